@@ -65,6 +65,7 @@ def drop_tables(conn):
         "articles_entities",
         "articles_keywords",
         "articles_authors",
+        "article_preprocessed",
         # Base
         "articles",
         "entities",
@@ -72,6 +73,7 @@ def drop_tables(conn):
         "categories",
         "authors",
         "sources",
+        "nlp_run_stage_metrics",
         "nlp_runs",
     ]
     with conn.cursor() as cur:
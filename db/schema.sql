@@ -22,6 +22,23 @@ CREATE TABLE IF NOT EXISTS nlp_runs (
     discarded_invalid      INTEGER DEFAULT 0
 );
 
+-- Tiempos por etapa del NLP por corrida (ver scrapy_project/nlp_metrics.py)
+CREATE TABLE IF NOT EXISTS nlp_run_stage_metrics (
+    run_id     TEXT NOT NULL REFERENCES nlp_runs(run_id) ON DELETE CASCADE,
+    stage      TEXT NOT NULL,  -- parse | preprocess | entities | sentiment | subjectivity | framing
+    samples    INTEGER NOT NULL DEFAULT 0,
+    failures   INTEGER NOT NULL DEFAULT 0,
+    p50_ms     NUMERIC(12,3),
+    p95_ms     NUMERIC(12,3),
+    p99_ms     NUMERIC(12,3),
+    mean_ms    NUMERIC(12,3),
+    total_ms   NUMERIC(16,3),
+    chars      BIGINT DEFAULT 0,
+    tokens     BIGINT DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (run_id, stage)
+);
+
 -- ===============================================
 -- Fuentes / catálogos base
 -- ===============================================
@@ -73,6 +90,10 @@ CREATE TABLE IF NOT EXISTS articles (
     body_hash         TEXT,
     hash              TEXT,
 
+    -- Claves de dedup (las mantiene el trigger trg_articles_dedup_keys)
+    url_key           TEXT,
+    title_norm        TEXT,
+
     source_id         INTEGER REFERENCES sources(id)    ON DELETE SET NULL,
     category_id       INTEGER REFERENCES categories(id) ON DELETE SET NULL,
 
@@ -102,6 +123,62 @@ CREATE INDEX       IF NOT EXISTS idx_articles_pubdate       ON articles(publicat
 CREATE INDEX       IF NOT EXISTS idx_articles_published_at  ON articles(published_at);
 CREATE INDEX       IF NOT EXISTS idx_articles_preproc_gin   ON articles USING GIN (preprocessed_data);
 
+-- tokens/lemmas/pos del Preprocessor, empaquetados fuera de la fila caliente
+-- (vocabulario por documento + índices + POS como códigos UPOS, zlib; ver
+-- scrapy_project/preprocessed_codec.py). preprocessed_data guarda solo un stub.
+CREATE TABLE IF NOT EXISTS article_preprocessed (
+    article_id BIGINT PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+    engine     TEXT,
+    n_tokens   INTEGER NOT NULL DEFAULT 0,
+    packed     BYTEA NOT NULL
+);
+-- Ya viene comprimido: sin recompresión TOAST
+ALTER TABLE article_preprocessed ALTER COLUMN packed SET STORAGE EXTERNAL;
+
+-- ===============================================
+-- Dedup: claves canónicas + índices (ver jobs/mg_articles_dedup_keys.sql)
+-- ===============================================
+-- host sin 'www.' + path sin '//' ni '/' final; sin esquema, query ni fragment
+-- (equivale a storage_helpers.url_key)
+CREATE OR REPLACE FUNCTION posverdad_url_key(u TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT regexp_replace(
+           regexp_replace(lower(split_part(s, '/', 1)), '^www\.', '')
+           || CASE WHEN strpos(s, '/') > 0
+                   THEN regexp_replace(substr(s, strpos(s, '/')), '/{2,}', '/', 'g')
+                   ELSE '' END,
+           '/+$', '')
+    FROM (SELECT split_part(split_part(
+                   regexp_replace(btrim(COALESCE(u, '')), '^[A-Za-z][A-Za-z0-9+.-]*://', ''),
+                 '#', 1), '?', 1) AS s) t
+$$;
+
+-- minúsculas + espacios colapsados (equivale a storage_helpers.title_norm)
+CREATE OR REPLACE FUNCTION posverdad_title_norm(t TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT btrim(regexp_replace(lower(COALESCE(t, '')), '\s+', ' ', 'g'))
+$$;
+
+CREATE OR REPLACE FUNCTION articles_dedup_keys() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  NEW.url_key    := posverdad_url_key(NEW.url);
+  NEW.title_norm := posverdad_title_norm(NEW.title);
+  RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_articles_dedup_keys ON articles;
+CREATE TRIGGER trg_articles_dedup_keys
+  BEFORE INSERT OR UPDATE OF url, title ON articles
+  FOR EACH ROW EXECUTE FUNCTION articles_dedup_keys();
+
+CREATE INDEX       IF NOT EXISTS idx_articles_url_key           ON articles(url_key);
+CREATE INDEX       IF NOT EXISTS idx_articles_body_hash         ON articles(body_hash);
+CREATE INDEX       IF NOT EXISTS idx_articles_domain_title_norm ON articles((lower(domain)), title_norm);
+-- Filas sin claves (pendientes de backfill); vacío en instalaciones nuevas
+CREATE INDEX       IF NOT EXISTS idx_articles_dedup_pending     ON articles(id) WHERE url_key IS NULL OR title_norm IS NULL;
+
 -- ===============================================
 -- Relaciones N:M
 -- ===============================================
@@ -0,0 +1,16 @@
+WITH targets AS (
+  SELECT a.id
+  FROM articles a
+  WHERE a.url_key IS NULL OR a.title_norm IS NULL
+  ORDER BY a.id
+  LIMIT 5000
+),
+upd AS (
+  UPDATE articles a
+     SET url_key    = posverdad_url_key(a.url),
+         title_norm = posverdad_title_norm(a.title)
+    FROM targets t
+   WHERE a.id = t.id
+  RETURNING 1
+)
+SELECT COUNT(*)::bigint AS affected FROM upd;
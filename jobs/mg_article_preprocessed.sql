@@ -0,0 +1,15 @@
+-- Migración: tokens/lemmas/pos fuera de articles.preprocessed_data (idempotente).
+-- Tabla lateral con la salida del Preprocessor empaquetada (ver scrapy_project/preprocessed_codec.py).
+-- Luego: make compact-preprocessed (mueve los arrays de las filas existentes)
+-- y, con la tabla ya compactada, recuperar espacio:
+--   VACUUM (ANALYZE) articles;
+--   REINDEX INDEX CONCURRENTLY idx_articles_preproc_gin;
+
+CREATE TABLE IF NOT EXISTS article_preprocessed (
+    article_id BIGINT PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+    engine     TEXT,
+    n_tokens   INTEGER NOT NULL DEFAULT 0,
+    packed     BYTEA NOT NULL
+);
+-- Ya viene comprimido: sin recompresión TOAST
+ALTER TABLE article_preprocessed ALTER COLUMN packed SET STORAGE EXTERNAL;
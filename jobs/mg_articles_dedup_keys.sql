@@ -0,0 +1,54 @@
+-- Migración: claves de dedup en articles (idempotente).
+-- Ejecutar con psql (sin transacción envolvente: usa CREATE INDEX CONCURRENTLY).
+-- Luego: make backfill-dedup-keys (o reconcile_runner.py --only backfill).
+
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS url_key    TEXT;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS title_norm TEXT;
+
+-- host sin 'www.' + path sin '//' ni '/' final; sin esquema, query ni fragment
+-- (equivale a storage_helpers.url_key)
+CREATE OR REPLACE FUNCTION posverdad_url_key(u TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT regexp_replace(
+           regexp_replace(lower(split_part(s, '/', 1)), '^www\.', '')
+           || CASE WHEN strpos(s, '/') > 0
+                   THEN regexp_replace(substr(s, strpos(s, '/')), '/{2,}', '/', 'g')
+                   ELSE '' END,
+           '/+$', '')
+    FROM (SELECT split_part(split_part(
+                   regexp_replace(btrim(COALESCE(u, '')), '^[A-Za-z][A-Za-z0-9+.-]*://', ''),
+                 '#', 1), '?', 1) AS s) t
+$$;
+
+-- minúsculas + espacios colapsados (equivale a storage_helpers.title_norm)
+CREATE OR REPLACE FUNCTION posverdad_title_norm(t TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT btrim(regexp_replace(lower(COALESCE(t, '')), '\s+', ' ', 'g'))
+$$;
+
+CREATE OR REPLACE FUNCTION articles_dedup_keys() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  NEW.url_key    := posverdad_url_key(NEW.url);
+  NEW.title_norm := posverdad_title_norm(NEW.title);
+  RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_articles_dedup_keys ON articles;
+CREATE TRIGGER trg_articles_dedup_keys
+  BEFORE INSERT OR UPDATE OF url, title ON articles
+  FOR EACH ROW EXECUTE FUNCTION articles_dedup_keys();
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articles_url_key
+  ON articles (url_key);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articles_body_hash
+  ON articles (body_hash);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articles_domain_title_norm
+  ON articles ((lower(domain)), title_norm);
+
+-- Pendientes de backfill (el pipeline usa la consulta combinada solo cuando está vacío)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articles_dedup_pending
+  ON articles (id) WHERE url_key IS NULL OR title_norm IS NULL;
@@ -105,8 +105,8 @@ def main():
     parser.add_argument("--dsn", default=os.getenv("POSTVERDAD_DSN", "dbname=posverdad user=postgres"),
                         help="DSN de conexión (por defecto toma POSTVERDAD_DSN)")
     parser.add_argument("--jobs-dir", default=None, help="Directorio de jobs SQL (por defecto: junto a este script)")
-    parser.add_argument("--only", choices=["all", "blocklist", "aliases"], default="all",
-                        help="Elegir qué reconciliar")
+    parser.add_argument("--only", choices=["all", "blocklist", "aliases", "backfill"], default="all",
+                        help="Elegir qué reconciliar (backfill: claves de dedup url_key/title_norm)")
     parser.add_argument("--max-batches", type=int, default=1000, help="Máximo de iteraciones por archivo SQL")
     parser.add_argument("--sleep-ms", type=int, default=0, help="Sleep entre batches")
     parser.add_argument("--statement-timeout-ms", type=int, default=60000, help="statement_timeout por batch")
@@ -128,10 +128,16 @@ def main():
         ("aliases.prune_alias_entities", sql_dir / "al_prune_alias_entities.sql"),
     ]
 
+    backfill_tasks = [
+        ("backfill.articles_dedup_keys", sql_dir / "bf_articles_dedup_keys.sql"),
+    ]
+
     if args.only == "blocklist":
         tasks = blocklist_tasks
     elif args.only == "aliases":
         tasks = aliases_tasks
+    elif args.only == "backfill":
+        tasks = backfill_tasks
     else:
         tasks = blocklist_tasks + aliases_tasks
 
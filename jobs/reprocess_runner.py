@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Re-ejecuta el NLP sobre artículos ya guardados, sin re-crawlear.
+
+- Lee `articles` en orden de id con un cursor con nombre (server-side), sin cargar
+  la tabla en memoria.
+- Reparte lotes de textos a un pool de procesos (spawn) donde cada worker carga
+  NLPOrchestrator una vez (scrapy_project.nlp_pool).
+- Escribe de vuelta preprocessed_data / polarity / subjectivity con un UPDATE
+  multi-fila por lote y los vínculos de entidades con los merges por conjuntos de
+  bulk_writer; un commit por lote.
+- Checkpoint (último id confirmado) en JSON: al re-lanzar con los mismos filtros
+  retoma donde quedó.
+- `--compact-existing`: sin NLP; mueve los tokens/lemmas/pos que aún viven en
+  preprocessed_data a la tabla lateral article_preprocessed (preprocessed_codec).
+- `--storage` (por defecto PREPROCESSED_STORAGE): "compact" se comprueba una vez al
+  arrancar; sin la tabla lateral (falta `make migrate-preprocessed`) se escribe json.
+
+Logs en JSONL por stdout (mismo formato que reconcile_runner.py).
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import psycopg2
+from psycopg2.extras import Json, execute_values
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrapy_project import db  # noqa: E402
+from scrapy_project.bulk_writer import merge_links  # noqa: E402
+from scrapy_project.nlp_metrics import StageMetrics  # noqa: E402
+from scrapy_project.preprocessed_codec import (  # noqa: E402
+    PREPROCESSED_STORAGE, compact as compact_preprocessed, side_table_available,
+)
+from scrapy_project.nlp_pool import ProfiledFactory, _analyze_many_in_worker, _init_worker  # noqa: E402
+from scrapy_project.storage_helpers import _entity_pairs  # noqa: E402
+
+CURSOR_NAME = "posverdad_reprocess"
+
+# Condiciones de --missing (se combinan con OR: falta cualquiera de ellas)
+MISSING_CLAUSES = {
+    "preprocessed": "(a.preprocessed_data IS NULL OR a.preprocessed_data = '{}'::jsonb)",
+    "polarity": "a.polarity IS NULL",
+    "subjectivity": "a.subjectivity IS NULL",
+    "entities": "NOT EXISTS (SELECT 1 FROM articles_entities ae WHERE ae.article_id = a.id)",
+}
+
+_UPDATE_REPLACE = """
+    UPDATE articles AS a
+       SET preprocessed_data = v.pre,
+           polarity          = COALESCE(v.pol, a.polarity),
+           subjectivity      = COALESCE(v.subj, a.subjectivity)
+      FROM (VALUES %s) AS v(id, pre, pol, subj)
+     WHERE a.id = v.id
+"""
+# Perfiles parciales (p.ej. ner-only): solo se pisan las claves que trae el resultado
+_UPDATE_MERGE = """
+    UPDATE articles AS a
+       SET preprocessed_data = COALESCE(a.preprocessed_data, '{}'::jsonb) || v.pre,
+           polarity          = COALESCE(v.pol, a.polarity),
+           subjectivity      = COALESCE(v.subj, a.subjectivity)
+      FROM (VALUES %s) AS v(id, pre, pol, subj)
+     WHERE a.id = v.id
+"""
+_UPDATE_TEMPLATE = "(%s::bigint, %s::jsonb, %s::numeric, %s::numeric)"
+
+# tokens/lemmas/pos empaquetados (preprocessed_codec) en la tabla lateral
+_PACKED_UPSERT = """
+    INSERT INTO article_preprocessed (article_id, engine, n_tokens, packed) VALUES %s
+    ON CONFLICT (article_id) DO UPDATE
+       SET engine = EXCLUDED.engine, n_tokens = EXCLUDED.n_tokens, packed = EXCLUDED.packed
+"""
+
+
+def log_event(**kv):
+    print(json.dumps(kv, ensure_ascii=False, default=str), flush=True)
+
+
+def text_for_nlp(body, title, subtitle) -> str:
+    # Mismo criterio que ScrapyProjectPipeline._text_for_nlp
+    text = (body or "").strip()
+    if not text:
+        text = f"{(title or '').strip()} {(subtitle or '').strip()}".strip()
+    return text
+
+
+def build_query(after_id=0, run_id=None, since=None, until=None, missing=(), max_id=None):
+    """SELECT de los artículos a reprocesar (id > after_id, en orden de id)."""
+    where = ["a.id > %s"]
+    params = [int(after_id or 0)]
+    if max_id:
+        where.append("a.id <= %s")
+        params.append(int(max_id))
+    if run_id:
+        where.append("a.run_id = %s")
+        params.append(run_id)
+    if since:
+        where.append("a.publication_date >= %s")
+        params.append(since)
+    if until:
+        where.append("a.publication_date <= %s")
+        params.append(until)
+    if missing:
+        where.append("(" + " OR ".join(MISSING_CLAUSES[m] for m in missing) + ")")
+    sql = (
+        "SELECT a.id, a.body, a.title, a.subtitle FROM articles a "
+        f"WHERE {' AND '.join(where)} ORDER BY a.id"
+    )
+    return sql, params
+
+
+def build_compact_query(after_id=0, max_id=None):
+    """Artículos con los arrays del Preprocessor aún dentro de preprocessed_data."""
+    where = ["a.id > %s", "jsonb_typeof(a.preprocessed_data -> 'preprocessed' -> 'tokens') = 'array'"]
+    params = [int(after_id or 0)]
+    if max_id:
+        where.append("a.id <= %s")
+        params.append(int(max_id))
+    return f"SELECT a.id, a.preprocessed_data FROM articles a WHERE {' AND '.join(where)} ORDER BY a.id", params
+
+
+def stream_rows(conn, sql, params, itersize=2000):
+    """Filas vía cursor con nombre: Postgres las entrega de a `itersize`."""
+    with conn.cursor(name=CURSOR_NAME) as cur:
+        cur.itersize = itersize
+        cur.execute(sql, params)
+        for row in cur:
+            yield row
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _compact(pre: dict) -> dict:
+    """Claves con valor útil (para el merge de perfiles parciales)."""
+    return {k: v for k, v in pre.items() if v not in (None, {}, [], "")}
+
+
+def write_batch(conn, rows, results, merge=False, replace_entities=False, link_entities=True, storage="json"):
+    """
+    Persiste un lote: UN UPDATE multi-fila en articles + merge de entidades por
+    conjuntos; un commit. Resultados vacíos (NLP caído) no pisan nada.
+    `storage="compact"` además empaqueta tokens/lemmas/pos en article_preprocessed.
+    Retorna cuántos artículos se actualizaron.
+    """
+    updates, links, touched, packed_rows = [], [], [], []
+    for row, pre in zip(rows, results):
+        if not isinstance(pre, dict) or not pre:
+            continue
+        article_id = row[0]
+        touched.append(article_id)
+        slim, packed = compact_preprocessed(pre, storage)
+        if packed:
+            packed_rows.append((article_id, packed["engine"], packed["n_tokens"], packed["packed"]))
+        updates.append((
+            article_id,
+            Json(_compact(slim) if merge else slim),
+            pre.get("polarity"),
+            pre.get("subjectivity"),
+        ))
+        if link_entities:
+            links += [(article_id, "entity", n, t) for n, t in _entity_pairs(pre.get("entities") or [])]
+
+    if not updates:
+        return 0
+    try:
+        with conn.cursor() as cur:
+            execute_values(cur, _UPDATE_MERGE if merge else _UPDATE_REPLACE, updates,
+                           template=_UPDATE_TEMPLATE, page_size=len(updates))
+            if packed_rows:
+                execute_values(cur, _PACKED_UPSERT, packed_rows, page_size=len(packed_rows))
+            if replace_entities:
+                cur.execute("DELETE FROM articles_entities WHERE article_id = ANY(%s)", (touched,))
+            merge_links(cur, list(dict.fromkeys(links)), [])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(updates)
+
+
+class Checkpoint:
+    """Último id confirmado, ligado a los filtros con que se lanzó la corrida."""
+
+    def __init__(self, path, filters):
+        self.path = Path(path) if path else None
+        self.filters = filters
+
+    def load(self) -> int:
+        if not self.path or not self.path.exists():
+            return 0
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except ValueError:
+            return 0
+        if data.get("filters") != self.filters:
+            log_event(event="reprocess.checkpoint_ignored", path=str(self.path),
+                      reason="filtros distintos", saved=data.get("filters"))
+            return 0
+        return int(data.get("last_id") or 0)
+
+    def save(self, last_id, processed, updated):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({
+            "last_id": int(last_id),
+            "processed": processed,
+            "updated": updated,
+            "filters": self.filters,
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)  # atómico: nunca queda un checkpoint a medias
+
+
+def run(read_conn, write_conn, executor, query, checkpoint, batch_size=64, in_flight=4,
+        limit=0, merge=False, replace_entities=False, dry_run=False, start_id=0, storage="json"):
+    """
+    Lotes de `batch_size` filas al executor (hasta `in_flight` en vuelo) y escritura
+    en orden de id: el checkpoint solo avanza sobre lotes ya confirmados. Si el NLP
+    de un lote falla, el checkpoint queda antes de ese lote y la corrida se detiene
+    (se escriben los lotes que ya estaban en vuelo), así el próximo resume lo reintenta.
+    """
+    sql, params = query
+    stats = {"processed": 0, "updated": 0, "failed_batches": 0, "failed_ranges": [], "last_id": start_id}
+    stage_metrics = StageMetrics()
+    pending = deque()
+    t_start = time.time()
+
+    def _drain_one():
+        rows, fut, t0 = pending.popleft()
+        try:
+            results = fut.result()
+        except Exception as e:
+            stats["failed_batches"] += 1
+            stats["failed_ranges"].append([rows[0][0], rows[-1][0]])
+            log_event(event="reprocess.nlp_error", first_id=rows[0][0], last_id=rows[-1][0],
+                      checkpoint_id=stats["last_id"], error=str(e))
+            results = [{}] * len(rows)
+        for res in results:
+            # Tiempos por etapa: a las métricas, no a preprocessed_data
+            if isinstance(res, dict):
+                stage_metrics.observe(res.pop("stage_timing", None))
+        updated = 0
+        if not dry_run:
+            updated = write_batch(write_conn, rows, results, merge=merge, replace_entities=replace_entities,
+                                  storage=storage)
+        stats["processed"] += len(rows)
+        stats["updated"] += updated
+        if not stats["failed_batches"]:
+            # Tras un lote fallido el checkpoint no se mueve: lo que siga se re-escribe al reanudar
+            stats["last_id"] = rows[-1][0]
+            if not dry_run:
+                checkpoint.save(stats["last_id"], stats["processed"], stats["updated"])
+        elapsed = max(time.time() - t_start, 1e-6)
+        log_event(
+            event="reprocess.batch",
+            first_id=rows[0][0],
+            last_id=rows[-1][0],
+            rows=len(rows),
+            updated=updated,
+            total_processed=stats["processed"],
+            docs_per_sec=round(stats["processed"] / elapsed, 2),
+            duration_ms=int((time.time() - t0) * 1000),
+        )
+
+    rows_iter = stream_rows(read_conn, sql, params)
+    seen = 0
+    for rows in batched(rows_iter, batch_size):
+        if limit and seen + len(rows) > limit:
+            rows = rows[: limit - seen]
+        seen += len(rows)
+        texts = [text_for_nlp(r[1], r[2], r[3]) for r in rows]
+        pending.append((rows, executor.submit(_analyze_many_in_worker, texts), time.time()))
+        while len(pending) >= max(1, in_flight):
+            _drain_one()
+        if stats["failed_batches"] or (limit and seen >= limit):
+            break
+    while pending:
+        _drain_one()
+    stats["stages"] = stage_metrics.summary()
+    return stats
+
+
+def compact_existing(read_conn, write_conn, query, checkpoint, batch_size=500, limit=0,
+                     dry_run=False, start_id=0):
+    """Re-escribe preprocessed_data en forma compacta, lote a lote y sin pasar por el NLP."""
+    sql, params = query
+    stats = {"processed": 0, "updated": 0, "last_id": start_id}
+    t_start = time.time()
+    for rows in batched(stream_rows(read_conn, sql, params), batch_size):
+        if limit and stats["processed"] + len(rows) > limit:
+            rows = rows[: limit - stats["processed"]]
+        updated = 0
+        if not dry_run:
+            updated = write_batch(write_conn, rows, [r[1] for r in rows], link_entities=False, storage="compact")
+            checkpoint.save(rows[-1][0], stats["processed"] + len(rows), stats["updated"] + updated)
+        stats["processed"] += len(rows)
+        stats["updated"] += updated
+        stats["last_id"] = rows[-1][0]
+        log_event(event="reprocess.compact_batch", first_id=rows[0][0], last_id=rows[-1][0],
+                  updated=updated, docs_per_sec=round(stats["processed"] / max(time.time() - t_start, 1e-6), 2))
+        if limit and stats["processed"] >= limit:
+            break
+    return stats
+
+
+def default_checkpoint_path(compact_existing=False):
+    """Cada modo con su archivo: un resume de uno nunca parte del id del otro."""
+    name = "reprocess_compact_checkpoint.json" if compact_existing else "reprocess_checkpoint.json"
+    return os.path.join(os.getenv("LOGS_DIR", "logs"), name)
+
+
+def _connect(dsn):
+    return psycopg2.connect(dsn) if dsn else psycopg2.connect(**db.dsn_params())
+
+
+def resolve_storage(conn, storage):
+    """"compact" solo si existe article_preprocessed; si no, "json" (como el pipeline en open_spider)."""
+    if storage != "compact":
+        return storage
+    try:
+        with conn.cursor() as cur:
+            available = side_table_available(cur)
+    finally:
+        conn.rollback()  # la consulta no deja una transacción abierta en la conexión de escritura
+    if not available:
+        log_event(event="reprocess.storage_fallback", storage="json",
+                  reason="falta la tabla article_preprocessed (make migrate-preprocessed)")
+        return "json"
+    return storage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Posverdad: re-ejecuta el NLP sobre articles existentes")
+    parser.add_argument("--dsn", default=os.getenv("POSTVERDAD_DSN", ""),
+                        help="DSN de conexión (por defecto POSTVERDAD_DSN o POSTGRES_*)")
+    parser.add_argument("--run-id", help="Solo artículos de este run_id")
+    parser.add_argument("--since", help="publication_date mínima (YYYY-MM-DD)")
+    parser.add_argument("--until", help="publication_date máxima (YYYY-MM-DD)")
+    parser.add_argument("--missing", action="append", choices=sorted(MISSING_CLAUSES), default=[],
+                        help="Solo artículos a los que les falta este campo (repetible; se combinan con OR)")
+    parser.add_argument("--min-id", type=int, default=0, help="Empezar después de este id")
+    parser.add_argument("--max-id", type=int, default=0, help="Terminar en este id (0 = sin tope)")
+    parser.add_argument("--limit", type=int, default=0, help="Máximo de artículos (0 = todos)")
+    parser.add_argument("--profile", default=None, help="Perfil spaCy (full | ner-only | lemmas)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="Procesos NLP")
+    parser.add_argument("--batch-size", type=int, default=64, help="Artículos por lote (análisis + commit)")
+    parser.add_argument("--in-flight", type=int, default=0, help="Lotes en vuelo (0 = 2 × workers)")
+    parser.add_argument("--replace-entities", action="store_true",
+                        help="Borra los vínculos de entidades previos de cada artículo reprocesado")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Archivo de checkpoint ('' para desactivar; por defecto logs/reprocess_checkpoint.json "
+                             "o logs/reprocess_compact_checkpoint.json con --compact-existing)")
+    parser.add_argument("--restart", action="store_true", help="Ignora el checkpoint y parte de --min-id")
+    parser.add_argument("--dry-run", action="store_true", help="Analiza pero no escribe ni avanza el checkpoint")
+    parser.add_argument("--compact-existing", action="store_true",
+                        help="Sin NLP: pasa los tokens/lemmas/pos guardados a la forma compacta")
+    parser.add_argument("--storage", choices=("compact", "json"), default=PREPROCESSED_STORAGE,
+                        help="Forma de preprocessed_data (por defecto PREPROCESSED_STORAGE; "
+                             "compact cae a json sin la tabla article_preprocessed)")
+    args = parser.parse_args()
+
+    profile = (args.profile or os.getenv("NLP_PROFILE", "full")).strip().lower()
+    filters = {
+        "run_id": args.run_id, "since": args.since, "until": args.until,
+        "missing": sorted(args.missing), "max_id": args.max_id, "profile": profile,
+    }
+    if args.compact_existing:
+        filters = {"mode": "compact", "max_id": args.max_id}
+    if args.checkpoint is None:
+        args.checkpoint = default_checkpoint_path(args.compact_existing)
+    checkpoint = Checkpoint(args.checkpoint, filters)
+    start_id = args.min_id if args.restart else max(args.min_id, checkpoint.load())
+
+    if args.compact_existing:
+        log_event(event="reprocess.start", start_id=start_id, batch_size=args.batch_size,
+                  dry_run=args.dry_run, **filters)
+        read_conn, write_conn = _connect(args.dsn), _connect(args.dsn)
+        read_conn.set_session(readonly=True)
+        t0 = time.time()
+        try:
+            if resolve_storage(write_conn, "compact") != "compact":
+                return 2
+            stats = compact_existing(read_conn, write_conn, build_compact_query(start_id, args.max_id),
+                                     checkpoint, batch_size=args.batch_size, limit=args.limit,
+                                     dry_run=args.dry_run, start_id=start_id)
+            log_event(event="reprocess.done", duration_s=int(time.time() - t0), **stats)
+        finally:
+            read_conn.close()
+            write_conn.close()
+            log_event(event="reprocess.exit")
+        return 0
+    query = build_query(start_id, run_id=args.run_id, since=args.since, until=args.until,
+                        missing=args.missing, max_id=args.max_id)
+
+    log_event(event="reprocess.start", start_id=start_id, workers=args.workers,
+              batch_size=args.batch_size, dry_run=args.dry_run, **filters)
+
+    read_conn = _connect(args.dsn)
+    write_conn = _connect(args.dsn)
+    read_conn.set_session(readonly=True)
+    storage = resolve_storage(write_conn, args.storage)
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(ProfiledFactory(profile),),
+    )
+    t0 = time.time()
+    try:
+        stats = run(
+            read_conn, write_conn, executor, query, checkpoint,
+            batch_size=args.batch_size,
+            in_flight=args.in_flight or 2 * args.workers,
+            limit=args.limit,
+            merge=profile != "full",
+            replace_entities=args.replace_entities,
+            dry_run=args.dry_run,
+            start_id=start_id,
+            storage=storage,
+        )
+        log_event(event="reprocess.done", duration_s=int(time.time() - t0), **stats)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        read_conn.close()
+        write_conn.close()
+        log_event(event="reprocess.exit")
+    return 1 if stats["failed_batches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
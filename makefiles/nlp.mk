@@ -1,6 +1,6 @@
 # === Modelos y utilidades NLP ===
 .PHONY: setup-nlp nlp-warmup spacy-validate spacy-download-md spacy-download-lg \
-        stanza-install test-stanza
+        stanza-install test-stanza bench-spacy-profiles framing-stub
 
 # Heredadas de env.mk
 VENV    ?= .venv
@@ -16,6 +16,16 @@ setup-nlp: ## Fix de NLTK/SSL (si aplica) + warmup NLP
 nlp-warmup: ## Solo warmup NLP (carga modelos, etc.)
 	@$(PYTHON) scripts/nlp_warmup.py
 
+# --- Benchmark de perfiles spaCy (docs/seg por perfil) ---
+BENCH_ARGS ?= --limit 300
+bench-spacy-profiles: ## docs/seg de spaCy por perfil (ner-only, lemmas, full); BENCH_ARGS="--db --limit 500 --stanza"
+	@$(PYTHON) scripts/bench_spacy_profiles.py $(BENCH_ARGS)
+
+# --- Servicio de framing simulado (FRAMING_URL=http://127.0.0.1:8765/framing) ---
+FRAMING_STUB_ARGS ?= --port 8765
+framing-stub: ## Servidor HTTP local que imita al servicio de framing; FRAMING_STUB_ARGS="--delay 0.3 --fail-first 2"
+	@$(PYTHON) -m scrapy_project.framing_stub $(FRAMING_STUB_ARGS)
+
 # --- spaCy: validación e instalación de modelos ---
 spacy-validate: ## Validar que spaCy y es_core_news_md cargan correctamente
 	@. $(VENV)/bin/activate && \
@@ -1,5 +1,6 @@
 # === Reconciliación de entidades: blocklist + aliases ===
-.PHONY: reconcile-all reconcile-blocklist reconcile-aliases reconcile-dry-run reconcile-check prepare-indexes
+.PHONY: reconcile-all reconcile-blocklist reconcile-aliases reconcile-dry-run reconcile-check prepare-indexes \
+        migrate-dedup-keys backfill-dedup-keys reprocess migrate-preprocessed compact-preprocessed
 
 # Heredadas/por defecto (coherentes con tus otros .mk)
 VENV    ?= .venv
@@ -23,6 +24,42 @@ prepare-indexes: ## Aplica índices idempotentes (una vez)
 	@$(PSQL) "$$POSTVERDAD_DSN" -v ON_ERROR_STOP=1 -f $(JOBS_DIR)/prepare_indexes.sql
 	@echo "✅ Índices aplicados"
 
+migrate-dedup-keys: ## Columnas url_key/title_norm + trigger + índices de dedup (idempotente)
+	@echo "🧱 Migrando claves de dedup en articles..."
+	@$(PSQL) "$$POSTVERDAD_DSN" -v ON_ERROR_STOP=1 -f $(JOBS_DIR)/mg_articles_dedup_keys.sql
+	@echo "✅ Migración aplicada (falta backfill: make backfill-dedup-keys)"
+
+backfill-dedup-keys: ## Rellena url_key/title_norm por lotes (logs JSONL)
+	@mkdir -p $(LOGS_DIR)
+	@echo "🧮 Backfill de claves de dedup..."
+	@POSTVERDAD_DSN="$(POSTVERDAD_DSN)" \
+	$(PYTHON) $(RUNNER) --only backfill --jobs-dir . $(RECON_FLAGS) \
+	| tee $(LOGS_DIR)/backfill_dedup_$$(date +%F_%H%M%S).jsonl
+
+# Reprocesado NLP offline (p.ej. REPROCESS_FLAGS="--missing entities --profile ner-only")
+REPROCESS_RUNNER ?= $(JOBS_DIR)/reprocess_runner.py
+REPROCESS_FLAGS  ?= --batch-size 64
+
+reprocess: ## Re-ejecuta el NLP sobre articles (cursor por id, pool de procesos, checkpoint; logs JSONL)
+	@mkdir -p $(LOGS_DIR)
+	@echo "🔁 Reprocesando NLP sobre articles..."
+	@POSTVERDAD_DSN="$(POSTVERDAD_DSN)" \
+	$(PYTHON) $(REPROCESS_RUNNER) $(REPROCESS_FLAGS) \
+	| tee $(LOGS_DIR)/reprocess_$$(date +%F_%H%M%S).jsonl
+
+migrate-preprocessed: ## Tabla lateral article_preprocessed (tokens/lemmas/pos compactos; idempotente)
+	@echo "🧱 Migrando preprocessed_data a forma compacta..."
+	@$(PSQL) "$$POSTVERDAD_DSN" -v ON_ERROR_STOP=1 -f $(JOBS_DIR)/mg_article_preprocessed.sql
+	@echo "✅ Migración aplicada (falta mover filas existentes: make compact-preprocessed; luego PREPROCESSED_STORAGE=compact)"
+
+compact-preprocessed: ## Mueve los arrays de preprocessed_data existentes a article_preprocessed (sin NLP; logs JSONL)
+	@mkdir -p $(LOGS_DIR)
+	@echo "🗜️  Compactando preprocessed_data..."
+	@POSTVERDAD_DSN="$(POSTVERDAD_DSN)" \
+	$(PYTHON) $(REPROCESS_RUNNER) --compact-existing --batch-size 500 \
+	  --checkpoint $(LOGS_DIR)/reprocess_compact_checkpoint.json \
+	| tee $(LOGS_DIR)/compact_preprocessed_$$(date +%F_%H%M%S).jsonl
+
 reconcile-all: ## Reconciliar blocklist + aliases (logs JSONL)
 	@mkdir -p $(LOGS_DIR)
 	@echo "♻️  Reconciliando blocklist + aliases..."
@@ -1,5 +1,5 @@
 # === Scraping y procesamiento ===
-.PHONY: scrape scrape-json pre-scrape
+.PHONY: scrape scrape-json pre-scrape backfill
 
 # Heredadas de env.mk
 VENV    ?= .venv
@@ -17,6 +17,14 @@ scrape: pre-scrape ## Ejecuta spider principal (usa ARGS="...")
 	@echo "🕷️  Corriendo spider el_mostrador $(ARGS)"
 	@$(VENV)/bin/scrapy crawl el_mostrador $(ARGS)
 
+# Backfill multi-año en una sola corrida: ubica YEAR_TO una vez y colecta de corrido hasta pasar YEAR_FROM
+YEAR_FROM     ?= 2018
+YEAR_TO       ?= $(shell date +%Y)
+BACKFILL_ARGS ?= -a probes=8 -a collect_window=4
+backfill: ## Backfill YEAR_FROM..YEAR_TO en una pasada (BACKFILL_ARGS="-a probes=8 -a collect_window=4")
+	@echo "🕷️  Backfill el_mostrador $(YEAR_FROM)..$(YEAR_TO) $(BACKFILL_ARGS) $(ARGS)"
+	@$(VENV)/bin/scrapy crawl el_mostrador -a year_from=$(YEAR_FROM) -a year_to=$(YEAR_TO) $(BACKFILL_ARGS) $(ARGS)
+
 # Exporta en JSON (usa -o/FEED export; puedes pasar ARGS="..." para filtros)
 scrape-json: ## Ejecuta spider y exporta a output.json
 	@echo "🕷️  Corriendo spider el_mostrador → output.json"
@@ -1,5 +1,5 @@
 # === Tests y cobertura ===
-.PHONY: test test-unit test-int coverage-html cov-clean merge-coverage test-store-article test-storage
+.PHONY: test test-unit test-int coverage-html cov-clean merge-coverage test-store-article test-storage import-time
 
 # Selección por defecto del alcance de test: unit | integration | all
 DEFAULT_TEST_SCOPE ?= unit  # cambia a 'all' si prefieres suite completa por defecto
@@ -40,6 +40,12 @@ endif
 test-unit: ## Ejecuta solo tests unitarios (marcados con -m unit)
 	@$(PYTEST) -m unit
 
+# Tiempo de import del paquete (sin backends NLP); detalle por módulo con -X importtime
+import-time: ## Import del paquete: top 25 módulos más lentos + test de presupuesto
+	@$(PYTHON) -X importtime -c "import scrapy_project.pipelines, scrapy_project.preprocessor, scrapy_project.nlp_transformers" 2>&1 \
+	  | sort -t'|' -k2 -n -r | head -25
+	@$(PYTEST) -q tests/unit/test_import_budget.py
+
 # Solo integración (AHORA sin dependencia implícita a db-up)
 # Nota: 'reset-all' ya levanta la DB antes de llamar a test-int.
 test-int: ## Ejecuta solo tests de integración (acumula cobertura sobre unit)
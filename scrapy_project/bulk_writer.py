@@ -0,0 +1,240 @@
+# scrapy_project/bulk_writer.py
+"""
+Escritura de artículos por lotes (group commit).
+
+`store_articles_bulk(db, items)` persiste N artículos con un número de sentencias
+que no depende de cuántos autores/keywords/categorías/entidades traigan:
+
+1) UN upsert multi-fila en `articles` (execute_values … RETURNING url, id, (xmax = 0)).
+2) Las relaciones de todo el lote se cargan en una tabla temporal de staging
+   (`posverdad_stage_links`, ON COMMIT DELETE ROWS) con execute_values.
+3) Por cada tipo, un INSERT … SELECT DISTINCT … ON CONFLICT DO NOTHING en la tabla
+   de nombres y un INSERT … SELECT … JOIN en la tabla puente.
+
+Con una conexión hace UN commit por lote (rollback completo si algo falla); con un
+cursor deja la transacción al llamador. Devuelve [(article_id, was_created)]
+alineado con `items` (URLs repetidas en el lote: solo la primera puede ser nueva).
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, List, Tuple
+
+from psycopg2.extras import execute_values
+
+from .id_cache import ID_CACHE
+from .storage_helpers import (
+    ARTICLE_COLUMNS,
+    ARTICLE_ON_CONFLICT,
+    _article_values,
+    _as_cursor,
+    _author_names,
+    _close,
+    _entity_pairs,
+    _explode_categories,
+    _merged_keywords,
+    _rollback,
+    save_framing,
+)
+
+logger = logging.getLogger("posverdad.pipeline.bulk")
+
+STAGE_TABLE = "posverdad_stage_links"
+
+_STAGE_DDL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} (
+        article_id BIGINT NOT NULL,
+        kind       TEXT   NOT NULL,  -- author | keyword | category | entity
+        name       TEXT   NOT NULL,
+        etype      TEXT
+    ) ON COMMIT DELETE ROWS
+"""
+
+# (kind, tabla de nombres, columna, tabla puente, columna fk)
+_NAME_MERGES = (
+    ("author", "authors", "name", "articles_authors", "author_id"),
+    ("keyword", "keywords", "word", "articles_keywords", "keyword_id"),
+    ("category", "categories", "name", "articles_categories", "category_id"),
+)
+
+# Entidades: misma semántica que save_entities (lower(name) + type, primer id existente)
+_ENTITY_INSERT = f"""
+    INSERT INTO entities (name, type)
+    SELECT DISTINCT ON (lower(s.name), s.etype) s.name, s.etype
+      FROM {STAGE_TABLE} s
+     WHERE s.kind = 'entity'
+       AND NOT EXISTS (
+             SELECT 1 FROM entities e
+              WHERE lower(e.name) = lower(s.name) AND e.type = s.etype
+           )
+     ORDER BY lower(s.name), s.etype, s.name
+    ON CONFLICT (name, type) DO NOTHING
+"""
+_ENTITY_LINK = f"""
+    INSERT INTO articles_entities (article_id, entity_id)
+    SELECT DISTINCT ON (s.article_id, lower(s.name), s.etype) s.article_id, e.id
+      FROM {STAGE_TABLE} s
+      JOIN entities e ON lower(e.name) = lower(s.name) AND e.type = s.etype
+     WHERE s.kind = 'entity'
+     ORDER BY s.article_id, lower(s.name), s.etype, e.id
+    ON CONFLICT DO NOTHING
+"""
+
+
+def _upsert_articles(cur, rows: List[tuple]) -> dict:
+    """UPSERT multi-fila; devuelve {url: (article_id, was_created)}."""
+    returned = execute_values(
+        cur,
+        f"""
+        INSERT INTO articles ({", ".join(ARTICLE_COLUMNS)})
+        VALUES %s
+        {ARTICLE_ON_CONFLICT}
+        RETURNING url, id, (xmax = 0) AS inserted
+        """,
+        rows,
+        page_size=max(1, len(rows)),
+        fetch=True,
+    )
+    out = {}
+    for row in returned or []:
+        out[row[0]] = (int(row[1]), bool(row[2]) if len(row) > 2 else None)
+    return out
+
+
+def _stage_links(item: dict, article_id: int) -> List[tuple]:
+    """Filas (article_id, kind, name, etype) de las relaciones de un artículo."""
+    rows: List[tuple] = []
+    authors_val = item.get("authors") if item.get("authors") is not None else item.get("author")
+    if authors_val:
+        rows += [(article_id, "author", n, None) for n in _author_names(authors_val)]
+    rows += [(article_id, "keyword", k, None) for k in _merged_keywords(item)]
+    categories_val = item.get("categories") if item.get("categories") is not None else item.get("category")
+    if categories_val:
+        seen = set()
+        for c in _explode_categories(categories_val):
+            if c not in seen:
+                seen.add(c)
+                rows.append((article_id, "category", c, None))
+    if item.get("entities"):
+        rows += [(article_id, "entity", n, t) for n, t in _entity_pairs(item["entities"])]
+    return rows
+
+
+def _commit_batch(db, manage_tx) -> None:
+    """
+    Commit del lote que, a diferencia de storage_helpers._commit, propaga el error:
+    un lote no confirmado no puede devolverse como escrito (lo deshace el llamador).
+    """
+    if not manage_tx:
+        return
+    conn = db if hasattr(db, "commit") else getattr(db, "connection", None)
+    conn.commit()
+    # Ids aprendidos en esta transacción → caché compartida
+    ID_CACHE.commit(db)
+
+
+def merge_links(cur, links: List[tuple], category_links: List[tuple]) -> None:
+    if links:
+        cur.execute(_STAGE_DDL)
+        execute_values(
+            cur,
+            f"INSERT INTO {STAGE_TABLE} (article_id, kind, name, etype) VALUES %s",
+            links,
+            page_size=1000,
+        )
+        kinds = {r[1] for r in links}
+        for kind, table, col, bridge, fk in _NAME_MERGES:
+            if kind not in kinds:
+                continue
+            cur.execute(
+                f"""
+                INSERT INTO {table} ({col})
+                SELECT DISTINCT s.name FROM {STAGE_TABLE} s WHERE s.kind = %s
+                ON CONFLICT ({col}) DO NOTHING
+                """,
+                (kind,),
+            )
+            cur.execute(
+                f"""
+                INSERT INTO {bridge} (article_id, {fk})
+                SELECT DISTINCT s.article_id, t.id
+                  FROM {STAGE_TABLE} s
+                  JOIN {table} t ON t.{col} = s.name
+                 WHERE s.kind = %s
+                ON CONFLICT DO NOTHING
+                """,
+                (kind,),
+            )
+        if "entity" in kinds:
+            cur.execute(_ENTITY_INSERT)
+            cur.execute(_ENTITY_LINK)
+
+    # Enlace directo por category_id (si viene en el item)
+    if category_links:
+        execute_values(
+            cur,
+            "INSERT INTO articles_categories (article_id, category_id) VALUES %s ON CONFLICT DO NOTHING",
+            category_links,
+            page_size=1000,
+        )
+
+
+def store_articles_bulk(db: Any, items: List[dict]) -> List[Tuple[int, bool]]:
+    """
+    Inserta/actualiza un lote de artículos y sus relaciones en una transacción.
+    Retorna [(article_id, was_created)] en el mismo orden que `items`.
+    """
+    if not items:
+        return []
+
+    cur, manage_tx, should_close = _as_cursor(db)
+    try:
+        # ——— Filas de articles; la última aparición de cada URL gana (ON CONFLICT
+        # no admite afectar dos veces la misma fila en una sentencia)
+        source_cache: dict = {}
+        urls: List[str] = []
+        by_url: dict = {}
+        for item in items:
+            values = _article_values(cur, item, source_cache=source_cache)
+            urls.append(values[0])
+            by_url[values[0]] = values
+        rows = list(by_url.values())
+
+        written = _upsert_articles(cur, rows)
+        missing = [u for u in by_url if u not in written]
+        if missing:
+            raise RuntimeError(f"INSERT/UPDATE en articles no retornó filas para {len(missing)} URL(s)")
+
+        # ——— Resultados por ítem (solo la primera aparición de una URL puede ser nueva)
+        results: List[Tuple[int, bool]] = []
+        seen_urls = set()
+        for url in urls:
+            article_id, created = written[url]
+            results.append((article_id, bool(created) and url not in seen_urls))
+            seen_urls.add(url)
+
+        # ——— Relaciones por conjuntos
+        links: List[tuple] = []
+        category_links = set()
+        for item, (article_id, _) in zip(items, results):
+            links += _stage_links(item, article_id)
+            if item.get("category_id"):
+                category_links.add((article_id, item["category_id"]))
+        merge_links(cur, list(dict.fromkeys(links)), sorted(category_links))
+
+        # ——— Framing: una fila por artículo (upsert propio)
+        for item, (article_id, _) in zip(items, results):
+            if item.get("framing"):
+                save_framing(cur, article_id, item["framing"])
+
+        _commit_batch(db, manage_tx)
+        logger.info(
+            f"[bulk] Lote escrito: {len(items)} ítems, {len(rows)} URLs, "
+            f"{sum(1 for _, c in results if c)} nuevos, {len(links)} relaciones"
+        )
+        return results
+    except Exception:
+        _rollback(db, manage_tx)
+        raise
+    finally:
+        _close(cur, should_close)
@@ -0,0 +1,228 @@
+# scrapy_project/db.py
+"""
+Conexiones a Postgres compartidas por el pipeline y los scripts.
+
+- `get_pool()`: ThreadedConnectionPool por proceso (DB_POOL_MIN / DB_POOL_MAX).
+- `getconn()` / `putconn()` / `connection()`: préstamo y devolución de conexiones;
+  al entregar una conexión nueva se preparan (PREPARE) las sentencias calientes
+  de PREPARED una sola vez por conexión.
+- `execute_prepared(cur, name, params)`: EXECUTE si la conexión la tiene
+  preparada; si no (fakes, mocks, conexiones fuera del pool), el SQL original.
+- `sqlalchemy_engine()`: engine único para los scripts con pandas/SQLAlchemy.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from psycopg2 import extensions, pool as pg_pool
+
+logger = logging.getLogger("posverdad.db")
+
+POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
+POSTGRES_PORT = int(os.getenv("POSTGRES_PORT", "5432"))
+POSTGRES_DB = os.getenv("POSTGRES_DB", "posverdad")
+POSTGRES_USER = os.getenv("POSTGRES_USER", "posverdad")
+POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "posverdad")
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "4"))
+# PREPARE de las sentencias calientes al abrir cada conexión del pool
+DB_PREPARE = (os.getenv("DB_PREPARE", "true").lower() == "true")
+
+
+# =========================
+# Sentencias preparadas
+# =========================
+# nombre → SQL con placeholders %s (psycopg2); el PREPARE usa $1..$n en el mismo orden.
+# Cada módulo registra aquí sus sentencias calientes con register_prepared().
+PREPARED: Dict[str, str] = {}
+
+
+def _dollar_params(sql: str) -> str:
+    """
+    Texto del PREPARE: recorre el SQL con las mismas reglas de psycopg2 (que no mira
+    comillas) para que $1..$n coincidan con los %s del SQL de respaldo:
+    '%s' → $n en orden, '%%' → '%'. Cualquier otro '%' (p. ej. '%(name)s') → ValueError.
+    """
+    out, n, i = [], 0, 0
+    while True:
+        j = sql.find("%", i)
+        if j < 0:
+            out.append(sql[i:])
+            return "".join(out)
+        out.append(sql[i:j])
+        nxt = sql[j + 1:j + 2]
+        if nxt == "s":
+            n += 1
+            out.append(f"${n}")
+        elif nxt == "%":
+            out.append("%")
+        else:
+            raise ValueError(
+                f"placeholder no soportado en sentencia preparada: {sql[j:j + 12]!r} (solo %s posicionales y %%)"
+            )
+        i = j + 2
+
+
+def register_prepared(name: str, sql: str) -> str:
+    """Agrega una sentencia a preparar en las conexiones del pool; devuelve el nombre."""
+    _dollar_params(sql)  # falla al importar el módulo, no al abrir la primera conexión
+    PREPARED[name] = sql
+    return name
+
+
+def is_prepared(cur, name: str) -> bool:
+    prepared = getattr(getattr(cur, "connection", None), "prepared", None)
+    return isinstance(prepared, set) and name in prepared
+
+
+class PreparedConnection(extensions.connection):
+    """Conexión psycopg2 que recuerda qué sentencias tiene preparadas."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: set = set()
+
+
+def prepare_statements(conn) -> set:
+    """
+    PREPARE de cada sentencia de PREPARED (una transacción por sentencia: si una
+    falla, p.ej. por columnas aún no migradas, se omite sin afectar a las demás).
+    """
+    prepared = getattr(conn, "prepared", None)
+    if not isinstance(prepared, set):
+        return set()
+    for name, sql in PREPARED.items():
+        if name in prepared:
+            continue
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"PREPARE {name} AS {_dollar_params(sql)}")
+            conn.commit()
+            prepared.add(name)
+        except Exception as e:
+            conn.rollback()
+            logger.info(f"[db] PREPARE {name} omitido: {e}")
+    return prepared
+
+
+def execute_prepared(cur, name: str, params: tuple = ()):
+    """EXECUTE name(...) si está preparada en la conexión del cursor; si no, el SQL original."""
+    if is_prepared(cur, name):
+        placeholders = ", ".join(["%s"] * len(params))
+        return cur.execute(f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}", params)
+    return cur.execute(PREPARED[name], params)
+
+
+# =========================
+# Pool por proceso
+# =========================
+_POOL: Optional[pg_pool.ThreadedConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def dsn_params() -> Dict[str, Any]:
+    return {
+        "host": POSTGRES_HOST,
+        "port": POSTGRES_PORT,
+        "dbname": POSTGRES_DB,
+        "user": POSTGRES_USER,
+        "password": POSTGRES_PASSWORD,
+    }
+
+
+def get_pool(minconn: Optional[int] = None, maxconn: Optional[int] = None) -> pg_pool.ThreadedConnectionPool:
+    """Pool compartido del proceso; el primer llamador fija el tamaño."""
+    global _POOL
+    if _POOL is not None:
+        return _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            lo = max(0, int(minconn if minconn is not None else DB_POOL_MIN))
+            hi = max(1, lo, int(maxconn if maxconn is not None else DB_POOL_MAX))
+            _POOL = pg_pool.ThreadedConnectionPool(
+                lo, hi, connection_factory=PreparedConnection, **dsn_params()
+            )
+            logger.info(
+                f"[db] Pool de conexiones listo (min={lo} max={hi}) "
+                f"host={POSTGRES_HOST} db={POSTGRES_DB} user={POSTGRES_USER}"
+            )
+    return _POOL
+
+
+def getconn(autocommit: bool = False):
+    """Toma una conexión del pool (con las sentencias calientes preparadas)."""
+    conn = get_pool().getconn()
+    if DB_PREPARE:
+        prepare_statements(conn)
+    conn.autocommit = autocommit
+    return conn
+
+
+def putconn(conn, close: bool = False) -> None:
+    """Devuelve la conexión al pool (rollback de lo no confirmado)."""
+    if conn is None:
+        return
+    try:
+        if not conn.closed and not conn.autocommit:
+            conn.rollback()
+    except Exception:
+        close = True
+    try:
+        if _POOL is None:
+            # Conexión ajena al pool (o pool ya cerrado): solo cerrarla
+            conn.close()
+        else:
+            _POOL.putconn(conn, close=close or bool(conn.closed))
+    except Exception as e:
+        logger.warning(f"[db] putconn falló (no crítico): {e}")
+
+
+@contextmanager
+def connection(autocommit: bool = False):
+    """`with connection() as conn:` → conexión del pool, devuelta al salir."""
+    conn = getconn(autocommit=autocommit)
+    try:
+        yield conn
+    finally:
+        putconn(conn)
+
+
+def close_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            try:
+                _POOL.closeall()
+            except Exception:
+                pass
+            _POOL = None
+
+
+# =========================
+# Scripts con SQLAlchemy/pandas
+# =========================
+_ENGINES: Dict[str, Any] = {}
+
+
+def sqlalchemy_url(driver: str = "psycopg2") -> str:
+    return (
+        f"postgresql+{driver}://{POSTGRES_USER}:{POSTGRES_PASSWORD}"
+        f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    )
+
+
+def sqlalchemy_engine(url: Optional[str] = None):
+    """Engine SQLAlchemy único por URL, con su pool acotado a DB_POOL_MAX."""
+    from sqlalchemy import create_engine
+
+    url = url or sqlalchemy_url()
+    eng = _ENGINES.get(url)
+    if eng is None:
+        eng = create_engine(url, future=True, pool_size=max(1, DB_POOL_MAX), max_overflow=0, pool_pre_ping=True)
+        _ENGINES[url] = eng
+    return eng
@@ -0,0 +1,110 @@
+# scrapy_project/dedup_index.py
+"""
+Índice de duplicados en memoria para el pipeline.
+
+Tres filtros de Bloom (clave de URL, body_hash, dominio+título normalizado) que se
+precargan desde `articles` en open_spider y se actualizan con cada artículo guardado.
+Un "no" del filtro es definitivo → se evita la consulta; un "quizás" se confirma
+contra la DB con la misma consulta de siempre. Los falsos positivos solo cuestan
+una consulta; nunca se descarta un artículo sin confirmación de la DB.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+
+from .storage_helpers import title_norm, url_key
+
+logger = logging.getLogger("posverdad.pipeline.dedup")
+
+
+class BloomFilter:
+    """Filtro de Bloom simple (bytearray + doble hashing sobre blake2b)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, int(capacity))
+        error_rate = min(max(float(error_rate), 1e-6), 0.5)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        d = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for p in self._positions(key):
+            self._bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class DedupIndex:
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.urls = BloomFilter(capacity, error_rate)
+        self.hashes = BloomFilter(capacity, error_rate)
+        self.titles = BloomFilter(capacity, error_rate)
+        self.loaded_rows = 0
+
+    # ---------- alta ----------
+    def add(self, url=None, url_canonical=None, body_hash=None, domain=None, title=None) -> None:
+        for u in (url, url_canonical):
+            k = url_key(u)
+            if k:
+                self.urls.add(k)
+        if body_hash:
+            self.hashes.add(body_hash)
+        tk = self._title_key(domain, title)
+        if tk:
+            self.titles.add(tk)
+
+    def add_item(self, item: dict) -> None:
+        self.add(
+            url=item.get("url"),
+            url_canonical=item.get("url_canonical"),
+            body_hash=item.get("body_hash"),
+            domain=item.get("domain"),
+            title=item.get("title"),
+        )
+
+    # ---------- consulta ----------
+    def might_have_url(self, *urls) -> bool:
+        return any((k := url_key(u)) and k in self.urls for u in urls)
+
+    def might_have_hash(self, body_hash: str) -> bool:
+        return bool(body_hash) and body_hash in self.hashes
+
+    def might_have_title(self, domain: str, title: str) -> bool:
+        tk = self._title_key(domain, title)
+        return bool(tk) and tk in self.titles
+
+    @staticmethod
+    def _title_key(domain, title) -> str:
+        dom = (domain or "").strip().lower()
+        tn = title_norm(title)
+        return f"{dom}\x00{tn}" if dom and tn else ""
+
+    # ---------- precarga ----------
+    def load(self, cur, itersize: int = 10_000) -> int:
+        """
+        Recorre `articles` con el cursor dado (idealmente server-side/named) y alimenta
+        los filtros. Devuelve filas leídas.
+        """
+        try:
+            cur.itersize = itersize
+        except Exception:
+            pass
+        cur.execute("SELECT url, body_hash, domain, title FROM articles")
+        n = 0
+        for url, body_hash, domain, title in cur:
+            self.add(url=url, body_hash=body_hash, domain=domain, title=title)
+            n += 1
+        self.loaded_rows += n
+        return n
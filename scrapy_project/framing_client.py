@@ -0,0 +1,325 @@
+# scrapy_project/framing_client.py
+"""
+Cliente asíncrono (asyncio) del servicio de framing (LLM remoto).
+
+- `AsyncFramingClient`: agrupa textos en lotes (FRAMING_BATCH_SIZE o hasta
+  FRAMING_BATCH_WAIT_MS de espera), limita los lotes en vuelo (FRAMING_CONCURRENCY),
+  reintenta con backoff exponencial + jitter y cachea por hash del cuerpo (textos
+  repetidos o ya en vuelo no vuelven a la red). Un fallo nunca propaga: el texto
+  queda con framing {} y se reintenta en la próxima corrida.
+- `FramingService`: corre el cliente en un event loop propio (hilo aparte) y
+  entrega Deferreds en el hilo del reactor, como NLPProcessPool: el pipeline
+  encola el framing y sigue con el próximo ítem.
+
+Protocolo HTTP (ver framing_stub.py):
+  POST FRAMING_URL {"model", "temperature", "items": [{"id", "prompt"}]}
+  → {"results": [{"id", "framing": {...}}]}
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import urllib.error
+import urllib.request
+from hashlib import sha256
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from twisted.internet import defer
+from twisted.python.failure import Failure
+
+from .framing_llm import LLMFramingAnalyzer
+from .nlp_cache import DATA_DIR
+
+logger = logging.getLogger("posverdad.pipeline.framing")
+
+FRAMING_ENABLED = (os.getenv("FRAMING_ENABLED", "false").lower() == "true")
+FRAMING_URL = os.getenv("FRAMING_URL", "http://127.0.0.1:8765/framing")
+FRAMING_MODEL = os.getenv("FRAMING_MODEL", "gpt-4")
+FRAMING_CONCURRENCY = int(os.getenv("FRAMING_CONCURRENCY", "4"))
+FRAMING_BATCH_SIZE = int(os.getenv("FRAMING_BATCH_SIZE", "8"))
+FRAMING_BATCH_WAIT_MS = float(os.getenv("FRAMING_BATCH_WAIT_MS", "50"))
+FRAMING_RETRIES = int(os.getenv("FRAMING_RETRIES", "3"))
+FRAMING_BACKOFF = float(os.getenv("FRAMING_BACKOFF", "0.5"))
+FRAMING_TIMEOUT = float(os.getenv("FRAMING_TIMEOUT", "30"))
+FRAMING_CACHE_PATH = os.getenv("FRAMING_CACHE_PATH", os.path.join(DATA_DIR, "framing_cache.sqlite3"))
+
+Transport = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class FramingError(RuntimeError):
+    """Error del servicio de framing; `retryable` indica si vale la pena reintentar."""
+
+    def __init__(self, msg: str, retryable: bool = True):
+        super().__init__(msg)
+        self.retryable = retryable
+
+
+def body_hash(text: str) -> str:
+    # Mismo hash que el pipeline usa para body_hash
+    return sha256((text or "").strip().encode("utf-8")).hexdigest()
+
+
+def _http_post(url: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        # 429 y 5xx son transitorios; el resto (400, 401, 404…) no mejora reintentando
+        raise FramingError(f"HTTP {e.code} desde {url}", retryable=e.code == 429 or e.code >= 500) from e
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        raise FramingError(f"{url} no responde: {e}") from e
+    except ValueError as e:
+        raise FramingError(f"Respuesta inválida de {url}: {e}") from e
+
+
+class _MemoryCache:
+    """Caché en memoria con la interfaz get/put de NLPResultCache."""
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._data.get(key)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        if result:
+            self._data[key] = result
+
+
+class AsyncFramingClient:
+    """
+    Framing por lotes sobre asyncio. Uso:
+
+        client = AsyncFramingClient()
+        await client.start()
+        framing = await client.analyze(texto)
+        await client.close()
+
+    `transport(payload) -> dict` es inyectable (tests); por defecto un POST JSON
+    con urllib en un hilo (asyncio.to_thread). `cache`: objeto con get/put (p.ej.
+    NLPResultCache con versions=framing_versions()); por defecto en memoria.
+    """
+
+    def __init__(
+        self,
+        url: str = FRAMING_URL,
+        model: str = FRAMING_MODEL,
+        concurrency: int = FRAMING_CONCURRENCY,
+        batch_size: int = FRAMING_BATCH_SIZE,
+        batch_wait_ms: float = FRAMING_BATCH_WAIT_MS,
+        retries: int = FRAMING_RETRIES,
+        backoff: float = FRAMING_BACKOFF,
+        timeout: float = FRAMING_TIMEOUT,
+        cache: Any = None,
+        transport: Optional[Transport] = None,
+        analyzer: Optional[LLMFramingAnalyzer] = None,
+    ):
+        self.url = url
+        self.model = model
+        self.concurrency = max(1, int(concurrency))
+        self.batch_size = max(1, int(batch_size))
+        self.batch_wait = max(0.0, float(batch_wait_ms)) / 1000.0
+        self.retries = max(0, int(retries))
+        self.backoff = max(0.0, float(backoff))
+        self.timeout = float(timeout)
+        self.cache = cache if cache is not None else _MemoryCache()
+        self._transport = transport or self._http_transport
+        self._analyzer = analyzer or LLMFramingAnalyzer(model_name=model)
+        self.stats = {"requests": 0, "batches": 0, "cache_hits": 0, "retries": 0, "failures": 0}
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._sending: set = set()
+
+    async def _http_transport(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(_http_post, self.url, payload, self.timeout)
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+    async def start(self) -> "AsyncFramingClient":
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._sem = asyncio.Semaphore(self.concurrency)
+            self._batcher = asyncio.create_task(self._batch_loop())
+        return self
+
+    async def close(self) -> None:
+        """Envía lo encolado, espera los lotes en vuelo y detiene el batcher."""
+        if self._batcher is None:
+            return
+        await self._queue.put(None)
+        await self._batcher
+        if self._sending:
+            await asyncio.gather(*list(self._sending), return_exceptions=True)
+        self._batcher = None
+
+    # -------------------------
+    # API
+    # -------------------------
+    async def analyze(self, text: str) -> Dict[str, Any]:
+        if not text or not str(text).strip():
+            return {}
+        if self._batcher is None:
+            await self.start()
+        key = body_hash(text)
+        try:
+            cached = self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"[framing] lectura de caché falló (no crítico): {e}")
+            cached = None
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.get_running_loop().create_future()
+            self._inflight[key] = fut
+            self._queue.put_nowait((key, self._analyzer.build_prompt(text)))
+        else:
+            self.stats["cache_hits"] += 1
+        return await asyncio.shield(fut)
+
+    async def analyze_many(self, texts: List[str]) -> List[Dict[str, Any]]:
+        return list(await asyncio.gather(*(self.analyze(t) for t in texts)))
+
+    # -------------------------
+    # Lotes
+    # -------------------------
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        stop = False
+        while not stop:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                wait = deadline - loop.time()
+                if wait <= 0:
+                    break
+                try:
+                    nxt = await asyncio.wait_for(self._queue.get(), wait)
+                except asyncio.TimeoutError:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            task = asyncio.create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[tuple]) -> None:
+        payload = {
+            "model": self.model,
+            "temperature": self._analyzer.temperature,
+            "items": [{"id": key, "prompt": prompt} for key, prompt in batch],
+        }
+        async with self._sem:
+            try:
+                resp = await self._post(payload)
+                by_id = {r.get("id"): r.get("framing") for r in (resp.get("results") or []) if isinstance(r, dict)}
+            except Exception as e:
+                self.stats["failures"] += len(batch)
+                logger.warning(f"[framing] lote de {len(batch)} falló: {e}")
+                by_id = {}
+        for key, _ in batch:
+            framing = by_id.get(key)
+            framing = framing if isinstance(framing, dict) else {}
+            if framing:
+                try:
+                    self.cache.put(key, framing)
+                except Exception as e:
+                    logger.warning(f"[framing] escritura de caché falló (no crítico): {e}")
+            fut = self._inflight.pop(key, None)
+            if fut is not None and not fut.done():
+                fut.set_result(framing)
+
+    async def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.stats["batches"] += 1
+        for attempt in range(self.retries + 1):
+            self.stats["requests"] += 1
+            try:
+                return await self._transport(payload)
+            except FramingError as e:
+                if not e.retryable or attempt >= self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                self.stats["retries"] += 1
+                logger.info(f"[framing] {e}; reintento {attempt + 1}/{self.retries} en {delay:.2f}s")
+                await asyncio.sleep(delay)
+        raise FramingError("sin intentos")  # pragma: no cover
+
+
+def framing_versions(model: str = FRAMING_MODEL, url: Optional[str] = None) -> str:
+    """Firma para la caché persistente (cambiar de modelo o de servicio invalida lo previo)."""
+    return f"framing;model={model};url={url or FRAMING_URL}"
+
+
+class FramingService:
+    """
+    AsyncFramingClient en un event loop propio (hilo daemon) con resultados como
+    Deferred disparados en el hilo del reactor. `call_from_thread` inyectable (tests).
+    """
+
+    def __init__(self, client: Optional[AsyncFramingClient] = None, call_from_thread=None):
+        self.client = client or AsyncFramingClient()
+        self._call_from_thread = call_from_thread
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FramingService":
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="posverdad-framing", daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self.client.start(), self._loop).result()
+            logger.info(
+                f"[framing] Cliente listo → {self.client.url} (concurrencia={self.client.concurrency}, "
+                f"lote={self.client.batch_size})"
+            )
+        if self._call_from_thread is None:
+            from twisted.internet import reactor
+            self._call_from_thread = reactor.callFromThread
+        return self
+
+    def analyze(self, text: str) -> defer.Deferred:
+        if self._loop is None:
+            self.start()
+        d = defer.Deferred()
+        fut = asyncio.run_coroutine_threadsafe(self.client.analyze(text), self._loop)
+
+        def _done(f):
+            # Corre en el hilo del loop: volver al reactor antes de disparar.
+            try:
+                res = f.result()
+            except Exception as e:
+                self._call_from_thread(d.errback, Failure(e))
+            else:
+                self._call_from_thread(d.callback, res)
+
+        fut.add_done_callback(_done)
+        return d
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"[framing] Cierre del cliente falló (no crítico): {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
@@ -0,0 +1,130 @@
+# scrapy_project/framing_stub.py
+"""
+Servidor HTTP local que imita al servicio de framing (tests y desarrollo).
+
+Responde el protocolo de framing_client con la respuesta simulada de
+LLMFramingAnalyzer. Permite inyectar latencia (`delay`) y fallos transitorios
+(`fail_first`: las N primeras peticiones responden 503) para ejercitar lotes,
+concurrencia y reintentos sin red ni API.
+
+    python -m scrapy_project.framing_stub --port 8765 --delay 0.2
+    with FramingStubServer(delay=0.05) as stub: ... stub.url ...
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+from .framing_llm import LLMFramingAnalyzer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_StubHTTPServer"
+
+    def do_POST(self):  # noqa: N802 (API de http.server)
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+            items = payload["items"]
+        except (ValueError, KeyError, TypeError):
+            return self._reply(400, {"error": "payload inválido"})
+
+        with stub.lock:
+            stub.requests.append(len(items))
+            n = len(stub.requests)
+            stub.active += 1
+            stub.max_active = max(stub.max_active, stub.active)
+        try:
+            if stub.delay:
+                time.sleep(stub.delay)
+            if n <= stub.fail_first:
+                return self._reply(503, {"error": "no disponible (simulado)"})
+            analyzer = LLMFramingAnalyzer(model_name=payload.get("model", "stub"))
+            results = [
+                {"id": it.get("id"), "framing": dict(analyzer.analyze_framing(it.get("prompt") or ""),
+                                                     summary=f"stub:{(it.get('id') or '')[:8]}")}
+                for it in items
+            ]
+            return self._reply(200, {"results": results})
+        finally:
+            with stub.lock:
+                stub.active -= 1
+
+    def _reply(self, status: int, body: dict):
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, fmt, *args):  # silencioso en tests
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "FramingStubServer"
+
+
+class FramingStubServer:
+    """Servidor de framing simulado en un hilo; `url`, `requests` (tamaño de cada lote), `max_active`."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0, fail_first: int = 0):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.requests: List[int] = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self._httpd = _StubHTTPServer((host, port), _Handler)
+        self._httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/framing"
+
+    def start(self) -> "FramingStubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="framing-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de framing simulado (protocolo de framing_client)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Latencia simulada por petición (s)")
+    parser.add_argument("--fail-first", type=int, default=0, help="Responder 503 a las N primeras peticiones")
+    args = parser.parse_args()
+    stub = FramingStubServer(args.host, args.port, delay=args.delay, fail_first=args.fail_first)
+    print(f"🧪 Framing stub escuchando en {stub.url}")
+    try:
+        stub._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# scrapy_project/id_cache.py
+"""
+Caché LRU nombre → id por proceso para las tablas de catálogo
+(keywords, authors, categories, sources, entities).
+
+Los helpers de storage_helpers consultan aquí antes de ir a Postgres y la llenan
+con lo que devuelven RETURNING/SELECT. Para no servir ids de transacciones que
+terminaron en rollback, lo aprendido dentro de una transacción queda "pendiente"
+por dueño (la conexión) y solo pasa a la caché compartida con `commit(owner)`;
+`rollback(owner)` lo descarta. Mientras la transacción sigue abierta, el mismo
+dueño sí ve sus pendientes (Postgres también le muestra sus propios INSERT).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+ID_CACHE_SIZE = int(os.getenv("ID_CACHE_SIZE", "20000"))
+
+Key = Tuple[str, Hashable]
+
+
+def tx_owner(db_or_cur: Any) -> int:
+    """Identidad de la transacción: la conexión (o el propio objeto si no la expone)."""
+    if hasattr(db_or_cur, "execute") and not hasattr(db_or_cur, "cursor"):
+        conn = getattr(db_or_cur, "connection", None)
+        return id(conn if conn is not None else db_or_cur)
+    return id(db_or_cur)
+
+
+class IdCache:
+    def __init__(self, capacity: int = ID_CACHE_SIZE):
+        self.capacity = max(0, int(capacity))
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Key, int]" = OrderedDict()
+        self._pending: Dict[int, Dict[Key, int]] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def get(self, kind: str, name: Hashable, owner: Any = None) -> Optional[int]:
+        if not self.enabled:
+            return None
+        k = (kind, name)
+        with self._lock:
+            v = self._lru.get(k)
+            if v is not None:
+                self._lru.move_to_end(k)
+            elif owner is not None:
+                v = self._pending.get(tx_owner(owner), {}).get(k)
+            if v is None:
+                self._misses[kind] = self._misses.get(kind, 0) + 1
+            else:
+                self._hits[kind] = self._hits.get(kind, 0) + 1
+            return v
+
+    def put(self, kind: str, name: Hashable, value: Any, owner: Any = None) -> None:
+        """Registra un id leído en la transacción de `owner` (pendiente hasta commit)."""
+        if not self.enabled or not value:
+            return
+        with self._lock:
+            k = (kind, name)
+            if owner is None:
+                self._store(k, int(value))
+            elif k not in self._lru:
+                self._pending.setdefault(tx_owner(owner), {})[k] = int(value)
+
+    def _store(self, k: Key, value: int) -> None:
+        self._lru[k] = value
+        self._lru.move_to_end(k)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def commit(self, owner: Any) -> None:
+        with self._lock:
+            for k, v in self._pending.pop(tx_owner(owner), {}).items():
+                self._store(k, v)
+
+    def rollback(self, owner: Any) -> None:
+        with self._lock:
+            self._pending.pop(tx_owner(owner), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = sorted(set(self._hits) | set(self._misses))
+            out: Dict[str, Any] = {"size": len(self._lru), "capacity": self.capacity}
+            for kind in kinds:
+                h, m = self._hits.get(kind, 0), self._misses.get(kind, 0)
+                out[kind] = {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 3) if h + m else 0.0}
+            return out
+
+    def forget(self) -> None:
+        """
+        Olvida todos los ids (compartidos y pendientes) sin tocar las estadísticas:
+        tras un IntegrityError, p.ej. porque un job de reconcile borró o fusionó entidades.
+        """
+        with self._lock:
+            self._lru.clear()
+            self._pending.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._pending.clear()
+            self._hits.clear()
+            self._misses.clear()
+
+
+ID_CACHE = IdCache()
+
+
+def id_cache_stats() -> Dict[str, Any]:
+    return ID_CACHE.stats()
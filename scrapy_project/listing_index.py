@@ -0,0 +1,117 @@
+# scrapy_project/listing_index.py
+"""
+Índice persistente página de listado → rango de años (SQLite).
+
+Cada corrida de ElMostradorSpider observa páginas de `/claves/feed/page/N/` y sus
+años mínimo/máximo. Guardarlas (page, y_min, y_max, observed_at) permite que la
+siguiente corrida para un `target_year` salte directo a la primera página limpia
+estimada y verifique solo los vecinos, en vez de repetir expand + binaria desde 1.
+
+El listado solo crece por arriba (lo nuevo empuja lo viejo a páginas mayores):
+- "página p NO limpia" (y_max > target) sigue siendo cierto con el tiempo → cota
+  baja segura sin re-verificar.
+- "página p limpia" (y_max ≤ target) puede dejar de serlo → cota alta que se
+  desplaza `drift` páginas por día de antigüedad y se verifica al empezar.
+
+Vive junto a la caché NLP (`data/listing_index.sqlite3`).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from .nlp_cache import DATA_DIR
+
+logger = logging.getLogger("posverdad.spider.listing_index")
+
+LISTING_INDEX = (os.getenv("LISTING_INDEX", "true").lower() == "true")
+LISTING_INDEX_PATH = os.getenv("LISTING_INDEX_PATH", os.path.join(DATA_DIR, "listing_index.sqlite3"))
+# Observaciones más viejas que esto no se usan para estimar (el listado se desplazó demasiado)
+LISTING_INDEX_MAX_AGE_DAYS = float(os.getenv("LISTING_INDEX_MAX_AGE_DAYS", "30"))
+# Páginas que avanza el listado por día (corrimiento de la cota alta); 0 = sin corrección
+LISTING_DRIFT_PAGES_PER_DAY = float(os.getenv("LISTING_DRIFT_PAGES_PER_DAY", "0"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listing_pages (
+    source      TEXT    NOT NULL,
+    page        INTEGER NOT NULL,
+    y_min       INTEGER NOT NULL,
+    y_max       INTEGER NOT NULL,
+    observed_at REAL    NOT NULL,
+    PRIMARY KEY (source, page)
+)
+"""
+
+
+class ListingIndex:
+    """
+    - `observe(page, y_min, y_max)` → registra (o refresca) una página observada
+    - `bracket(target_year)` → (low, high) para la búsqueda leftmost, o None sin datos útiles
+    """
+
+    def __init__(self, source: str, path: str = LISTING_INDEX_PATH,
+                 max_age_days: float = LISTING_INDEX_MAX_AGE_DAYS,
+                 drift_per_day: float = LISTING_DRIFT_PAGES_PER_DAY):
+        self.source = source
+        self.path = path
+        self.max_age_days = float(max_age_days)
+        self.drift_per_day = max(0.0, float(drift_per_day))
+        self.observed = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError:
+            pass
+        self._db.execute(_SCHEMA)
+
+    def observe(self, page: int, y_min: Optional[int], y_max: Optional[int], now: Optional[float] = None) -> None:
+        if y_min is None or y_max is None or page < 1:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO listing_pages (source, page, y_min, y_max, observed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.source, int(page), int(y_min), int(y_max), now if now is not None else time.time()),
+            )
+            self.observed += 1
+
+    def bracket(self, target_year: int, now: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        """
+        (low, high) con low = mayor página observada NO limpia para `target_year` y
+        high = menor página limpia por encima de low (+ corrimiento por antigüedad).
+        None si falta alguna de las dos cotas: entonces se busca desde la página 1.
+        """
+        now = now if now is not None else time.time()
+        since = now - self.max_age_days * 86400
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MAX(page) FROM listing_pages WHERE source = ? AND observed_at >= ? AND y_max > ?",
+                (self.source, since, int(target_year)),
+            ).fetchone()
+            low = row[0] if row else None
+            if low is None:
+                return None
+            rows = self._db.execute(
+                "SELECT page, observed_at FROM listing_pages"
+                " WHERE source = ? AND observed_at >= ? AND y_max <= ? AND page > ?",
+                (self.source, since, int(target_year), int(low)),
+            ).fetchall()
+        if not rows:
+            return None
+        high = min(page + int(round(self.drift_per_day * max(0.0, now - ts) / 86400)) for page, ts in rows)
+        return int(low), max(int(low) + 1, high)
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._db.close()
+            except Exception:
+                pass
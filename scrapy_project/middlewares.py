@@ -98,3 +98,29 @@ class ScrapyProjectDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class ListingMemoMiddleware:
+    """
+    Sirve desde el memo del spider las páginas de listado ya parseadas en el run
+    (Requests con meta["listing_memo"]): los cambios de modo de la búsqueda
+    (expand → leftmost, leftmost → collect, …) no vuelven a descargar la página.
+    """
+
+    def __init__(self, stats=None):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(getattr(crawler, "stats", None))
+
+    def process_request(self, request, spider):
+        if not request.meta.get("listing_memo"):
+            return None
+        lookup = getattr(spider, "listing_memo_response", None)
+        cached = lookup(request.url) if callable(lookup) else None
+        if cached is None:
+            return None  # expulsada del memo: descarga normal
+        if self.stats is not None:
+            self.stats.inc_value("posverdad/listing/memo_hits", spider=spider)
+        return cached.replace(request=request)
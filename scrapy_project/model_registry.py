@@ -0,0 +1,151 @@
+# scrapy_project/model_registry.py
+"""
+Registro de modelos NLP por proceso (perezoso y thread-safe).
+
+Todos los componentes (pipeline, Preprocessor, NLPOrchestrator, PosverdadNLP,
+scripts) piden sus modelos aquí en vez de cargarlos por su cuenta, de modo que
+`es_core_news_md` y el analizador de sentimiento se cargan UNA vez por proceso.
+
+Clave: (tipo, nombre, componentes deshabilitados). Para cada carga se registra
+el tiempo y la memoria residente (RSS) del proceso antes/después.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("posverdad.models")
+
+Key = Tuple[str, str, Tuple[str, ...]]
+
+
+def _rss_mb() -> Optional[float]:
+    """RSS actual del proceso en MB (Linux: /proc/self/statm; fallback: ru_maxrss)."""
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            pages = int(fh.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except Exception:
+        pass
+    try:
+        import resource
+        # ru_maxrss: KB en Linux, bytes en macOS (pico, no actual)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(rss / 1024, 1)
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Key, threading.Lock] = {}
+        self._models: Dict[Key, Any] = {}
+        self._stats: Dict[Key, Dict[str, Any]] = {}
+
+    @staticmethod
+    def key(kind: str, name: str, disable: Iterable[str] = ()) -> Key:
+        return (kind, name, tuple(sorted(set(disable or ()))))
+
+    def get(self, kind: str, name: str, loader: Callable[[], Any], disable: Iterable[str] = ()) -> Any:
+        """
+        Devuelve el modelo para (kind, name, disable); lo carga con `loader()` la
+        primera vez. Cargas concurrentes de la MISMA clave esperan a la primera;
+        claves distintas cargan en paralelo. Si `loader` falla, no se cachea nada.
+        """
+        k = self.key(kind, name, disable)
+        model = self._models.get(k)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(k, threading.Lock())
+
+        with key_lock:
+            model = self._models.get(k)
+            if model is not None:
+                return model
+
+            rss_before = _rss_mb()
+            t0 = perf_counter()
+            model = loader()
+            load_s = round(perf_counter() - t0, 3)
+            rss_after = _rss_mb()
+            delta = (
+                round(rss_after - rss_before, 1)
+                if rss_before is not None and rss_after is not None
+                else None
+            )
+
+            self._models[k] = model
+            self._stats[k] = {
+                "kind": kind,
+                "name": name,
+                "disabled": list(k[2]),
+                "load_seconds": load_s,
+                "rss_mb": rss_after,
+                "rss_delta_mb": delta,
+            }
+            logger.info(
+                f"[models] {kind}:{name} cargado en {load_s:.2f}s "
+                f"(disabled={list(k[2]) or '-'} rss={rss_after} MB Δ={delta} MB)"
+            )
+            return model
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [dict(v) for v in self._stats.values()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+            self._key_locks.clear()
+
+
+REGISTRY = ModelRegistry()
+
+
+# -------------------------
+# Atajos por tipo de modelo
+# -------------------------
+def get_spacy(name: str = "es_core_news_md", disable: Iterable[str] = (), loader: Optional[Callable[[], Any]] = None):
+    """Pipeline spaCy compartido. `disable` forma parte de la clave."""
+    disable = tuple(disable or ())
+    if loader is None:
+        def loader():
+            import spacy
+            return spacy.load(name, disable=list(disable)) if disable else spacy.load(name)
+    return REGISTRY.get("spacy", name, loader, disable)
+
+
+def get_sentiment(
+    lang: str = "es", loader: Optional[Callable[[], Any]] = None, backend: str = "torch", threads: Optional[int] = None
+):
+    """
+    Analizador de sentimiento compartido (pysentimiento; `backend="onnx"` → onnxruntime).
+    `threads` (hilos de la sesión ONNX) forma parte de la clave.
+    """
+    if loader is None:
+        def loader():
+            if backend == "onnx":
+                from .sentiment_onnx import load_onnx_sentiment
+                return load_onnx_sentiment(lang) if threads is None else load_onnx_sentiment(lang, threads=threads)
+            from pysentimiento import create_analyzer
+            return create_analyzer(task="sentiment", lang=lang)
+    key = lang if backend == "torch" else f"{lang}:{backend}"
+    if threads is not None:
+        key = f"{key}:t{threads}"
+    return REGISTRY.get("sentiment", key, loader)
+
+
+def model_stats() -> List[Dict[str, Any]]:
+    """Tiempo de carga y RSS por modelo cargado en este proceso."""
+    return REGISTRY.stats()
+
+
+def clear() -> None:
+    """Olvida los modelos cargados (tests / recarga explícita)."""
+    REGISTRY.clear()
@@ -0,0 +1,226 @@
+# scrapy_project/nlp_cache.py
+"""
+Caché persistente de resultados NLP (SQLite) delante de NLPOrchestrator.analyze.
+
+Clave: sha256 del texto analizado (el body_hash del artículo cuando el NLP corre
+sobre el cuerpo) + versiones de los modelos (spaCy, es_core_news_md,
+pysentimiento) y del modo de sentimiento. Cambiar cualquiera de ellos invalida
+las entradas previas sin borrarlas; la expulsión por tamaño (LRU por último
+acceso) termina de limpiarlas.
+
+Vive en el directorio de datos hermano de LOGS_DIR (`data/nlp_cache.sqlite3`),
+de modo que re-correr un año tras una caída no vuelve a inferir lo ya visto.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("posverdad.pipeline.nlp_cache")
+
+LOGS_DIR = os.getenv("LOGS_DIR", "logs")
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(LOGS_DIR)), "data"))
+NLP_CACHE = (os.getenv("NLP_CACHE", "true").lower() == "true")
+NLP_CACHE_PATH = os.getenv("NLP_CACHE_PATH", os.path.join(DATA_DIR, "nlp_cache.sqlite3"))
+NLP_CACHE_MAX_MB = float(os.getenv("NLP_CACHE_MAX_MB", "512"))
+
+# Al pasarse del máximo se expulsa hasta quedar en esta fracción (evita expulsar en cada put)
+_EVICT_TO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nlp_results (
+    key      TEXT PRIMARY KEY,
+    result   TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+def _pkg_version(name: str) -> str:
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return "none"
+
+
+def model_versions(profile: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Firma de los modelos que producen el resultado. Solo lee metadatos de paquetes
+    (no carga modelos), así sirve también cuando el NLP corre en el pool de procesos.
+    `profile`: perfil spaCy del orquestador (cambia qué campos trae la salida).
+    `options`: las de build_nlp_stack (desde settings); sin ellas, el entorno.
+    """
+    options = options or {}
+
+    def _opt(key, env, default):
+        value = options.get(key)
+        return os.getenv(env, default) if value is None else str(value)
+
+    parts = [
+        f"spacy={_pkg_version('spacy')}",
+        f"es_core_news_md={_pkg_version('es_core_news_md')}",
+        f"pysentimiento={_pkg_version('pysentimiento')}",
+        f"transformers={_pkg_version('transformers')}",
+        # Mismas opciones que usa PosverdadNLP: cambian el sentimiento resultante
+        f"chunked={_opt('chunked', 'SENTIMENT_CHUNKED', 'false').lower()}",
+        f"window={_opt('window_tokens', 'SENTIMENT_WINDOW_TOKENS', '120')}",
+        f"backend={_opt('backend', 'SENTIMENT_BACKEND', 'torch').strip().lower()}",
+        f"int8={_opt('onnx_int8', 'SENTIMENT_ONNX_INT8', 'true').lower()}",
+        f"profile={(profile or os.getenv('NLP_PROFILE', 'full')).strip().lower()}",
+    ]
+    return ";".join(parts)
+
+
+class NLPResultCache:
+    """
+    Caché {hash de texto → salida del orquestador} en SQLite.
+
+    - `get(text_hash)` / `get_many(hashes)` → dict | None
+    - `put(text_hash, result)` / `put_many(pairs)`
+    - `hits` / `misses` / `evictions`; `stats()` para el resumen.
+    """
+
+    def __init__(self, path: str = NLP_CACHE_PATH, max_mb: float = NLP_CACHE_MAX_MB, versions: Optional[str] = None):
+        self.path = path
+        self.max_bytes = int(max(0.0, float(max_mb)) * 1024 * 1024)
+        self.versions = versions if versions is not None else model_versions()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError:
+            pass
+        self._db.execute(_SCHEMA)
+        self._db.execute("CREATE INDEX IF NOT EXISTS nlp_results_accessed ON nlp_results (accessed)")
+        self._bytes = int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM nlp_results").fetchone()[0])
+
+    def _key(self, text_hash: str) -> str:
+        return f"{self.versions}|{text_hash}"
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+    def get(self, text_hash: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([text_hash])[0]
+
+    def get_many(self, hashes: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        hashes = list(hashes)
+        keys = [self._key(h) for h in hashes]
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            wanted = sorted(set(keys))
+            for k0 in range(0, len(wanted), 500):
+                chunk = wanted[k0:k0 + 500]
+                rows = self._db.execute(
+                    f"SELECT key, result FROM nlp_results WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, raw in rows:
+                    try:
+                        found[key] = json.loads(raw)
+                    except ValueError:
+                        pass
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE nlp_results SET accessed = ? WHERE key = ?", [(now, k) for k in found]
+                )
+            out = [found.get(k) for k in keys]
+            n_hits = sum(1 for r in out if r is not None)
+            self.hits += n_hits
+            self.misses += len(out) - n_hits
+        return out
+
+    # -------------------------
+    # Escritura
+    # -------------------------
+    def put(self, text_hash: str, result: Dict[str, Any]) -> None:
+        self.put_many([(text_hash, result)])
+
+    def put_many(self, pairs: Iterable[tuple]) -> None:
+        rows = []
+        now = time.time()
+        for text_hash, result in pairs:
+            # Resultados vacíos (NLP caído) no se cachean: se reintentan la próxima vez
+            if not text_hash or not isinstance(result, dict) or not result:
+                continue
+            try:
+                raw = json.dumps(result, ensure_ascii=False, default=str)
+            except (TypeError, ValueError):
+                continue
+            rows.append((self._key(text_hash), raw, len(raw.encode("utf-8")), now))
+        if not rows:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for key, raw, size, ts in rows:
+                    prev = self._db.execute("SELECT size FROM nlp_results WHERE key = ?", (key,)).fetchone()
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO nlp_results (key, result, size, accessed) VALUES (?, ?, ?, ?)",
+                        (key, raw, size, ts),
+                    )
+                    self._bytes += size - (prev[0] if prev else 0)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                self._bytes = int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM nlp_results").fetchone()[0])
+                raise
+            if self.max_bytes and self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Borra las entradas de acceso más antiguo hasta quedar bajo _EVICT_TO * máximo."""
+        target = int(self.max_bytes * _EVICT_TO)
+        self._db.execute("BEGIN")
+        try:
+            cur = self._db.execute("SELECT key, size FROM nlp_results ORDER BY accessed ASC")
+            doomed = []
+            freed = 0
+            for key, size in cur:
+                if self._bytes - freed <= target:
+                    break
+                doomed.append((key,))
+                freed += size
+            self._db.executemany("DELETE FROM nlp_results WHERE key = ?", doomed)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._bytes -= freed
+        self.evictions += len(doomed)
+        logger.info(f"[NLP-cache] Expulsadas {len(doomed)} entradas ({freed // 1024} KB)")
+
+    # -------------------------
+    # Estado
+    # -------------------------
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "size_mb": round(self._bytes / (1024 * 1024), 2),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._db.close()
+            except Exception:
+                pass
@@ -0,0 +1,122 @@
+# scrapy_project/nlp_metrics.py
+"""
+Métricas por etapa del NLP (dónde se va el tiempo de una corrida).
+
+- NLPOrchestrator mide cada etapa (parse, preprocess, entities, sentiment,
+  subjectivity, framing) y deja en la salida de cada texto
+  `stage_timing = {etapa: {"ms", "chars", "tokens", "failed"}}`. Viaja con el
+  resultado, así funciona igual en línea que en el pool de procesos.
+- `StageMetrics` acumula esas mediciones en el pipeline: histograma de ms por
+  etapa (Scrapy Stats `posverdad/nlp/<etapa>_ms`) y p50/p95/p99 al cierre, que se
+  guardan en `nlp_run_stage_metrics` junto a `nlp_runs`.
+"""
+from __future__ import annotations
+
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+# Medir etapas en NLPOrchestrator (false = sin "stage_timing" en la salida)
+NLP_STAGE_TIMING = (os.getenv("NLP_STAGE_TIMING", "true").lower() == "true")
+
+STAGES = ("parse", "preprocess", "entities", "sentiment", "subjectivity", "framing")
+
+# Límites superiores (ms) de los buckets del histograma en Scrapy Stats
+HIST_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_INSERT_SQL = """
+    INSERT INTO nlp_run_stage_metrics
+        (run_id, stage, samples, failures, p50_ms, p95_ms, p99_ms, mean_ms, total_ms, chars, tokens)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (run_id, stage) DO UPDATE
+       SET samples  = EXCLUDED.samples,
+           failures = EXCLUDED.failures,
+           p50_ms   = EXCLUDED.p50_ms,
+           p95_ms   = EXCLUDED.p95_ms,
+           p99_ms   = EXCLUDED.p99_ms,
+           mean_ms  = EXCLUDED.mean_ms,
+           total_ms = EXCLUDED.total_ms,
+           chars    = EXCLUDED.chars,
+           tokens   = EXCLUDED.tokens
+"""
+
+
+def hist_bucket(ms: float) -> str:
+    """Etiqueta del bucket del histograma: "<=10", …, ">5000"."""
+    for edge in HIST_BUCKETS_MS:
+        if ms <= edge:
+            return f"<={edge}"
+    return f">{HIST_BUCKETS_MS[-1]}"
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Percentil por interpolación lineal (como numpy.percentile) sobre valores ya ordenados."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo, hi = math.floor(pos), math.ceil(pos)
+    if lo == hi:
+        return float(sorted_values[lo])
+    return float(sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo))
+
+
+class StageMetrics:
+    """
+    Acumulador de `stage_timing` por etapa.
+
+    - `observe(stage_timing)` → agrega una salida; devuelve [(etapa, ms)] registrados
+    - `summary()` → {etapa: {samples, failures, p50_ms, p95_ms, p99_ms, mean_ms, total_ms, chars, tokens}}
+    - `persist(cur, run_id)` → upsert de summary() en nlp_run_stage_metrics
+    """
+
+    def __init__(self):
+        self._ms: Dict[str, List[float]] = {}
+        self._failures: Dict[str, int] = {}
+        self._chars: Dict[str, int] = {}
+        self._tokens: Dict[str, int] = {}
+
+    def observe(self, stage_timing: Any) -> List[tuple]:
+        seen = []
+        if not isinstance(stage_timing, dict):
+            return seen
+        for stage, m in stage_timing.items():
+            if not isinstance(m, dict):
+                continue
+            try:
+                ms = float(m.get("ms") or 0.0)
+            except (TypeError, ValueError):
+                continue
+            self._ms.setdefault(stage, []).append(ms)
+            self._failures[stage] = self._failures.get(stage, 0) + (1 if m.get("failed") else 0)
+            self._chars[stage] = self._chars.get(stage, 0) + int(m.get("chars") or 0)
+            self._tokens[stage] = self._tokens.get(stage, 0) + int(m.get("tokens") or 0)
+            seen.append((stage, ms))
+        return seen
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for stage in sorted(self._ms, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+            values = sorted(self._ms[stage])
+            total = sum(values)
+            out[stage] = {
+                "samples": len(values),
+                "failures": self._failures.get(stage, 0),
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+                "p99_ms": round(percentile(values, 99), 3),
+                "mean_ms": round(total / len(values), 3),
+                "total_ms": round(total, 3),
+                "chars": self._chars.get(stage, 0),
+                "tokens": self._tokens.get(stage, 0),
+            }
+        return out
+
+    def persist(self, cur, run_id: str) -> int:
+        rows = [
+            (run_id, stage, s["samples"], s["failures"], s["p50_ms"], s["p95_ms"], s["p99_ms"],
+             s["mean_ms"], s["total_ms"], s["chars"], s["tokens"])
+            for stage, s in self.summary().items()
+        ]
+        for row in rows:
+            cur.execute(_INSERT_SQL, row)
+        return len(rows)
@@ -1,10 +1,16 @@
 # scrapy_project/nlp_orchestrator.py
 from __future__ import annotations
 
-from typing import Any, Dict, List, Protocol, Optional, Tuple
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterable, Iterator, List, Protocol, Optional, Tuple
 import warnings
 import logging
 
+from .nlp_metrics import NLP_STAGE_TIMING
+from .spacy_profiles import NLP_PROFILE, PROFILE_STAGES, resolve_profile, use_profile
+
 logger = logging.getLogger("scrapy_project.nlp_orchestrator")
 
 
@@ -15,6 +21,9 @@ class OrchestratorProtocol(Protocol):
     def analyze(self, text: str) -> Dict[str, Any]:
         ...
 
+    def analyze_many(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        ...
+
 
 def run_nlp(text: str, orch: Any) -> Dict[str, Any]:
     """
@@ -47,6 +56,72 @@ def _default_out() -> Dict[str, Any]:
     }
 
 
+def _empty_out() -> Dict[str, Any]:
+    # Estructura EXACTA para texto vacío/espacios (contrato de tests)
+    return {
+        "polarity": None,
+        "subjectivity": None,
+        "entities": [],
+        "topics": [],
+        "framing": {},
+        "preprocessed": {},
+    }
+
+
+def _read_preprocessed(pre: Any, text: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Interpreta la salida del preprocesador:
+      - dict -> se expone tal cual; si trae 'text' usable, ése alimenta NER/sentiment
+      - str no vacío -> texto normalizado
+      - otro -> texto original
+    """
+    if isinstance(pre, dict):
+        return pre, (pre.get("text") or text)
+    if isinstance(pre, str) and pre:
+        return None, pre
+    return None, text
+
+
+def _entities_from_doc(doc: Any) -> List[Dict[str, str]]:
+    ents: List[Dict[str, str]] = []
+    if doc is None or not hasattr(doc, "ents"):
+        return ents
+    for ent in getattr(doc, "ents", []):
+        try:
+            ents.append({
+                "text": getattr(ent, "text", str(ent)),
+                "label": getattr(ent, "label_", getattr(ent, "label", "")),
+            })
+        except Exception:
+            pass
+    return ents
+
+
+def _size(text: str, doc: Any = None) -> Tuple[int, int]:
+    """(chars, tokens) de la entrada de una etapa; tokens del Doc si lo hay."""
+    tokens = None
+    if doc is not None:
+        try:
+            tokens = len(doc)
+        except Exception:
+            tokens = None
+    if not isinstance(tokens, int):
+        tokens = len(str(text).split())
+    return len(text), tokens
+
+
+def _accepts_doc(component: Any) -> bool:
+    # `is True` estricto: un MagicMock expone cualquier atributo como truthy
+    return getattr(component, "accepts_doc", False) is True
+
+
+def _chunked(component: Any) -> bool:
+    # Sentimiento por ventanas (PosverdadNLP.chunked); mismo criterio estricto que accepts_doc
+    return getattr(component, "chunked", False) is True and callable(
+        getattr(component, "analyze_sentiment_windows", None)
+    )
+
+
 def _to_float(x: Any) -> Optional[float]:
     try:
         if isinstance(x, (int, float)):
@@ -230,8 +305,27 @@ class NLPOrchestrator:
     Dependencias (inyectables para tests):
       - spacy_model: str | Language | Fake (opcional)
       - posverdad_nlp: objeto con .analyze_sentiment(text) y/o .subjectivity_proxy(text)
+                       (opcional: .analyze_sentiment_many(texts) para lotes; con
+                       `chunked = True`, .analyze_sentiment_windows(texts, docs) y la
+                       salida agrega "sentiment_timing" por texto)
       - framing_analyzer: objeto con .analyze(text) o .analyze_framing(text) -> dict
       - preprocessor: objeto con .preprocess(text) -> str | dict
+                      (opcional: .preprocess_many(texts) para lotes)
+      - entity_cleaner: callable(ents, spacy_doc=None) -> ents (opcional; p.ej.
+                        heuristica_entities.clean_and_unify_entities)
+
+    Documento compartido: el texto se parsea con spaCy UNA vez y el Doc se pasa al
+    preprocesador y a subjectivity_proxy cuando declaran `accepts_doc = True`, y al
+    entity_cleaner. Los métodos basados en texto siguen como fallback.
+
+    Perfil spaCy (`profile`, ver spacy_profiles): "full" por defecto; "ner-only" solo
+    corre tok2vec + ner y omite preprocesamiento y subjetividad; "lemmas" omite NER
+    y subjetividad. Sentimiento y framing no dependen del perfil.
+
+    Métricas por etapa (`stage_timing`, ver nlp_metrics): cada salida no vacía trae
+    {etapa: {ms, chars, tokens, failed}} para parse, preprocess, entities, sentiment,
+    subjectivity y framing. En analyze_many los ms de una etapa batch se reparten
+    entre los textos del lote. `failures` acumula los fallos por etapa.
     """
 
     def __init__(
@@ -240,19 +334,26 @@ class NLPOrchestrator:
         posverdad_nlp: Optional[Any] = None,
         framing_analyzer: Optional[Any] = None,
         preprocessor: Optional[Any] = None,
+        entity_cleaner: Optional[Any] = None,
+        profile: Optional[str] = None,
     ):
         self._nlp = None
+        self.profile = resolve_profile(profile or NLP_PROFILE)
         self._pre = preprocessor
         self._pv = posverdad_nlp
         self._fr = framing_analyzer
+        self._clean = entity_cleaner
+        self.stage_timing = NLP_STAGE_TIMING
+        self.failures: Counter = Counter()
 
         # Cargar spaCy o aceptar objeto inyectado tipo Fake
         if spacy_model is None:
             # Intento con es_core_news_md, cae a blank
             try:
                 import spacy  # type: ignore
+                from .model_registry import get_spacy
                 try:
-                    self._nlp = spacy.load("es_core_news_md")
+                    self._nlp = get_spacy("es_core_news_md")
                 except Exception:
                     self._nlp = spacy.blank("es")
                     logger.warning("[NLP] No se pudo cargar 'es_core_news_md'. Uso blank('es')")
@@ -263,8 +364,8 @@ class NLPOrchestrator:
             # Si es string, intento cargar; si es objeto con __call__/pipe, lo uso tal cual
             try:
                 if isinstance(spacy_model, str):
-                    import spacy  # type: ignore
-                    self._nlp = spacy.load(spacy_model)
+                    from .model_registry import get_spacy
+                    self._nlp = get_spacy(spacy_model)
                 else:
                     # Fake u objeto estilo Language
                     self._nlp = spacy_model
@@ -279,12 +380,116 @@ class NLPOrchestrator:
     # -------------------------------
     # API pública estable
     # -------------------------------
+    def set_profile(self, profile: Optional[str], preprocess_profile: Optional[str] = None) -> None:
+        """Cambia el perfil spaCy del orquestador (y del preprocesador, si se indica)."""
+        if profile:
+            self.profile = resolve_profile(profile)
+        if preprocess_profile and self._pre is not None and hasattr(self._pre, "profile"):
+            self._pre.profile = resolve_profile(preprocess_profile, default="lemmas")
+
+    def set_options(self, options: Optional[Dict[str, Any]]) -> None:
+        """Opciones del stack desde settings (ver nlp_pool.nlp_options_from_settings)."""
+        options = dict(options or {})
+        if "stage_timing" in options:
+            self.stage_timing = bool(options.pop("stage_timing"))
+        configure = getattr(self._pv, "configure", None)
+        if options and callable(configure):
+            configure(**options)
+
+    def _runs(self, stage: str) -> bool:
+        return stage in PROFILE_STAGES[self.profile]
+
+    def _needs_doc(self) -> bool:
+        """Etapas posteriores al preprocesamiento que consumen el Doc."""
+        return self._runs("entities") or self._runs("subjectivity")
+
     def analyze(self, text: str) -> Dict[str, Any]:
         """
         API estable. Internamente delega en process(...) para mantener compatibilidad.
         """
         return self.process(text)
 
+    def analyze_many(self, texts: Iterable[str], batch_size: int = 32) -> List[Dict[str, Any]]:
+        """
+        Variante por lotes de analyze(): misma salida por texto, pero spaCy corre con
+        nlp.pipe(...) y el sentimiento con una sola llamada batch al backend cuando
+        éste lo soporta (analyze_sentiment_many). Si algún backend no expone la API
+        batch (fakes, mocks), se cae al camino por texto sin cambiar el contrato.
+        """
+        texts = list(texts or [])
+        if not texts:
+            return []
+
+        outs: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        live: List[int] = []
+        for i, t in enumerate(texts):
+            if not t or not str(t).strip():
+                outs[i] = _empty_out()
+            else:
+                live.append(i)
+        if not live:
+            return outs  # type: ignore[return-value]
+
+        live_texts = [texts[i] for i in live]
+        live_outs = [_default_out() for _ in live]
+        for i, out in zip(live, live_outs):
+            outs[i] = out
+        sizes = [_size(t) for t in live_texts]
+
+        # Documento compartido: un nlp.pipe para preprocess + NER + subjetividad
+        docs: List[Any] = [None] * len(live)
+        if not self._runs("preprocess"):
+            prepped = [(None, t) for t in live_texts]
+        else:
+            if _accepts_doc(self._pre):
+                with self._timed("parse", live_outs, sizes):
+                    docs = self._parse_many(live_texts, batch_size)
+            with self._timed("preprocess", live_outs if self._pre else [], sizes):
+                if _accepts_doc(self._pre):
+                    prepped = [self._preprocess(t, d) for t, d in zip(live_texts, docs)]
+                else:
+                    prepped = self._preprocess_many(live_texts, batch_size)
+        for out, (pre_out, _) in zip(live_outs, prepped):
+            if pre_out is not None:
+                out["preprocessed"] = pre_out
+        texts_prep = [tp for _, tp in prepped]
+
+        # Re-parsear solo lo que no tenga Doc válido para el texto final
+        stale = [k for k, (t, tp, d) in enumerate(zip(live_texts, texts_prep, docs)) if d is None or tp != t]
+        if stale and self._needs_doc():
+            with self._timed("parse", [live_outs[k] for k in stale], [_size(texts_prep[k]) for k in stale]):
+                for k, d in zip(stale, self._parse_many([texts_prep[k] for k in stale], batch_size)):
+                    docs[k] = d
+        sizes = [_size(tp, d) for tp, d in zip(texts_prep, docs)]
+
+        # NER
+        if self._runs("entities"):
+            with self._timed("entities", live_outs, sizes):
+                for out, doc in zip(live_outs, docs):
+                    self._apply_entities(out, doc)
+
+        # Sentiment batch + subjectivity
+        if self._pv:
+            with self._timed("sentiment", live_outs, sizes):
+                if _chunked(self._pv):
+                    for out, win in zip(live_outs, self._sentiment_windows(texts_prep, docs)):
+                        self._apply_windows(out, win)
+                else:
+                    for out, sent in zip(live_outs, self._sentiment_many(texts_prep)):
+                        self._apply_sentiment(out, sent)
+            if self._runs("subjectivity"):
+                with self._timed("subjectivity", live_outs, sizes):
+                    for out, tp, doc in zip(live_outs, texts_prep, docs):
+                        self._apply_subjectivity(out, tp, doc)
+
+        # Framing (por texto; el analizador no tiene API batch)
+        if self._fr:
+            with self._timed("framing", live_outs, sizes):
+                for out, tp in zip(live_outs, texts_prep):
+                    self._apply_framing(out, tp)
+
+        return outs  # type: ignore[return-value]
+
     # -------------------------------
     # Implementación (histórica)
     # -------------------------------
@@ -298,93 +503,222 @@ class NLPOrchestrator:
         """
         # EARLY-RETURN para texto vacío/espacios: coincide EXACTO con el test conocido
         if not text or not str(text).strip():
-            return {
-                "polarity": None,
-                "subjectivity": None,
-                "entities": [],
-                "topics": [],
-                "framing": {},
-                "preprocessed": {},
-            }
+            return _empty_out()
 
         out: Dict[str, Any] = _default_out()
+        size = [_size(text)]
 
-        # Preprocess
+        # Parseo único (si el preprocesador puede reutilizar el Doc)
+        doc = None
         text_prep = text
-        if self._pre and hasattr(self._pre, "preprocess"):
-            try:
-                pre = self._pre.preprocess(text)
-                # Si el preprocesador devuelve dict, lo exponemos tal cual
-                if isinstance(pre, dict):
-                    out["preprocessed"] = pre
-                    # y si trae un campo 'text' usable, úsalo para NER/sentiment
-                    text_prep = pre.get("text") or text
-                elif isinstance(pre, str) and pre:
-                    text_prep = pre
+        if self._runs("preprocess"):
+            if _accepts_doc(self._pre):
+                with self._timed("parse", [out], size):
+                    doc = self._parse(text)
+
+            # Preprocess
+            with self._timed("preprocess", [out] if self._pre else [], size):
+                pre_out, text_prep = self._preprocess(text, doc)
+            if pre_out is not None:
+                out["preprocessed"] = pre_out
+
+        # NER (reutiliza el Doc salvo que el preprocesador haya cambiado el texto)
+        if (doc is None or text_prep != text) and self._needs_doc():
+            with self._timed("parse", [out], [_size(text_prep)]):
+                doc = self._parse(text_prep)
+        size = [_size(text_prep, doc)]
+        if self._runs("entities"):
+            with self._timed("entities", [out], size):
+                self._apply_entities(out, doc)
+
+        # Sentiment / Subjectivity
+        if self._pv:
+            # Sentiment
+            with self._timed("sentiment", [out], size):
+                try:
+                    if _chunked(self._pv):
+                        self._apply_windows(out, self._sentiment_windows([text_prep], [doc])[0])
+                    elif hasattr(self._pv, "analyze_sentiment"):
+                        self._apply_sentiment(out, self._pv.analyze_sentiment(text_prep))
+                except Exception as e:
+                    self._failed("sentiment", f"[NLP] analyze_sentiment falló: {e}")
+
+            # Subjectivity (requiere el parser: solo con perfil "full")
+            if self._runs("subjectivity"):
+                with self._timed("subjectivity", [out], size):
+                    self._apply_subjectivity(out, text_prep, doc)
+
+        # Framing
+        if self._fr:
+            with self._timed("framing", [out], size):
+                self._apply_framing(out, text_prep)
+
+        return out
+
+    # -------------------------------
+    # Métricas por etapa
+    # -------------------------------
+    def _failed(self, stage: str, msg: str) -> None:
+        self.failures[stage] += 1
+        logger.warning(msg)
+
+    @contextmanager
+    def _timed(self, stage: str, outs: List[Dict[str, Any]], sizes: List[Tuple[int, int]]) -> Iterator[None]:
+        """
+        Mide el bloque como la etapa `stage` de `outs` (uno o varios textos): los ms
+        se reparten entre los textos y se suman si la etapa corre dos veces (re-parse).
+        """
+        if not self.stage_timing or not outs:
+            yield
+            return
+        before = self.failures[stage]
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            ms = (perf_counter() - t0) * 1000.0 / len(outs)
+            failed = int(self.failures[stage] > before)
+            for out, (chars, tokens) in zip(outs, sizes):
+                timing = out.setdefault("stage_timing", {})
+                prev = timing.get(stage)
+                if prev is None:
+                    timing[stage] = {"ms": round(ms, 3), "chars": chars, "tokens": tokens, "failed": failed}
                 else:
-                    text_prep = text
+                    prev["ms"] = round(prev["ms"] + ms, 3)
+                    prev["failed"] = max(prev["failed"], failed)
+
+    # -------------------------------
+    # Etapas (compartidas por process / analyze_many)
+    # -------------------------------
+    def _parse(self, text: str) -> Any:
+        if self._nlp is None or not callable(self._nlp):
+            return None
+        try:
+            with use_profile(self._nlp, self.profile):
+                return self._nlp(text)
+        except Exception as e:
+            self._failed("parse", f"[NLP] NER falló: {e}")
+            return None
+
+    def _parse_many(self, texts: List[str], batch_size: int) -> List[Any]:
+        if self._nlp is None or not callable(self._nlp):
+            return [None for _ in texts]
+        pipe = getattr(self._nlp, "pipe", None)
+        if callable(pipe):
+            try:
+                with use_profile(self._nlp, self.profile):
+                    docs = list(pipe(texts, batch_size=batch_size))
+                if len(docs) == len(texts):
+                    return docs
             except Exception as e:
-                logger.warning(f"[NLP] Preprocessor falló: {e}")
+                logger.warning(f"[NLP] nlp.pipe falló; sigo por texto: {e}")
+        return [self._parse(t) for t in texts]
 
-        # NER
+    def _preprocess(self, text: str, doc: Any = None) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Devuelve (dict_preprocesado | None, texto a usar aguas abajo)."""
+        if not (self._pre and hasattr(self._pre, "preprocess")):
+            return None, text
         try:
-            if self._nlp is not None:
-                doc = self._nlp(text_prep) if callable(self._nlp) else None
-                if doc is not None and hasattr(doc, "ents"):
-                    ents: List[Dict[str, str]] = []
-                    for ent in getattr(doc, "ents", []):
-                        try:
-                            ents.append({
-                                "text": getattr(ent, "text", str(ent)),
-                                "label": getattr(ent, "label_", getattr(ent, "label", "")),
-                            })
-                        except Exception:
-                            pass
-                    if ents:
-                        out["entities"] = ents
+            if doc is not None and _accepts_doc(self._pre):
+                return _read_preprocessed(self._pre.preprocess(text, doc=doc), text)
+            return _read_preprocessed(self._pre.preprocess(text), text)
         except Exception as e:
-            logger.warning(f"[NLP] NER falló: {e}")
+            self._failed("preprocess", f"[NLP] Preprocessor falló: {e}")
+            return None, text
 
-        # Sentiment / Subjectivity
-        if self._pv:
-            # Sentiment
+    def _preprocess_many(self, texts: List[str], batch_size: int) -> List[Tuple[Optional[Dict[str, Any]], str]]:
+        many = getattr(self._pre, "preprocess_many", None) if self._pre else None
+        if callable(many):
             try:
-                if hasattr(self._pv, "analyze_sentiment"):
-                    sent = self._pv.analyze_sentiment(text_prep)
-                    if sent is not None:
-                        out["sentiment"] = sent
-                        maybe_pol = _derive_polarity_from_sentiment(sent)
-                        if maybe_pol is not None:
-                            out["polarity"] = maybe_pol
+                res = many(texts, batch_size=batch_size)
+                if isinstance(res, list) and len(res) == len(texts):
+                    return [_read_preprocessed(pre, t) for pre, t in zip(res, texts)]
             except Exception as e:
-                logger.warning(f"[NLP] analyze_sentiment falló: {e}")
+                logger.warning(f"[NLP] preprocess_many falló; sigo por texto: {e}")
+        return [self._preprocess(t) for t in texts]
 
-            # Subjectivity
+    def _apply_entities(self, out: Dict[str, Any], doc: Any) -> None:
+        ents = _entities_from_doc(doc)
+        if ents and self._clean is not None:
             try:
-                if hasattr(self._pv, "subjectivity_proxy"):
-                    subj = self._pv.subjectivity_proxy(text_prep)
-                    s = _to_float(subj)
-                    if s is not None:
-                        out["subjectivity"] = s
+                ents = self._clean(ents, spacy_doc=doc)
             except Exception as e:
-                logger.warning(f"[NLP] subjectivity_proxy falló: {e}")
+                self._failed("entities", f"[NLP] limpieza de entidades falló: {e}")
+        if ents:
+            out["entities"] = ents
 
-        # Framing
-        if self._fr:
+    def _sentiment_many(self, texts: List[str]) -> List[Any]:
+        many = getattr(self._pv, "analyze_sentiment_many", None)
+        if callable(many):
             try:
-                fr = None
-                # Preferir analyze_framing si existe y es callable (evita trampas con MagicMock)
-                af = getattr(self._fr, "analyze_framing", None)
-                an = getattr(self._fr, "analyze", None)
-                if callable(af):
-                    fr = af(text_prep)
-                elif callable(an):
-                    fr = an(text_prep)
-
-                # Solo aceptar dict no vacío
-                if isinstance(fr, dict) and fr:
-                    out["framing"] = fr
+                res = many(texts)
+                if isinstance(res, list) and len(res) == len(texts):
+                    return res
             except Exception as e:
-                logger.warning(f"[NLP] framing analyzer falló: {e}")
-
+                self._failed("sentiment", f"[NLP] analyze_sentiment_many falló; sigo por texto: {e}")
+        out: List[Any] = []
+        for t in texts:
+            try:
+                out.append(self._pv.analyze_sentiment(t) if hasattr(self._pv, "analyze_sentiment") else None)
+            except Exception as e:
+                self._failed("sentiment", f"[NLP] analyze_sentiment falló: {e}")
+                out.append(None)
         return out
+
+    def _sentiment_windows(self, texts: List[str], docs: List[Any]) -> List[Optional[Dict[str, Any]]]:
+        """Todas las ventanas de todos los textos en un batch; None por texto si falla."""
+        try:
+            res = self._pv.analyze_sentiment_windows(texts, docs=docs)
+            if isinstance(res, list) and len(res) == len(texts):
+                return res
+        except Exception as e:
+            self._failed("sentiment", f"[NLP] analyze_sentiment_windows falló: {e}")
+        return [None for _ in texts]
+
+    def _apply_windows(self, out: Dict[str, Any], win: Optional[Dict[str, Any]]) -> None:
+        if not isinstance(win, dict):
+            return
+        self._apply_sentiment(out, win.get("sentiment"))
+        out["sentiment_timing"] = {
+            "chunks": win.get("chunks", 0),
+            "ms": win.get("ms", 0.0),
+            "ms_per_chunk": win.get("ms_per_chunk", 0.0),
+        }
+
+    @staticmethod
+    def _apply_sentiment(out: Dict[str, Any], sent: Any) -> None:
+        if sent is not None:
+            out["sentiment"] = sent
+            maybe_pol = _derive_polarity_from_sentiment(sent)
+            if maybe_pol is not None:
+                out["polarity"] = maybe_pol
+
+    def _apply_subjectivity(self, out: Dict[str, Any], text_prep: str, doc: Any = None) -> None:
+        try:
+            if hasattr(self._pv, "subjectivity_proxy"):
+                if doc is not None and _accepts_doc(self._pv):
+                    subj = self._pv.subjectivity_proxy(text_prep, doc=doc)
+                else:
+                    subj = self._pv.subjectivity_proxy(text_prep)
+                s = _to_float(subj)
+                if s is not None:
+                    out["subjectivity"] = s
+        except Exception as e:
+            self._failed("subjectivity", f"[NLP] subjectivity_proxy falló: {e}")
+
+    def _apply_framing(self, out: Dict[str, Any], text_prep: str) -> None:
+        try:
+            fr = None
+            # Preferir analyze_framing si existe y es callable (evita trampas con MagicMock)
+            af = getattr(self._fr, "analyze_framing", None)
+            an = getattr(self._fr, "analyze", None)
+            if callable(af):
+                fr = af(text_prep)
+            elif callable(an):
+                fr = an(text_prep)
+
+            # Solo aceptar dict no vacío
+            if isinstance(fr, dict) and fr:
+                out["framing"] = fr
+        except Exception as e:
+            self._failed("framing", f"[NLP] framing analyzer falló: {e}")
@@ -0,0 +1,222 @@
+# scrapy_project/nlp_pool.py
+"""
+Ejecución del NLP fuera del reactor de Twisted.
+
+- `build_nlp_stack()` arma spaCy + PosverdadNLP + Preprocessor + NLPOrchestrator
+  (mismos fallbacks que usaba el pipeline en línea).
+- `NLPProcessPool` mantiene un pool de procesos (spawn) donde cada worker carga los
+  modelos UNA vez en su initializer; `analyze()` / `analyze_many()` devuelven un
+  Deferred que se dispara en el hilo del reactor con el resultado.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from twisted.internet import defer
+from twisted.python.failure import Failure
+
+logger = logging.getLogger("posverdad.pipeline.nlp")
+
+# Orquestador del proceso worker (se crea en el initializer)
+_WORKER_NLP = None
+
+
+# Setting de Scrapy → (opción del stack, getter de Settings). Sin el setting rige el entorno.
+NLP_OPTION_SETTINGS = (
+    ("SENTIMENT_CHUNKED", "chunked", "getbool"),
+    ("SENTIMENT_WINDOW_TOKENS", "window_tokens", "getint"),
+    ("SENTIMENT_BACKEND", "backend", "get"),
+    ("SENTIMENT_ONNX_INT8", "onnx_int8", "getbool"),
+    ("SENTIMENT_ONNX_THREADS", "onnx_threads", "getint"),
+    ("NLP_STAGE_TIMING", "stage_timing", "getbool"),
+)
+
+
+def nlp_options_from_settings(settings) -> dict:
+    """Opciones de build_nlp_stack presentes en los settings de Scrapy."""
+    options = {}
+    for name, key, getter in NLP_OPTION_SETTINGS:
+        if settings.get(name) is not None:
+            options[key] = getattr(settings, getter)(name)
+    return options
+
+
+def build_nlp_stack(profile=None, preprocess_profile=None, options=None):
+    """
+    Carga los modelos locales y devuelve (spacy_model, orchestrator).
+    Nunca lanza: cada componente cae a None/blank si no está disponible.
+    `profile` / `preprocess_profile`: perfiles spaCy (ver spacy_profiles).
+    `options`: kwargs de PosverdadNLP (chunked, window_tokens, backend, onnx_int8, onnx_threads)
+    y stage_timing del orquestador.
+    """
+    options = dict(options or {})
+    stage_timing = options.pop("stage_timing", None)
+    from .model_registry import get_spacy, model_stats
+    from .nlp_orchestrator import NLPOrchestrator
+    from .nlp_transformers import PosverdadNLP
+    from .preprocessor import Preprocessor
+    try:
+        import spacy
+    except Exception:
+        spacy = None
+    try:
+        from .heuristica_entities import clean_and_unify_entities
+    except Exception:
+        clean_and_unify_entities = None
+
+    spacy_model = None
+    if spacy is not None:
+        try:
+            spacy_model = get_spacy("es_core_news_md")
+            logger.info("[NLP] spaCy 'es_core_news_md' cargado.")
+        except Exception as e:
+            logger.warning(f"[NLP] No se pudo cargar 'es_core_news_md': {e}. Fallback a blank('es')")
+            try:
+                spacy_model = spacy.blank("es")
+                logger.info("[NLP] spaCy blank('es') cargado (sin NER/dep).")
+            except Exception as e2:
+                logger.warning(f"[NLP] spaCy no disponible: {e2}")
+                spacy_model = None
+    else:
+        logger.warning("[NLP] spaCy no está instalado en este entorno.")
+
+    posverdad = None
+    try:
+        posverdad = PosverdadNLP(nlp_model=spacy_model, **options)
+        logger.info("[NLP] PosverdadNLP inicializado (pysentimiento + spaCy).")
+    except Exception as e:
+        logger.warning(f"[NLP] PosverdadNLP no disponible: {e}")
+
+    preproc = None
+    try:
+        preproc = Preprocessor(engine="spacy", profile=preprocess_profile)
+        logger.info("[NLP] Preprocessor(spacy) inicializado.")
+    except Exception as e:
+        logger.warning(f"[NLP] Preprocessor no disponible: {e}")
+
+    orchestrator = NLPOrchestrator(
+        spacy_model=spacy_model,
+        posverdad_nlp=posverdad,
+        preprocessor=preproc,
+        framing_analyzer=None,  # activable más adelante sin coste de API
+        entity_cleaner=clean_and_unify_entities,  # recibe el Doc compartido
+        profile=profile,
+    )
+    if stage_timing is not None:
+        orchestrator.stage_timing = bool(stage_timing)
+    logger.info(f"[NLP] Perfil spaCy: {orchestrator.profile} (preprocesador: {getattr(preproc, 'profile', '-')})")
+    for st in model_stats():
+        logger.info(
+            f"[NLP] modelo {st['kind']}:{st['name']} — carga {st['load_seconds']}s, "
+            f"RSS {st['rss_mb']} MB (Δ {st['rss_delta_mb']} MB)"
+        )
+    return spacy_model, orchestrator
+
+
+def _default_factory():
+    return build_nlp_stack()[1]
+
+
+class ProfiledFactory:
+    """Factory serializable (spawn) que arma el stack con perfiles spaCy dados."""
+
+    def __init__(self, profile=None, preprocess_profile=None, options=None):
+        self.profile = profile
+        self.preprocess_profile = preprocess_profile
+        self.options = dict(options or {})
+
+    def __call__(self):
+        return build_nlp_stack(self.profile, self.preprocess_profile, self.options)[1]
+
+
+# -------------------------
+# Lado worker (proceso hijo)
+# -------------------------
+def _init_worker(factory=None):
+    global _WORKER_NLP
+    _WORKER_NLP = (factory or _default_factory)()
+
+
+def _analyze_in_worker(text: str) -> dict:
+    if not text:
+        return {}
+    return _WORKER_NLP.analyze(text) or {}
+
+
+def _analyze_many_in_worker(texts: list[str]) -> list[dict]:
+    analyze_many = getattr(_WORKER_NLP, "analyze_many", None)
+    if callable(analyze_many):
+        results = analyze_many(texts)
+    else:
+        results = [_WORKER_NLP.analyze(t) if t else {} for t in texts]
+    return [(r or {}) if t else {} for t, r in zip(texts, results)]
+
+
+# -------------------------
+# Lado reactor (pipeline)
+# -------------------------
+class NLPProcessPool:
+    """
+    Pool de procesos para NLP con resultados como Deferred.
+
+    `executor` y `call_from_thread` son inyectables (tests / ejecución sin reactor).
+    """
+
+    def __init__(self, workers: int | None = None, factory=None, executor=None, call_from_thread=None):
+        self.workers = max(1, int(workers or max(1, (os.cpu_count() or 2) - 1)))
+        self.factory = factory
+        self._executor = executor
+        self._call_from_thread = call_from_thread
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context("spawn"),  # evita heredar estado del reactor
+                initializer=_init_worker,
+                initargs=(self.factory,),
+            )
+            logger.info(f"[NLP] Pool de procesos iniciado (workers={self.workers}).")
+        if self._call_from_thread is None:
+            from twisted.internet import reactor
+            self._call_from_thread = reactor.callFromThread
+        return self
+
+    def analyze(self, text: str) -> defer.Deferred:
+        return self._submit(_analyze_in_worker, text)
+
+    def analyze_many(self, texts: list[str]) -> defer.Deferred:
+        return self._submit(_analyze_many_in_worker, list(texts))
+
+    def _submit(self, fn, payload) -> defer.Deferred:
+        if self._executor is None:
+            self.start()
+        d = defer.Deferred()
+        try:
+            fut = self._executor.submit(fn, payload)
+        except Exception as e:
+            d.errback(Failure(e))
+            return d
+
+        def _done(f):
+            # Corre en un hilo del executor: volver al reactor antes de disparar.
+            try:
+                res = f.result()
+            except Exception as e:
+                self._call_from_thread(d.errback, Failure(e))
+            else:
+                self._call_from_thread(d.callback, res)
+
+        fut.add_done_callback(_done)
+        return d
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            try:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+            except Exception as e:
+                logger.warning(f"[NLP] Cierre del pool falló (no crítico): {e}")
+            self._executor = None
@@ -1,7 +1,39 @@
 # nlp_transformers.py — Módulo de análisis NLP básico basado en pysentimiento y spaCy
 # ====================================================================================
 
-from pysentimiento import create_analyzer
+import math
+import os
+import re
+import time
+
+from .model_registry import get_sentiment
+from .sentiment_onnx import SENTIMENT_BACKEND, SENTIMENT_ONNX_INT8, SENTIMENT_ONNX_THREADS, load_onnx_sentiment
+
+# Modo por ventanas: el cuerpo completo se parte en ventanas de oraciones bajo el
+# límite del modelo (robertuito trunca en 128 tokens) y se agregan las probabilidades
+SENTIMENT_CHUNKED = (os.getenv("SENTIMENT_CHUNKED", "false").lower() == "true")
+# Presupuesto de tokens por ventana (margen para los tokens especiales del modelo)
+SENTIMENT_WINDOW_TOKENS = int(os.getenv("SENTIMENT_WINDOW_TOKENS", "120"))
+
+POLARITY_MAP = {"POS": 1.0, "NEU": 0.0, "NEG": -1.0}
+
+_SENT_SPLIT = re.compile(r"(?<=[.!?…])\s+|\n+")
+# Tokens subpalabra por palabra cuando el analizador no expone tokenizer
+_TOKENS_PER_WORD = 1.4
+
+
+def __getattr__(name):
+    # pysentimiento arrastra transformers/torch: `create_analyzer` se importa al pedirlo
+    if name == "create_analyzer":
+        from pysentimiento import create_analyzer
+        globals()[name] = create_analyzer
+        return create_analyzer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _load_pysentimiento():
+    create_analyzer = globals().get("create_analyzer") or __getattr__("create_analyzer")
+    return create_analyzer(task="sentiment", lang="es")
 
 
 class PosverdadNLP:
@@ -10,18 +42,66 @@ class PosverdadNLP:
     usando modelos entrenados para español. Se apoya en pysentimiento para sentimiento
     y en spaCy para análisis morfosintáctico.
     """
-    def __init__(self, nlp_model=None):
-        self.spacy = nlp_model  # Debe pasarse una instancia spaCy ya cargada
+    # subjectivity_proxy acepta un Doc de spaCy ya parseado (ver NLPOrchestrator)
+    accepts_doc = True
 
-        try:
-            self.sa = create_analyzer(task="sentiment", lang="es")
-        except Exception as e:
-            print(f"[ERROR] No se pudo cargar el analizador de sentimiento: {e}")
-            self.sa = None
+    def __init__(self, nlp_model=None, chunked=None, window_tokens=None, backend=None,
+                 onnx_int8=None, onnx_threads=None):
+        self.spacy = nlp_model  # Debe pasarse una instancia spaCy ya cargada
+        self.chunked = SENTIMENT_CHUNKED if chunked is None else bool(chunked)
+        self.window_tokens = max(8, int(window_tokens or SENTIMENT_WINDOW_TOKENS))
+        # "torch" (pysentimiento) | "onnx" (onnxruntime en CPU, ver sentiment_onnx)
+        self.backend = (backend or SENTIMENT_BACKEND).strip().lower()
+        # None = lo de sentiment_onnx (SENTIMENT_ONNX_INT8 / SENTIMENT_ONNX_THREADS)
+        self.onnx_int8 = onnx_int8
+        self.onnx_threads = onnx_threads
+        self.sa = None
+        self._load_analyzer()
 
         # Eliminado: subjectivity como tarea no está soportada por pysentimiento en español
         self.subj = None
 
+    def _load_analyzer(self):
+        self.sa = None
+        if self.backend == "onnx":
+            kwargs = {k: v for k, v in (("int8", self.onnx_int8), ("threads", self.onnx_threads)) if v is not None}
+            int8 = SENTIMENT_ONNX_INT8 if self.onnx_int8 is None else bool(self.onnx_int8)
+            threads = SENTIMENT_ONNX_THREADS if self.onnx_threads is None else int(self.onnx_threads)
+            try:
+                self.sa = get_sentiment(
+                    "es", loader=lambda: load_onnx_sentiment("es", **kwargs),
+                    backend="onnx" if int8 else "onnx-fp32", threads=threads,
+                )
+            except Exception as e:
+                print(f"[ERROR] Backend ONNX no disponible, uso pysentimiento (torch): {e}")
+                self.backend = "torch"
+
+        if self.sa is None:
+            try:
+                # Compartido por proceso (ver model_registry)
+                self.sa = get_sentiment("es", loader=_load_pysentimiento)
+            except Exception as e:
+                print(f"[ERROR] No se pudo cargar el analizador de sentimiento: {e}")
+                self.sa = None
+
+    def configure(self, chunked=None, window_tokens=None, backend=None, onnx_int8=None, onnx_threads=None):
+        """Aplica opciones de settings sobre una instancia ya creada; recarga el analizador solo si cambia."""
+        if chunked is not None:
+            self.chunked = bool(chunked)
+        if window_tokens:
+            self.window_tokens = max(8, int(window_tokens))
+        reload = False
+        if backend and backend.strip().lower() != self.backend:
+            self.backend, reload = backend.strip().lower(), True
+        for attr, value, default in (("onnx_int8", onnx_int8, SENTIMENT_ONNX_INT8),
+                                     ("onnx_threads", onnx_threads, SENTIMENT_ONNX_THREADS)):
+            current = getattr(self, attr)
+            if value is not None and value != (default if current is None else current):
+                setattr(self, attr, value)
+                reload = reload or self.backend == "onnx"
+        if reload:
+            self._load_analyzer()
+
     def analyze_sentiment(self, text):
         """
         Ejecuta análisis de sentimiento y retorna una tupla (polaridad, score).
@@ -33,29 +113,172 @@ class PosverdadNLP:
         """
         if not self.sa or not text or not text.strip():
             return None, None
+        if self.chunked:
+            return self.analyze_sentiment_windows([text])[0]["sentiment"]
 
         try:
             result = self.sa.predict(text)
-            polarity_map = {"POS": 1.0, "NEU": 0.0, "NEG": -1.0}
-            polarity = polarity_map.get(result.output, 0.0)
+            polarity = POLARITY_MAP.get(result.output, 0.0)
             score = float(result.probas.get(result.output, 0.0))
             return polarity, score
         except Exception as e:
             print(f"[ERROR] Fallo en análisis de sentimiento: {e}")
             return None, None
 
-    def subjectivity_proxy(self, text):
+    def analyze_sentiment_many(self, texts):
+        """
+        Versión por lotes de analyze_sentiment: una sola llamada a `self.sa.predict(lista)`
+        para todos los textos no vacíos. Retorna una lista de tuplas (polaridad, score)
+        alineada con `texts`; los vacíos (o todos, si falla el batch) quedan en (None, None).
+        """
+        texts = list(texts or [])
+        out = [(None, None)] * len(texts)
+        idx = [i for i, t in enumerate(texts) if t and t.strip()]
+        if not self.sa or not idx:
+            return out
+        if self.chunked:
+            return [r["sentiment"] for r in self.analyze_sentiment_windows(texts)]
+
+        try:
+            results = self._predict_batch([texts[i] for i in idx])
+            for i, result in zip(idx, results):
+                polarity = POLARITY_MAP.get(result.output, 0.0)
+                score = float(result.probas.get(result.output, 0.0))
+                out[i] = (polarity, score)
+            return out
+        except Exception as e:
+            print(f"[ERROR] Fallo en análisis de sentimiento (batch): {e}")
+            return [(None, None)] * len(texts)
+
+    # -------------------------------
+    # Sentimiento por ventanas
+    # -------------------------------
+    def _predict_batch(self, texts):
+        results = self.sa.predict(list(texts))
+        if not isinstance(results, (list, tuple)) or len(results) != len(texts):
+            raise ValueError("predict(batch) no devolvió un resultado por texto")
+        return results
+
+    def _count_tokens(self, text):
+        """Tokens del modelo si el analizador expone su tokenizer; si no, estimación por palabras."""
+        tokenize = getattr(getattr(self.sa, "tokenizer", None), "tokenize", None)
+        if callable(tokenize):
+            try:
+                toks = tokenize(text)
+                if isinstance(toks, (list, tuple)):
+                    return len(toks)
+            except Exception:
+                pass
+        return math.ceil(len(text.split()) * _TOKENS_PER_WORD)
+
+    @staticmethod
+    def split_sentences(text, doc=None):
+        """Oraciones de `text`: las del Doc de spaCy si corresponde al mismo texto; si no, regex."""
+        if doc is not None and getattr(doc, "text", None) == text:
+            try:
+                sents = [s.text.strip() for s in doc.sents]
+                if sents:
+                    return [s for s in sents if s]
+            except Exception:
+                pass  # Doc sin límites de oración (blank/fakes)
+        return [s.strip() for s in _SENT_SPLIT.split(text) if s and s.strip()]
+
+    def sentiment_windows(self, text, doc=None):
+        """
+        Agrupa oraciones consecutivas en ventanas de hasta `window_tokens` tokens.
+        Una oración más larga que el presupuesto se corta por palabras.
+        """
+        budget = self.window_tokens
+        windows, cur, cur_tokens = [], [], 0
+        for sent in self.split_sentences(text, doc):
+            n = self._count_tokens(sent)
+            if n > budget:
+                if cur:
+                    windows.append(" ".join(cur))
+                    cur, cur_tokens = [], 0
+                words = sent.split()
+                step = max(1, int(len(words) * budget / n))
+                windows += [" ".join(words[k:k + step]) for k in range(0, len(words), step)]
+                continue
+            if cur and cur_tokens + n > budget:
+                windows.append(" ".join(cur))
+                cur, cur_tokens = [], 0
+            cur.append(sent)
+            cur_tokens += n
+        if cur:
+            windows.append(" ".join(cur))
+        return windows
+
+    @staticmethod
+    def _aggregate(results, weights):
+        """Promedio de probabilidades ponderado por largo → (polaridad, score) de la clase ganadora."""
+        total = float(sum(weights)) or 1.0
+        probas = {}
+        for result, w in zip(results, weights):
+            for label, p in (result.probas or {}).items():
+                probas[label] = probas.get(label, 0.0) + float(p) * w / total
+        if not probas:
+            return None, None
+        label = max(probas, key=probas.get)
+        return POLARITY_MAP.get(label, 0.0), round(probas[label], 6)
+
+    def analyze_sentiment_windows(self, texts, docs=None):
+        """
+        Sentimiento del cuerpo completo de uno o varios textos: todas las ventanas de
+        todos los textos van en UNA llamada a `self.sa.predict(lista)`.
+
+        Retorna, alineado con `texts`, dicts con:
+          - `sentiment`: (polaridad, score) agregados ((None, None) si vacío o falla)
+          - `chunks`: nº de ventanas del texto
+          - `ms`: parte del tiempo del batch atribuida al texto (proporcional a sus ventanas)
+          - `ms_per_chunk`: tiempo medio por ventana en el batch
+        """
+        texts = list(texts or [])
+        docs = list(docs) if docs is not None else [None] * len(texts)
+        out = [{"sentiment": (None, None), "chunks": 0, "ms": 0.0, "ms_per_chunk": 0.0} for _ in texts]
+        if not self.sa:
+            return out
+
+        spans, flat = [], []
+        for i, (t, d) in enumerate(zip(texts, docs)):
+            if not t or not t.strip():
+                continue
+            wins = self.sentiment_windows(t, d)
+            spans.append((i, len(flat), len(flat) + len(wins)))
+            flat += wins
+        if not flat:
+            return out
+
+        t0 = time.perf_counter()
+        try:
+            results = self._predict_batch(flat)
+        except Exception as e:
+            print(f"[ERROR] Fallo en análisis de sentimiento (ventanas): {e}")
+            return out
+        ms_per_chunk = (time.perf_counter() - t0) * 1000.0 / len(flat)
+
+        for i, a, b in spans:
+            out[i] = {
+                "sentiment": self._aggregate(results[a:b], [len(w) for w in flat[a:b]]),
+                "chunks": b - a,
+                "ms": round(ms_per_chunk * (b - a), 3),
+                "ms_per_chunk": round(ms_per_chunk, 3),
+            }
+        return out
+
+    def subjectivity_proxy(self, text, doc=None):
         """
         Calcula una estimación simple de subjetividad basada en la proporción de
         adjetivos y verbos subordinados (como modales o relativos).
 
-        Requiere un modelo spaCy cargado. Retorna float entre 0 y 1.
+        Requiere un modelo spaCy cargado o un `doc` ya parseado. Retorna float entre 0 y 1.
         """
-        if not self.spacy or not text.strip():
+        if (doc is None and not self.spacy) or not text.strip():
             return None
 
         try:
-            doc = self.spacy(text)
+            if doc is None:
+                doc = self.spacy(text)
             subj_words = [
                 token for token in doc
                 if token.pos_ in {"ADJ", "VERB"} and token.dep_ in {"amod", "acomp", "advcl", "relcl"}
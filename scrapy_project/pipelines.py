@@ -6,24 +6,30 @@ from datetime import datetime
 from hashlib import sha256
 from time import monotonic
 
-import psycopg2
-from psycopg2 import OperationalError
-from psycopg2.extras import Json
+from psycopg2 import IntegrityError, OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
 
 from scrapy.exceptions import DropItem, CloseSpider
 from dotenv import load_dotenv
 from itemadapter import ItemAdapter
 
-from .nlp_orchestrator import NLPOrchestrator
-from .storage_helpers import store_article, save_entities, save_framing, _infer_domain_from_url
-
-# === NLP locales
-from .nlp_transformers import PosverdadNLP
-from .preprocessor import Preprocessor
-try:
-    import spacy
-except Exception:
-    spacy = None
+from twisted.internet import defer
+
+from . import db
+from .bulk_writer import store_articles_bulk
+from .dedup_index import DedupIndex
+from .framing_client import (
+    FRAMING_BATCH_SIZE, FRAMING_CACHE_PATH, FRAMING_CONCURRENCY, FRAMING_ENABLED, FRAMING_URL,
+    AsyncFramingClient, FramingService, framing_versions,
+)
+from .id_cache import ID_CACHE
+from .nlp_cache import NLP_CACHE, NLP_CACHE_MAX_MB, NLP_CACHE_PATH, NLPResultCache, model_versions
+from .nlp_metrics import StageMetrics, hist_bucket
+from .nlp_pool import NLPProcessPool, ProfiledFactory, build_nlp_stack, nlp_options_from_settings
+from .preprocessed_codec import PREPROCESSED_STORAGE, side_table_available, write_preprocessed
+from .storage_helpers import (
+    store_article, save_entities, save_framing, _infer_domain_from_url, title_norm, url_key,
+)
 
 
 # =========================
@@ -32,7 +38,6 @@ except Exception:
 load_dotenv()
 
 LOGS_DIR = os.getenv("LOGS_DIR", "logs")
-os.makedirs(LOGS_DIR, exist_ok=True)
 
 LOG_TO_CONSOLE = (os.getenv("LOG_TO_CONSOLE", "true").lower() == "true")
 
@@ -43,35 +48,95 @@ MAX_DUPLICATES_IN_A_ROW = int(os.getenv("MAX_DUPLICATES_IN_A_ROW", "50"))
 # Corte duro por total de duplicados (0 = desactivado)
 MAX_DUPLICATES_TOTAL = int(os.getenv("MAX_DUPLICATES_TOTAL", "0"))
 
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
-POSTGRES_PORT = int(os.getenv("POSTGRES_PORT", "5432"))
-POSTGRES_DB = os.getenv("POSTGRES_DB", "posverdad")
-POSTGRES_USER = os.getenv("POSTGRES_USER", "posverdad")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "posverdad")
+# Índice de duplicados en memoria (Bloom) precargado en open_spider
+DEDUP_INDEX = (os.getenv("DEDUP_INDEX", "true").lower() == "true")
+DEDUP_BLOOM_CAPACITY = int(os.getenv("DEDUP_BLOOM_CAPACITY", "1000000"))
+DEDUP_BLOOM_ERROR = float(os.getenv("DEDUP_BLOOM_ERROR", "0.01"))
 
-# Logger “humano”
-RUN_TS = datetime.now().strftime("%Y%m%d-%H%M%S")
-RUN_ID = f"{RUN_TS}-{uuid.uuid4().hex[:8]}"
-LOG_HUMAN = os.path.join(LOGS_DIR, f"pipeline_{RUN_ID}.log")
+# NLP por lotes: 0/1 = análisis por ítem (clásico); N>1 = acumula N artículos nuevos
+# (o lo que haya tras NLP_BATCH_TIMEOUT segundos) y los analiza con analyze_many.
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "0"))
+NLP_BATCH_TIMEOUT = float(os.getenv("NLP_BATCH_TIMEOUT", "30"))
 
-logger = logging.getLogger("posverdad.pipeline")
-logger.setLevel(logging.DEBUG)
+# Dónde corre el NLP: "inline" (hilo del reactor, clásico) | "process" (pool de procesos)
+NLP_EXECUTION = os.getenv("NLP_EXECUTION", "inline").strip().lower()
+# Workers del pool (0 = núcleos - 1)
+NLP_WORKERS = int(os.getenv("NLP_WORKERS", "0"))
 
-_file_handler = logging.FileHandler(LOG_HUMAN, mode="a", encoding="utf-8")
-_file_handler.setLevel(logging.DEBUG)
-_file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
-logger.addHandler(_file_handler)
+# Escritura por lotes (group commit): 0/1 = un commit por ítem; N>1 = lotes de N artículos
+ARTICLE_WRITE_BATCH = int(os.getenv("ARTICLE_WRITE_BATCH", "0"))
+ARTICLE_WRITE_TIMEOUT = float(os.getenv("ARTICLE_WRITE_TIMEOUT", "10"))
 
-if LOG_TO_CONSOLE:
-    _console = logging.StreamHandler()
-    _console.setLevel(logging.INFO)
-    _console.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
-    logger.addHandler(_console)
-    logger.info("[👀] Consola activada para logs.")
-else:
-    logger.info("[🔇] Logging a consola desactivado.")
+# Conexión: pool compartido de scrapy_project.db (DB_POOL_MIN / DB_POOL_MAX)
+DB_POOL_MIN = db.DB_POOL_MIN
+DB_POOL_MAX = db.DB_POOL_MAX
 
-logger.info(f"[✅] Logging inicializado: {os.path.abspath(LOG_HUMAN)}")
+# Logger “humano”: los handlers (archivo del run + consola) se crean al construir el
+# primer pipeline, no al importar el módulo (scrapy list, tests y scripts no abren logs)
+logger = logging.getLogger("posverdad.pipeline")
+logger.setLevel(logging.DEBUG)
+
+RUN_ID = None
+LOG_HUMAN = None
+
+
+def setup_run_logging() -> str:
+    """Crea RUN_ID y los handlers del log del run (una vez por proceso); devuelve RUN_ID."""
+    global RUN_ID, LOG_HUMAN
+    if RUN_ID is not None:
+        return RUN_ID
+    run_ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+    RUN_ID = f"{run_ts}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    LOG_HUMAN = os.path.join(LOGS_DIR, f"pipeline_{RUN_ID}.log")
+
+    file_handler = logging.FileHandler(LOG_HUMAN, mode="a", encoding="utf-8")
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    logger.addHandler(file_handler)
+
+    if LOG_TO_CONSOLE:
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        console.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        logger.addHandler(console)
+        logger.info("[👀] Consola activada para logs.")
+    else:
+        logger.info("[🔇] Logging a consola desactivado.")
+
+    logger.info(f"[✅] Logging inicializado: {os.path.abspath(LOG_HUMAN)}")
+    return RUN_ID
+
+
+# Dedup: sentencias calientes preparadas en cada conexión del pool
+DEDUP_KEYS_STMT = db.register_prepared(
+    "posverdad_dedup_keys",
+    "SELECT r, id FROM ("
+    "(SELECT 1 AS r, id FROM articles"
+    " WHERE %s::boolean AND url_key IN (posverdad_url_key(%s::text), posverdad_url_key(%s::text)) LIMIT 1)"
+    " UNION ALL "
+    "(SELECT 2 AS r, id FROM articles WHERE %s::boolean AND body_hash = %s::text LIMIT 1)"
+    " UNION ALL "
+    "(SELECT 3 AS r, id FROM articles"
+    " WHERE %s::boolean AND lower(domain) = %s::text AND title_norm = posverdad_title_norm(%s::text) LIMIT 1)"
+    ") d ORDER BY r LIMIT 1",
+)
+DEDUP_URL_STMT = db.register_prepared(
+    "posverdad_dedup_url", "SELECT id FROM articles WHERE url = ANY(%s::text[]) LIMIT 1"
+)
+DEDUP_HASH_STMT = db.register_prepared(
+    "posverdad_dedup_hash", "SELECT id FROM articles WHERE body_hash = %s LIMIT 1"
+)
+DEDUP_TITLE_STMT = db.register_prepared(
+    "posverdad_dedup_title",
+    """
+                SELECT a.id
+                  FROM articles a
+                 WHERE lower(a.domain) = %s
+                   AND regexp_replace(lower(a.title), '\\s+', ' ', 'g') = %s
+                 LIMIT 1
+                """,
+)
 
 
 def _hash_body(text: str) -> str:
@@ -85,7 +150,7 @@ class ScrapyProjectPipeline:
     def __init__(self):
         self.crawler = None
         self.conn = None
-        self.run_id = RUN_ID
+        self.run_id = setup_run_logging()
         # Contadores finos
         self.inserted = 0
         self.updated = 0
@@ -94,58 +159,66 @@ class ScrapyProjectPipeline:
         self.discarded_invalid = 0
         self.errors = 0
         self._closing = False
+        self.db_pool_min = DB_POOL_MIN
+        self.db_pool_max = DB_POOL_MAX
 
         self.duplicates_in_a_row = 0
         self._t0 = None
 
-        # =========================
-        # A4: Carga de modelos y cachés
-        # =========================
-        spacy_model = None
-        if spacy is not None:
-            try:
-                spacy_model = spacy.load("es_core_news_md")
-                logger.info("[NLP] spaCy 'es_core_news_md' cargado.")
-            except Exception as e:
-                logger.warning(f"[NLP] No se pudo cargar 'es_core_news_md': {e}. Fallback a blank('es')")
-                try:
-                    spacy_model = spacy.blank("es")
-                    logger.info("[NLP] spaCy blank('es') cargado (sin NER/dep).")
-                except Exception as e2:
-                    logger.warning(f"[NLP] spaCy no disponible: {e2}")
-                    spacy_model = None
-        else:
-            logger.warning("[NLP] spaCy no está instalado en este entorno.")
-
-        # Guardar referencia para heurísticas posteriores
-        self.spacy_model = spacy_model
+        # Índice de duplicados (None = consultas directas a la DB)
+        self.dedup_index = None
+        # True si articles tiene url_key/title_norm completos → una sola consulta indexada
+        self.dedup_keys = False
+        # compact | json; en open_spider cae a json si falta la tabla article_preprocessed
+        self.preprocessed_storage = PREPROCESSED_STORAGE
+
+        # NLP por lotes: [(article_id, item)] pendientes de análisis
+        self.nlp_batch_size = NLP_BATCH_SIZE
+        self.nlp_batch_timeout = NLP_BATCH_TIMEOUT
+        self._nlp_buffer: list[tuple[int, dict]] = []
+        self._nlp_buffer_t0 = None
+
+        # Escritura por lotes: ítems validados y no duplicados pendientes de commit
+        self.write_batch_size = ARTICLE_WRITE_BATCH
+        self.write_batch_timeout = ARTICLE_WRITE_TIMEOUT
+        self._write_buffer: list[dict] = []
+        self._write_buffer_t0 = None
+        self._write_keys: set = set()
+
+        # Ejecución del NLP: en línea o en pool de procesos (Deferred)
+        self.nlp_execution = NLP_EXECUTION
+        self.nlp_workers = NLP_WORKERS
+        self._nlp_pool = None
+        self._nlp_pending: set = set()
+        # Perfiles spaCy (None = los de spacy_profiles: NLP_PROFILE / NLP_PREPROCESS_PROFILE)
+        self.nlp_profile = None
+        self.nlp_preprocess_profile = None
+        # Sentimiento (SENTIMENT_*) y NLP_STAGE_TIMING desde settings; vacío = el entorno
+        self.nlp_options: dict = {}
+
+        # Caché persistente de resultados NLP (se abre en open_spider)
+        self.nlp_cache_enabled = NLP_CACHE
+        self.nlp_cache_path = NLP_CACHE_PATH
+        self.nlp_cache_max_mb = NLP_CACHE_MAX_MB
+        self.nlp_cache = None
+
+        # Framing remoto asíncrono (FramingService): no bloquea el procesamiento del ítem
+        self.framing_enabled = FRAMING_ENABLED
+        self.framing_url = FRAMING_URL
+        self.framing_concurrency = FRAMING_CONCURRENCY
+        self.framing_batch_size = FRAMING_BATCH_SIZE
+        self.framing = None
+        self._framing_pending: set = set()
+
+        # Tiempos por etapa del NLP (stage_timing de cada salida) → Stats + nlp_run_stage_metrics
+        self.nlp_metrics = StageMetrics()
 
         # =========================
-        # A1: Inyección de backends locales (con fallback)
+        # A4: Carga de modelos en open_spider, con los settings ya aplicados
+        # (solo en modo en línea; el pool carga en cada worker)
         # =========================
-        posverdad = None
-        try:
-            posverdad = PosverdadNLP(nlp_model=spacy_model)
-            logger.info("[NLP] PosverdadNLP inicializado (pysentimiento + spaCy).")
-        except Exception as e:
-            logger.warning(f"[NLP] PosverdadNLP no disponible: {e}")
-            posverdad = None
-
-        preproc = None
-        try:
-            preproc = Preprocessor(engine="spacy")
-            logger.info("[NLP] Preprocessor(spacy) inicializado.")
-        except Exception as e:
-            logger.warning(f"[NLP] Preprocessor no disponible: {e}")
-            preproc = None
-
-        # Orquestador con dependencias inyectadas
-        self.nlp = NLPOrchestrator(
-            spacy_model=spacy_model,
-            posverdad_nlp=posverdad,
-            preprocessor=preproc,
-            framing_analyzer=None,  # activable más adelante sin coste de API
-        )
+        self.spacy_model = None
+        self.nlp = None
 
     def _request_close(self, spider, reason: str):
         """Pide el cierre del spider al engine, solo una vez, y evita tracebacks."""
@@ -165,6 +238,32 @@ class ScrapyProjectPipeline:
     def from_crawler(cls, crawler):
         obj = cls()
         obj.crawler = crawler
+        settings = getattr(crawler, "settings", None)
+        if settings is not None:
+            obj.nlp_batch_size = settings.getint("NLP_BATCH_SIZE", obj.nlp_batch_size)
+            obj.nlp_batch_timeout = settings.getfloat("NLP_BATCH_TIMEOUT", obj.nlp_batch_timeout)
+            obj.nlp_execution = (settings.get("NLP_EXECUTION") or obj.nlp_execution).strip().lower()
+            obj.nlp_workers = settings.getint("NLP_WORKERS", obj.nlp_workers)
+            obj.nlp_profile = settings.get("NLP_PROFILE") or obj.nlp_profile
+            obj.nlp_preprocess_profile = settings.get("NLP_PREPROCESS_PROFILE") or obj.nlp_preprocess_profile
+            obj.nlp_options = nlp_options_from_settings(settings)
+            cache_flag = settings.get("NLP_CACHE")
+            if cache_flag is not None:
+                obj.nlp_cache_enabled = str(cache_flag).strip().lower() in ("1", "true", "yes", "on")
+            obj.nlp_cache_max_mb = settings.getfloat("NLP_CACHE_MAX_MB", obj.nlp_cache_max_mb)
+            framing_flag = settings.get("FRAMING_ENABLED")
+            if framing_flag is not None:
+                obj.framing_enabled = str(framing_flag).strip().lower() in ("1", "true", "yes", "on")
+            obj.framing_url = settings.get("FRAMING_URL") or obj.framing_url
+            obj.framing_concurrency = settings.getint("FRAMING_CONCURRENCY", obj.framing_concurrency)
+            obj.framing_batch_size = settings.getint("FRAMING_BATCH_SIZE", obj.framing_batch_size)
+            obj.preprocessed_storage = (
+                settings.get("PREPROCESSED_STORAGE") or obj.preprocessed_storage
+            ).strip().lower()
+            obj.write_batch_size = settings.getint("ARTICLE_WRITE_BATCH", obj.write_batch_size)
+            obj.db_pool_min = settings.getint("DB_POOL_MIN", obj.db_pool_min)
+            obj.db_pool_max = settings.getint("DB_POOL_MAX", obj.db_pool_max)
+            obj.write_batch_timeout = settings.getfloat("ARTICLE_WRITE_TIMEOUT", obj.write_batch_timeout)
         return obj
 
     def _bump(self, key: str, delta: int = 1):
@@ -182,17 +281,13 @@ class ScrapyProjectPipeline:
         self._t0 = monotonic()
         # Conexión a Postgres
         try:
-            self.conn = psycopg2.connect(
-                host=POSTGRES_HOST,
-                port=POSTGRES_PORT,
-                dbname=POSTGRES_DB,
-                user=POSTGRES_USER,
-                password=POSTGRES_PASSWORD,
-            )
-            self.conn.autocommit = False  # transacciones manuales por ítem
+            db.get_pool(minconn=self.db_pool_min, maxconn=self.db_pool_max)
+            # Conexión del pool con dedup/upsert/vínculos ya preparados (PREPARE)
+            self.conn = db.getconn(autocommit=False)  # transacciones manuales por ítem
             logger.info(
                 "Conexión a la base de datos establecida. "
-                f"host={POSTGRES_HOST} db={POSTGRES_DB} user={POSTGRES_USER}"
+                f"host={db.POSTGRES_HOST} db={db.POSTGRES_DB} user={db.POSTGRES_USER} "
+                f"preparadas={len(getattr(self.conn, 'prepared', ()))}"
             )
         except OperationalError as e:
             logger.error(f"Fallo de conexión a Postgres: {e}")
@@ -215,6 +310,21 @@ class ScrapyProjectPipeline:
 
         logger.info(f"[🆔] RUN_ID: {self.run_id}")
 
+        self._detect_dedup_keys()
+        self._detect_preprocessed_storage()
+        self._preload_dedup_index()
+        self._open_nlp_cache()
+        self._open_framing()
+
+        if self.nlp_execution == "process":
+            # Cada worker carga los modelos una vez al arrancar (initializer del pool)
+            self._nlp_pool = NLPProcessPool(
+                workers=self.nlp_workers or None,
+                factory=ProfiledFactory(self.nlp_profile, self.nlp_preprocess_profile, self.nlp_options),
+            ).start()
+            return
+        self._load_nlp_stack()
+
         # Warm-up de modelos (no bloqueante si falla)
         try:
             sample = "Warm-up: economía chilena y política pública."
@@ -223,7 +333,73 @@ class ScrapyProjectPipeline:
         except Exception as e:
             logger.warning(f"[NLP] Warm-up falló (no bloqueante): {e}")
 
+    def _load_nlp_stack(self):
+        """Carga el stack NLP en línea una sola vez, con perfiles y SENTIMENT_* ya resueltos."""
+        if self.nlp is None:
+            self.spacy_model, self.nlp = build_nlp_stack(self.nlp_profile, self.nlp_preprocess_profile, self.nlp_options)
+
     def close_spider(self, spider):
+        # Escribir el lote pendiente (sus artículos nuevos pasan al lote NLP)
+        if self._write_buffer:
+            self._flush_write_batch()
+
+        # Drenar el lote NLP pendiente antes del resumen
+        if self._nlp_buffer:
+            self._flush_nlp_batch()
+
+        # Esperar los análisis en vuelo del pool (y luego el framing que éstos encolen)
+        if self._nlp_pending:
+            logger.info(f"[NLP] Esperando {len(self._nlp_pending)} análisis en curso…")
+            dl = defer.DeferredList(list(self._nlp_pending), consumeErrors=True)
+            dl.addBoth(lambda _: self._drain_framing())
+            return dl.addBoth(lambda _: self._finish_run(spider))
+        drained = self._drain_framing()
+        if drained is not None:
+            return drained.addBoth(lambda _: self._finish_run(spider))
+        return self._finish_run(spider)
+
+    def _tx_aborted(self) -> bool:
+        """True si Postgres abortó la transacción en curso (el COMMIT será un ROLLBACK)."""
+        try:
+            return self.conn.info.transaction_status == TRANSACTION_STATUS_INERROR
+        except Exception:
+            return False
+
+    def _settle_id_cache(self, tx_aborted: bool):
+        """Tras cerrar la transacción: promueve los ids aprendidos o los descarta."""
+        if tx_aborted:
+            ID_CACHE.rollback(self.conn)
+        else:
+            ID_CACHE.commit(self.conn)
+
+    def _forget_stale_ids(self, error: Exception):
+        """
+        Un IntegrityError (p.ej. FK en articles_entities) puede venir de ids cacheados cuyas
+        filas borró/fusionó un job de reconcile: se vacía la caché antes de reintentar.
+        """
+        if isinstance(error, IntegrityError):
+            ID_CACHE.forget()
+            self._bump("posverdad/id_cache/invalidations", 1)
+            logger.warning(f"[🧹] Caché de ids vaciada tras error de integridad: {error}")
+
+    def _log_id_cache_stats(self):
+        """Tasa de aciertos de la caché nombre → id (log + Scrapy Stats)."""
+        st = ID_CACHE.stats()
+        for kind, v in st.items():
+            if not isinstance(v, dict):
+                continue
+            self._bump(f"posverdad/id_cache/{kind}/hits", v["hits"])
+            self._bump(f"posverdad/id_cache/{kind}/misses", v["misses"])
+            logger.info(f"[ids] {kind}: hits={v['hits']} misses={v['misses']} hit_rate={v['hit_rate']:.1%}")
+        logger.info(f"[ids] caché: {st['size']}/{st['capacity']} entradas")
+
+    def _finish_run(self, spider):
+        if self._nlp_pool is not None:
+            self._nlp_pool.shutdown()
+            self._nlp_pool = None
+        self._close_framing()
+        self._close_nlp_cache()
+
         # Cerrar con resumen
         try:
             duration_seconds = None
@@ -275,16 +451,18 @@ class ScrapyProjectPipeline:
                 f"❌ Errores: {self.errors}\n"
             )
             logger.info(resumen)
+            self._log_id_cache_stats()
+            self._log_nlp_stage_metrics()
             with open(os.path.join(LOGS_DIR, "summary.log"), "a", encoding="utf-8") as fsum:
                 fsum.write(resumen + "\n")
         except Exception as e:
             logger.warning(f"No se pudo actualizar nlp_runs: {e}")
         finally:
-            try:
-                if self.conn:
-                    self.conn.close()
-            except Exception:
-                pass
+            self._persist_nlp_stage_metrics()
+            # Devolver la conexión y cerrar el pool del proceso (sin conexiones ociosas al terminar)
+            db.putconn(self.conn)
+            self.conn = None
+            db.close_pool()
 
         # Notificación opcional (no detiene cierre)
         try:
@@ -441,6 +619,72 @@ class ScrapyProjectPipeline:
                 alts.add(base.replace("://", "://www."))
             return list(alts)
 
+    def _preload_dedup_index(self):
+        """Carga claves de URL, body_hash y dominio+título en filtros de Bloom (no bloqueante)."""
+        if not DEDUP_INDEX:
+            return
+        t0 = monotonic()
+        try:
+            idx = DedupIndex(capacity=DEDUP_BLOOM_CAPACITY, error_rate=DEDUP_BLOOM_ERROR)
+            with self.conn:
+                # cursor con nombre (server-side): no trae toda la tabla a memoria de una vez
+                with self.conn.cursor(name="dedup_preload") as cur:
+                    n = idx.load(cur)
+            self.dedup_index = idx
+            logger.info(f"[dedup] Índice en memoria: {n} artículos en {int((monotonic() - t0) * 1000)} ms")
+        except Exception as e:
+            self.dedup_index = None
+            logger.warning(f"[dedup] No se pudo precargar el índice (uso consultas directas): {e}")
+
+    def _dedup_skip(self, rule: str):
+        """Regla resuelta en memoria (sin consulta a la DB)."""
+        self._bump(f"posverdad/dedup_index_skip/{rule}", 1)
+
+    def _detect_preprocessed_storage(self):
+        """Con PREPROCESSED_STORAGE=compact, confirma que la migración de article_preprocessed está aplicada."""
+        if self.preprocessed_storage != "compact":
+            return
+        try:
+            with self.conn:
+                with self.conn.cursor() as cur:
+                    if side_table_available(cur):
+                        return
+            logger.warning("[preprocessed] Falta la tabla article_preprocessed (make migrate-preprocessed): se guarda json.")
+        except Exception as e:
+            logger.warning(f"[preprocessed] No se pudo detectar article_preprocessed (se guarda json): {e}")
+        self.preprocessed_storage = "json"
+
+    def _detect_dedup_keys(self):
+        """Activa la consulta combinada si existen url_key/title_norm y el backfill terminó."""
+        self.dedup_keys = False
+        try:
+            with self.conn:
+                with self.conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT count(*)
+                          FROM information_schema.columns
+                         WHERE table_name = 'articles'
+                           AND column_name IN ('url_key', 'title_norm')
+                        """
+                    )
+                    row = cur.fetchone()
+                    if not row or int(row[0]) < 2:
+                        logger.info("[dedup] Sin columnas url_key/title_norm: consultas legacy.")
+                        return
+                    # Servido por idx_articles_dedup_pending (parcial)
+                    cur.execute(
+                        "SELECT EXISTS (SELECT 1 FROM articles WHERE url_key IS NULL OR title_norm IS NULL)"
+                    )
+                    row = cur.fetchone()
+                    if row and row[0]:
+                        logger.warning("[dedup] Backfill de url_key/title_norm pendiente: consultas legacy.")
+                        return
+            self.dedup_keys = True
+            logger.info("[dedup] Claves url_key/title_norm disponibles: consulta combinada.")
+        except Exception as e:
+            logger.warning(f"[dedup] No se pudo detectar url_key/title_norm (uso legacy): {e}")
+
     def _check_duplicates(self, cur, item: dict) -> str | None:
         """
         Retorna razón si es duplicado, None si no.
@@ -448,55 +692,668 @@ class ScrapyProjectPipeline:
           1) URL/url_canonical normalizadas
           2) body_hash
           3) dominio + título normalizado
+        Con índice en memoria, cada regla consulta la DB solo si el filtro de Bloom
+        indica un posible duplicado. Con url_key/title_norm en la tabla, las reglas
+        restantes van en una sola consulta indexada.
         """
+        idx = self.dedup_index
         url = (item.get("url") or "").strip()
         url_can = (item.get("url_canonical") or "").strip()
         title = (item.get("title") or "").strip()
         body = (item.get("body") or "").strip()
 
-        # 1) URL variantes
-        url_variants = self._normalize_url_variants(url)
-        if url_can:
-            url_variants.extend(self._normalize_url_variants(url_can))
-        url_variants = list(dict.fromkeys(v for v in url_variants if v))  # dedup
-
-        if url_variants:
+        h = _hash_body(body)
+        item["body_hash"] = h
+        dom = (item.get("domain") or "").lower()
+        tnorm = title_norm(title)
+
+        # Reglas a consultar (el índice en memoria descarta las que no pueden coincidir)
+        check_url = bool(url or url_can)
+        check_hash = True
+        check_title = bool(dom and tnorm)
+        if idx is not None:
+            if check_url and not idx.might_have_url(url, url_can):
+                check_url = False
+                self._dedup_skip("url")
+            if not idx.might_have_hash(h):
+                check_hash = False
+                self._dedup_skip("hash")
+            if check_title and not idx.might_have_title(dom, title):
+                check_title = False
+                self._dedup_skip("title")
+
+        if self.dedup_keys and db.is_prepared(cur, DEDUP_KEYS_STMT):
+            # Todas las ramas en la sentencia preparada; las descartadas van con flag false
+            if not (check_url or check_hash or check_title):
+                return None
+            db.execute_prepared(
+                cur,
+                DEDUP_KEYS_STMT,
+                (check_url, url or url_can, url_can or url, check_hash, h, check_title, dom, title),
+            )
+            row = cur.fetchone()
+            if not row:
+                return None
+            reason = {1: "Duplicado URL", 2: "Duplicado HASH", 3: "Duplicado (domain+title)"}[row[0]]
+            return f"{reason} (article_id={row[1]})"
+
+        if self.dedup_keys:
+            parts, params = [], []
+            if check_url:
+                parts.append(
+                    "(SELECT 1 AS r, id FROM articles"
+                    " WHERE url_key IN (posverdad_url_key(%s), posverdad_url_key(%s)) LIMIT 1)"
+                )
+                params += [url or url_can, url_can or url]
+            if check_hash:
+                parts.append("(SELECT 2 AS r, id FROM articles WHERE body_hash = %s LIMIT 1)")
+                params.append(h)
+            if check_title:
+                parts.append(
+                    "(SELECT 3 AS r, id FROM articles"
+                    " WHERE lower(domain) = %s AND title_norm = posverdad_title_norm(%s) LIMIT 1)"
+                )
+                params += [dom, title]
+            if not parts:
+                return None
             cur.execute(
-                "SELECT id FROM articles WHERE url = ANY(%s) LIMIT 1",
-                (url_variants,)
+                "SELECT r, id FROM (" + " UNION ALL ".join(parts) + ") d ORDER BY r LIMIT 1",
+                tuple(params),
             )
             row = cur.fetchone()
-            if row:
-                return f"Duplicado URL (article_id={row[0]})"
+            if not row:
+                return None
+            reason = {1: "Duplicado URL", 2: "Duplicado HASH", 3: "Duplicado (domain+title)"}[row[0]]
+            return f"{reason} (article_id={row[1]})"
+
+        # ——— Legacy: una consulta por regla ———
+        # 1) URL variantes
+        if check_url:
+            url_variants = self._normalize_url_variants(url)
+            if url_can:
+                url_variants.extend(self._normalize_url_variants(url_can))
+            url_variants = list(dict.fromkeys(v for v in url_variants if v))  # dedup
+            if url_variants:
+                db.execute_prepared(cur, DEDUP_URL_STMT, (url_variants,))
+                row = cur.fetchone()
+                if row:
+                    return f"Duplicado URL (article_id={row[0]})"
 
         # 2) body_hash
-        h = _hash_body(body)
-        item["body_hash"] = h
-        cur.execute("SELECT id FROM articles WHERE body_hash = %s LIMIT 1", (h,))
-        row = cur.fetchone()
-        if row:
-            return f"Duplicado HASH (article_id={row[0]})"
+        if check_hash:
+            db.execute_prepared(cur, DEDUP_HASH_STMT, (h,))
+            row = cur.fetchone()
+            if row:
+                return f"Duplicado HASH (article_id={row[0]})"
 
         # 3) dominio + título normalizado
-        dom = (item.get("domain") or "").lower()
-        title_norm = " ".join(title.lower().split())
-        if dom and title_norm:
-            cur.execute(
-                """
-                SELECT a.id
-                  FROM articles a
-                 WHERE lower(a.domain) = %s
-                   AND regexp_replace(lower(a.title), '\s+', ' ', 'g') = %s
-                 LIMIT 1
-                """,
-                (dom, title_norm)
-            )
+        if check_title:
+            db.execute_prepared(cur, DEDUP_TITLE_STMT, (dom, tnorm))
             row = cur.fetchone()
             if row:
                 return f"Duplicado (domain+title) (article_id={row[0]})"
 
         return None
 
+    def _drop_duplicate(self, spider, dup_reason: str):
+        """Cuenta el duplicado, aplica los cortes por racha/total y lanza DropItem."""
+        self.discarded += 1
+        self.discarded_duplicates += 1
+        self._bump("posverdad/discarded_duplicates", 1)
+        self.duplicates_in_a_row += 1
+
+        # Corte por total de duplicados
+        if MAX_DUPLICATES_TOTAL and self.discarded_duplicates >= MAX_DUPLICATES_TOTAL:
+            logger.warning(
+                f"Demasiados duplicados en total "
+                f"({self.discarded_duplicates} >= {MAX_DUPLICATES_TOTAL}). Solicitando cierre…"
+            )
+            self._request_close(spider, "too_many_duplicates_total")
+            # No llenamos el log con tracebacks: descartamos silenciosamente este y los siguientes ítems
+            raise DropItem("closing: too_many_duplicates_total")
+
+        logger.info(
+            f"[🟠] Drop duplicado — {dup_reason}. "
+            f"streak={self.duplicates_in_a_row}/{MAX_DUPLICATES_IN_A_ROW}"
+        )
+
+        # Corte por racha de duplicados consecutivos
+        if self.duplicates_in_a_row >= MAX_DUPLICATES_IN_A_ROW:
+            logger.warning(
+                f"Demasiados duplicados seguidos "
+                f"({self.duplicates_in_a_row} >= {MAX_DUPLICATES_IN_A_ROW}). Solicitando cierre…"
+            )
+            self._request_close(spider, "too_many_duplicates_in_a_row")
+            raise DropItem("closing: too_many_duplicates_in_a_row")
+
+        # Si no se cierra aún, solo descartamos este duplicado
+        raise DropItem("duplicate")
+
+    # -------------------------
+    # Escritura por lotes (group commit)
+    # -------------------------
+    @staticmethod
+    def _write_keys_for(item: dict) -> set:
+        """Claves de duplicado (mismas reglas que _check_duplicates) de un ítem en memoria."""
+        keys = set()
+        for u in (item.get("url"), item.get("url_canonical")):
+            k = url_key(u)
+            if k:
+                keys.add(("url", k))
+        if item.get("body_hash"):
+            keys.add(("hash", item["body_hash"]))
+        dom = (item.get("domain") or "").lower()
+        tnorm = title_norm(item.get("title"))
+        if dom and tnorm:
+            keys.add(("title", f"{dom}\x00{tnorm}"))
+        return keys
+
+    def _write_batching(self) -> bool:
+        return (self.write_batch_size or 0) > 1
+
+    def _buffered_duplicate(self, item: dict) -> str | None:
+        """Duplicados contra ítems aún no escritos (la DB todavía no los ve)."""
+        if not self._write_keys:
+            return None
+        hits = self._write_keys_for(item) & self._write_keys
+        if not hits:
+            return None
+        rule = sorted(hits)[0][0]
+        reason = {"url": "Duplicado URL", "hash": "Duplicado HASH", "title": "Duplicado (domain+title)"}[rule]
+        return f"{reason} (en lote pendiente)"
+
+    def _buffer_write(self, item: dict):
+        if not self._write_buffer:
+            self._write_buffer_t0 = monotonic()
+        self._write_buffer.append(item)
+        self._write_keys |= self._write_keys_for(item)
+        logger.info(f"[3a] artículo en lote de escritura ({len(self._write_buffer)}/{self.write_batch_size})")
+
+        due = len(self._write_buffer) >= self.write_batch_size or (
+            (monotonic() - self._write_buffer_t0) >= self.write_batch_timeout
+        )
+        if due:
+            self._flush_write_batch()
+        return item
+
+    def _flush_write_batch(self):
+        """
+        Escribe el lote con store_articles_bulk (upsert multi-fila + merges por
+        conjuntos, UN commit), actualiza contadores y pasa los nuevos al NLP.
+        Si el lote falla, cada ítem se reintenta en su propia transacción; solo lo
+        efectivamente escrito entra al índice de duplicados y a los contadores.
+        """
+        batch, self._write_buffer = self._write_buffer, []
+        self._write_buffer_t0 = None
+        self._write_keys = set()
+        if not batch:
+            return None
+
+        t0 = monotonic()
+        try:
+            written = list(zip(batch, store_articles_bulk(self.conn, batch)))
+            self._settle_id_cache(False)
+            self._bump("posverdad/write_batches", 1)
+            logger.info(f"[3b] Lote escrito: {len(batch)} artículos en {int((monotonic() - t0) * 1000)} ms")
+        except Exception as e:
+            self._settle_id_cache(True)
+            self._forget_stale_ids(e)
+            self._bump("posverdad/write_batch_failures", 1)
+            logger.error(f"[💥] Error escribiendo lote ({len(batch)} artículos): {e}; reintento ítem por ítem")
+            written = self._write_one_by_one(batch)
+
+        for item, (article_id, created) in written:
+            if self.dedup_index is not None:
+                self.dedup_index.add_item(item)
+            item["article_id"] = article_id
+            item["was_created"] = created
+            self._count_saved(item, (item.get("title") or "").strip())
+            if created:
+                if not self._nlp_buffer:
+                    self._nlp_buffer_t0 = monotonic()
+                self._nlp_buffer.append((article_id, item))
+
+        # Sin lote NLP propio, los nuevos del lote de escritura se analizan juntos
+        if self._nlp_buffer and (not self._nlp_batching() or self._nlp_batch_due()):
+            return self._flush_nlp_batch()
+        return None
+
+    def _write_one_by_one(self, batch: list) -> list:
+        """Plan B de un lote fallido: store_article por ítem, cada uno con su commit."""
+        written = []
+        for item in batch:
+            try:
+                with self.conn:
+                    with self.conn.cursor() as cur:
+                        res = store_article(cur, item, return_created=True)
+                self._settle_id_cache(False)
+            except Exception as e:
+                self._settle_id_cache(True)
+                self._forget_stale_ids(e)
+                self.errors += 1
+                logger.error(f"[💥] Error guardando {item.get('url')}: {e}")
+                continue
+            if isinstance(res, tuple) and len(res) >= 2:
+                written.append((item, (res[0], bool(res[1]))))
+            else:
+                written.append((item, (res, None)))
+        return written
+
+    # -------------------------
+    # NLP: análisis y persistencia
+    # -------------------------
+    @staticmethod
+    def _text_for_nlp(item: dict) -> str:
+        text = (item.get("body") or "").strip()
+        if not text:
+            text = f"{(item.get('title') or '').strip()} {(item.get('subtitle') or '').strip()}".strip()
+        return text
+
+    def _nlp_batching(self) -> bool:
+        return (self.nlp_batch_size or 0) > 1
+
+    def _nlp_batch_due(self) -> bool:
+        if len(self._nlp_buffer) >= self.nlp_batch_size:
+            return True
+        if self._nlp_buffer_t0 is None:
+            return False
+        return (monotonic() - self._nlp_buffer_t0) >= self.nlp_batch_timeout
+
+    def _flush_nlp_batch(self):
+        """
+        Analiza el lote pendiente con NLPOrchestrator.analyze_many (nlp.pipe + sentimiento
+        batch) y persiste todos los resultados en UNA transacción. Con pool de procesos
+        devuelve el Deferred de la persistencia.
+        """
+        batch, self._nlp_buffer = self._nlp_buffer, []
+        self._nlp_buffer_t0 = None
+        if not batch:
+            return None
+
+        texts = [self._text_for_nlp(it) for _, it in batch]
+        t0 = monotonic()
+
+        # Solo se infiere lo que no está en la caché persistente
+        cached = self._nlp_cache_get(texts)
+        todo = [k for k, (t, c) in enumerate(zip(texts, cached)) if t and c is None]
+        if not todo:
+            logger.info(f"[2] Lote NLP resuelto desde caché ({len(batch)} artículos)")
+            self._store_nlp_results(batch, texts, self._merge_cached(cached, todo, []), t0)
+            return None
+        todo_texts = [texts[k] for k in todo]
+        logger.info(
+            f"[2] Ejecutando análisis NLP por lote ({len(todo)} de {len(batch)} artículos; resto en caché)…"
+        )
+
+        if self._nlp_pool is not None:
+            d = self._nlp_pool.analyze_many(todo_texts)
+            d.addErrback(self._nlp_failed, default=[{}] * len(todo))
+            d.addCallback(lambda fresh: self._store_nlp_results(
+                batch, texts, self._merge_cached(cached, todo, fresh, todo_texts), t0
+            ))
+            return self._track(d)
+
+        try:
+            analyze_many = getattr(self.nlp, "analyze_many", None)
+            if callable(analyze_many):
+                fresh = analyze_many(todo_texts)
+            else:
+                fresh = [self.nlp.analyze(t) for t in todo_texts]
+        except Exception as nlp_exc:
+            logger.warning(f"[2] NLP por lote falló: {nlp_exc}")
+            fresh = [{}] * len(todo)
+        self._store_nlp_results(batch, texts, self._merge_cached(cached, todo, fresh, todo_texts), t0)
+        return None
+
+    # -------------------------
+    # Framing remoto (asíncrono)
+    # -------------------------
+    def _open_framing(self):
+        if not self.framing_enabled or self.framing is not None:
+            return
+        cache = None
+        if self.nlp_cache_enabled:
+            try:
+                cache = NLPResultCache(
+                    FRAMING_CACHE_PATH, max_mb=self.nlp_cache_max_mb, versions=framing_versions(url=self.framing_url)
+                )
+            except Exception as e:
+                logger.warning(f"[framing] Caché persistente no disponible (sigo en memoria): {e}")
+        try:
+            client = AsyncFramingClient(
+                url=self.framing_url,
+                concurrency=self.framing_concurrency,
+                batch_size=self.framing_batch_size,
+                cache=cache,
+            )
+            self.framing = FramingService(client).start()
+        except Exception as e:
+            logger.warning(f"[framing] No disponible (sigo sin framing): {e}")
+            self.framing = None
+
+    def _schedule_framing(self, article_id, text: str):
+        """Encola el framing del artículo; se guarda cuando llega, en su propia transacción."""
+        d = self.framing.analyze(text)
+        d.addCallback(lambda framing: self._store_framing(article_id, framing))
+        d.addErrback(lambda f: logger.warning(f"[framing] {article_id}: {f.getErrorMessage()}"))
+        self._framing_pending.add(d)
+
+        def _untrack(result):
+            self._framing_pending.discard(d)
+            return result
+
+        d.addBoth(_untrack)
+        return d
+
+    def _store_framing(self, article_id, framing: dict):
+        if not framing:
+            self._bump("posverdad/framing_empty", 1)
+            return
+        try:
+            with self.conn:
+                with self.conn.cursor() as cur:
+                    save_framing(cur, article_id, framing)
+            self._bump("posverdad/framing_saved", 1)
+        except Exception as e:
+            self._bump("posverdad/framing_errors", 1)
+            logger.warning(f"[framing] fallo al guardar framing de {article_id}: {e}")
+
+    def _drain_framing(self):
+        """Deferred que espera el framing en vuelo (None si no hay)."""
+        if not self._framing_pending:
+            return None
+        logger.info(f"[framing] Esperando {len(self._framing_pending)} framings en curso…")
+        return defer.DeferredList(list(self._framing_pending), consumeErrors=True)
+
+    def _close_framing(self):
+        if self.framing is None:
+            return
+        client = self.framing.client
+        self.framing.shutdown()
+        for k, v in client.stats.items():
+            self._bump(f"posverdad/framing_{k}", v)
+        logger.info("[framing] " + " ".join(f"{k}={v}" for k, v in client.stats.items()))
+        cache_close = getattr(client.cache, "close", None)
+        if callable(cache_close):
+            cache_close()
+        self.framing = None
+
+    # -------------------------
+    # Métricas por etapa del NLP
+    # -------------------------
+    def _observe_nlp_timing(self, results: list):
+        """Saca `stage_timing` de cada resultado fresco (no se cachea ni se persiste) y lo acumula."""
+        for res in results:
+            if not isinstance(res, dict):
+                continue
+            timing = res.pop("stage_timing", None)
+            for stage, ms in self.nlp_metrics.observe(timing):
+                self._hist(f"posverdad/nlp/{stage}_ms", hist_bucket(ms))
+                if timing[stage].get("failed"):
+                    self._bump(f"posverdad/nlp/{stage}_failures", 1)
+
+    def _hist(self, key: str, bucket: str):
+        """Histograma en Scrapy Stats: {bucket: cuenta} bajo una sola clave."""
+        try:
+            hist = dict(self.crawler.stats.get_value(key) or {})
+            hist[bucket] = hist.get(bucket, 0) + 1
+            self.crawler.stats.set_value(key, hist)
+        except Exception:
+            pass
+
+    def _log_nlp_stage_metrics(self):
+        for stage, st in self.nlp_metrics.summary().items():
+            for q in ("p50_ms", "p95_ms", "p99_ms"):
+                try:
+                    self.crawler.stats.set_value(f"posverdad/nlp/{stage}_{q}", st[q])
+                except Exception:
+                    pass
+            logger.info(
+                f"[NLP] {stage}: n={st['samples']} p50={st['p50_ms']} ms p95={st['p95_ms']} ms "
+                f"p99={st['p99_ms']} ms fallos={st['failures']} tokens={st['tokens']}"
+            )
+
+    def _persist_nlp_stage_metrics(self):
+        """p50/p95/p99 por etapa en nlp_run_stage_metrics (no crítico si la tabla falta)."""
+        if not self.nlp_metrics.summary():
+            return
+        try:
+            with self.conn:
+                with self.conn.cursor() as cur:
+                    n = self.nlp_metrics.persist(cur, self.run_id)
+            logger.info(f"[NLP] Métricas por etapa guardadas ({n} etapas)")
+        except Exception as e:
+            logger.warning(f"No se pudieron guardar las métricas por etapa del NLP: {e}")
+
+    # -------------------------
+    # Caché persistente de resultados NLP
+    # -------------------------
+    def _open_nlp_cache(self):
+        if not self.nlp_cache_enabled or self.nlp_cache is not None:
+            return
+        try:
+            self.nlp_cache = NLPResultCache(
+                self.nlp_cache_path, max_mb=self.nlp_cache_max_mb, versions=model_versions(self.nlp_profile, self.nlp_options)
+            )
+            logger.info(
+                f"[NLP-cache] {self.nlp_cache.path} ({self.nlp_cache.stats()['size_mb']} MB) "
+                f"versiones: {self.nlp_cache.versions}"
+            )
+        except Exception as e:
+            logger.warning(f"[NLP-cache] No disponible (sigo sin caché): {e}")
+            self.nlp_cache = None
+
+    def _close_nlp_cache(self):
+        if self.nlp_cache is None:
+            return
+        st = self.nlp_cache.stats()
+        self._bump("posverdad/nlp_cache_evictions", st["evictions"])
+        logger.info(
+            f"[NLP-cache] hits={st['hits']} misses={st['misses']} hit_rate={st['hit_rate']:.1%} "
+            f"expulsadas={st['evictions']} tamaño={st['size_mb']} MB"
+        )
+        self.nlp_cache.close()
+        self.nlp_cache = None
+
+    def _nlp_cache_get(self, texts: list) -> list:
+        """Resultados cacheados alineados con `texts` (None = hay que inferir)."""
+        if self.nlp_cache is None:
+            return [None] * len(texts)
+        live = [k for k, t in enumerate(texts) if t]
+        out = [None] * len(texts)
+        try:
+            for k, res in zip(live, self.nlp_cache.get_many([_hash_body(texts[k]) for k in live])):
+                out[k] = res
+        except Exception as e:
+            logger.warning(f"[NLP-cache] lectura falló (no crítico): {e}")
+            return [None] * len(texts)
+        hits = sum(1 for r in out if r is not None)
+        self._bump("posverdad/nlp_cache_hits", hits)
+        self._bump("posverdad/nlp_cache_misses", len(live) - hits)
+        return out
+
+    def _nlp_cache_put(self, texts: list, results: list):
+        if self.nlp_cache is None:
+            return
+        try:
+            self.nlp_cache.put_many((_hash_body(t), r) for t, r in zip(texts, results) if t)
+        except Exception as e:
+            logger.warning(f"[NLP-cache] escritura falló (no crítico): {e}")
+
+    def _merge_cached(self, cached: list, todo: list, fresh, todo_texts: list = ()) -> list:
+        """Completa los resultados cacheados con los recién inferidos (y los guarda)."""
+        fresh = list(fresh or [])
+        if len(fresh) != len(todo):
+            fresh = [{}] * len(todo)
+        fresh = [r or {} for r in fresh]
+        self._observe_nlp_timing(fresh)
+        self._nlp_cache_put(list(todo_texts), fresh)
+        results = [c or {} for c in cached]
+        for k, r in zip(todo, fresh):
+            results[k] = r
+        return results
+
+    def _analyze_cached(self, text: str) -> dict:
+        """analyze() en línea con la caché persistente delante."""
+        cached = self._nlp_cache_get([text])[0]
+        if cached is not None:
+            logger.info("[2] NLP desde caché")
+            return cached
+        logger.info("[2] Ejecutando análisis NLP…")
+        result = self.nlp.analyze(text) or {}
+        self._observe_nlp_timing([result])
+        self._nlp_cache_put([text], [result])
+        return result
+
+    def _store_nlp_results(self, batch, texts, results, t0):
+        try:
+            with self.conn:
+                with self.conn.cursor() as cur:
+                    for (article_id, item), text, preprocessed in zip(batch, texts, results):
+                        self._persist_nlp(cur, item, article_id, (preprocessed or {}) if text else {})
+                    tx_aborted = self._tx_aborted()
+            self._settle_id_cache(tx_aborted)
+            if len(batch) > 1:
+                self._bump("posverdad/nlp_batches", 1)
+                logger.info(
+                    f"[2] Lote NLP persistido: {len(batch)} artículos en {int((monotonic() - t0) * 1000)} ms"
+                )
+        except Exception as e:
+            ID_CACHE.rollback(self.conn)
+            self._forget_stale_ids(e)
+            self.errors += 1
+            logger.error(f"[💥] Error persistiendo NLP ({len(batch)} artículos): {e}")
+
+    def _defer_nlp(self, item: dict, article_id, text: str):
+        """Envía el análisis al pool y devuelve un Deferred que resuelve al item ya persistido."""
+        logger.info("[2] Ejecutando análisis NLP en pool…")
+        d = self._nlp_pool.analyze(text)
+        d.addErrback(self._nlp_failed, default={})
+        d.addCallback(lambda pre: self._merge_cached([None], [0], [pre], [text])[0])
+        d.addCallback(lambda pre: self._store_nlp_results([(article_id, item)], [text], [pre], monotonic()))
+        d.addCallback(lambda _: item)
+        return self._track(d)
+
+    @staticmethod
+    def _nlp_failed(failure, default):
+        logger.warning(f"[2] NLP falló: {failure.getErrorMessage()}")
+        return default
+
+    def _track(self, d):
+        """Registra un Deferred en vuelo para que close_spider lo espere."""
+        self._nlp_pending.add(d)
+
+        def _untrack(result):
+            self._nlp_pending.discard(d)
+            return result
+
+        d.addBoth(_untrack)
+        return d
+
+    def _persist_nlp(self, cur, item: dict, article_id, preprocessed: dict):
+        """Limpia entidades, inyecta salidas NLP en el item y persiste preprocessed_data y relacionales."""
+        # Limpieza/unificación opcional de entidades
+        try:
+            from importlib import import_module
+            clean_and_unify_entities = None
+            for _mod in ("scrapy_project.heuristica_entities", "scrapy_project.heuristics_entities"):
+                try:
+                    _m = import_module(_mod)
+                    clean_and_unify_entities = getattr(_m, "clean_and_unify_entities", None)
+                    if clean_and_unify_entities:
+                        break
+                except Exception:
+                    pass
+            if clean_and_unify_entities:
+                # El filtro POS con Doc ya lo aplicó el orquestador sobre su parseo único;
+                # aquí solo se unifica/deduplica (idempotente) sin volver a parsear.
+                if isinstance(preprocessed, dict) and preprocessed.get("entities"):
+                    preprocessed["entities"] = clean_and_unify_entities(preprocessed["entities"])
+                if item.get("entities"):
+                    item["entities"] = clean_and_unify_entities(item["entities"])
+        except Exception as e:
+            logger.warning(f"[entities] limpieza/unificación falló: {e}")
+
+        # Inyectar salidas del NLP al item si no estaban
+        if isinstance(preprocessed, dict) and preprocessed:
+            if "entities" in preprocessed and not item.get("entities"):
+                item["entities"] = preprocessed["entities"]
+            if "polarity" in preprocessed and item.get("polarity") is None:
+                item["polarity"] = preprocessed["polarity"]
+            if "subjectivity" in preprocessed and item.get("subjectivity") is None:
+                item["subjectivity"] = preprocessed["subjectivity"]
+            if "framing" in preprocessed and not item.get("framing"):
+                item["framing"] = preprocessed["framing"]
+
+        # Persistir preprocessed_data (tokens/lemmas/pos empaquetados aparte) y relacionales
+        try:
+            if not write_preprocessed(cur, article_id, preprocessed, self.preprocessed_storage):
+                # La tabla lateral falló (bajo SAVEPOINT): el resto de la corrida va en json
+                self.preprocessed_storage = "json"
+            logger.info("[4b] preprocessed_data OK")
+
+            # Actualizar polarity/subjectivity si las tenemos
+            pol = item.get("polarity")
+            subj = item.get("subjectivity")
+            if pol is None and isinstance(preprocessed, dict):
+                pol = preprocessed.get("polarity")
+            if subj is None and isinstance(preprocessed, dict):
+                subj = preprocessed.get("subjectivity")
+
+            if pol is not None or subj is not None:
+                cur.execute(
+                    """
+                    UPDATE articles
+                       SET polarity     = COALESCE(%s, polarity),
+                           subjectivity = COALESCE(%s, subjectivity)
+                     WHERE id = %s
+                    """,
+                    (pol, subj, article_id),
+                )
+
+            # Entidades
+            ents = (item.get("entities") or preprocessed.get("entities") or [])
+            if ents:
+                try:
+                    save_entities(cur, article_id, ents)
+                    logger.info("[4c] entities OK")
+                except Exception as ee:
+                    self._forget_stale_ids(ee)
+                    logger.warning(f"[4x] fallo al guardar entities: {ee}")
+
+            # Framing (si no vino en el ítem ni del NLP, se pide al servicio sin esperar)
+            framing = item.get("framing") or preprocessed.get("framing") or {}
+            if framing:
+                try:
+                    save_framing(cur, article_id, framing)
+                    logger.info("[4d] framing OK")
+                except Exception as fe:
+                    logger.warning(f"[4x] fallo al guardar framing: {fe}")
+            elif self.framing is not None and preprocessed:
+                self._schedule_framing(article_id, self._text_for_nlp(item))
+
+        except Exception as upd_exc:
+            logger.warning(f"[4x] fallo al actualizar preprocessed_data/relacionales: {upd_exc}")
+
+    def _count_saved(self, item: dict, title: str):
+        """Contadores tras el commit: nuevo (inserted) o existente (updated)."""
+        created = item.get("was_created")
+        created_effective = True if created is None else bool(created)
+
+        if created_effective:
+            # Nuevo → reset streak y contadores
+            self.duplicates_in_a_row = 0
+            self.inserted += 1
+            self._bump("posverdad/inserted", 1)
+            logger.info("[✔] commit realizado (nuevo)")
+            logger.info(f"✅ Artículo NUEVO: {item['article_id']} — {title[:80]}")
+        else:
+            # Existente (upsert por conflicto) → cuenta como “updated”
+            self.updated += 1
+            self._bump("posverdad/updated", 1)
+            # OJO: la racha de duplicados la gestiona EXCLUSIVAMENTE el branch de drop duplicado
+            logger.info(f"[↩] Artículo ya existente (update por conflicto).")
+
     # ---------------
     # Proceso por ítem
     # ---------------
@@ -541,204 +1398,105 @@ class ScrapyProjectPipeline:
         # 5) run_id
         item.setdefault("run_id", self.run_id)
 
+        deferred_nlp = None  # (article_id, texto) si el NLP va al pool de procesos
+        tx_aborted = False
+        buffered = False  # True si el ítem espera al lote de escritura
+
         # === DUPLICADOS: evaluar y dropear antes del upsert ===
         try:
             with self.conn:
                 with self.conn.cursor() as cur:
                     # 5.1) check duplicados (antes de guardar)
-                    dup_reason = self._check_duplicates(cur, item)
+                    dup_reason = self._check_duplicates(cur, item) or self._buffered_duplicate(item)
                     if dup_reason:
-                        self.discarded += 1
-                        self.discarded_duplicates += 1
-                        self._bump("posverdad/discarded_duplicates", 1)
-                        self.duplicates_in_a_row += 1
-                        
-                        # Corte por total de duplicados
-                        if MAX_DUPLICATES_TOTAL and self.discarded_duplicates >= MAX_DUPLICATES_TOTAL:
-                            logger.warning(
-                                f"Demasiados duplicados en total "
-                                f"({self.discarded_duplicates} >= {MAX_DUPLICATES_TOTAL}). Solicitando cierre…"
-                            )
-                            self._request_close(spider, "too_many_duplicates_total")
-                            # No llenamos el log con tracebacks: descartamos silenciosamente este y los siguientes ítems
-                            raise DropItem("closing: too_many_duplicates_total")
-                        
-                        logger.info(
-                            f"[🟠] Drop duplicado — {dup_reason}. "
-                            f"streak={self.duplicates_in_a_row}/{MAX_DUPLICATES_IN_A_ROW}"
-                        )
-                        
-                        # Corte por racha de duplicados consecutivos
-                        if self.duplicates_in_a_row >= MAX_DUPLICATES_IN_A_ROW:
-                            logger.warning(
-                                f"Demasiados duplicados seguidos "
-                                f"({self.duplicates_in_a_row} >= {MAX_DUPLICATES_IN_A_ROW}). Solicitando cierre…"
-                            )
-                            self._request_close(spider, "too_many_duplicates_in_a_row")
-                            raise DropItem("closing: too_many_duplicates_in_a_row")
-                        
-                        # Si no se cierra aún, solo descartamos este duplicado
-                        raise DropItem("duplicate")
-
-                    logger.info("[3a] guardando artículo…")
-                    try:
-                        created = None
+                        self._drop_duplicate(spider, dup_reason)
+
+                    if self._write_batching():
+                        # Group commit: se persiste junto al lote (ver _flush_write_batch)
+                        buffered = True
+                    else:
+                        logger.info("[3a] guardando artículo…")
                         try:
-                            res = store_article(cur, item, return_created=True)
-                        except TypeError as te:
-                            # Mocks antiguos no aceptan 'return_created'
-                            if "return_created" in str(te):
-                                res = store_article(cur, item)  # retorna solo id
-                                created = None
+                            created = None
+                            try:
+                                res = store_article(cur, item, return_created=True)
+                            except TypeError as te:
+                                # Mocks antiguos no aceptan 'return_created'
+                                if "return_created" in str(te):
+                                    res = store_article(cur, item)  # retorna solo id
+                                    created = None
+                                else:
+                                    raise
+
+                            if isinstance(res, tuple) and len(res) >= 2:
+                                article_id, created = res[0], bool(res[1])
                             else:
-                                raise
-
-                        if isinstance(res, tuple) and len(res) >= 2:
-                            article_id, created = res[0], bool(res[1])
-                        else:
-                            article_id = res
-                            # created permanece None si no vino
-
-                        item["article_id"] = article_id
-                        item["was_created"] = created  # True/False/None
-                        logger.info(f"[3b] guardado id={article_id} created={created}")
-                    except Exception as ins_exc:
-                        self.errors += 1
-                        logger.error(f"[3x] error al guardar: {ins_exc}")
-                        raise
-
-                    # Si es nuevo → NLP y relacionales
-                    if created:
-                        logger.info("[2] Ejecutando análisis NLP…")
-                        preprocessed = {}
-                        try:
-                            text_for_nlp = (item.get("body") or "").strip()
-                            if not text_for_nlp:
-                                text_for_nlp = f"{(item.get('title') or '').strip()} {(item.get('subtitle') or '').strip()}".strip()
-                            if text_for_nlp:
-                                preprocessed = self.nlp.analyze(text_for_nlp) or {}
-                        except Exception as nlp_exc:
-                            logger.warning(f"[2] NLP falló: {nlp_exc}")
-                            preprocessed = {}
-
-                        # Limpieza/unificación opcional de entidades
-                        try:
-                            from importlib import import_module
-                            clean_and_unify_entities = None
-                            for _mod in ("scrapy_project.heuristica_entities", "scrapy_project.heuristics_entities"):
-                                try:
-                                    _m = import_module(_mod)
-                                    clean_and_unify_entities = getattr(_m, "clean_and_unify_entities", None)
-                                    if clean_and_unify_entities:
-                                        break
-                                except Exception:
-                                    pass
-                            if clean_and_unify_entities:
-                                spacy_doc = None
-                                text_for_doc = (item.get("body") or "").strip() or title
-                                if self.spacy_model is not None and text_for_doc:
-                                    try:
-                                        spacy_doc = self.spacy_model(text_for_doc)
-                                    except Exception:
-                                        spacy_doc = None
-                                if isinstance(preprocessed, dict) and preprocessed.get("entities"):
-                                    preprocessed["entities"] = clean_and_unify_entities(
-                                        preprocessed["entities"], spacy_doc=spacy_doc
-                                    )
-                                if item.get("entities"):
-                                    item["entities"] = clean_and_unify_entities(item["entities"], spacy_doc=spacy_doc)
-                        except Exception as e:
-                            logger.warning(f"[entities] limpieza/unificación falló: {e}")
-
-                        # Inyectar salidas del NLP al item si no estaban
-                        if isinstance(preprocessed, dict) and preprocessed:
-                            if "entities" in preprocessed and not item.get("entities"):
-                                item["entities"] = preprocessed["entities"]
-                            if "polarity" in preprocessed and item.get("polarity") is None:
-                                item["polarity"] = preprocessed["polarity"]
-                            if "subjectivity" in preprocessed and item.get("subjectivity") is None:
-                                item["subjectivity"] = preprocessed["subjectivity"]
-                            if "framing" in preprocessed and not item.get("framing"):
-                                item["framing"] = preprocessed["framing"]
-
-                        # Persistir preprocessed_data y relacionales
-                        try:
-                            cur.execute(
-                                """
-                                UPDATE articles
-                                   SET preprocessed_data = %s
-                                 WHERE id = %s
-                                """,
-                                (Json(preprocessed), article_id),
-                            )
-                            logger.info("[4b] preprocessed_data OK")
-
-                            # Actualizar polarity/subjectivity si las tenemos
-                            pol = item.get("polarity")
-                            subj = item.get("subjectivity")
-                            if pol is None and isinstance(preprocessed, dict):
-                                pol = preprocessed.get("polarity")
-                            if subj is None and isinstance(preprocessed, dict):
-                                subj = preprocessed.get("subjectivity")
-
-                            if pol is not None or subj is not None:
-                                cur.execute(
-                                    """
-                                    UPDATE articles
-                                       SET polarity     = COALESCE(%s, polarity),
-                                           subjectivity = COALESCE(%s, subjectivity)
-                                     WHERE id = %s
-                                    """,
-                                    (pol, subj, article_id),
+                                article_id = res
+                                # created permanece None si no vino
+
+                            item["article_id"] = article_id
+                            item["was_created"] = created  # True/False/None
+                            if self.dedup_index is not None:
+                                self.dedup_index.add_item(item)
+                            logger.info(f"[3b] guardado id={article_id} created={created}")
+                        except Exception as ins_exc:
+                            self.errors += 1
+                            logger.error(f"[3x] error al guardar: {ins_exc}")
+                            raise
+
+                        # Si es nuevo → NLP y relacionales
+                        if created:
+                            if self._nlp_batching():
+                                # Diferido: se analiza junto a otros artículos nuevos
+                                if not self._nlp_buffer:
+                                    self._nlp_buffer_t0 = monotonic()
+                                self._nlp_buffer.append((article_id, item))
+                                logger.info(
+                                    f"[2] NLP diferido a lote ({len(self._nlp_buffer)}/{self.nlp_batch_size})"
                                 )
-
-                            # Entidades
-                            ents = (item.get("entities") or preprocessed.get("entities") or [])
-                            if ents:
-                                try:
-                                    save_entities(cur, article_id, ents)
-                                    logger.info("[4c] entities OK")
-                                except Exception as ee:
-                                    logger.warning(f"[4x] fallo al guardar entities: {ee}")
-
-                            # Framing
-                            framing = item.get("framing") or preprocessed.get("framing") or {}
-                            if framing:
+                            elif self._nlp_pool is not None:
+                                # Fuera del reactor: se persiste al volver del worker (salvo acierto en caché)
+                                text_for_nlp = self._text_for_nlp(item)
+                                cached = self._nlp_cache_get([text_for_nlp])[0]
+                                if cached is not None:
+                                    self._persist_nlp(cur, item, article_id, cached)
+                                else:
+                                    deferred_nlp = (article_id, text_for_nlp)
+                            else:
+                                preprocessed = {}
                                 try:
-                                    save_framing(cur, article_id, framing)
-                                    logger.info("[4d] framing OK")
-                                except Exception as fe:
-                                    logger.warning(f"[4x] fallo al guardar framing: {fe}")
+                                    text_for_nlp = self._text_for_nlp(item)
+                                    if text_for_nlp:
+                                        preprocessed = self._analyze_cached(text_for_nlp)
+                                except Exception as nlp_exc:
+                                    logger.warning(f"[2] NLP falló: {nlp_exc}")
+                                    preprocessed = {}
+
+                                self._persist_nlp(cur, item, article_id, preprocessed)
 
-                        except Exception as upd_exc:
-                            logger.warning(f"[4x] fallo al actualizar preprocessed_data/relacionales: {upd_exc}")
+                    tx_aborted = self._tx_aborted()
 
             # ——— Fuera del with: COMMIT hecho ———
+            self._settle_id_cache(tx_aborted)
 
-            created = item.get("was_created")
-            created_effective = True if created is None else bool(created)
+            if buffered:
+                return self._buffer_write(item)
 
-            if created_effective:
-                # Nuevo → reset streak y contadores
-                self.duplicates_in_a_row = 0
-                self.inserted += 1
-                self._bump("posverdad/inserted", 1)
-                logger.info("[✔] commit realizado (nuevo)")
-                logger.info(f"✅ Artículo NUEVO: {item['article_id']} — {title[:80]}")
-            else:
-                # Existente (upsert por conflicto) → cuenta como “updated”
-                self.updated += 1
-                self._bump("posverdad/updated", 1)
-                # OJO: la racha de duplicados la gestiona EXCLUSIVAMENTE el branch de drop duplicado
-                logger.info(f"[↩] Artículo ya existente (update por conflicto).")
+            self._count_saved(item, title)
+
+            if self._nlp_buffer and self._nlp_batch_due():
+                self._flush_nlp_batch()
 
+            if deferred_nlp is not None:
+                return self._defer_nlp(item, *deferred_nlp)
             return item
 
-        except DropItem:
-            raise
-        except CloseSpider:
+        except (DropItem, CloseSpider):
+            ID_CACHE.rollback(self.conn)
             raise
         except Exception as e:
+            ID_CACHE.rollback(self.conn)
+            self._forget_stale_ids(e)
             self.errors += 1
             url = (item.get("url") or "").strip()
             logger.error(f"[💥] Error procesando ítem url={url}: {e}")
@@ -0,0 +1,195 @@
+# scrapy_project/preprocessed_codec.py
+"""
+Almacenamiento compacto de la salida del Preprocessor (tokens / lemmas / pos).
+
+Antes: tres arrays paralelos de strings dentro de `articles.preprocessed_data`
+(JSONB con índice GIN) → filas anchas, WAL y GIN inflados en cada insert.
+
+Ahora (PREPROCESSED_STORAGE=compact):
+- `pack(pre)`: vocabulario por documento (cada token/lema distinto una sola vez),
+  tokens y lemas como índices a ese vocabulario y POS como enteros pequeños
+  (UPOS; etiquetas fuera de UPOS van a un vocabulario extra), todo en JSON
+  compacto comprimido con zlib → BYTEA en la tabla lateral `article_preprocessed`.
+- En `preprocessed_data` queda solo un stub {"engine", "n_tokens", "packed": true}.
+- `unpack(blob)` / `expand(data, blob)` / `load_preprocessed_data(cur, id)`
+  reconstruyen el dict de siempre para los consumidores existentes.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import Json
+
+from .db import execute_prepared, register_prepared
+
+logger = logging.getLogger("posverdad.pipeline.preprocessed")
+
+# json (arrays dentro de preprocessed_data, como antes) | compact (tabla lateral comprimida).
+# compact se activa explícitamente tras `make migrate-preprocessed` y `make compact-preprocessed`:
+# quien lea preprocessed_data sin load_preprocessed_data deja de ver tokens/lemmas/pos.
+PREPROCESSED_STORAGE = os.getenv("PREPROCESSED_STORAGE", "json").strip().lower()
+
+FORMAT_VERSION = 1
+# Universal POS tags (spaCy y Stanza usan este conjunto); el índice es el código
+UPOS = (
+    "ADJ", "ADP", "ADV", "AUX", "CCONJ", "DET", "INTJ", "NOUN", "NUM",
+    "PART", "PRON", "PROPN", "PUNCT", "SCONJ", "SPACE", "SYM", "VERB", "X",
+)
+_UPOS_CODE = {tag: i for i, tag in enumerate(UPOS)}
+
+PACKED_UPSERT = register_prepared(
+    "posverdad_preprocessed_upsert",
+    """
+    INSERT INTO article_preprocessed (article_id, engine, n_tokens, packed)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (article_id) DO UPDATE
+       SET engine = EXCLUDED.engine, n_tokens = EXCLUDED.n_tokens, packed = EXCLUDED.packed
+    """,
+)
+_UPDATE_PREPROCESSED = "UPDATE articles SET preprocessed_data = %s WHERE id = %s"
+_SAVEPOINT = "posverdad_packed"
+
+
+def _is_token_dict(pre: Any) -> bool:
+    return isinstance(pre, dict) and isinstance(pre.get("tokens"), list)
+
+
+def pack(pre: Dict[str, Any]) -> bytes:
+    """{"engine", "tokens", "lemmas", "pos"} → bytes (zlib de JSON con índices)."""
+    vocab: Dict[str, int] = {}
+
+    def _id(word: Any) -> int:
+        word = "" if word is None else str(word)
+        if word not in vocab:
+            vocab[word] = len(vocab)
+        return vocab[word]
+
+    tokens = pre.get("tokens") or []
+    lemmas = pre.get("lemmas") or []
+    pos = pre.get("pos") or []
+    extra: Dict[str, int] = {}
+    pos_codes: List[int] = []
+    for tag in pos:
+        tag = "" if tag is None else str(tag)
+        code = _UPOS_CODE.get(tag)
+        if code is None:
+            code = extra.setdefault(tag, len(UPOS) + len(extra))
+        pos_codes.append(code)
+
+    payload = {
+        "v": FORMAT_VERSION,
+        "e": pre.get("engine"),
+        "t": [_id(w) for w in tokens],
+        "l": [_id(w) for w in lemmas],
+        "p": pos_codes,
+    }
+    if extra:
+        payload["px"] = list(extra)
+    # El vocabulario al final (el dict conserva el orden de inserción = orden de ids)
+    payload["w"] = list(vocab)
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(raw.encode("utf-8"), 6)
+
+
+def unpack(blob: Any) -> Dict[str, Any]:
+    """Inverso de pack(): devuelve el dict {"engine", "tokens", "lemmas", "pos"}."""
+    payload = json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+    if payload.get("v") != FORMAT_VERSION:
+        raise ValueError(f"Formato de preprocessed empaquetado desconocido: {payload.get('v')}")
+    words = payload["w"]
+    tags = list(UPOS) + list(payload.get("px") or [])
+    return {
+        "engine": payload.get("e"),
+        "tokens": [words[i] for i in payload["t"]],
+        "lemmas": [words[i] for i in payload["l"]],
+        "pos": [tags[c] for c in payload["p"]],
+    }
+
+
+def compact(result: Any, storage: Optional[str] = None) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """
+    Separa la salida del orquestador en (resultado para preprocessed_data, fila lateral).
+    La fila lateral es {"engine", "n_tokens", "packed"} o None si no hay nada que empaquetar
+    (modo json, resultado sin tokens, fallos del NLP). No modifica `result`.
+    """
+    if (storage or PREPROCESSED_STORAGE) != "compact" or not isinstance(result, dict):
+        return result, None
+    pre = result.get("preprocessed")
+    if not _is_token_dict(pre):
+        return result, None
+    n_tokens = len(pre.get("tokens") or [])
+    slim = dict(result)
+    slim["preprocessed"] = {"engine": pre.get("engine"), "n_tokens": n_tokens, "packed": True}
+    return slim, {"engine": pre.get("engine"), "n_tokens": n_tokens, "packed": pack(pre)}
+
+
+def expand(data: Any, blob: Any = None) -> Any:
+    """preprocessed_data (+ blob de article_preprocessed) → forma antigua con los arrays."""
+    if not isinstance(data, dict):
+        return data
+    pre = data.get("preprocessed")
+    if not (isinstance(pre, dict) and pre.get("packed") is True) or blob is None:
+        return data
+    out = dict(data)
+    out["preprocessed"] = unpack(blob)
+    return out
+
+
+# -------------------------
+# Acceso a la DB (cursor; la transacción la maneja quien llama)
+# -------------------------
+def save_packed(cur: Any, article_id: int, row: Optional[Dict[str, Any]]) -> None:
+    if not row:
+        return
+    execute_prepared(cur, PACKED_UPSERT, (article_id, row["engine"], row["n_tokens"], row["packed"]))
+
+
+def side_table_available(cur: Any) -> bool:
+    """True si existe article_preprocessed (migración aplicada); se consulta una vez por conexión."""
+    cur.execute("SELECT to_regclass('article_preprocessed') IS NOT NULL")
+    row = cur.fetchone()
+    return bool(row and row[0])
+
+
+def write_preprocessed(cur: Any, article_id: int, result: Any, storage: Optional[str] = None) -> bool:
+    """
+    UPDATE de preprocessed_data + fila lateral, dentro de la transacción de quien llama.
+    La forma compacta va bajo SAVEPOINT: si la tabla lateral falla solo se deshace
+    ese tramo y se guarda la forma json. Retorna False si hubo que caer a json.
+    """
+    slim, packed = compact(result, storage)
+    if packed:
+        cur.execute(f"SAVEPOINT {_SAVEPOINT}")
+        try:
+            cur.execute(_UPDATE_PREPROCESSED, (Json(slim), article_id))
+            save_packed(cur, article_id, packed)
+        except Exception as e:
+            cur.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+            logger.warning(f"[preprocessed] article_preprocessed falló para {article_id} (se guarda json): {e}")
+            slim = result
+        else:
+            cur.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
+            return True
+    cur.execute(_UPDATE_PREPROCESSED, (Json(slim), article_id))
+    return not packed
+
+
+def load_preprocessed_data(cur: Any, article_id: int) -> Optional[Dict[str, Any]]:
+    """Accessor de compatibilidad: preprocessed_data con tokens/lemmas/pos reconstruidos."""
+    cur.execute(
+        """
+        SELECT a.preprocessed_data, p.packed
+          FROM articles a
+          LEFT JOIN article_preprocessed p ON p.article_id = a.id
+         WHERE a.id = %s
+        """,
+        (article_id,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    return expand(row[0], row[1])
@@ -1,39 +1,120 @@
 # preprocessor.py — Utilidades de preprocesamiento textual con spaCy o Stanza
 # =============================================================================
 
-import spacy
+import importlib
+import importlib.util
+import inspect
+import os
 
-try:
-    import stanza
-    stanza_available = True
-except ImportError:
-    stanza_available = False
+from .model_registry import REGISTRY, get_spacy
+from .spacy_profiles import NLP_PREPROCESS_PROFILE, resolve_profile, use_profile
+
+# spaCy y Stanza se importan al crear el Preprocessor (importar el módulo no carga torch)
+stanza = None
+stanza_available = importlib.util.find_spec("stanza") is not None
+
+# Recursos de Stanza: se resuelven UNA vez desde este directorio (misma variable que usa Stanza);
+# solo se descargan si faltan, y el Pipeline se crea sin chequeos de descarga.
+STANZA_RESOURCES_DIR = os.getenv("STANZA_RESOURCES_DIR", os.path.expanduser("~/stanza_resources"))
+STANZA_LANG = "es"
+STANZA_PROCESSORS = "tokenize,pos,lemma"
+# Documentos por llamada a bulk_process (y batch interno de pos/lemma)
+STANZA_BATCH_SIZE = int(os.getenv("STANZA_BATCH_SIZE", "32"))
+
+_STANZA_PUNCT = {".", ",", ";", ":", "¿", "?", "¡", "!"}
+
+
+def __getattr__(name):
+    # `preprocessor.spacy` sigue existiendo (p. ej. para parchearlo), pero se importa al pedirlo
+    if name == "spacy":
+        globals()[name] = importlib.import_module(name)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _spacy():
+    return globals().get("spacy") or __getattr__("spacy")
+
+
+def _import_stanza():
+    """Importa Stanza en el primer uso (respeta un módulo ya inyectado, p. ej. en tests)."""
+    global stanza
+    if stanza is None:
+        stanza = importlib.import_module("stanza")
+    return stanza
+
+
+def _supported_kwargs(fn, kwargs):
+    """Solo los kwargs que `fn` acepta (versiones antiguas de Stanza, fakes de tests)."""
+    try:
+        params = inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return kwargs
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()):
+        return kwargs
+    return {k: v for k, v in kwargs.items() if k in params}
+
+
+def stanza_resources_ready(resources_dir=None, lang=STANZA_LANG):
+    """True si el directorio local ya tiene resources.json y los modelos del idioma."""
+    resources_dir = resources_dir or STANZA_RESOURCES_DIR
+    return (
+        os.path.isfile(os.path.join(resources_dir, "resources.json"))
+        and os.path.isdir(os.path.join(resources_dir, lang))
+    )
 
 
 class Preprocessor:
     """
     Clase encargada de realizar preprocesamiento lingüístico básico sobre texto,
     utilizando spaCy o Stanza como backend NLP.
+
+    Con spaCy, los parseos propios corren con el perfil `profile` (por defecto
+    "lemmas": sin parser ni NER, ver spacy_profiles).
     """
 
-    def __init__(self, engine="spacy"):
+    def __init__(self, engine="spacy", profile=None):
         self.engine = engine.lower()
+        self.profile = resolve_profile(profile or NLP_PREPROCESS_PROFILE, default="lemmas")
         if self.engine == "spacy":
-            self.nlp = spacy.load("es_core_news_md")
+            self.nlp = get_spacy("es_core_news_md", loader=lambda: _spacy().load("es_core_news_md"))
         elif self.engine == "stanza":
             if not stanza_available:
                 raise ImportError("Stanza no está instalado. Usa: pip install stanza")
-            stanza.download("es", verbose=False)
-            self.nlp = stanza.Pipeline("es", processors="tokenize,pos,lemma", verbose=False)
+            _import_stanza()
+            self.nlp = REGISTRY.get("stanza", f"{STANZA_LANG}:{STANZA_PROCESSORS}", self._load_stanza)
         else:
             raise ValueError("Engine debe ser 'spacy' o 'stanza'.")
 
-    def preprocess(self, text):
+    @staticmethod
+    def _load_stanza():
+        if not stanza_resources_ready():
+            stanza.download(STANZA_LANG, **_supported_kwargs(
+                stanza.download, {"model_dir": STANZA_RESOURCES_DIR, "verbose": False}
+            ))
+        return stanza.Pipeline(STANZA_LANG, **_supported_kwargs(stanza.Pipeline, {
+            "processors": STANZA_PROCESSORS,
+            "dir": STANZA_RESOURCES_DIR,
+            "download_method": None,  # recursos ya resueltos: sin chequeos de red al crear
+            "tokenize_batch_size": STANZA_BATCH_SIZE,
+            "pos_batch_size": STANZA_BATCH_SIZE * 100,  # en palabras
+            "lemma_batch_size": STANZA_BATCH_SIZE * 100,
+            "verbose": False,
+        }))
+
+    @property
+    def accepts_doc(self):
+        """True si `preprocess` puede reutilizar un Doc de spaCy ya parseado."""
+        return self.engine == "spacy"
+
+    def preprocess(self, text, doc=None):
         """
         Aplica preprocesamiento NLP al texto:
         - Tokenización
         - Lematización
         - Etiquetado gramatical (POS)
+
+        Con engine spaCy, `doc` (Doc ya parseado del mismo texto) evita un segundo parseo.
         """
         if text is None:
             raise TypeError("El texto de entrada no puede ser None.")
@@ -46,16 +127,59 @@ class Preprocessor:
             }
 
         if self.engine == "spacy":
+            if doc is not None:
+                return self._from_spacy_doc(doc)
             return self._preprocess_spacy(text)
         elif self.engine == "stanza":
             return self._preprocess_stanza(text)
 
+    def preprocess_many(self, texts, batch_size=32):
+        """
+        Preprocesa una lista de textos. Con spaCy usa `nlp.pipe` (un solo recorrido
+        por lotes); con Stanza, `bulk_process` sobre lotes de documentos. Mismo
+        contrato por texto que `preprocess`.
+        """
+        texts = list(texts)
+        if any(t is None for t in texts):
+            raise TypeError("El texto de entrada no puede ser None.")
+
+        out = [self.preprocess(t) if not t.strip() else None for t in texts]
+        idx = [i for i, t in enumerate(texts) if t.strip()]
+        if not idx:
+            return out
+
+        if self.engine == "spacy":
+            with use_profile(self.nlp, self.profile):
+                docs = self.nlp.pipe([texts[i] for i in idx], batch_size=batch_size)
+                for i, doc in zip(idx, docs):
+                    out[i] = self._from_spacy_doc(doc)
+        else:
+            for i, doc in zip(idx, self._stanza_bulk([texts[i] for i in idx], batch_size)):
+                out[i] = self._from_stanza_doc(doc)
+        return out
+
+    def _stanza_bulk(self, texts, batch_size=STANZA_BATCH_SIZE):
+        """Docs de Stanza para `texts`: bulk_process por lotes si está disponible; si no, uno a uno."""
+        bulk = getattr(self.nlp, "bulk_process", None)
+        document = getattr(stanza, "Document", None)
+        if not (callable(bulk) and document is not None):
+            return [self.nlp(t) for t in texts]
+        docs = []
+        size = max(1, int(batch_size or STANZA_BATCH_SIZE))
+        for k in range(0, len(texts), size):
+            docs += bulk([document([], text=t) for t in texts[k:k + size]])
+        return docs
+
     def _preprocess_spacy(self, text):
         """
         Preprocesamiento con spaCy.
         Filtra signos de puntuación y stopwords.
         """
-        doc = self.nlp(text)
+        with use_profile(self.nlp, self.profile):
+            return self._from_spacy_doc(self.nlp(text))
+
+    @staticmethod
+    def _from_spacy_doc(doc):
         tokens = []
         lemmas = []
         pos_tags = []
@@ -78,14 +202,17 @@ class Preprocessor:
         Preprocesamiento con Stanza.
         Filtra algunos signos de puntuación básicos.
         """
-        doc = self.nlp(text)
+        return self._from_stanza_doc(self.nlp(text))
+
+    @staticmethod
+    def _from_stanza_doc(doc):
         tokens = []
         lemmas = []
         pos_tags = []
 
         for sentence in doc.sentences:
             for word in sentence.words:
-                if word.text not in {".", ",", ";", ":", "¿", "?", "¡", "!"}:
+                if word.text not in _STANZA_PUNCT:
                     tokens.append(word.text)
                     lemmas.append(word.lemma)
                     pos_tags.append(word.upos)
@@ -0,0 +1,203 @@
+# scrapy_project/sentiment_onnx.py
+"""
+Backend ONNX Runtime (CPU) para el sentimiento de PosverdadNLP.
+
+- `export_onnx(analyzer, out_dir)`: exporta UNA vez el modelo de pysentimiento
+  (robertuito-sentiment-analysis) a ONNX y, opcionalmente, una copia cuantizada
+  dinámicamente a int8; guarda junto al modelo el tokenizer y las etiquetas.
+- `OnnxSentimentAnalyzer`: misma interfaz que el analizador de pysentimiento
+  (`predict(texto | lista)` → AnalyzerOutput con `.output` y `.probas`, y
+  `.tokenizer`), así PosverdadNLP conserva el contrato (polaridad, score).
+- `load_onnx_sentiment(lang)`: carga el export del directorio de datos o lo crea
+  desde el modelo torch si aún no existe.
+
+Requiere `onnxruntime` (opcional); PosverdadNLP cae al backend torch si falta.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .nlp_cache import DATA_DIR
+
+if TYPE_CHECKING:  # numpy se importa en el primer uso (importar el módulo es liviano)
+    import numpy as np
+
+logger = logging.getLogger("posverdad.models.onnx")
+
+# torch (pysentimiento) | onnx (onnxruntime en CPU)
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch").strip().lower()
+SENTIMENT_ONNX_DIR = os.getenv("SENTIMENT_ONNX_DIR", os.path.join(DATA_DIR, "onnx"))
+# Usar el modelo cuantizado dinámicamente a int8 (más rápido y liviano en CPU)
+SENTIMENT_ONNX_INT8 = (os.getenv("SENTIMENT_ONNX_INT8", "true").lower() == "true")
+# Hilos intra-op de onnxruntime (0 = lo que decida onnxruntime)
+SENTIMENT_ONNX_THREADS = int(os.getenv("SENTIMENT_ONNX_THREADS", "0"))
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+META_FILE = "posverdad_meta.json"
+MAX_LENGTH = 128  # mismo límite que fija pysentimiento en su tokenizer
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def export_onnx(analyzer: Any, out_dir: str, quantize: bool = True, opset: int = 17) -> str:
+    """
+    Exporta `analyzer.model` (AnalyzerForSequenceClassification de pysentimiento) a
+    `out_dir/model.onnx` (+ `model.int8.onnx` si `quantize`). Devuelve `out_dir`.
+    """
+    import torch
+
+    os.makedirs(out_dir, exist_ok=True)
+    model = analyzer.model.eval()
+    tokenizer = analyzer.tokenizer
+    fp32_path = os.path.join(out_dir, FP32_FILE)
+
+    sample = tokenizer(["exportación de prueba", "otra frase algo más larga"], padding=True, return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "seq"},
+                "attention_mask": {0: "batch", 1: "seq"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+            dynamo=False,
+        )
+    logger.info(f"[onnx] Modelo exportado: {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(out_dir, INT8_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        logger.info(f"[onnx] Modelo cuantizado (int8): {int8_path}")
+
+    tokenizer.save_pretrained(out_dir)
+    meta = {
+        "id2label": {int(k): v for k, v in model.config.id2label.items()},
+        "problem_type": model.config.problem_type,
+        "preprocessing_args": dict(getattr(analyzer, "preprocessing_args", {}) or {}),
+        "source": getattr(model.config, "_name_or_path", ""),
+    }
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False, indent=2)
+    return out_dir
+
+
+class OnnxSentimentAnalyzer:
+    """Analizador con la interfaz de pysentimiento sobre una sesión de onnxruntime."""
+
+    def __init__(
+        self,
+        session: Any,
+        tokenizer: Any,
+        id2label: Dict[int, str],
+        preprocessing_args: Optional[Dict[str, Any]] = None,
+        problem_type: Optional[str] = None,
+        batch_size: int = 32,
+    ):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.id2label = {int(k): v for k, v in id2label.items()}
+        self.preprocessing_args = dict(preprocessing_args or {})
+        self.is_multilabel = problem_type == "multi_label_classification"
+        self.batch_size = max(1, int(batch_size))
+        self._input_names = [i.name for i in session.get_inputs()]
+
+    @classmethod
+    def from_dir(cls, model_dir: str, int8: bool = SENTIMENT_ONNX_INT8, threads: int = SENTIMENT_ONNX_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, META_FILE), encoding="utf-8") as fh:
+            meta = json.load(fh)
+        path = os.path.join(model_dir, INT8_FILE if int8 else FP32_FILE)
+        if int8 and not os.path.exists(path):
+            logger.warning("[onnx] Sin modelo int8 exportado; uso el fp32")
+            path = os.path.join(model_dir, FP32_FILE)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads and threads > 0:
+            opts.intra_op_num_threads = int(threads)
+            opts.inter_op_num_threads = 1
+        session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        tokenizer.model_max_length = MAX_LENGTH
+        logger.info(f"[onnx] Sesión lista: {os.path.basename(path)} (threads={threads or 'auto'})")
+        return cls(
+            session,
+            tokenizer,
+            meta["id2label"],
+            preprocessing_args=meta.get("preprocessing_args"),
+            problem_type=meta.get("problem_type"),
+        )
+
+    def _preprocess(self, text: str) -> str:
+        # Mismo preprocesamiento que aplica pysentimiento antes de tokenizar
+        try:
+            from pysentimiento.preprocessing import preprocess_tweet
+        except Exception:
+            return text
+        return preprocess_tweet(text, **self.preprocessing_args)
+
+    def _outputs(self, sentences: List[str], logits: np.ndarray) -> List[Any]:
+        import numpy as np
+        from pysentimiento.analyzer import AnalyzerOutput
+
+        probs = 1.0 / (1.0 + np.exp(-logits)) if self.is_multilabel else _softmax(logits)
+        return [
+            AnalyzerOutput(
+                sent,
+                context=None,
+                probas={self.id2label[i]: float(row[i]) for i in self.id2label},
+                is_multilabel=self.is_multilabel,
+            )
+            for sent, row in zip(sentences, probs)
+        ]
+
+    def predict(self, inputs):
+        """Como pysentimiento: str → AnalyzerOutput; lista → lista de AnalyzerOutput."""
+        import numpy as np
+
+        single = isinstance(inputs, str)
+        sentences = [self._preprocess(t) for t in ([inputs] if single else list(inputs))]
+        out: List[Any] = []
+        for k in range(0, len(sentences), self.batch_size):
+            chunk = sentences[k:k + self.batch_size]
+            enc = self.tokenizer(
+                chunk, padding="longest", truncation=True, max_length=MAX_LENGTH, return_tensors="np"
+            )
+            feeds = {name: np.asarray(enc[name], dtype=np.int64) for name in self._input_names}
+            logits = self.session.run(None, feeds)[0]
+            out += self._outputs(chunk, np.asarray(logits, dtype=np.float32))
+        return out[0] if single else out
+
+
+def load_onnx_sentiment(
+    lang: str = "es",
+    model_dir: Optional[str] = None,
+    int8: bool = SENTIMENT_ONNX_INT8,
+    threads: int = SENTIMENT_ONNX_THREADS,
+) -> OnnxSentimentAnalyzer:
+    """Carga el export ONNX; si no existe, lo genera una vez desde el modelo torch."""
+    model_dir = model_dir or os.path.join(SENTIMENT_ONNX_DIR, f"sentiment-{lang}")
+    if not os.path.exists(os.path.join(model_dir, META_FILE)):
+        from pysentimiento import create_analyzer
+
+        logger.info(f"[onnx] Exportando el modelo de sentimiento ({lang}) a {model_dir}…")
+        export_onnx(create_analyzer(task="sentiment", lang=lang), model_dir, quantize=int8)
+    return OnnxSentimentAnalyzer.from_dir(model_dir, int8=int8, threads=threads)
@@ -20,6 +20,11 @@ ITEM_PIPELINES = {
     "scrapy_project.pipelines.ScrapyProjectPipeline": 300,
 }
 
+# Páginas de listado ya parseadas en el run se sirven desde el memo del spider (sin re-descarga)
+DOWNLOADER_MIDDLEWARES = {
+    "scrapy_project.middlewares.ListingMemoMiddleware": 50,
+}
+
 # (opcional) Ajusta niveles de log de Scrapy para ver mid/pipelines claramente
 LOG_LEVEL = "INFO"
 
@@ -38,6 +43,68 @@ ROBOTSTXT_OBEY = True  # Cambiar a False si haces scraping investigativo
 CONCURRENT_REQUESTS = int(os.getenv("CONCURRENT_REQUESTS", "8"))
 # DOWNLOAD_DELAY = 1.5
 
+# NLP por lotes en el pipeline (0/1 = por ítem; N>1 = lotes de N artículos nuevos)
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "0"))
+# Segundos máximos que un artículo espera en el lote antes de forzar el análisis
+NLP_BATCH_TIMEOUT = float(os.getenv("NLP_BATCH_TIMEOUT", "30"))
+# Ejecución del NLP: "inline" (en el reactor) | "process" (pool de procesos, process_item devuelve Deferred)
+NLP_EXECUTION = os.getenv("NLP_EXECUTION", "inline")
+# Workers del pool NLP (0 = núcleos - 1)
+NLP_WORKERS = int(os.getenv("NLP_WORKERS", "0"))
+# Sentimiento del cuerpo completo por ventanas de oraciones (el pipeline lo pasa a PosverdadNLP)
+SENTIMENT_CHUNKED = (os.getenv("SENTIMENT_CHUNKED", "false").lower() == "true")
+# Tokens máximos por ventana (el modelo de sentimiento trunca en 128)
+SENTIMENT_WINDOW_TOKENS = int(os.getenv("SENTIMENT_WINDOW_TOKENS", "120"))
+
+# Backend del sentimiento: "torch" (pysentimiento) | "onnx" (onnxruntime CPU; exporta el modelo una vez a data/onnx)
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
+# Backend ONNX: modelo cuantizado int8 y hilos intra-op (0 = automático)
+SENTIMENT_ONNX_INT8 = (os.getenv("SENTIMENT_ONNX_INT8", "true").lower() == "true")
+SENTIMENT_ONNX_THREADS = int(os.getenv("SENTIMENT_ONNX_THREADS", "0"))
+
+# Perfil spaCy del orquestador: "full" (NER + lemas + parser) | "ner-only" (backfills de entidades) | "lemmas"
+NLP_PROFILE = os.getenv("NLP_PROFILE", "full")
+# Perfil de los parseos propios del Preprocessor (sin parser ni NER por defecto)
+NLP_PREPROCESS_PROFILE = os.getenv("NLP_PREPROCESS_PROFILE", "lemmas")
+
+# Caché persistente de resultados NLP (SQLite en el directorio de datos hermano de LOGS_DIR)
+NLP_CACHE = (os.getenv("NLP_CACHE", "true").lower() == "true")
+# Tamaño máximo del archivo de caché antes de expulsar las entradas menos usadas
+NLP_CACHE_MAX_MB = float(os.getenv("NLP_CACHE_MAX_MB", "512"))
+
+# Tiempos por etapa del NLP (Stats posverdad/nlp/<etapa>_ms + tabla nlp_run_stage_metrics)
+NLP_STAGE_TIMING = (os.getenv("NLP_STAGE_TIMING", "true").lower() == "true")
+
+# Índice persistente página de listado → años (ElMostradorSpider salta directo a la primera página del año)
+LISTING_INDEX = (os.getenv("LISTING_INDEX", "true").lower() == "true")
+LISTING_INDEX_MAX_AGE_DAYS = float(os.getenv("LISTING_INDEX_MAX_AGE_DAYS", "30"))
+LISTING_DRIFT_PAGES_PER_DAY = float(os.getenv("LISTING_DRIFT_PAGES_PER_DAY", "0"))
+# Sondas en paralelo por ronda al ubicar el año (1 = búsqueda serial; p. ej. 8 = k-aria, ~CONCURRENT_REQUESTS)
+LISTING_PROBES = int(os.getenv("LISTING_PROBES", "1"))
+# Memo del run: páginas de listado parseadas que se reutilizan al cambiar de modo (0 = sin memo)
+LISTING_MEMO_PAGES = int(os.getenv("LISTING_MEMO_PAGES", "64"))
+# Páginas de listado en vuelo durante la colecta (1 = serial; N > 1 = ventana ordenada con look-ahead)
+LISTING_COLLECT_WINDOW = int(os.getenv("LISTING_COLLECT_WINDOW", "1"))
+
+# Salida del Preprocessor: "json" (arrays en preprocessed_data) | "compact" (tabla lateral article_preprocessed,
+# empaquetada; activar solo tras make migrate-preprocessed + make compact-preprocessed)
+PREPROCESSED_STORAGE = os.getenv("PREPROCESSED_STORAGE", "json")
+
+# Framing remoto (framing_client): asíncrono, por lotes y con concurrencia acotada; no retrasa cada ítem
+FRAMING_ENABLED = (os.getenv("FRAMING_ENABLED", "false").lower() == "true")
+FRAMING_URL = os.getenv("FRAMING_URL", "http://127.0.0.1:8765/framing")
+FRAMING_CONCURRENCY = int(os.getenv("FRAMING_CONCURRENCY", "4"))
+FRAMING_BATCH_SIZE = int(os.getenv("FRAMING_BATCH_SIZE", "8"))
+
+# Pool de conexiones compartido (scrapy_project.db): mínimo / máximo de conexiones por proceso
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "4"))
+
+# Escritura por lotes de artículos (0/1 = commit por ítem; N>1 = upsert multi-fila + un commit cada N)
+ARTICLE_WRITE_BATCH = int(os.getenv("ARTICLE_WRITE_BATCH", "0"))
+# Segundos máximos que un artículo espera en el lote de escritura
+ARTICLE_WRITE_TIMEOUT = float(os.getenv("ARTICLE_WRITE_TIMEOUT", "10"))
+
 # Headers por defecto (opcional)
 # DEFAULT_REQUEST_HEADERS = {
 #     "User-Agent": "Mozilla/5.0 (compatible; PosverdadBot/1.0; +http://posverdad.local)",
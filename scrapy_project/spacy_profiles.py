@@ -0,0 +1,68 @@
+# scrapy_project/spacy_profiles.py
+"""
+Perfiles de análisis spaCy: qué componentes del pipeline corren para cada consumidor.
+
+- "ner-only": tok2vec + ner → entidades (backfills de entidades, sin parser).
+- "lemmas":   tok2vec + morphologizer/tagger + attribute_ruler + lemmatizer → Preprocessor.
+- "full":     todos los componentes (NER + lemas + parser para subjectivity_proxy).
+
+`use_profile(nlp, profile)` activa solo esos componentes con `nlp.select_pipes` y
+los restaura al salir. Con objetos que no son un Language (fakes, mocks, blank sin
+componentes) no hace nada. `PROFILE_STAGES` indica qué etapas del orquestador
+tienen las anotaciones que necesitan con cada perfil.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("posverdad.models")
+
+NLP_PROFILE = os.getenv("NLP_PROFILE", "full").strip().lower()
+NLP_PREPROCESS_PROFILE = os.getenv("NLP_PREPROCESS_PROFILE", "lemmas").strip().lower()
+
+# perfil → componentes a activar (None = todos)
+PROFILES: Dict[str, Optional[Tuple[str, ...]]] = {
+    "ner-only": ("tok2vec", "ner"),
+    "lemmas": ("tok2vec", "morphologizer", "tagger", "attribute_ruler", "lemmatizer"),
+    "full": None,
+}
+
+# perfil → etapas del orquestador que dependen de spaCy y quedan cubiertas
+PROFILE_STAGES: Dict[str, FrozenSet[str]] = {
+    "ner-only": frozenset({"entities"}),
+    "lemmas": frozenset({"preprocess"}),
+    "full": frozenset({"preprocess", "entities", "subjectivity"}),
+}
+
+
+def resolve_profile(profile: Optional[str], default: str = "full") -> str:
+    """Normaliza el nombre; uno desconocido cae a `default` con aviso."""
+    name = (profile or default).strip().lower()
+    if name not in PROFILES:
+        logger.warning(f"[NLP] Perfil spaCy desconocido '{profile}'; uso '{default}'")
+        return default
+    return name
+
+
+def profile_pipes(nlp: Any, profile: str) -> Optional[List[str]]:
+    """Componentes de `nlp` a activar con el perfil (None = no tocar el pipeline)."""
+    names = getattr(nlp, "pipe_names", None)
+    wanted = PROFILES.get(profile)
+    if wanted is None or not isinstance(names, list):
+        return None
+    return [n for n in names if n in wanted]
+
+
+@contextmanager
+def use_profile(nlp: Any, profile: Optional[str]) -> Iterator[Any]:
+    """`with use_profile(nlp, "ner-only"):` → solo tok2vec + ner mientras dure el bloque."""
+    enable = profile_pipes(nlp, resolve_profile(profile)) if nlp is not None else None
+    select = getattr(nlp, "select_pipes", None)
+    if enable is None or not callable(select) or len(enable) == len(nlp.pipe_names):
+        yield nlp
+        return
+    with select(enable=enable):
+        yield nlp
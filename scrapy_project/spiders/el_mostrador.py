@@ -1,11 +1,15 @@
 # scrapy_project/spiders/el_mostrador.py
 import os
 import re
+from collections import OrderedDict
+from datetime import datetime
+
 import scrapy
 from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
 from dateutil import parser as dateparser
 from scrapy.loader import ItemLoader
 from scrapy_project.items import ArticleItem
+from scrapy_project.listing_index import LISTING_INDEX, ListingIndex
 
 # Listado con paginación
 BASE_LIST_URL = "https://www.elmostrador.cl/claves/feed/page/{}/"
@@ -17,6 +21,13 @@ ARTICLE_HREF_PAT = re.compile(
 
 DEFAULT_YEAR = 2020
 DEFAULT_MAX_DUPLICATES = int(os.getenv("MAX_DUPLICATES_IN_A_ROW", "10"))
+# Sondas en paralelo por ronda al ubicar el año: 1 = búsqueda serial clásica (expand/bin/leftmost);
+# k > 1 = búsqueda k-aria (cada ronda pide k páginas a la vez y achica el intervalo k+1 veces)
+LISTING_PROBES = int(os.getenv("LISTING_PROBES", "1"))
+# Páginas de listado ya parseadas que se guardan en el run (memo para cambios de modo; 0 = sin memo)
+LISTING_MEMO_PAGES = int(os.getenv("LISTING_MEMO_PAGES", "64"))
+# Páginas de listado en vuelo durante la colecta (1 = cadena serial; N > 1 = ventana con look-ahead)
+LISTING_COLLECT_WINDOW = int(os.getenv("LISTING_COLLECT_WINDOW", "1"))
 
 
 class ElMostradorSpider(scrapy.Spider):
@@ -53,13 +64,42 @@ class ElMostradorSpider(scrapy.Spider):
         fragment = ""  # sin fragmento
         return urlunsplit((scheme, netloc, path, query, fragment))
 
-    def __init__(self, year=None, category=None, custom_urls=None, max_duplicates=None, *args, **kwargs):
+    def __init__(self, year=None, category=None, custom_urls=None, max_duplicates=None, listing_index=None,
+                 probes=None, collect_window=None, year_from=None, year_to=None, date_from=None, date_to=None,
+                 *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.target_year = int(year) if year else DEFAULT_YEAR
+        # Rango a recolectar: year (un año) | year_from/year_to | date_from/date_to (YYYY-MM-DD).
+        # Se ubica una sola vez el borde más nuevo (year_to) y se colecta de corrido hasta pasar year_from.
+        self.date_from = self._parse_day(date_from)
+        self.date_to = self._parse_day(date_to)
+        lo = int(year_from) if year_from else (int(self.date_from[:4]) if self.date_from else None)
+        hi = int(year_to) if year_to else (int(self.date_to[:4]) if self.date_to else None)
+        if lo is None:
+            lo = int(year) if year else (hi if hi is not None else DEFAULT_YEAR)
+        if hi is None:
+            hi = int(year) if year else (datetime.now().year if (year_from or date_from) else lo)
+        self.year_from, self.year_to = min(lo, hi), max(lo, hi)
+        self.target_year = self.year_to  # la búsqueda ubica el borde más nuevo del rango
         self.target_category = category
         self.custom_urls = None
         self.max_duplicates = int(max_duplicates) if max_duplicates else DEFAULT_MAX_DUPLICATES
         self.nav_epoch = 0  # para control de concurrencia en precisión
+        # Índice página → años (listing_index); se abre en start_requests, no al construir
+        self.use_listing_index = (
+            LISTING_INDEX if listing_index is None else str(listing_index).lower() in ("1", "true", "yes")
+        )
+        self.listing_index = None
+        self.listing_index_options = {}  # path/max_age_days/drift_per_day desde settings (from_crawler)
+        self.probes = max(1, int(probes or LISTING_PROBES))
+        self._kary = None  # estado de la ronda k-aria en curso
+        self.collect_window = max(1, int(collect_window or LISTING_COLLECT_WINDOW))
+        self._collect = None  # ventana de colecta: next (a procesar), issued, buffer, stop
+        self.collect_ignored = 0
+        # url → {"response", "years", "entries"}: los cambios de modo sobre una página ya vista
+        # no la vuelven a descargar (ListingMemoMiddleware la sirve desde aquí)
+        self._listing_memo = OrderedDict()
+        self.listing_memo_pages = LISTING_MEMO_PAGES
+        self.listing_memo_hits = 0
 
         if custom_urls:
             if os.path.isfile(custom_urls):
@@ -68,6 +108,27 @@ class ElMostradorSpider(scrapy.Spider):
             else:
                 self.custom_urls = [u.strip() for u in custom_urls.split(",") if u.strip()]
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        """Los LISTING_* de settings (o -s) pisan el env; los argumentos -a del spider pisan a ambos."""
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        if kwargs.get("listing_index") is None:
+            spider.use_listing_index = settings.getbool("LISTING_INDEX", spider.use_listing_index)
+        if not kwargs.get("probes"):
+            spider.probes = max(1, settings.getint("LISTING_PROBES", spider.probes))
+        if not kwargs.get("collect_window"):
+            spider.collect_window = max(1, settings.getint("LISTING_COLLECT_WINDOW", spider.collect_window))
+        spider.listing_memo_pages = settings.getint("LISTING_MEMO_PAGES", spider.listing_memo_pages)
+        for key, name, conv in (
+            ("path", "LISTING_INDEX_PATH", settings.get),
+            ("max_age_days", "LISTING_INDEX_MAX_AGE_DAYS", settings.getfloat),
+            ("drift_per_day", "LISTING_DRIFT_PAGES_PER_DAY", settings.getfloat),
+        ):
+            if settings.get(name) is not None:
+                spider.listing_index_options[key] = conv(name)
+        return spider
+
     # -----------------------
     # Utilidades de navegación
     # -----------------------
@@ -104,7 +165,7 @@ class ElMostradorSpider(scrapy.Spider):
             year = None
             if dt_iso:
                 try:
-                    d = dateparser.parse(dt_iso, dayfirst=True)
+                    d = self._parse_card_datetime(dt_iso)
                     if d:
                         year = d.year
                         dt_iso = d.isoformat()
@@ -122,6 +183,62 @@ class ElMostradorSpider(scrapy.Spider):
 
         return entries
 
+    def _observe_listing(self, page, y_min, y_max):
+        if self.listing_index is not None:
+            try:
+                self.listing_index.observe(page, y_min, y_max)
+            except Exception as e:
+                self.logger.debug(f"[🗂️ index] no se pudo registrar page={page}: {e}")
+
+    def _open_listing_index(self):
+        if not self.use_listing_index or self.listing_index is not None:
+            return self.listing_index
+        try:
+            self.listing_index = ListingIndex(self.name, **self.listing_index_options)
+        except Exception as e:
+            self.logger.warning(f"[🗂️ index] deshabilitado: {e}")
+        return self.listing_index
+
+    def closed(self, reason):
+        if self.listing_index is not None:
+            self.logger.info(f"[🗂️ index] {self.listing_index.observed} páginas registradas")
+            self.listing_index.close()
+            self.listing_index = None
+
+    # -----------------------
+    # Memo del run: páginas de listado ya parseadas
+    # -----------------------
+    def _listing_request(self, page, meta, **kwargs):
+        """Request de listado hacia parse_list; si la página está en el memo, se marca para no descargarla."""
+        url = self._url_for_page(page)
+        if url in self._listing_memo:
+            meta = {**meta, "listing_memo": True}
+        return scrapy.Request(url, callback=self.parse_list, dont_filter=True, meta=meta, **kwargs)
+
+    def listing_memo_response(self, url):
+        """Respuesta memorizada para `url` (o None); la usa ListingMemoMiddleware."""
+        hit = self._listing_memo.get(url)
+        if hit is None:
+            return None
+        self._listing_memo.move_to_end(url)
+        self.listing_memo_hits += 1
+        return hit["response"]
+
+    def _memo_listing(self, response, need_entries=False):
+        """(years, entries) de la página; una respuesta servida desde el memo no se vuelve a parsear."""
+        hit = self._listing_memo.get(response.url) if response.meta.get("listing_memo") else None
+        if hit is None:
+            years, entries = self._years_and_entries(response)
+            hit = {"response": response, "years": years, "entries": entries}
+            if self.listing_memo_pages > 0:
+                self._listing_memo[response.url] = hit
+                self._listing_memo.move_to_end(response.url)
+                while len(self._listing_memo) > self.listing_memo_pages:
+                    self._listing_memo.popitem(last=False)
+        if need_entries and hit["entries"] is None:
+            hit["entries"] = self._entries_from_cards(hit["response"])
+        return hit["years"], hit["entries"]
+
     def _year_range(self, entries):
         if not entries:
             return None, None
@@ -165,6 +282,44 @@ class ElMostradorSpider(scrapy.Spider):
         years = [y for y, _, _ in entries]
         return years, entries
 
+    @staticmethod
+    def _parse_card_datetime(value):
+        """
+        `<time datetime>` de una tarjeta. Es ISO (YYYY-MM-DD...): con dayfirst=True dateutil
+        intercambia mes y día cuando el día es ≤ 12, así que solo los formatos no ISO lo usan.
+        """
+        try:
+            return datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return dateparser.parse(value, dayfirst=True)
+
+    @staticmethod
+    def _parse_day(value):
+        if not value:
+            return None
+        return dateparser.parse(str(value)).date().isoformat()
+
+    def _wanted(self, year, iso=""):
+        """True si un artículo del listado (año + fecha ISO) cae dentro del rango pedido."""
+        if not (self.year_from <= year <= self.year_to):
+            return False
+        day = (iso or "")[:10]
+        if len(day) == 10:
+            if self.date_from and day < self.date_from:
+                return False
+            if self.date_to and day > self.date_to:
+                return False
+        return True
+
+    def _past_range(self, entries, y_max):
+        """Página completamente más antigua que el rango: y_max < year_from (o todas antes de date_from)."""
+        if y_max is not None and y_max < self.year_from:
+            return True
+        if self.date_from and entries:
+            days = [(iso or "")[:10] for _, _, iso in entries]
+            return all(len(d) == 10 for d in days) and max(days) < self.date_from
+        return False
+
     def _contains_target(self, y_min, y_max):
         return (y_min is not None) and (y_min <= self.target_year <= y_max)
 
@@ -195,8 +350,31 @@ class ElMostradorSpider(scrapy.Spider):
                 yield scrapy.Request(u, callback=self.parse_article, dont_filter=True)
             return
 
+        if self.year_from == self.year_to and not (self.date_from or self.date_to):
+            self.logger.info(f"[⚙️] target_year={self.target_year}")
+        else:
+            self.logger.info(
+                f"[⚙️] rango years=[{self.year_from}, {self.year_to}]"
+                f" dates=[{self.date_from or '-'}, {self.date_to or '-'}]; ubico {self.year_to} y colecto de corrido"
+            )
+        index = self._open_listing_index()
+        bracket = index.bracket(self.target_year) if index is not None else None
+        if self.probes > 1:
+            low, high = bracket or (0, None)
+            self.logger.info(f"[🧭 kary] búsqueda con {self.probes} sondas por ronda (low={low}, high≈{high})")
+            yield from self._kary_start(low, high)
+            return
+        if bracket:
+            # Salto directo a la primera página limpia estimada; leftmost verifica sus vecinos
+            low, high = bracket
+            self.logger.info(f"[🗂️ index] first_clean estimado={high} (low={low}); verifico vecinos")
+            yield self._listing_request(
+                high,
+                self._next_epoch_meta({"mode": "leftmost", "low": low, "high": high, "high_checked": False}),
+            )
+            return
+
         start = self._url_for_page(1)
-        self.logger.info(f"[⚙️] target_year={self.target_year}")
         yield scrapy.Request(
             start,
             callback=self.parse_list,
@@ -223,9 +401,16 @@ class ElMostradorSpider(scrapy.Spider):
             if response.meta["epoch"] != self.nav_epoch:
                 return
 
+        # Búsqueda k-aria: cada respuesta es una sonda de la ronda actual
+        if mode == "kary":
+            years, _entries = self._memo_listing(response)
+            yield from self._kary_observe(page, years)
+            return
+
         # Fase de colecta: procesar página actual y encadenar
         if mode == "collect":
-            entries = self._entries_from_cards(response)
+            _years, entries = self._memo_listing(response, need_entries=True)
+            self._observe_listing(page, *self._year_range(entries))
             yield from self._collect_here_and_next(response, entries, page)
             return
 
@@ -233,19 +418,18 @@ class ElMostradorSpider(scrapy.Spider):
         last_too_new = int(response.meta.get("last_too_new", 0))
         right_bound = response.meta.get("right_bound")
 
-        years, _entries = self._years_and_entries(response)
+        years, _entries = self._memo_listing(response)
         if not years:
             # página sin tarjetas legibles → avanza lineal
             self.logger.info(f"[🔎] page={page} -> years=[]; avanzo a page={page+1}")
-            yield scrapy.Request(
-                self._url_for_page(page + 1),
-                callback=self.parse_list,
-                dont_filter=True,
-                meta=self._next_epoch_meta({"mode": mode, "step": step, "last_too_new": last_too_new, "right_bound": right_bound}),
+            yield self._listing_request(
+                page + 1,
+                self._next_epoch_meta({"mode": mode, "step": step, "last_too_new": last_too_new, "right_bound": right_bound}),
             )
             return
 
         y_min, y_max = min(years), max(years)
+        self._observe_listing(page, y_min, y_max)
         self.logger.info(f"[🔎] page={page} -> years=[{y_min}, {y_max}] target={self.target_year} mode={mode}")
 
         # -------------------
@@ -255,21 +439,17 @@ class ElMostradorSpider(scrapy.Spider):
             if self._too_new(y_min):
                 next_page = page + step
                 self.logger.info(f"[⏩ expand] too_new; voy a page={next_page} (step {step}→{step*2})")
-                yield scrapy.Request(
-                    self._url_for_page(next_page),
-                    callback=self.parse_list,
-                    dont_filter=True,
-                    meta=self._next_epoch_meta({"mode": "expand", "step": step * 2, "last_too_new": page, "right_bound": right_bound}),
+                yield self._listing_request(
+                    next_page,
+                    self._next_epoch_meta({"mode": "expand", "step": step * 2, "last_too_new": page, "right_bound": right_bound}),
                 )
                 return
 
             if self._contains_target(y_min, y_max):
                 self.logger.info(f"[✅ expand] contiene target; inicio búsqueda izquierda last_too_new={last_too_new}, high={page}")
-                yield scrapy.Request(
-                    self._url_for_page(page),
-                    callback=self.parse_list,
-                    dont_filter=True,
-                    meta=self._next_epoch_meta({"mode": "leftmost", "low": last_too_new, "high": page, "high_checked": False}),
+                yield self._listing_request(
+                    page,
+                    self._next_epoch_meta({"mode": "leftmost", "low": last_too_new, "high": page, "high_checked": False}),
                 )
                 return
 
@@ -281,20 +461,16 @@ class ElMostradorSpider(scrapy.Spider):
                 mid = (low + high) // 2 or 1
                 if mid == low:
                     mid += 1
-                yield scrapy.Request(
-                    self._url_for_page(mid),
-                    callback=self.parse_list,
-                    dont_filter=True,
-                    meta=self._next_epoch_meta({"mode": "bin_find_any", "low": low, "high": high}),
+                yield self._listing_request(
+                    mid,
+                    self._next_epoch_meta({"mode": "bin_find_any", "low": low, "high": high}),
                 )
                 return
 
             self.logger.info(f"[ℹ️ expand] rango cruzado sin target; avanzo a page={page+1}")
-            yield scrapy.Request(
-                self._url_for_page(page + 1),
-                callback=self.parse_list,
-                dont_filter=True,
-                meta=self._next_epoch_meta({"mode": "expand", "step": step, "last_too_new": last_too_new, "right_bound": right_bound}),
+            yield self._listing_request(
+                page + 1,
+                self._next_epoch_meta({"mode": "expand", "step": step, "last_too_new": last_too_new, "right_bound": right_bound}),
             )
             return
 
@@ -307,11 +483,9 @@ class ElMostradorSpider(scrapy.Spider):
 
             if self._contains_target(y_min, y_max):
                 self.logger.info(f"[✅ bin] hallé page={page} con target. Voy a leftmost en [{low}, {page}]")
-                yield scrapy.Request(
-                    self._url_for_page(page),
-                    callback=self.parse_list,
-                    dont_filter=True,
-                    meta=self._next_epoch_meta({"mode": "leftmost", "low": low, "high": page, "high_checked": False}),
+                yield self._listing_request(
+                    page,
+                    self._next_epoch_meta({"mode": "leftmost", "low": low, "high": page, "high_checked": False}),
                 )
                 return
 
@@ -321,11 +495,9 @@ class ElMostradorSpider(scrapy.Spider):
                 high = page
 
             if low + 1 >= high:
-                yield scrapy.Request(
-                    self._url_for_page(high),
-                    callback=self.parse_list,
-                    dont_filter=True,
-                    meta=self._next_epoch_meta({"mode": "leftmost", "low": low, "high": high, "high_checked": False}),
+                yield self._listing_request(
+                    high,
+                    self._next_epoch_meta({"mode": "leftmost", "low": low, "high": high, "high_checked": False}),
                 )
                 return
 
@@ -333,12 +505,7 @@ class ElMostradorSpider(scrapy.Spider):
             if mid == page:
                 mid = min(high - 1, page + 1)
             self.logger.info(f"[🔀 bin] low={low} high={high} → mid={mid}")
-            yield scrapy.Request(
-                self._url_for_page(mid),
-                callback=self.parse_list,
-                dont_filter=True,
-                meta=self._next_epoch_meta({"mode": "bin_find_any", "low": low, "high": high}),
-            )
+            yield self._listing_request(mid, self._next_epoch_meta({"mode": "bin_find_any", "low": low, "high": high}))
             return
 
         # -------------------
@@ -353,11 +520,9 @@ class ElMostradorSpider(scrapy.Spider):
             # 1) Verificar que 'high' sea limpio
             if not response.meta.get("high_checked"):
                 if page != high:
-                    yield scrapy.Request(
-                        self._url_for_page(high),
-                        callback=self.parse_list,
-                        dont_filter=True,
-                        meta=self._next_epoch_meta({"mode": "leftmost", "low": low, "high": high, "high_checked": True}),
+                    yield self._listing_request(
+                        high,
+                        self._next_epoch_meta({"mode": "leftmost", "low": low, "high": high, "high_checked": True}),
                     )
                     return
                 else:
@@ -365,11 +530,9 @@ class ElMostradorSpider(scrapy.Spider):
                         jump = max(1, page - low)
                         nxt  = page + jump
                         self.logger.info(f"[➡️ leftmost] high={high} no limpio; expando → {nxt} (jump={jump})")
-                        yield scrapy.Request(
-                            self._url_for_page(nxt),
-                            callback=self.parse_list,
-                            dont_filter=True,
-                            meta=self._next_epoch_meta({"mode": "leftmost", "low": low, "high": nxt, "high_checked": False}),
+                        yield self._listing_request(
+                            nxt,
+                            self._next_epoch_meta({"mode": "leftmost", "low": low, "high": nxt, "high_checked": False}),
                         )
                         return
                     # si es limpio, seguimos con binaria
@@ -384,11 +547,9 @@ class ElMostradorSpider(scrapy.Spider):
             if low + 1 >= high:
                 first_clean = high
                 self.logger.info(f"[🏁 leftmost] first_clean=page={first_clean}. → collect")
-                yield scrapy.Request(
-                    self._url_for_page(first_clean),
-                    callback=self.parse_list,
-                    dont_filter=True,
-                    meta=self._next_epoch_meta({"mode": "collect", "phase": "collect", "state": "collect", "page": first_clean}),
+                yield self._listing_request(
+                    first_clean,
+                    self._next_epoch_meta({"mode": "collect", "phase": "collect", "state": "collect", "page": first_clean}),
                 )
                 return
 
@@ -402,20 +563,124 @@ class ElMostradorSpider(scrapy.Spider):
                 mid = page + 1 if is_clean_here else max(low + 1, page - 1)
 
             self.logger.info(f"[🔍 leftmost] low={low} high={high} → mid={mid} (clean_here={is_clean_here})")
-            yield scrapy.Request(
-                self._url_for_page(mid),
-                callback=self.parse_list,
-                dont_filter=True,
-                meta=self._next_epoch_meta({"mode": "leftmost", "low": low, "high": high, "high_checked": True}),
+            yield self._listing_request(
+                mid,
+                self._next_epoch_meta({"mode": "leftmost", "low": low, "high": high, "high_checked": True}),
+            )
+            return
+
+    # -------------------
+    # Búsqueda k-aria en paralelo (probes > 1)
+    # -------------------
+    # Invariante: `low` = última página NO limpia conocida (0 = virtual), `high` = primera
+    # página limpia conocida (y_max ≤ target) o None si aún no hay cota alta. Cada ronda
+    # pide `probes` páginas a la vez con el mismo epoch y decide recién con todas.
+    # `last_full` = última página con tarjetas vista: una sonda vacía antes de ella es un hueco.
+    def _kary_start(self, low=0, high=None):
+        self._kary = {"low": low, "high": None, "step": max(1, (high or 0) - low), "last_full": low}
+        if high is not None:
+            # cota alta del índice, sin verificar: va como una sonda más
+            return self._kary_round(self._kary_interior(low, high, self.probes - 1) + [high])
+        return self._kary_round(self._kary_expand_probes(low, 1))
+
+    def _kary_expand_probes(self, low, step):
+        return [low + step * 2 ** j for j in range(self.probes)]
+
+    def _kary_interior(self, low, high, k):
+        """k páginas equiespaciadas estrictamente entre low y high."""
+        gap = high - low
+        return sorted({low + (i * gap) // (k + 1) for i in range(1, k + 1)} - {low, high})
+
+    def _kary_round(self, pages):
+        st = self._kary
+        st["pending"] = set(pages)
+        st["results"] = {}
+        meta = self._next_epoch_meta({"mode": "kary"})
+        self.logger.info(f"[🧭 kary] low={st['low']} high={st['high']} → sondas={sorted(st['pending'])}")
+        for p in sorted(st["pending"]):
+            yield self._listing_request(p, {**meta, "page": p}, errback=self._kary_failed)
+
+    def _kary_observe(self, page, years):
+        st = self._kary
+        if st is None or page not in st["pending"]:
+            return
+        if years:
+            self._observe_listing(page, min(years), max(years))
+            st["last_full"] = max(st["last_full"], page)
+            st["results"][page] = max(years) <= self.target_year
+        else:
+            # vacía: se decide con la ronda completa (hueco o más allá del final del listado)
+            st["results"][page] = None
+        st["pending"].discard(page)
+        if not st["pending"]:
+            yield from self._kary_next()
+
+    def _kary_failed(self, failure):
+        request = getattr(failure, "request", None)
+        st = self._kary
+        if request is None or st is None or request.meta.get("epoch") != self.nav_epoch:
+            return
+        page = self._page_from_url(request.url)
+        if page not in st["pending"]:
+            return
+        self.logger.warning(f"[🧭 kary] sonda page={page} falló: {failure.value!r}")
+        st["pending"].discard(page)
+        if not st["pending"]:
+            yield from self._kary_next()
+
+    def _kary_next(self):
+        st = self._kary
+        results = st["results"]
+        for p in [p for p, clean in results.items() if clean is None]:
+            if p < st["last_full"]:
+                # hueco dentro del listado: como el modo serial, no dice nada → sonda descartada
+                self.logger.info(f"[🧭 kary] sonda page={p} vacía antes de page={st['last_full']}; la descarto")
+                del results[p]
+            else:
+                results[p] = True  # más allá del final del listado: cuenta como limpia
+        low, high = st["low"], st["high"]
+        cleans = [p for p, clean in results.items() if clean and p > low]
+        if cleans:
+            high = min(cleans + ([high] if high is not None else []))
+        low = max([low] + [p for p, clean in results.items() if not clean and (high is None or p < high)])
+
+        if (low, high) == (st["low"], st["high"]):
+            # ronda sin información (sondas caídas): sigue la búsqueda serial desde aquí
+            self._kary = None
+            self.logger.info(f"[🧭 kary] ronda sin avance; sigo en modo serial (low={low}, high={high})")
+            if high is None:
+                yield self._listing_request(
+                    low + 1,
+                    self._next_epoch_meta({"mode": "expand", "step": 1, "last_too_new": low, "right_bound": None}),
+                )
+            else:
+                yield self._listing_request(
+                    high,
+                    self._next_epoch_meta({"mode": "leftmost", "low": low, "high": high, "high_checked": False}),
+                )
+            return
+
+        st["low"], st["high"] = low, high
+        if high is None:
+            st["step"] *= 2 ** self.probes
+            yield from self._kary_round(self._kary_expand_probes(low, st["step"]))
+            return
+        if high - low <= 1:
+            self._kary = None
+            self.logger.info(f"[🏁 kary] first_clean=page={high}. → collect")
+            yield self._listing_request(
+                high,
+                self._next_epoch_meta({"mode": "collect", "phase": "collect", "state": "collect", "page": high}),
             )
             return
+        yield from self._kary_round(self._kary_interior(low, high, self.probes))
 
     # -------------------
     # Colecta
     # -------------------
     def _collect_here_and_next(self, response, entries, page):
         # Solo artículos del año objetivo, en orden DOM
-        to_collect = [href for (y, href, _) in entries if y == self.target_year]
+        to_collect = [href for (y, href, iso) in entries if self._wanted(y, iso)]
         self.logger.info(f"[📄 collect] page={page} years={sorted(set(y for y,_,__ in entries))} target_hits={len(to_collect)}")
 
         for href in to_collect:
@@ -423,49 +688,89 @@ class ElMostradorSpider(scrapy.Spider):
 
         # Miramos el rango para decidir si seguimos
         y_min, y_max = self._year_range(entries)
-        if y_max is not None and y_max < self.target_year:
-            self.logger.info(f"[✅ collect] corto: page={page} ya por debajo del target (y_max={y_max})")
+        if self._past_range(entries, y_max):
+            self.logger.info(f"[✅ collect] corto: page={page} ya por debajo del rango (y_max={y_max})")
             return
 
         # Continuar a siguientes páginas mientras sigan tocando el año
-        next_page = page + 1
-        yield scrapy.Request(
-            self._url_for_page(next_page),
-            callback=self._collect_step,
-            dont_filter=True,
-            meta={"mode": "collect", "page": next_page},  # mantener mode
-        )
+        yield from self._collect_start(page)
 
-    def _collect_step(self, response):
-        page = response.meta["page"]
-        entries = self._entries_from_cards(response)
-        y_min, y_max = self._year_range(entries)
+    def _collect_start(self, page):
+        """Abre la ventana de colecta tras `page`: hasta `collect_window` páginas de listado en vuelo."""
+        self._collect = {"next": page + 1, "issued": page, "buffer": {}, "stop": None}
+        yield from self._collect_fill()
 
-        if y_min is None:
-            self.logger.info(f"[📄 collect] page={page} sin tarjetas; continúo a page={page+1}")
+    def _collect_fill(self):
+        st = self._collect
+        while st["stop"] is None and st["issued"] < st["next"] + self.collect_window - 1:
+            st["issued"] += 1
             yield scrapy.Request(
-                self._url_for_page(page + 1),
+                self._url_for_page(st["issued"]),
                 callback=self._collect_step,
+                errback=self._collect_failed,
                 dont_filter=True,
-                meta={"mode": "collect", "page": page + 1},
+                meta={"mode": "collect", "page": st["issued"]},  # mantener mode
             )
+
+    def _in_collect_window(self, page):
+        st = self._collect
+        return (
+            st is not None and page is not None and page >= st["next"]
+            and (st["stop"] is None or page <= st["stop"])
+        )
+
+    def _collect_step(self, response):
+        page = response.meta["page"]
+        if not self._in_collect_window(page):
+            self.collect_ignored += 1
+            self.logger.debug(f"[📄 collect] page={page} más allá del corte; se ignora")
             return
+        self._collect["buffer"][page] = (response, self._entries_from_cards(response))
+        yield from self._collect_drain()
 
-        if y_max < self.target_year:
-            self.logger.info(f"[✅ collect] fin: page={page} y_max={y_max} < target={self.target_year}")
+    def _collect_failed(self, failure):
+        request = getattr(failure, "request", None)
+        page = request.meta.get("page") if request is not None else None
+        if not self._in_collect_window(page):
             return
+        # Como en la cadena serial: una página de listado caída termina la colecta
+        self.logger.warning(f"[📄 collect] page={page} falló: {failure.value!r}; fin de la colecta")
+        self._collect["buffer"][page] = (None, None)
+        yield from self._collect_drain()
+
+    def _collect_drain(self):
+        """Procesa EN ORDEN las páginas recibidas; la primera más antigua que el rango cierra la ventana."""
+        st = self._collect
+        while st["stop"] is None and st["next"] in st["buffer"]:
+            page = st["next"]
+            response, entries = st["buffer"].pop(page)
+            if response is None:
+                st["stop"] = page
+                break
+            y_min, y_max = self._year_range(entries)
+            self._observe_listing(page, y_min, y_max)
+
+            if y_min is None:
+                self.logger.info(f"[📄 collect] page={page} sin tarjetas; continúo a page={page+1}")
+                st["next"] += 1
+                continue
 
-        to_collect = [href for (y, href, _) in entries if y == self.target_year]
-        self.logger.info(f"[📄 collect] page={page} range=[{y_min},{y_max}] hits={len(to_collect)}")
-        for href in to_collect:
-            yield response.follow(href, callback=self.parse_article)
+            if self._past_range(entries, y_max):
+                self.logger.info(f"[✅ collect] fin: page={page} y_max={y_max} < year_from={self.year_from}")
+                st["stop"] = page
+                break
 
-        yield scrapy.Request(
-            self._url_for_page(page + 1),
-            callback=self._collect_step,
-            dont_filter=True,
-            meta={"mode": "collect", "page": page + 1},
-        )
+            to_collect = [href for (y, href, iso) in entries if self._wanted(y, iso)]
+            self.logger.info(f"[📄 collect] page={page} range=[{y_min},{y_max}] hits={len(to_collect)}")
+            for href in to_collect:
+                yield response.follow(href, callback=self.parse_article)
+            st["next"] += 1
+
+        if st["stop"] is not None:
+            # Lo que quede en vuelo más allá del corte se ignora al llegar
+            st["buffer"].clear()
+            return
+        yield from self._collect_fill()
 
     # -------------------
     # Artículo
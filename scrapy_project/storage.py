@@ -2,7 +2,8 @@
 from __future__ import annotations
 from typing import Any, Tuple
 import psycopg2
-from psycopg2.extras import Json
+
+from .preprocessed_codec import compact as compact_preprocessed, load_preprocessed_data, save_packed, write_preprocessed  # noqa: F401
 
 def _is_cursor(db: Any) -> bool:
     # Cursor típico tiene .execute y .fetchone y no tiene .cursor()
@@ -36,17 +37,15 @@ def _close(cur: Any, should_close: bool) -> None:
 
 def save_preprocessed_data(article_id: int, preprocessed: dict, db: Any) -> None:
     """
-    Actualiza el campo preprocessed_data del artículo.
+    Actualiza el campo preprocessed_data del artículo (tokens/lemmas/pos van
+    empaquetados a article_preprocessed; ver preprocessed_codec).
     Acepta:
       - cursor (recomendado): NO realiza commit/rollback (parte de la transacción activa)
       - connection (compat): abre cursor, hace commit/rollback y cierra
     """
     cur, manage_tx, should_close = _as_cursor(db)
     try:
-        cur.execute(
-            "UPDATE articles SET preprocessed_data = %s WHERE id = %s;",
-            (Json(preprocessed), article_id),
-        )
+        write_preprocessed(cur, article_id, preprocessed)
         _commit(db, manage_tx)
     except Exception as e:
         _rollback(db, manage_tx)
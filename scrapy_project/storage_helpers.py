@@ -13,6 +13,7 @@ Este módulo NO abre conexiones por su cuenta; opera sobre una conexión o curso
 from __future__ import annotations
 
 import json
+import os
 import re
 import traceback
 import math
@@ -21,6 +22,17 @@ from hashlib import sha256
 from typing import Any, Iterable, Optional, Tuple, List
 from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode, urlsplit, urlunsplit
 
+from .db import execute_prepared, register_prepared
+from .id_cache import ID_CACHE
+
+try:  # solo para distinguir cursores reales de fakes/mocks
+    from psycopg2.extensions import cursor as _PgCursor
+except Exception:  # pragma: no cover
+    _PgCursor = None
+
+# Guardado por conjuntos (unnest) en save_keywords/save_authors/save_entities
+STORAGE_SET_BASED = (os.getenv("STORAGE_SET_BASED", "true").lower() == "true")
+
 # ============================================================
 # Utilidades genéricas
 # ============================================================
@@ -52,13 +64,15 @@ def _commit(db_or_cur, manage_tx):
     try:
         if hasattr(db_or_cur, "commit"):
             db_or_cur.commit()
-            return
-        conn = getattr(db_or_cur, "connection", None)
-        if conn and hasattr(conn, "commit"):
-            conn.commit()
+        else:
+            conn = getattr(db_or_cur, "connection", None)
+            if conn and hasattr(conn, "commit"):
+                conn.commit()
+        # Ids aprendidos en esta transacción → caché compartida
+        ID_CACHE.commit(db_or_cur)
     except Exception:
         # No propagamos en helpers
-        pass
+        ID_CACHE.rollback(db_or_cur)
 
 
 def _rollback(db_or_cur, manage_tx):
@@ -67,6 +81,7 @@ def _rollback(db_or_cur, manage_tx):
     """
     if not manage_tx:
         return
+    ID_CACHE.rollback(db_or_cur)
     try:
         if hasattr(db_or_cur, "rollback"):
             db_or_cur.rollback()
@@ -213,25 +228,11 @@ def _explode_authors(value) -> list[str]:
     return out
 
 
-def save_authors(db_or_cur: Any, article_id: int, authors_in: Any = None, **kwargs) -> None:
+def _author_names(authors_in: Any) -> list[str]:
     """
-    Inserta autores y crea vínculos en articles_authors.
-
-    Compatibilidad:
-      - authors_in=<...> (preferido)
-      - author_value=<...> (algunos tests lo usan)
-
-    Reglas:
-      - Acepta str o lista/tupla/set de str.
-      - Si viene lista, cada elemento puede venir con múltiples autores separados por coma.
-      - Normaliza con strip() y deduplica.
-      - Idempotente en la tabla puente (ON CONFLICT DO NOTHING).
+    Lista de autores tal como la guarda save_authors: split por comas (también
+    dentro de elementos de listas), strip y deduplicación estable.
     """
-    # Compatibilidad con tests que pasan author_value=...
-    if authors_in is None:
-        authors_in = kwargs.get("author_value")
-
-    # Normalización y split por comas (incluidos elementos de listas)
     names: list[str] = []
     if isinstance(authors_in, str):
         names = [x.strip() for x in authors_in.split(",") if x.strip()]
@@ -254,37 +255,77 @@ def save_authors(db_or_cur: Any, article_id: int, authors_in: Any = None, **kwar
             seen.add(n)
             norm_names.append(n)
 
+    return norm_names
+
+
+def save_authors(db_or_cur: Any, article_id: int, authors_in: Any = None, **kwargs) -> None:
+    """
+    Inserta autores y crea vínculos en articles_authors.
+
+    Compatibilidad:
+      - authors_in=<...> (preferido)
+      - author_value=<...> (algunos tests lo usan)
+
+    Reglas:
+      - Acepta str o lista/tupla/set de str.
+      - Si viene lista, cada elemento puede venir con múltiples autores separados por coma.
+      - Normaliza con strip() y deduplica.
+      - Idempotente en la tabla puente (ON CONFLICT DO NOTHING).
+      - Con un cursor psycopg2 real: 3 sentencias para todos los autores (unnest).
+    """
+    # Compatibilidad con tests que pasan author_value=...
+    if authors_in is None:
+        authors_in = kwargs.get("author_value")
+
+    norm_names = _author_names(authors_in)
     if not norm_names:
         return
 
     cur, manage_tx, should_close = _as_cursor(db_or_cur)
+    if _set_based(cur):
+        try:
+            _save_names_set(
+                cur, article_id, norm_names,
+                table="authors", column="name", bridge="articles_authors", fk="author_id", owner=db_or_cur,
+            )
+            _commit(db_or_cur, manage_tx)
+            return
+        except Exception:
+            _rollback(db_or_cur, manage_tx)
+            raise
+        finally:
+            _close(cur, should_close)
+
     try:
         progress = False  # marcamos True ante cualquier operación SQL exitosa
 
         for name in norm_names:
-            author_id = None
-
-            # 1) SIEMPRE intentar insertar primero (para que el test capture el INSERT)
-            try:
-                cur.execute(
-                    "INSERT INTO authors (name) VALUES (%s) ON CONFLICT (name) DO NOTHING;",
-                    (name,),
-                )
-                progress = True
-            except Exception:
-                # no interrumpimos; intentaremos aún recuperar el id si es posible
-                pass
+            # 0) Caché de ids (solo ids confirmados o de esta misma transacción)
+            author_id = ID_CACHE.get("authors", name, db_or_cur)
 
-            # 2) Recuperar id (sea nuevo o preexistente)
-            try:
-                cur.execute("SELECT id FROM authors WHERE name = %s LIMIT 1;", (name,))
-                row = cur.fetchone()
-                if row:
-                    author_id = row[0]
+            if not author_id:
+                # 1) SIEMPRE intentar insertar primero (para que el test capture el INSERT)
+                try:
+                    cur.execute(
+                        "INSERT INTO authors (name) VALUES (%s) ON CONFLICT (name) DO NOTHING;",
+                        (name,),
+                    )
                     progress = True
-            except Exception:
-                # si no podemos recuperar id, no podemos vincular
-                author_id = None
+                except Exception:
+                    # no interrumpimos; intentaremos aún recuperar el id si es posible
+                    pass
+
+                # 2) Recuperar id (sea nuevo o preexistente)
+                try:
+                    cur.execute("SELECT id FROM authors WHERE name = %s LIMIT 1;", (name,))
+                    row = cur.fetchone()
+                    if row:
+                        author_id = row[0]
+                        progress = True
+                        ID_CACHE.put("authors", name, author_id, db_or_cur)
+                except Exception:
+                    # si no podemos recuperar id, no podemos vincular
+                    author_id = None
 
             if not author_id:
                 # no pudimos obtener id para este autor; continuar con los otros
@@ -364,6 +405,7 @@ def save_keywords(db_or_cur: Any, article_id: int, keywords_in: Any) -> None:
       - Si se pasa un CURSOR directo → ni commit ni rollback.
       - No dividir por espacios dentro de una keyword (p.ej. 'palabra clave' se mantiene).
       - Separadores válidos: ',', ';', '|', '/'.
+      - Con un cursor psycopg2 real: 3 sentencias para todas las keywords (unnest).
     """
     # Explode robusto (si tienes _explode_keywords, puedes usarlo en su lugar)
     def _explode_kw(v: Any) -> list[str]:
@@ -405,34 +447,44 @@ def save_keywords(db_or_cur: Any, article_id: int, keywords_in: Any) -> None:
 
     cur, manage_tx, should_close = _as_cursor(db_or_cur)
     try:
+        if _set_based(cur):
+            _save_names_set(
+                cur, article_id, kws,
+                table="keywords", column="word", bridge="articles_keywords", fk="keyword_id", owner=db_or_cur,
+            )
+            _commit(db_or_cur, manage_tx)
+            return
+
         for w in kws:
-            kid = None
+            kid = ID_CACHE.get("keywords", w, db_or_cur)
 
-            # Intento 1: insertar con ON CONFLICT (sin RETURNING para máxima compatibilidad con fakes)
-            try:
-                cur.execute(
-                    "INSERT INTO keywords (word) VALUES (%s) ON CONFLICT (word) DO NOTHING;",
-                    (w,),
-                )
-            except Exception:
-                # No levantamos aquí; dejamos que el flujo reintente con SELECT y,
-                # si vuelve a fallar, la excepción se propagará más abajo.
-                pass
+            if not kid:
+                # Intento 1: insertar con ON CONFLICT (sin RETURNING para máxima compatibilidad con fakes)
+                try:
+                    cur.execute(
+                        "INSERT INTO keywords (word) VALUES (%s) ON CONFLICT (word) DO NOTHING;",
+                        (w,),
+                    )
+                except Exception:
+                    # No levantamos aquí; dejamos que el flujo reintente con SELECT y,
+                    # si vuelve a fallar, la excepción se propagará más abajo.
+                    pass
 
-            # Intento 2: obtener id (funciona tanto si insertó como si ya existía)
-            cur.execute("SELECT id FROM keywords WHERE word = %s LIMIT 1;", (w,))
-            row = cur.fetchone()
-            if row and row[0] is not None:
-                kid = int(row[0])
-            else:
-                # Fallback adicional: INSERT ... RETURNING (por si el SELECT falla en algunos fakes)
-                cur.execute(
-                    "INSERT INTO keywords (word) VALUES (%s) RETURNING id;",
-                    (w,),
-                )
-                row2 = cur.fetchone()
-                if row2 and row2[0] is not None:
-                    kid = int(row2[0])
+                # Intento 2: obtener id (funciona tanto si insertó como si ya existía)
+                cur.execute("SELECT id FROM keywords WHERE word = %s LIMIT 1;", (w,))
+                row = cur.fetchone()
+                if row and row[0] is not None:
+                    kid = int(row[0])
+                else:
+                    # Fallback adicional: INSERT ... RETURNING (por si el SELECT falla en algunos fakes)
+                    cur.execute(
+                        "INSERT INTO keywords (word) VALUES (%s) RETURNING id;",
+                        (w,),
+                    )
+                    row2 = cur.fetchone()
+                    if row2 and row2[0] is not None:
+                        kid = int(row2[0])
+                ID_CACHE.put("keywords", w, kid, db_or_cur)
 
             if not kid:
                 # Si seguimos sin id aquí, dejamos que el test lo haga visible
@@ -497,6 +549,35 @@ def normalize_url(url: str) -> str:
         return url
 
 
+def url_key(url: str) -> str:
+    """
+    Clave canónica de URL para dedup (columna articles.url_key):
+    host en minúsculas sin 'www.' + path sin slashes repetidos ni finales; ignora
+    esquema, query y fragment. 'https://www.x.cl/a//b/?utm=1' -> 'x.cl/a/b'.
+    Debe coincidir con la función SQL posverdad_url_key (db/schema.sql).
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    try:
+        u = urlsplit(url)
+        host = (u.netloc or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        path = re.sub(r"/{2,}", "/", u.path or "")
+        return host + path.rstrip("/")
+    except Exception:
+        return url.rstrip("/").lower()
+
+
+def title_norm(title: str) -> str:
+    """
+    Título normalizado para dedup (columna articles.title_norm): minúsculas y
+    espacios colapsados. Equivale a la función SQL posverdad_title_norm.
+    """
+    return " ".join((title or "").lower().split())
+
+
 # ============================================================
 # Derivación NLP
 # ============================================================
@@ -549,11 +630,21 @@ def _ensure_source(db_or_cur: Any, item: dict) -> Optional[int]:
       - domain: item["domain"] o inferido desde item["url"] (puede ser vacío)
     Maneja unicidad tanto por name como por domain.
     """
+    name = (item.get("source") or "").strip().lower() or "unknown"
+    domain = (item.get("domain") or _infer_domain_from_url(item.get("url") or "") or "").strip()
+
+    cached = ID_CACHE.get("sources", (name, domain), db_or_cur)
+    if cached:
+        return cached
+    source_id = _resolve_source(db_or_cur, name, domain)
+    ID_CACHE.put("sources", (name, domain), source_id, db_or_cur)
+    return source_id
+
+
+def _resolve_source(db_or_cur: Any, name: str, domain: str) -> Optional[int]:
+    """Busca por name, luego por domain; si no existe, inserta (ON CONFLICT por name)."""
     cur, manage_tx, should_close = _as_cursor(db_or_cur)
     try:
-        name = (item.get("source") or "").strip().lower() or "unknown"
-        domain = (item.get("domain") or _infer_domain_from_url(item.get("url") or "") or "").strip()
-
         # 1) Buscar por name
         try:
             cur.execute("SELECT id FROM sources WHERE name = %s LIMIT 1;", (name,))
@@ -611,6 +702,140 @@ def _ensure_source(db_or_cur: Any, item: dict) -> Optional[int]:
         _close(cur, should_close)
 
 
+# ============================================================
+# Operaciones por conjunto (unnest)
+# ============================================================
+
+def _set_based(cur: Any) -> bool:
+    """
+    Ruta por conjuntos solo con cursores psycopg2 reales; fakes/mocks mantienen
+    la ruta por nombre (una sentencia por nombre, contrato de los tests).
+    """
+    return STORAGE_SET_BASED and _PgCursor is not None and isinstance(cur, _PgCursor)
+
+
+def _link_statement(bridge: str) -> str:
+    """Nombre de la sentencia preparada que vincula un artículo con N ids de `bridge`."""
+    return f"posverdad_link_{bridge}"
+
+
+for _bridge, _fk in (
+    ("articles_authors", "author_id"),
+    ("articles_keywords", "keyword_id"),
+    ("articles_entities", "entity_id"),
+):
+    register_prepared(
+        _link_statement(_bridge),
+        f"INSERT INTO {_bridge} (article_id, {_fk}) SELECT %s, unnest(%s::int[]) ON CONFLICT DO NOTHING;",
+    )
+
+
+def _save_names_set(
+    cur: Any,
+    article_id: int,
+    names: list[str],
+    *,
+    table: str,
+    column: str,
+    bridge: str,
+    fk: str,
+    owner: Any = None,
+) -> list[int]:
+    """
+    Upsert + resolución + vínculo de todos los nombres de un artículo en 3 sentencias:
+      1) INSERT … SELECT unnest(%s) ON CONFLICT DO NOTHING RETURNING id, nombre (nuevos)
+      2) SELECT id, nombre … = ANY(%s) para los que ya existían
+      3) INSERT INTO puente … SELECT %s, unnest(%s) ON CONFLICT DO NOTHING
+    Los nombres presentes en ID_CACHE no se consultan. Retorna los ids vinculados.
+    """
+    ids: dict[str, int] = {}
+    todo: list[str] = []
+    for n in names:
+        cached = ID_CACHE.get(table, n, owner)
+        if cached:
+            ids[n] = cached
+        else:
+            todo.append(n)
+
+    if todo:
+        cur.execute(
+            f"INSERT INTO {table} ({column}) SELECT unnest(%s::text[]) "
+            f"ON CONFLICT ({column}) DO NOTHING RETURNING id, {column};",
+            (todo,),
+        )
+        for rid, name in cur.fetchall() or []:
+            ids[name] = int(rid)
+        missing = [n for n in todo if n not in ids]
+        if missing:
+            cur.execute(f"SELECT id, {column} FROM {table} WHERE {column} = ANY(%s);", (missing,))
+            for rid, name in cur.fetchall() or []:
+                ids[name] = int(rid)
+        for n in todo:
+            ID_CACHE.put(table, n, ids.get(n), owner)
+
+    linked = list(dict.fromkeys(ids[n] for n in names if ids.get(n)))
+    if linked:
+        execute_prepared(cur, _link_statement(bridge), (article_id, linked))
+    return linked
+
+
+def _save_entities_set(cur: Any, article_id: int, ents: list[tuple[str, str]], owner: Any = None) -> list[int]:
+    """
+    Igual que _save_names_set para entities, con la semántica de save_entities:
+    coincidencia por lower(name) + type y, si hay varias filas, la de menor id.
+    """
+    ids: dict[tuple[str, str], int] = {}
+    todo: dict[tuple[str, str], tuple[str, str]] = {}
+    for name, etype in ents:
+        key = (name.lower(), etype)
+        cached = ID_CACHE.get("entities", key, owner)
+        if cached:
+            ids[key] = cached
+        elif key not in todo:
+            todo[key] = (name, etype)
+
+    if todo:
+        names = [n for n, _ in todo.values()]
+        types = [t for _, t in todo.values()]
+        cur.execute(
+            """
+            INSERT INTO entities (name, type)
+            SELECT i.name, i.type
+              FROM unnest(%s::text[], %s::text[]) AS i(name, type)
+             WHERE NOT EXISTS (
+                     SELECT 1 FROM entities e
+                      WHERE lower(e.name) = lower(i.name) AND e.type = i.type
+                   )
+            ON CONFLICT (name, type) DO NOTHING
+            RETURNING id, lower(name), type;
+            """,
+            (names, types),
+        )
+        for rid, lname, etype in cur.fetchall() or []:
+            ids[(lname, etype)] = int(rid)
+        missing = [k for k in todo if k not in ids]
+        if missing:
+            cur.execute(
+                """
+                SELECT DISTINCT ON (lower(e.name), e.type) e.id, lower(e.name), e.type
+                  FROM entities e
+                  JOIN unnest(%s::text[], %s::text[]) AS i(name, type)
+                    ON lower(e.name) = lower(i.name) AND e.type = i.type
+                 ORDER BY lower(e.name), e.type, e.id;
+                """,
+                ([todo[k][0] for k in missing], [todo[k][1] for k in missing]),
+            )
+            for rid, lname, etype in cur.fetchall() or []:
+                ids[(lname, etype)] = int(rid)
+        for k in todo:
+            ID_CACHE.put("entities", k, ids.get(k), owner)
+
+    linked = list(dict.fromkeys(ids[(n.lower(), t)] for n, t in ents if ids.get((n.lower(), t))))
+    if linked:
+        execute_prepared(cur, _link_statement("articles_entities"), (article_id, linked))
+    return linked
+
+
 # ============================================================
 # Categorías
 # ============================================================
@@ -660,6 +885,11 @@ def upsert_categories(cur, categories_value):
         return []
     ids = []
     for name in names:
+        # Solo ids ya confirmados: repetidos dentro de la llamada siguen yendo a la DB
+        cached = ID_CACHE.get("categories", name)
+        if cached:
+            ids.append(cached)
+            continue
         row = None
         try:
             cur.execute(
@@ -673,6 +903,7 @@ def upsert_categories(cur, categories_value):
 
         if row and len(row) >= 1 and row[0]:
             ids.append(int(row[0]))
+            ID_CACHE.put("categories", name, ids[-1], cur)
             continue
 
         # Fallback sólo si RETURNING no devolvió nada
@@ -680,6 +911,7 @@ def upsert_categories(cur, categories_value):
             cur.execute("SELECT id FROM categories WHERE name = %s LIMIT 1;", (name,))
             row = cur.fetchone()
             ids.append(int(row[0]) if row and row[0] is not None else 0)
+            ID_CACHE.put("categories", name, ids[-1], cur)
         except Exception:
             ids.append(0)
     return ids
@@ -741,15 +973,8 @@ def save_categories_and_link(db_or_cur, article_id, categories_value):
 # Guardado de claves auxiliares (keywords, authors, entities, framing)
 # ============================================================
 
-def save_entities(db_or_cur: Any, article_id: int, entities_in: Any) -> None:
-    """
-    Inserta entidades (respetando blocklist/alias SOLO si vienen como atributos en fakes)
-    y vincula en articles_entities. No consulta tablas opcionales (entity_blocklist/entity_aliases)
-    para evitar abortar transacciones en DBs de test que no las tienen.
-
-    Entrada: lista de dicts con 'text'/'name' y 'label'/'type'.
-    """
-    # Normalización → [(name, type)]
+def _entity_pairs(entities_in: Any) -> list[tuple[str, str]]:
+    """Normaliza entidades (dicts con 'text'/'name' y 'label'/'type') → [(name, type)]."""
     ents: list[tuple[str, str]] = []
     if isinstance(entities_in, dict):
         entities_in = [entities_in]
@@ -761,11 +986,36 @@ def save_entities(db_or_cur: Any, article_id: int, entities_in: Any) -> None:
             etype = (e.get("label") or e.get("type") or "").strip()
             if name and etype:
                 ents.append((name, etype))
+    return ents
+
+
+def save_entities(db_or_cur: Any, article_id: int, entities_in: Any) -> None:
+    """
+    Inserta entidades (respetando blocklist/alias SOLO si vienen como atributos en fakes)
+    y vincula en articles_entities. No consulta tablas opcionales (entity_blocklist/entity_aliases)
+    para evitar abortar transacciones en DBs de test que no las tienen.
+
+    Entrada: lista de dicts con 'text'/'name' y 'label'/'type'.
+    Con un cursor psycopg2 real usa la ruta por conjuntos (unnest); errores se propagan.
+    """
+    ents = _entity_pairs(entities_in)
     if not ents:
         return
 
     cur, manage_tx, should_close = _as_cursor(db_or_cur)
 
+    # Cursor real: 3 sentencias para todas las entidades (ver _save_entities_set)
+    if _set_based(cur):
+        try:
+            _save_entities_set(cur, article_id, ents, owner=db_or_cur)
+            _commit(db_or_cur, manage_tx)
+            return
+        except Exception:
+            _rollback(db_or_cur, manage_tx)
+            raise
+        finally:
+            _close(cur, should_close)
+
     # Helpers SOLO-atributos (sin SQL de fallback, para no abortar transacciones)
     def _is_blocklisted(name: str, etype: str) -> bool:
         try:
@@ -792,8 +1042,11 @@ def save_entities(db_or_cur: Any, article_id: int, entities_in: Any) -> None:
                 continue
 
             entity_id: Optional[int] = _alias_canonical_id(name, etype)
+            cache_key = (name.lower(), etype)
+            if not entity_id:
+                entity_id = ID_CACHE.get("entities", cache_key, db_or_cur)
 
-            # 1) Buscar existente si no vino por alias
+            # 1) Buscar existente si no vino por alias ni por caché
             if not entity_id:
                 try:
                     cur.execute(
@@ -838,6 +1091,7 @@ def save_entities(db_or_cur: Any, article_id: int, entities_in: Any) -> None:
             if not entity_id:
                 # No se pudo obtener ID para esta entidad
                 continue
+            ID_CACHE.put("entities", cache_key, entity_id, db_or_cur)
 
             # 3) Vincular en tabla puente (idempotente)
             try:
@@ -993,78 +1247,14 @@ def save_framing(db_or_cur: Any, article_id: int, framing: Any) -> None:
 # Artículo principal (UPSERT)
 # ============================================================
 
-def store_article(db: Any, item: dict, *, return_created: bool = False):
-    """
-    Inserta/actualiza un artículo y sus relaciones.
-    - Idempotencia por URL canónica (articles.url).
-    - Una sola sentencia UPSERT con RETURNING id,(xmax=0) para obtener was_created.
-    - Fallback NLP desde 'sentiment' si faltan polarity/subjectivity.
-    - Fusiona keywords/meta_keywords para evitar trabajo duplicado.
-    Retorna:
-      - si return_created=True  → (article_id, was_created: bool)
-      - si return_created=False → article_id
-    """
-    cur, manage_tx, should_close = _as_cursor(db)
-    try:
-        # ——— Señales NLP
-        polarity = _as_nullable_float(item.get("polarity"))
-        subjectivity = _as_nullable_float(item.get("subjectivity"))
-        language = (item.get("language") or "es").strip() or "es"
-
-        if polarity is None or subjectivity is None:
-            sp, ss = _derive_polarity_subjectivity_from_sentiment(item.get("sentiment"))
-            if polarity is None:
-                polarity = _as_nullable_float(sp)
-            if subjectivity is None:
-                subjectivity = _as_nullable_float(ss)
-
-        # ——— Fuente
-        source_id = item.get("source_id")
-        if not source_id:
-            domain_from_url = _infer_domain_from_url(item.get("url") or "")
-            # Nombre preferido:
-            # 1) item["source"] si viene
-            # 2) item["domain"] si viene
-            # 3) dominio inferido por URL
-            # 4) "unknown" (último recurso)
-            source_name = (item.get("source") or item.get("domain") or domain_from_url or "unknown")
-            source_domain = (item.get("domain") or domain_from_url or source_name or "")
-            source_id = _ensure_source(
-                cur,
-                {
-                    "source": source_name,
-                    "domain": source_domain,
-                    "url": item.get("url"),
-                },
-            )
+# Columnas de articles escritas por el UPSERT (mismo orden que _article_values)
+ARTICLE_COLUMNS = (
+    "url", "title", "body", "category_id", "publication_date", "body_hash", "run_id",
+    "image", "meta_description", "meta_keywords", "source_id", "polarity", "subjectivity", "language",
+)
 
-        # ——— URL canónica
-        raw_url = (item.get("url") or "").strip()
-        url_canonical = (item.get("url_canonical") or "").strip() or normalize_url(raw_url)
-        url = url_canonical
-
-        # ——— Campos base
-        title = (item.get("title") or "").strip()
-        body = (item.get("body") or "").strip()
-        publication_date = item.get("publication_date")
-        category_id = item.get("category_id")
-        run_id = item.get("run_id")
-
-        image = (item.get("image") or "").strip()
-        meta_description = (item.get("meta_description") or "").strip()
-        meta_keywords_field = _normalize_meta_keywords_for_articles_field(item.get("meta_keywords"))
-
-        # ——— body_hash si falta
-        body_hash = (item.get("body_hash") or sha256((body or "").encode("utf-8")).hexdigest())
-
-        # ——— Un solo UPSERT con RETURNING id, (xmax=0)
-        cur.execute(
-            """
-            INSERT INTO articles (
-                url, title, body, category_id, publication_date, body_hash, run_id,
-                image, meta_description, meta_keywords, source_id, polarity, subjectivity, language
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+# Cláusula ON CONFLICT compartida por store_article y el escritor por lotes
+ARTICLE_ON_CONFLICT = """
             ON CONFLICT (url)
             DO UPDATE SET
                 title = EXCLUDED.title,
@@ -1080,13 +1270,118 @@ def store_article(db: Any, item: dict, *, return_created: bool = False):
                 polarity = COALESCE(EXCLUDED.polarity, articles.polarity),
                 subjectivity = COALESCE(EXCLUDED.subjectivity, articles.subjectivity),
                 language = COALESCE(EXCLUDED.language, articles.language)
+"""
+
+
+# UPSERT por ítem (store_article), preparado en las conexiones del pool
+ARTICLE_UPSERT = register_prepared(
+    "posverdad_article_upsert",
+    f"""
+            INSERT INTO articles ({", ".join(ARTICLE_COLUMNS)})
+            VALUES ({", ".join(["%s"] * len(ARTICLE_COLUMNS))})
+            {ARTICLE_ON_CONFLICT}
             RETURNING id, (xmax = 0) AS inserted;
             """,
-            (
-                url, title, body, category_id, publication_date, body_hash, run_id,
-                image, meta_description, meta_keywords_field, source_id, polarity, subjectivity, language
+)
+
+
+def _article_values(cur: Any, item: dict, source_cache: Optional[dict] = None) -> tuple:
+    """
+    Deriva la tupla de valores (orden ARTICLE_COLUMNS) para el UPSERT de `item`.
+    Resuelve la fuente con `_ensure_source` si no viene source_id; `source_cache`
+    ((nombre, dominio) → id) evita repetirlo dentro de un lote.
+    """
+    # ——— Señales NLP
+    polarity = _as_nullable_float(item.get("polarity"))
+    subjectivity = _as_nullable_float(item.get("subjectivity"))
+    language = (item.get("language") or "es").strip() or "es"
+
+    if polarity is None or subjectivity is None:
+        sp, ss = _derive_polarity_subjectivity_from_sentiment(item.get("sentiment"))
+        if polarity is None:
+            polarity = _as_nullable_float(sp)
+        if subjectivity is None:
+            subjectivity = _as_nullable_float(ss)
+
+    # ——— Fuente
+    source_id = item.get("source_id")
+    if not source_id:
+        domain_from_url = _infer_domain_from_url(item.get("url") or "")
+        # Nombre preferido:
+        # 1) item["source"] si viene
+        # 2) item["domain"] si viene
+        # 3) dominio inferido por URL
+        # 4) "unknown" (último recurso)
+        source_name = (item.get("source") or item.get("domain") or domain_from_url or "unknown")
+        source_domain = (item.get("domain") or domain_from_url or source_name or "")
+        cache_key = (source_name, source_domain)
+        if source_cache is not None and cache_key in source_cache:
+            source_id = source_cache[cache_key]
+        else:
+            source_id = _ensure_source(
+                cur,
+                {
+                    "source": source_name,
+                    "domain": source_domain,
+                    "url": item.get("url"),
+                },
             )
-        )
+            if source_cache is not None and source_id:
+                source_cache[cache_key] = source_id
+
+    # ——— URL canónica
+    raw_url = (item.get("url") or "").strip()
+    url = (item.get("url_canonical") or "").strip() or normalize_url(raw_url)
+
+    # ——— Campos base
+    title = (item.get("title") or "").strip()
+    body = (item.get("body") or "").strip()
+    publication_date = item.get("publication_date")
+    category_id = item.get("category_id")
+    run_id = item.get("run_id")
+
+    image = (item.get("image") or "").strip()
+    meta_description = (item.get("meta_description") or "").strip()
+    meta_keywords_field = _normalize_meta_keywords_for_articles_field(item.get("meta_keywords"))
+
+    # ——— body_hash si falta
+    body_hash = (item.get("body_hash") or sha256((body or "").encode("utf-8")).hexdigest())
+
+    return (
+        url, title, body, category_id, publication_date, body_hash, run_id,
+        image, meta_description, meta_keywords_field, source_id, polarity, subjectivity, language
+    )
+
+
+def _merged_keywords(item: dict) -> list[str]:
+    """keywords + meta_keywords fusionadas y deduplicadas (orden estable)."""
+    merged: list[str] = []
+    if item.get("keywords"):
+        merged.extend(_explode_keywords(item["keywords"]))
+    if item.get("meta_keywords"):
+        merged.extend(_explode_keywords(item["meta_keywords"]))
+    seen = set()
+    return [k for k in merged if not (k in seen or seen.add(k))]
+
+
+def store_article(db: Any, item: dict, *, return_created: bool = False):
+    """
+    Inserta/actualiza un artículo y sus relaciones.
+    - Idempotencia por URL canónica (articles.url).
+    - Una sola sentencia UPSERT con RETURNING id,(xmax=0) para obtener was_created.
+    - Fallback NLP desde 'sentiment' si faltan polarity/subjectivity.
+    - Fusiona keywords/meta_keywords para evitar trabajo duplicado.
+    Retorna:
+      - si return_created=True  → (article_id, was_created: bool)
+      - si return_created=False → article_id
+    """
+    cur, manage_tx, should_close = _as_cursor(db)
+    try:
+        values = _article_values(cur, item)
+        category_id = values[3]
+
+        # ——— Un solo UPSERT con RETURNING id, (xmax=0)
+        execute_prepared(cur, ARTICLE_UPSERT, values)
         row = cur.fetchone()
         if not row:
             raise RuntimeError("INSERT/UPDATE en articles no retornó filas")
@@ -1107,14 +1402,8 @@ def store_article(db: Any, item: dict, *, return_created: bool = False):
             save_authors(cur, article_id, authors_val)
 
         # Keywords fusionadas
-        merged_keywords = []
-        if item.get("keywords"):
-            merged_keywords.extend(_explode_keywords(item["keywords"]))
-        if item.get("meta_keywords"):
-            merged_keywords.extend(_explode_keywords(item["meta_keywords"]))
-        if merged_keywords:
-            seen = set()
-            fused = [k for k in merged_keywords if not (k in seen or seen.add(k))]
+        fused = _merged_keywords(item)
+        if fused:
             save_keywords(cur, article_id, fused)
 
         # Entidades
@@ -1151,14 +1440,16 @@ def store_article(db: Any, item: dict, *, return_created: bool = False):
                     db.commit()
                 elif hasattr(cur, "connection") and hasattr(cur.connection, "commit") and callable(cur.connection.commit):
                     cur.connection.commit()
+                ID_CACHE.commit(db)
             except Exception:
-                pass
+                ID_CACHE.rollback(db)
 
         return (article_id, was_created) if return_created else article_id
 
     except Exception:
         # ——— Rollback explícito sobre 'db' (si es conexión)
         if manage_tx:
+            ID_CACHE.rollback(db)
             try:
                 if hasattr(db, "rollback") and callable(getattr(db, "rollback")):
                     db.rollback()
@@ -0,0 +1,110 @@
+# scripts/bench_spacy_profiles.py
+"""
+Benchmark de perfiles spaCy (scrapy_project.spacy_profiles): docs/seg por perfil.
+Con --stanza agrega una fila con el Preprocessor de Stanza (tokenize,pos,lemma
+por bulk_process) para compararlo con el perfil "lemmas" de spaCy.
+
+Textos: --file (uno por línea), o los últimos --limit cuerpos de `articles`
+(--db), o una muestra sintética. Cada perfil corre nlp.pipe sobre los mismos
+textos tras una pasada de calentamiento.
+
+  python scripts/bench_spacy_profiles.py --db --limit 500
+  python scripts/bench_spacy_profiles.py --file cuerpos.txt --profiles ner-only,full
+  python scripts/bench_spacy_profiles.py --db --profiles lemmas,full --stanza
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scrapy_project.model_registry import get_spacy  # noqa: E402
+from scrapy_project.spacy_profiles import PROFILES, profile_pipes, use_profile  # noqa: E402
+
+SAMPLE = (
+    "El Congreso aprobó este martes el proyecto de ley que modifica el sistema de pensiones, "
+    "tras una extensa jornada de debate en la que el ministro de Hacienda defendió la propuesta. "
+    "La oposición criticó la falta de diálogo y anunció que recurrirá al Tribunal Constitucional."
+)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="⏱️ docs/seg de spaCy por perfil de análisis")
+    p.add_argument("--model", default="es_core_news_md", help="Modelo spaCy")
+    p.add_argument("--profiles", default=",".join(PROFILES), help="Perfiles separados por coma")
+    p.add_argument("--file", help="Archivo con un texto por línea")
+    p.add_argument("--db", action="store_true", help="Usar cuerpos de articles (POSTGRES_*)")
+    p.add_argument("--limit", type=int, default=300, help="Máximo de textos")
+    p.add_argument("--batch-size", type=int, default=32, help="batch_size de nlp.pipe")
+    p.add_argument("--stanza", action="store_true", help="Medir también Preprocessor(engine='stanza')")
+    return p.parse_args()
+
+
+def load_texts(args):
+    if args.file:
+        with open(args.file, encoding="utf-8") as fh:
+            return [ln.strip() for ln in fh if ln.strip()][: args.limit]
+    if args.db:
+        from scrapy_project.db import connection
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT body FROM articles WHERE body IS NOT NULL AND body <> '' ORDER BY id DESC LIMIT %s",
+                (args.limit,),
+            )
+            return [r[0] for r in cur.fetchall()]
+    return [SAMPLE] * args.limit
+
+
+def bench(nlp, texts, profile, batch_size):
+    with use_profile(nlp, profile):
+        list(nlp.pipe(texts[: min(len(texts), batch_size)], batch_size=batch_size))  # calentamiento
+        t0 = perf_counter()
+        for _ in nlp.pipe(texts, batch_size=batch_size):
+            pass
+        return perf_counter() - t0
+
+
+def bench_stanza(texts, batch_size):
+    from scrapy_project.preprocessor import STANZA_PROCESSORS, Preprocessor
+    pre = Preprocessor(engine="stanza")
+    pre.preprocess_many(texts[: min(len(texts), batch_size)], batch_size=batch_size)  # calentamiento
+    t0 = perf_counter()
+    pre.preprocess_many(texts, batch_size=batch_size)
+    return perf_counter() - t0, STANZA_PROCESSORS.split(",")
+
+
+def main():
+    args = parse_args()
+    texts = load_texts(args)
+    if not texts:
+        print("⚠️ Sin textos para medir.")
+        return
+    nlp = get_spacy(args.model)
+    chars = sum(len(t) for t in texts)
+    print(f"📄 {len(texts)} textos ({chars / len(texts):.0f} caracteres promedio) — modelo {args.model}")
+    results = []
+    for profile in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+        if profile not in PROFILES:
+            print(f"⚠️ Perfil desconocido: {profile}")
+            continue
+        secs = bench(nlp, texts, profile, args.batch_size)
+        results.append((profile, secs, profile_pipes(nlp, profile) or nlp.pipe_names))
+    if args.stanza:
+        try:
+            secs, pipes = bench_stanza(texts, args.batch_size)
+            results.append(("stanza", secs, pipes))
+        except ImportError as e:
+            print(f"⚠️ Stanza no disponible: {e}")
+
+    full = next((secs for p, secs, _ in results if p == "full"), None)
+    print(f"{'perfil':<10} {'docs/seg':>10} {'kchars/seg':>11} {'vs full':>8}  componentes")
+    for profile, secs, pipes in results:
+        secs = max(secs, 1e-9)
+        speedup = f"{full / secs:.2f}x" if full else "-"
+        print(
+            f"{profile:<10} {len(texts) / secs:>10.1f} {chars / 1000 / secs:>11.1f} {speedup:>8}  {', '.join(pipes)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
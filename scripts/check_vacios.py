@@ -1,22 +1,20 @@
 # scripts/check_vacios.py
 
 import os
+import sys
 import pandas as pd
 import requests
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
 # === Configuración ===
 load_dotenv()
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 
-DB_URL = (
-    f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
-    f"@{os.getenv('POSTGRES_HOST', 'localhost')}:{os.getenv('POSTGRES_PORT', '5432')}"
-    f"/{os.getenv('POSTGRES_DB')}"
-)
-engine = create_engine(DB_URL)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scrapy_project.db import sqlalchemy_engine  # noqa: E402
+
+engine = sqlalchemy_engine()
 
 # === Función para alerta Slack ===
 def slack_alert(text, title="🚨 Run vacío detectado"):
@@ -1,23 +1,22 @@
 import os
+import sys
 import json
 import pandas as pd
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 
 load_dotenv()
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scrapy_project.db import sqlalchemy_engine  # noqa: E402
+
 RUN_ID = os.getenv("LAST_RUN_ID")
 if not RUN_ID:
     print("❌ LAST_RUN_ID no definido.")
     exit(1)
 
-# === DB engine (SQLAlchemy) ===
-db_url = (
-    f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
-    f"@{os.getenv('POSTGRES_HOST', 'localhost')}:{os.getenv('POSTGRES_PORT', '5432')}"
-    f"/{os.getenv('POSTGRES_DB')}"
-)
-engine = create_engine(db_url)
+# === DB engine (SQLAlchemy, compartido vía scrapy_project.db) ===
+engine = sqlalchemy_engine()
 
 def get_articles():
     query = "SELECT * FROM articles WHERE run_id = :run_id ORDER BY publication_date DESC;"
@@ -2,30 +2,34 @@
 
 """
 Descarga y verifica recursos NLP esenciales antes de correr el pipeline.
+Los modelos se cargan vía scrapy_project.model_registry (una vez por proceso)
+y al final se reporta tiempo de carga y RSS por modelo.
 """
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 
 def check_and_warmup_nlp(log=True):
-    import importlib
+    from scrapy_project.model_registry import get_sentiment, get_spacy, model_stats
 
     # --- spaCy ---
     try:
-        import spacy
-        spacy.load("es_core_news_md")
+        get_spacy("es_core_news_md")
         if log:
             print("✅ spaCy: es_core_news_md disponible.")
     except Exception:
         import subprocess
         print("⬇️ Descargando spaCy es_core_news_md...")
         subprocess.run(["python", "-m", "spacy", "download", "es_core_news_md"], check=True)
-        import spacy
-        spacy.load("es_core_news_md")
+        get_spacy("es_core_news_md")
         print("✅ spaCy es_core_news_md descargado y cacheado.")
 
     # --- pysentimiento SOLO sentiment para español ---
     try:
-        from pysentimiento import create_analyzer
         print("Intentando descargar modelo sentiment (pysentimiento)...")
-        create_analyzer(task="sentiment", lang="es")
+        get_sentiment("es")
         print("Sentiment descargado OK")
         if log:
             print("✅ pysentimiento: modelo español (sentiment) listo.")
@@ -36,5 +40,12 @@ def check_and_warmup_nlp(log=True):
         traceback.print_exc()
         raise
 
+    if log:
+        for st in model_stats():
+            print(
+                f"📦 {st['kind']}:{st['name']} — carga {st['load_seconds']}s, "
+                f"RSS {st['rss_mb']} MB (Δ {st['rss_delta_mb']} MB)"
+            )
+
 if __name__ == "__main__":
     check_and_warmup_nlp()
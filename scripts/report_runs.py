@@ -3,18 +3,16 @@
 import os
 import argparse
 import pandas as pd
+import sys
 import matplotlib.pyplot as plt
-from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
 # === Configuración ===
 load_dotenv()
-db_url = (
-    f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
-    f"@{os.getenv('POSTGRES_HOST', 'localhost')}:{os.getenv('POSTGRES_PORT', '5432')}"
-    f"/{os.getenv('POSTGRES_DB')}"
-)
-engine = create_engine(db_url)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scrapy_project.db import sqlalchemy_engine  # noqa: E402
+
+engine = sqlalchemy_engine()
 
 def parse_args():
     parser = argparse.ArgumentParser(description="📊 Reporte de ejecuciones NLP Posverdad")
@@ -1,26 +1,23 @@
 # scripts/report_summary.py
 
 import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
 
 # === Configuración ===
 load_dotenv()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scrapy_project.db import sqlalchemy_engine  # noqa: E402
+
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 plt.rcParams["font.size"] = 9
 
 N = int(os.getenv("SUMMARY_RUNS_LIMIT", "30"))
 EXPORT_HTML = True
 
-db_url = (
-    f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
-    f"@{os.getenv('POSTGRES_HOST', 'localhost')}:{os.getenv('POSTGRES_PORT', '5432')}"
-    f"/{os.getenv('POSTGRES_DB')}"
-)
-
-engine = create_engine(db_url)
+engine = sqlalchemy_engine()
 
 def generar_graficos(df):
     os.makedirs("graphs", exist_ok=True)
@@ -18,19 +18,13 @@ import shutil
 import subprocess
 from typing import Iterable, List, Set
 
-import psycopg2
 from psycopg2 import OperationalError
 from dotenv import load_dotenv
 
 load_dotenv()
 
-DB_PARAMS = {
-    "dbname": os.getenv("POSTGRES_DB"),
-    "user": os.getenv("POSTGRES_USER"),
-    "password": os.getenv("POSTGRES_PASSWORD") or None,
-    "host": os.getenv("POSTGRES_HOST", "localhost"),
-    "port": os.getenv("POSTGRES_PORT", "5432"),
-}
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scrapy_project import db  # noqa: E402
 
 DEFAULT_LOG_PATH = "logs/pipeline.log"
 DEFAULT_ERR_FILE = "logs/errores_date.txt"
@@ -94,7 +88,8 @@ def url_in_db(url: str) -> bool:
     Devuelve True si la URL ya existe en articles.url
     """
     try:
-        with psycopg2.connect(**DB_PARAMS) as conn:
+        # Conexión del pool: una sola para todas las URLs consultadas
+        with db.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT 1 FROM articles WHERE url = %s LIMIT 1;", (url,))
                 return cur.fetchone() is not None
@@ -28,6 +28,56 @@ if repo_str not in sys.path:
     sys.path.insert(0, repo_str)
 
 
+# --- Registro de modelos limpio por test ---
+@pytest.fixture(autouse=True)
+def _clear_model_registry():
+    """
+    Los componentes toman sus modelos de scrapy_project.model_registry (caché por proceso).
+    Se vacía antes de cada test para que los mocks de spacy.load/create_analyzer apliquen.
+    """
+    from scrapy_project import model_registry
+    model_registry.clear()
+    yield
+    model_registry.clear()
+
+
+# --- Caché de ids limpia por test ---
+@pytest.fixture(autouse=True)
+def _clear_id_cache():
+    """storage_helpers cachea nombre → id por proceso; cada test parte sin ids aprendidos."""
+    from scrapy_project.id_cache import ID_CACHE
+    ID_CACHE.clear()
+    yield
+    ID_CACHE.clear()
+
+
+# --- Pipeline aislado para tests unitarios ---
+@pytest.fixture
+def pipeline_factory(monkeypatch, tmp_path):
+    """
+    Construye ScrapyProjectPipeline sin efectos fuera del test: los logs del run van a
+    tmp_path (no a logs/ del repo) y build_nlp_stack no carga modelos.
+    Uso: p = pipeline_factory(conn=..., nlp=..., nlp_batch_size=3)
+    """
+    from scrapy_project import pipelines as pl
+
+    monkeypatch.setattr(pl, "LOGS_DIR", str(tmp_path))
+    monkeypatch.setattr(pl, "RUN_ID", None)
+    monkeypatch.setattr(pl, "LOG_HUMAN", None)
+    monkeypatch.setattr(pl.logger, "handlers", [])
+    monkeypatch.setattr(pl, "build_nlp_stack", lambda *a, **k: (None, None))
+
+    def _make(**attrs):
+        p = pl.ScrapyProjectPipeline()
+        for name, value in attrs.items():
+            setattr(p, name, value)
+        return p
+
+    yield _make
+    for handler in pl.logger.handlers:
+        handler.close()
+
+
 # --- Auto-marcado por estructura de carpetas ---
 def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
     """
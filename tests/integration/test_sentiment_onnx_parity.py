@@ -0,0 +1,48 @@
+# tests/integration/test_sentiment_onnx_parity.py
+"""
+Paridad backend ONNX vs torch (pysentimiento) sobre textos fijos.
+Requiere onnxruntime y el modelo robertuito descargado; si no, se omite.
+"""
+import pytest
+
+pytest.importorskip("onnxruntime")
+
+from scrapy_project.nlp_transformers import PosverdadNLP  # noqa: E402
+from scrapy_project.sentiment_onnx import OnnxSentimentAnalyzer, export_onnx  # noqa: E402
+
+TEXTS = [
+    "Me encanta cómo quedó la nueva plaza, es un lugar precioso.",
+    "El gobierno anunció el calendario de pagos para marzo.",
+    "Es un desastre total, la atención fue pésima y nadie respondió.",
+    "La selección ganó con claridad y los hinchas celebraron felices.",
+    "Los vecinos denuncian robos constantes y se sienten abandonados.",
+]
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    try:
+        from pysentimiento import create_analyzer
+        torch_sa = create_analyzer(task="sentiment", lang="es")
+    except Exception as e:
+        pytest.skip(f"Modelo de sentimiento no disponible: {e}")
+    out_dir = str(tmp_path_factory.mktemp("onnx"))
+    export_onnx(torch_sa, out_dir, quantize=True)
+    return torch_sa, out_dir
+
+
+def _nlp(sa):
+    nlp = PosverdadNLP(nlp_model=None, chunked=False)
+    nlp.sa = sa
+    return nlp
+
+
+@pytest.mark.parametrize("int8,tol", [(False, 1e-3), (True, 0.1)])
+def test_onnx_matches_torch_backend(exported, int8, tol):
+    torch_sa, out_dir = exported
+    ref = _nlp(torch_sa).analyze_sentiment_many(TEXTS)
+    got = _nlp(OnnxSentimentAnalyzer.from_dir(out_dir, int8=int8, threads=1)).analyze_sentiment_many(TEXTS)
+
+    for (p_ref, s_ref), (p_got, s_got) in zip(ref, got):
+        assert p_got == p_ref
+        assert abs(s_got - s_ref) <= tol
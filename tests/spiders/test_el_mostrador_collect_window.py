@@ -0,0 +1,82 @@
+from scrapy.http import HtmlResponse, Request
+from twisted.python.failure import Failure
+
+from scrapy_project.spiders.el_mostrador import ElMostradorSpider
+
+YEARS_BY_PAGE = {10: [2024, 2023], 11: [2023], 12: [], 13: [2023, 2022], 14: [2022], 15: [2022], 16: [2021]}
+
+
+def _page_from(url: str) -> int:
+    return int(url.rstrip("/").split("/")[-1])
+
+
+def _entries(response):
+    page = _page_from(response.url)
+    return [
+        (y, f"https://www.elmostrador.cl/noticias/{y}/01/01/p{page}-{i}/", f"{y}-01-01")
+        for i, y in enumerate(YEARS_BY_PAGE.get(page, []))
+    ]
+
+
+def _spider(monkeypatch, window):
+    spider = ElMostradorSpider(year=2023, listing_index="false", collect_window=window)
+    monkeypatch.setattr(spider, "_entries_from_cards", _entries)
+    return spider
+
+
+def _resp(req):
+    return HtmlResponse(url=req.url, request=req, body=b"<html></html>", encoding="utf-8")
+
+
+def _split(out):
+    out = list(out)
+    listing = sorted(_page_from(r.url) for r in out if r.meta.get("mode") == "collect")
+    articles = [r.url.rstrip("/").split("/")[-1] for r in out if r.meta.get("mode") != "collect"]
+    return listing, articles
+
+
+def _start(spider):
+    req = Request(spider._url_for_page(10), meta={"mode": "collect", "page": 10})
+    return list(spider.parse_list(_resp(req)))
+
+
+def test_window_keeps_n_pages_in_flight_and_processes_in_order(monkeypatch):
+    spider = _spider(monkeypatch, 3)
+    listing, articles = _split(_start(spider))
+    assert listing == [11, 12, 13] and articles == ["p10-1"]
+    reqs = {n: Request(spider._url_for_page(n), meta={"mode": "collect", "page": n}) for n in range(11, 17)}
+
+    # Llega 13 antes que 11: queda en buffer, sin artículos ni nuevas páginas
+    assert list(spider._collect_step(_resp(reqs[13]))) == []
+    # 11 → se procesa y la ventana avanza hasta 14
+    assert _split(spider._collect_step(_resp(reqs[11]))) == ([14], ["p11-0"])
+    # 12 (vacía) destraba 13 ya recibida → ventana hasta 16
+    assert _split(spider._collect_step(_resp(reqs[12]))) == ([15, 16], ["p13-0"])
+    # 14 está por debajo del target: corte, sin más páginas
+    assert list(spider._collect_step(_resp(reqs[14]))) == []
+    # Lo que estaba en vuelo más allá del corte se ignora
+    assert list(spider._collect_step(_resp(reqs[15]))) == []
+    assert list(spider._collect_step(_resp(reqs[16]))) == []
+    assert spider.collect_ignored == 2
+
+
+def test_window_of_one_is_the_serial_chain(monkeypatch):
+    spider = _spider(monkeypatch, 1)
+    listing, _ = _split(_start(spider))
+    seen = []
+    while listing:
+        (page,) = listing
+        seen.append(page)
+        req = Request(spider._url_for_page(page), meta={"mode": "collect", "page": page})
+        listing, _ = _split(spider._collect_step(_resp(req)))
+    assert seen == [11, 12, 13, 14]
+
+
+def test_failed_listing_page_ends_collect(monkeypatch):
+    spider = _spider(monkeypatch, 2)
+    _start(spider)  # en vuelo: 11, 12
+    failure = Failure(IOError("404"))
+    failure.request = Request(spider._url_for_page(11), meta={"mode": "collect", "page": 11})
+    assert list(spider._collect_failed(failure)) == []
+    late = Request(spider._url_for_page(12), meta={"mode": "collect", "page": 12})
+    assert list(spider._collect_step(_resp(late))) == []
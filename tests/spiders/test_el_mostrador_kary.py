@@ -0,0 +1,117 @@
+import pytest
+from scrapy.http import HtmlResponse, Request
+from twisted.python.failure import Failure
+
+from scrapy_project.spiders.el_mostrador import ElMostradorSpider
+
+
+def _page_from(url: str) -> int:
+    try:
+        return int(url.rstrip("/").split("/")[-1])
+    except Exception:
+        return -1
+
+
+def fake_years_for_page(n: int):
+    if n < 2000:
+        return [2025]
+    if n < 4000:
+        return [2024, 2025]
+    if n < 6500:
+        return [2023, 2025]
+    if n < 7000:
+        return [2023]
+    if n < 9000:
+        return [2021, 2023]
+    return [2019, 2021]
+
+
+def _spider(monkeypatch, year, probes):
+    spider = ElMostradorSpider(year=year, listing_index="false", probes=probes)
+    monkeypatch.setattr(spider, "extract_listing_years", lambda r: fake_years_for_page(_page_from(r.url)))
+    return spider
+
+
+def _respond(spider, req):
+    resp = HtmlResponse(url=req.url, request=req, body=b"<html></html>", encoding="utf-8")
+    return [o for o in spider.parse(resp) if isinstance(o, Request)]
+
+
+def _locate(spider):
+    """Corre rondas (todas las peticiones en vuelo a la vez) hasta 'collect'; devuelve (página, rondas)."""
+    in_flight = list(spider.start_requests())
+    rounds = 0
+    while rounds < 100:
+        collect = [r for r in in_flight if r.meta.get("mode") == "collect"]
+        if collect:
+            return _page_from(collect[0].url), rounds
+        rounds += 1
+        nxt = []
+        for req in in_flight:
+            nxt += _respond(spider, req)
+        in_flight = nxt
+    raise AssertionError("el spider nunca pasó a 'collect'")
+
+
+@pytest.mark.parametrize("year", [2025, 2024, 2023, 2021])
+def test_kary_finds_same_first_clean_as_serial(monkeypatch, year):
+    serial_page, serial_rounds = _locate(_spider(monkeypatch, year, 1))
+    kary_page, kary_rounds = _locate(_spider(monkeypatch, year, 4))
+    assert kary_page == serial_page
+    assert kary_rounds <= serial_rounds
+
+
+def test_kary_round_is_parallel_and_much_shorter(monkeypatch):
+    spider = _spider(monkeypatch, 2023, 8)
+    first = list(spider.start_requests())
+    assert [_page_from(r.url) for r in first] == [1, 2, 4, 8, 16, 32, 64, 128]
+    assert len({r.meta["epoch"] for r in first}) == 1
+
+    page, rounds = _locate(_spider(monkeypatch, 2023, 8))
+    _, serial = _locate(_spider(monkeypatch, 2023, 1))
+    assert page == 6500
+    assert rounds * 3 <= serial
+
+
+def test_kary_ignores_stale_probes_and_waits_for_whole_round(monkeypatch):
+    spider = _spider(monkeypatch, 2023, 4)
+    round1 = list(spider.start_requests())
+    assert _respond(spider, round1[0]) == []  # falta el resto de la ronda
+    round2 = []
+    for req in round1[1:]:
+        round2 += _respond(spider, req)
+    assert round2 and all(r.meta["epoch"] == spider.nav_epoch for r in round2)
+    # Una respuesta repetida de la ronda anterior se descarta
+    assert _respond(spider, round1[1]) == []
+
+
+def test_kary_failed_round_falls_back_to_serial(monkeypatch):
+    spider = _spider(monkeypatch, 2023, 3)
+    round1 = list(spider.start_requests())
+    out = []
+    for req in round1:
+        failure = Failure(IOError("timeout"))
+        failure.request = req
+        out += list(spider._kary_failed(failure) or [])
+    assert len(out) == 1 and out[0].meta["mode"] == "expand" and _page_from(out[0].url) == 1
+
+
+@pytest.mark.parametrize("gap", [6280, 6443, 6495])
+def test_kary_empty_page_inside_listing_is_not_clean(monkeypatch, gap):
+    serial_page, _ = _locate(_spider(monkeypatch, 2023, 1))
+    spider = _spider(monkeypatch, 2023, 4)
+    # Página sin tarjetas legibles en medio del listado (sondeada por la búsqueda de 4 sondas)
+    monkeypatch.setattr(
+        spider, "extract_listing_years",
+        lambda r: [] if _page_from(r.url) == gap else fake_years_for_page(_page_from(r.url)),
+    )
+    assert _locate(spider)[0] == serial_page == 6500
+
+
+def test_kary_empty_pages_past_the_end_count_as_clean(monkeypatch):
+    spider = _spider(monkeypatch, 2019, 4)
+    monkeypatch.setattr(
+        spider, "extract_listing_years",
+        lambda r: [] if _page_from(r.url) >= 20000 else fake_years_for_page(_page_from(r.url)),
+    )
+    assert _locate(spider)[0] == 20000
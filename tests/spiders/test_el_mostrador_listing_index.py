@@ -0,0 +1,99 @@
+from scrapy.http import HtmlResponse, Request
+
+from scrapy_project.listing_index import ListingIndex
+from scrapy_project.spiders.el_mostrador import ElMostradorSpider
+
+
+def _page_from(url: str) -> int:
+    try:
+        return int(url.rstrip("/").split("/")[-1])
+    except Exception:
+        return -1
+
+
+def fake_years_for_page(n: int):
+    if n < 2000:
+        return [2025]
+    if n < 4000:
+        return [2024, 2025]
+    if n < 6500:
+        return [2023, 2025]
+    if n < 7000:
+        return [2023]
+    if n < 9000:
+        return [2021, 2023]
+    return [2019, 2021]
+
+
+def _spider(monkeypatch, index_path):
+    spider = ElMostradorSpider(year=2023, listing_index="true")
+    monkeypatch.setattr(spider, "extract_listing_years", lambda r: fake_years_for_page(_page_from(r.url)))
+    monkeypatch.setattr(
+        "scrapy_project.spiders.el_mostrador.ListingIndex", lambda source: ListingIndex(source, path=index_path)
+    )
+    return spider
+
+
+def _locate(spider):
+    """Sigue la navegación desde start_requests; devuelve (página de collect, fetches de listado)."""
+    current = next(iter(spider.start_requests()))
+    fetches = 0
+    while fetches < 200:
+        if str(current.meta.get("mode")) == "collect":
+            return _page_from(current.url), fetches
+        fetches += 1
+        resp = HtmlResponse(url=current.url, request=current, body=b"<html></html>", encoding="utf-8")
+        current = next(o for o in spider.parse(resp) if isinstance(o, Request))
+    raise AssertionError("el spider nunca pasó a 'collect'")
+
+
+def test_second_run_jumps_to_first_clean_page(monkeypatch, tmp_path):
+    path = str(tmp_path / "listing_index.sqlite3")
+
+    first = _spider(monkeypatch, path)
+    page, cold = _locate(first)
+    first.closed("finished")
+    assert page == 6500
+
+    second = _spider(monkeypatch, path)
+    page, warm = _locate(second)
+    second.closed("finished")
+    assert page == 6500
+    assert warm <= 3 < cold
+
+
+def test_listing_index_disabled_starts_from_page_one(monkeypatch, tmp_path):
+    spider = ElMostradorSpider(year=2023, listing_index="false")
+    req = next(iter(spider.start_requests()))
+    assert _page_from(req.url) == 1 and req.meta["mode"] == "expand"
+    assert spider.listing_index is None
+
+
+def test_listing_settings_come_from_crawler_settings(monkeypatch, tmp_path):
+    from scrapy.utils.test import get_crawler
+
+    crawler = get_crawler(settings_dict={
+        "LISTING_INDEX": False,
+        "LISTING_PROBES": 6,
+        "LISTING_MEMO_PAGES": 3,
+        "LISTING_COLLECT_WINDOW": 4,
+        "LISTING_INDEX_MAX_AGE_DAYS": 7,
+        "LISTING_DRIFT_PAGES_PER_DAY": 1.5,
+    })
+    spider = ElMostradorSpider.from_crawler(crawler, year=2023)
+    assert spider.use_listing_index is False
+    assert (spider.probes, spider.listing_memo_pages, spider.collect_window) == (6, 3, 4)
+    assert spider.listing_index_options == {"max_age_days": 7.0, "drift_per_day": 1.5}
+
+    # Los argumentos -a del spider pisan a settings
+    spider = ElMostradorSpider.from_crawler(crawler, year=2023, listing_index="true", probes="2", collect_window="1")
+    assert spider.use_listing_index is True and (spider.probes, spider.collect_window) == (2, 1)
+
+    seen = {}
+    monkeypatch.setattr(
+        "scrapy_project.spiders.el_mostrador.ListingIndex",
+        lambda source, **kw: seen.update(kw) or ListingIndex(source, path=str(tmp_path / "idx.sqlite3"), **kw),
+    )
+    spider._open_listing_index()
+    spider.closed("finished")
+    assert seen == {"max_age_days": 7.0, "drift_per_day": 1.5}
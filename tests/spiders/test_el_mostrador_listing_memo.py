@@ -0,0 +1,98 @@
+from scrapy.http import HtmlResponse, Request
+
+from scrapy_project.middlewares import ListingMemoMiddleware
+from scrapy_project.spiders.el_mostrador import ElMostradorSpider
+
+
+def _page_from(url: str) -> int:
+    try:
+        return int(url.rstrip("/").split("/")[-1])
+    except Exception:
+        return -1
+
+
+def fake_years_for_page(n: int):
+    if n < 2000:
+        return [2025]
+    if n < 4000:
+        return [2024, 2025]
+    if n < 6500:
+        return [2023, 2025]
+    if n < 7000:
+        return [2023]
+    if n < 9000:
+        return [2021, 2023]
+    return [2019, 2021]
+
+
+class FakeStats:
+    def __init__(self):
+        self.values = {}
+
+    def inc_value(self, key, count=1, start=0, spider=None):
+        self.values[key] = self.values.get(key, start) + count
+
+
+def _spider(monkeypatch, **kwargs):
+    spider = ElMostradorSpider(year=2023, listing_index="false", **kwargs)
+    parsed = []
+
+    def _years(response):
+        parsed.append(_page_from(response.url))
+        return fake_years_for_page(_page_from(response.url))
+
+    monkeypatch.setattr(spider, "extract_listing_years", _years)
+    return spider, parsed
+
+
+def _run_until_collect(spider, mw):
+    """Sigue la navegación pasando cada Request por el middleware; devuelve (collect_req, descargas)."""
+    in_flight = list(spider.start_requests())
+    downloads = 0
+    for _ in range(200):
+        collect = [r for r in in_flight if r.meta.get("mode") == "collect"]
+        if collect:
+            return collect[0], downloads
+        nxt = []
+        for req in in_flight:
+            resp = mw.process_request(req, spider)
+            if resp is None:
+                downloads += 1
+                resp = HtmlResponse(url=req.url, request=req, body=b"<html></html>", encoding="utf-8")
+            nxt += [o for o in spider.parse(resp) if isinstance(o, Request)]
+        in_flight = nxt
+    raise AssertionError("el spider nunca pasó a 'collect'")
+
+
+def test_mode_transitions_reuse_parsed_pages(monkeypatch):
+    stats = FakeStats()
+    mw = ListingMemoMiddleware(stats)
+    spider, parsed = _spider(monkeypatch)
+
+    collect_req, downloads = _run_until_collect(spider, mw)
+    assert _page_from(collect_req.url) == 6500
+    # La página de collect ya se parseó en leftmost: se sirve desde el memo
+    assert collect_req.meta.get("listing_memo") is True
+    assert mw.process_request(collect_req, spider) is not None
+    # Cada página se parsea (y descarga) una sola vez
+    assert len(parsed) == len(set(parsed)) == downloads
+    assert stats.values["posverdad/listing/memo_hits"] == spider.listing_memo_hits >= 2
+
+
+def test_memo_is_bounded_and_evicted_pages_are_downloaded(monkeypatch):
+    import scrapy_project.spiders.el_mostrador as em
+
+    monkeypatch.setattr(em, "LISTING_MEMO_PAGES", 2)
+    spider, _ = _spider(monkeypatch)
+    for n in (1, 2, 3):
+        url = spider._url_for_page(n)
+        req = Request(url)
+        spider._memo_listing(HtmlResponse(url=url, request=req, body=b"<html></html>", encoding="utf-8"))
+    assert list(spider._listing_memo) == [spider._url_for_page(2), spider._url_for_page(3)]
+
+    mw = ListingMemoMiddleware()
+    stale = Request(spider._url_for_page(1), meta={"listing_memo": True})
+    assert mw.process_request(stale, spider) is None
+    assert mw.process_request(Request(spider._url_for_page(3)), spider) is None  # sin marca: descarga
+    served = mw.process_request(Request(spider._url_for_page(3), meta={"listing_memo": True, "mode": "collect"}), spider)
+    assert served.meta["mode"] == "collect"
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+from scrapy.http import HtmlResponse, Request
+
+from scrapy_project.spiders.el_mostrador import ElMostradorSpider
+
+# page → [(año, fecha)] del listado (más nuevo primero)
+LISTING = {
+    10: [(2025, "2025-01-03"), (2024, "2024-12-30")],
+    11: [(2024, "2024-06-01"), (2024, "2024-02-01")],
+    12: [(2023, "2023-11-20"), (2023, "2023-03-01")],
+    13: [(2022, "2022-08-15"), (2022, "2022-01-10")],
+    14: [(2021, "2021-12-31"), (2021, "2021-05-05")],
+    15: [(2020, "2020-12-01")],
+}
+
+
+def _page_from(url: str) -> int:
+    return int(url.rstrip("/").split("/")[-1])
+
+
+def _entries(response):
+    page = _page_from(response.url)
+    return [
+        (y, f"https://www.elmostrador.cl/noticias/{day.replace('-', '/')}/p{page}-{i}/", f"{day}T10:00:00")
+        for i, (y, day) in enumerate(LISTING.get(page, []))
+    ]
+
+
+def _collect(monkeypatch, **kwargs):
+    """Colecta desde la página 10 hasta el corte; devuelve (artículos, páginas de listado recorridas)."""
+    spider = ElMostradorSpider(listing_index="false", **kwargs)
+    monkeypatch.setattr(spider, "_entries_from_cards", _entries)
+    req = Request(spider._url_for_page(10), meta={"mode": "collect", "page": 10})
+    pending = list(spider.parse_list(HtmlResponse(url=req.url, request=req, body=b"", encoding="utf-8")))
+    articles, pages = [], [10]
+    while pending:
+        out = pending.pop(0)
+        if out.meta.get("mode") == "collect":
+            pages.append(out.meta["page"])
+            pending += list(spider._collect_step(HtmlResponse(url=out.url, request=out, body=b"", encoding="utf-8")))
+        else:
+            articles.append(out.url.rstrip("/").split("/")[-1])
+    return articles, pages
+
+
+def test_year_range_collects_contiguously_in_one_pass(monkeypatch):
+    articles, pages = _collect(monkeypatch, year_from="2022", year_to="2024")
+    assert articles == ["p10-1", "p11-0", "p11-1", "p12-0", "p12-1", "p13-0", "p13-1"]
+    assert pages == [10, 11, 12, 13, 14]  # corta en la primera página anterior a 2022
+
+
+def test_date_range_filters_by_listing_date_and_stops_early(monkeypatch):
+    articles, pages = _collect(monkeypatch, date_from="2023-03-01", date_to="2024-06-30")
+    assert articles == ["p11-0", "p11-1", "p12-0", "p12-1"]
+    assert pages == [10, 11, 12, 13]
+
+
+def test_single_year_behaves_as_before(monkeypatch):
+    articles, pages = _collect(monkeypatch, year="2023")
+    assert articles == ["p12-0", "p12-1"]
+    assert pages == [10, 11, 12, 13]
+
+
+@pytest.mark.parametrize("kwargs, expected", [
+    ({}, (2020, 2020)),
+    ({"year": "2023"}, (2023, 2023)),
+    ({"year_from": "2024", "year_to": "2018"}, (2018, 2024)),
+    ({"year_to": "2019"}, (2019, 2019)),
+    ({"year_from": "2021"}, (2021, datetime.now().year)),
+    ({"date_from": "2019-05-01", "date_to": "2021-02-01"}, (2019, 2021)),
+])
+def test_range_arguments(kwargs, expected):
+    spider = ElMostradorSpider(listing_index="false", **kwargs)
+    assert (spider.year_from, spider.year_to) == expected
+    assert spider.target_year == expected[1]  # locate busca el borde más nuevo
+
+
+def test_date_range_uses_real_card_dates_with_day_up_to_12(html_listing_all_2023):
+    spider = ElMostradorSpider(listing_index="false", date_from="2023-07-01", date_to="2023-07-31")
+    req = Request(spider._url_for_page(1), meta={"mode": "collect", "page": 1})
+    resp = HtmlResponse(url=req.url, request=req, body=html_listing_all_2023, encoding="utf-8")
+
+    # <time datetime="2023-07-12"> es ISO: el día no se confunde con el mes
+    assert [iso[:10] for _, _, iso in spider._entries_from_cards(resp)] == ["2023-12-12", "2023-12-11", "2023-07-12"]
+    urls = [r.url for r in spider.parse_list(resp) if r.meta.get("mode") != "collect"]
+    assert [u.rstrip("/").split("/")[-1] for u in urls] == ["nota-3"]
+
+    entries = spider._entries_from_cards(resp)
+    assert not spider._past_range(entries, 2023)
+    late = ElMostradorSpider(listing_index="false", date_from="2023-12-13", date_to="2023-12-31")
+    assert late._past_range(entries, 2023)
@@ -0,0 +1,137 @@
+# tests/unit/test_bulk_writer.py
+import pytest
+
+from scrapy_project import bulk_writer as bw
+
+
+class FakeCursor:
+    """Cursor mínimo: sources existe (id=7); registra todas las sentencias."""
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, q, params=None):
+        self.executed.append((" ".join(q.split()), params))
+
+    def fetchone(self):
+        return (7,)
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self):
+        self.cur = FakeCursor()
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def fake_values(monkeypatch):
+    """execute_values simulado: ids crecientes; URLs en `existing` → no creadas."""
+    calls = []
+    existing = set()
+
+    def _execute_values(cur, sql, rows, page_size=100, fetch=False, **kw):
+        calls.append((" ".join(sql.split()), list(rows)))
+        if fetch:
+            return [(r[0], 100 + i, r[0] not in existing) for i, r in enumerate(rows)]
+        return None
+
+    monkeypatch.setattr(bw, "execute_values", _execute_values)
+    return calls, existing
+
+
+def _item(i, **kw):
+    base = {"url": f"https://www.diario.cl/nota/{i}", "title": f"t{i}", "body": "cuerpo " * 20, "source": "diario"}
+    base.update(kw)
+    return base
+
+
+def test_one_upsert_and_one_commit_per_batch(fake_values):
+    calls, existing = fake_values
+    existing.add("https://diario.cl/nota/2")
+    conn = FakeConn()
+
+    res = bw.store_articles_bulk(conn, [_item(1), _item(2), _item(3)])
+
+    assert [c for _, c in res] == [True, False, True]
+    assert [a for a, _ in res] == [100, 101, 102]
+    upserts = [c for c in calls if c[0].startswith("INSERT INTO articles")]
+    assert len(upserts) == 1 and len(upserts[0][1]) == 3
+    assert "RETURNING url, id, (xmax = 0)" in upserts[0][0]
+    assert conn.commits == 1 and conn.rollbacks == 0
+    # La fuente se resuelve una sola vez para todo el lote
+    assert sum(1 for q, _ in conn.cur.executed if "FROM sources" in q) == 1
+
+
+def test_repeated_url_in_batch_is_written_once(fake_values):
+    calls, _ = fake_values
+    res = bw.store_articles_bulk(FakeConn(), [_item(1, title="viejo"), _item(1, title="nuevo")])
+
+    rows = [c for c in calls if c[0].startswith("INSERT INTO articles")][0][1]
+    assert len(rows) == 1 and rows[0][1] == "nuevo"  # gana la última aparición
+    assert res == [(100, True), (100, False)]
+
+
+def test_relations_are_merged_as_sets(fake_values):
+    calls, _ = fake_values
+    conn = FakeConn()
+    items = [
+        _item(1, authors="Ana, Beto", keywords=["a", "b"], meta_keywords="b; c",
+              categories="Política, Política", entities=[{"text": "Boric", "label": "PER"}], category_id=5),
+        _item(2, authors=["Ana"], entities=[{"name": "Chile", "type": "LOC"}]),
+    ]
+    bw.store_articles_bulk(conn, items)
+
+    staged = [c for c in calls if bw.STAGE_TABLE in c[0]][0][1]
+    assert (100, "author", "Ana", None) in staged and (101, "author", "Ana", None) in staged
+    assert [r[2] for r in staged if r[1] == "keyword"] == ["a", "b", "c"]
+    assert [r[2] for r in staged if r[1] == "category"] == ["Política"]
+    assert (100, "entity", "Boric", "PER") in staged
+
+    direct = [c for c in calls if c[0].startswith("INSERT INTO articles_categories")][0][1]
+    assert direct == [(100, 5)]
+
+    # Statements fijos por tipo, no por nombre
+    sql = [q for q, _ in conn.cur.executed]
+    assert sum(1 for q in sql if q.startswith("INSERT INTO authors")) == 1
+    assert sum(1 for q in sql if q.startswith("INSERT INTO articles_authors")) == 1
+    assert sum(1 for q in sql if q.startswith("INSERT INTO entities")) == 1
+    assert sum(1 for q in sql if q.startswith("INSERT INTO articles_entities")) == 1
+
+
+def test_failure_rolls_back_whole_batch(fake_values, monkeypatch):
+    def boom(*a, **k):
+        raise RuntimeError("db caída")
+
+    monkeypatch.setattr(bw, "execute_values", boom)
+    conn = FakeConn()
+    with pytest.raises(RuntimeError):
+        bw.store_articles_bulk(conn, [_item(1)])
+    assert conn.commits == 0 and conn.rollbacks == 1
+
+
+def test_failed_commit_raises_and_rolls_back(fake_values):
+    class CommitFails(FakeConn):
+        def commit(self):
+            raise RuntimeError("could not serialize access")
+
+    conn = CommitFails()
+    with pytest.raises(RuntimeError):
+        bw.store_articles_bulk(conn, [_item(1), _item(2)])
+    assert conn.rollbacks == 1
+
+
+def test_empty_batch_is_noop():
+    assert bw.store_articles_bulk(FakeConn(), []) == []
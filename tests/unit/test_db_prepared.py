@@ -0,0 +1,122 @@
+# tests/unit/test_db_prepared.py
+from types import SimpleNamespace
+
+import pytest
+
+from scrapy_project import db
+from scrapy_project import pipelines as pl
+
+
+class FakeConn:
+    def __init__(self, fail=()):
+        self.prepared = set()
+        self.fail = set(fail)
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self.row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, q, params=None):
+        if any(f"PREPARE {n} " in q for n in self.connection.fail):
+            raise RuntimeError("column url_key does not exist")
+        self.connection.executed.append((q, params))
+
+    def fetchone(self):
+        return self.row
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(db, "PREPARED", {})
+    db.register_prepared("t_ok", "SELECT id FROM t WHERE a = %s AND b = ANY(%s::int[])")
+    db.register_prepared("t_bad", "SELECT id FROM t WHERE url_key = %s")
+    return db.PREPARED
+
+
+def test_dollar_params_numbers_in_order():
+    assert db._dollar_params("a = %s AND b = %s") == "a = $1 AND b = $2"
+
+
+def test_dollar_params_follows_psycopg2_escapes():
+    # '%%' es un '%' literal para psycopg2: no debe convertirse en '%$n'
+    assert db._dollar_params("url LIKE 'http%%' AND pct = '100%%s' AND id = %s") == (
+        "url LIKE 'http%' AND pct = '100%s' AND id = $1"
+    )
+
+
+@pytest.mark.parametrize("sql", ["SELECT %(id)s", "SELECT 1 WHERE a = %d", "SELECT 5 %"])
+def test_register_prepared_rejects_unsupported_placeholders(monkeypatch, sql):
+    monkeypatch.setattr(db, "PREPARED", {})
+    with pytest.raises(ValueError):
+        db.register_prepared("t_named", sql)
+    assert db.PREPARED == {}
+
+
+def test_prepare_skips_failing_statements(registry):
+    conn = FakeConn(fail={"t_bad"})
+    assert db.prepare_statements(conn) == {"t_ok"}
+    assert conn.executed[0][0] == "PREPARE t_ok AS SELECT id FROM t WHERE a = $1 AND b = ANY($2::int[])"
+    assert conn.rollbacks == 1
+    # Segunda vez: solo reintenta la que falló
+    n = len(conn.executed)
+    db.prepare_statements(conn)
+    assert len(conn.executed) == n and conn.rollbacks == 2
+
+
+def test_execute_prepared_uses_execute_when_prepared(registry):
+    conn = FakeConn()
+    conn.prepared.add("t_ok")
+    cur = conn.cursor()
+    db.execute_prepared(cur, "t_ok", (1, [2, 3]))
+    assert conn.executed[-1] == ("EXECUTE t_ok (%s, %s)", (1, [2, 3]))
+
+
+def test_execute_prepared_falls_back_to_sql(registry):
+    log = []
+    cur = SimpleNamespace(execute=lambda q, p=None: log.append((q, p)))
+    db.execute_prepared(cur, "t_ok", (1, [2]))
+    assert log == [(registry["t_ok"], (1, [2]))]
+
+
+def test_putconn_without_pool_closes(monkeypatch):
+    monkeypatch.setattr(db, "_POOL", None)
+    closed = []
+    conn = SimpleNamespace(closed=0, autocommit=False, rollback=lambda: None, close=lambda: closed.append(1))
+    db.putconn(conn)
+    assert closed == [1]
+
+
+def test_pipeline_dedup_uses_prepared_combined_query():
+    p = pl.ScrapyProjectPipeline.__new__(pl.ScrapyProjectPipeline)
+    p.dedup_index = None
+    p.dedup_keys = True
+    p.crawler = None
+    conn = FakeConn()
+    conn.prepared.add(pl.DEDUP_KEYS_STMT)
+    cur = conn.cursor()
+    cur.row = (2, 77)
+    item = {"url": "https://x.cl/a", "title": "Título", "body": "cuerpo", "domain": "x.cl"}
+    assert p._check_duplicates(cur, item) == "Duplicado HASH (article_id=77)"
+    q, params = conn.executed[-1]
+    assert q.startswith(f"EXECUTE {pl.DEDUP_KEYS_STMT} (")
+    assert params[0] is True and params[3] is True and params[5] is True
@@ -0,0 +1,159 @@
+# tests/unit/test_dedup_index.py
+from types import SimpleNamespace
+
+from scrapy_project import pipelines as pl
+from scrapy_project.dedup_index import BloomFilter, DedupIndex, url_key
+
+
+def test_url_key_matches_variant_rules():
+    k = url_key("https://www.elmostrador.cl/noticias/pais/2024/01/02/x/")
+    assert k == "elmostrador.cl/noticias/pais/2024/01/02/x"
+    assert url_key("http://elmostrador.cl/noticias/pais/2024/01/02/x") == k
+    assert url_key("") == ""
+
+
+def test_bloom_has_no_false_negatives():
+    bf = BloomFilter(1000, 0.01)
+    keys = [f"k{i}" for i in range(1000)]
+    for k in keys:
+        bf.add(k)
+    assert all(k in bf for k in keys)
+    fp = sum(f"otro{i}" in bf for i in range(2000))
+    assert fp < 100  # ~1% esperado
+
+
+class RowsCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.sql = None
+
+    def execute(self, q, params=None):
+        self.sql = q
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+def test_load_and_lookups():
+    idx = DedupIndex(capacity=1000)
+    n = idx.load(RowsCursor([("https://x.cl/a/", "h1", "x.cl", "Hola  Mundo")]))
+    assert n == 1
+    assert idx.might_have_url("http://www.x.cl/a")
+    assert idx.might_have_hash("h1")
+    assert idx.might_have_title("X.CL", "hola mundo")
+    assert not idx.might_have_hash("h2")
+
+
+class CountingCursor:
+    def __init__(self):
+        self.queries = []
+
+    def execute(self, q, params=None):
+        self.queries.append(q)
+
+    def fetchone(self):
+        return (42,)  # la DB confirma cualquier consulta
+
+
+def _item():
+    return {"url": "https://x.cl/nuevo", "title": "Nuevo", "body": "cuerpo", "domain": "x.cl"}
+
+
+def test_check_duplicates_skips_db_on_bloom_miss(pipeline_factory):
+    p = pipeline_factory(dedup_index=DedupIndex(capacity=1000))
+    cur = CountingCursor()
+    assert p._check_duplicates(cur, _item()) is None
+    assert cur.queries == []
+
+
+def test_check_duplicates_confirms_probable_hit_with_db(pipeline_factory):
+    idx = DedupIndex(capacity=1000)
+    idx.add(url="http://www.x.cl/nuevo/")
+    p = pipeline_factory(dedup_index=idx)
+    cur = CountingCursor()
+    assert p._check_duplicates(cur, _item()).startswith("Duplicado URL")
+    assert len(cur.queries) == 1
+
+
+def test_check_duplicates_without_index_queries_db(pipeline_factory):
+    p = pipeline_factory()
+    cur = CountingCursor()
+    assert p._check_duplicates(cur, _item()).startswith("Duplicado URL")
+    assert len(cur.queries) == 1
+
+
+class TxCursor(CountingCursor):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def fetchone(self):
+        return None
+
+
+class TxConn:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return TxCursor()
+
+
+def test_inserted_item_is_added_to_index(monkeypatch, pipeline_factory):
+    idx = DedupIndex(capacity=1000)
+    p = pipeline_factory(dedup_index=idx)
+    p.conn = TxConn()
+    p.nlp = SimpleNamespace(analyze=lambda t: {})
+    monkeypatch.setattr(pl, "store_article", lambda cur, item, return_created=True: (1, True))
+    item = {"url": "https://x.cl/otro", "title": "Otro", "body": "cuerpo largo " * 10}
+    p.process_item(item, SimpleNamespace(name="s"))
+    assert idx.might_have_url("https://x.cl/otro")
+    assert idx.might_have_hash(item["body_hash"])
+
+
+class ScriptedCursor:
+    def __init__(self, row):
+        self.row = row
+        self.queries = []
+
+    def execute(self, q, params=None):
+        self.queries.append((q, params))
+
+    def fetchone(self):
+        return self.row
+
+
+def test_combined_query_is_single_statement(pipeline_factory):
+    p = pipeline_factory()
+    p.dedup_keys = True
+    cur = ScriptedCursor((2, 9))
+    assert p._check_duplicates(cur, _item()) == "Duplicado HASH (article_id=9)"
+    assert len(cur.queries) == 1
+    sql, params = cur.queries[0]
+    assert "url_key" in sql and "body_hash" in sql and "title_norm" in sql
+    assert "regexp_replace" not in sql
+
+
+def test_combined_query_only_includes_probable_rules(pipeline_factory):
+    idx = DedupIndex(capacity=1000)
+    item = _item()
+    idx.add(url=item["url"])
+    p = pipeline_factory(dedup_index=idx)
+    p.dedup_keys = True
+    cur = ScriptedCursor(None)
+    assert p._check_duplicates(cur, item) is None
+    sql, _ = cur.queries[0]
+    assert "url_key" in sql and "body_hash" not in sql and "title_norm" not in sql
+
+
+def test_combined_query_skipped_when_index_rules_out_everything(pipeline_factory):
+    p = pipeline_factory(dedup_index=DedupIndex(capacity=1000))
+    p.dedup_keys = True
+    cur = ScriptedCursor((1, 1))
+    assert p._check_duplicates(cur, _item()) is None
+    assert cur.queries == []
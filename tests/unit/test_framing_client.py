@@ -0,0 +1,190 @@
+# tests/unit/test_framing_client.py
+import asyncio
+import time
+
+import pytest
+
+from scrapy_project.framing_client import AsyncFramingClient, FramingError, FramingService, body_hash
+from scrapy_project.framing_stub import FramingStubServer
+from scrapy_project.nlp_cache import NLPResultCache
+
+
+def _client(url, **kw):
+    kw.setdefault("batch_wait_ms", 20)
+    kw.setdefault("backoff", 0.01)
+    return AsyncFramingClient(url=url, **kw)
+
+
+async def _run(client, texts):
+    await client.start()
+    try:
+        return await client.analyze_many(texts)
+    finally:
+        await client.close()
+
+
+@pytest.mark.unit
+def test_batches_against_stub_server_and_returns_schema():
+    with FramingStubServer() as stub:
+        client = _client(stub.url, batch_size=4)
+        texts = [f"artículo número {i}" for i in range(10)]
+        outs = asyncio.run(_run(client, texts))
+
+    assert len(outs) == 10
+    assert outs[3]["summary"] == f"stub:{body_hash(texts[3])[:8]}"
+    assert set(outs[0]) == {"ideological_frame", "narrative_role", "emotions", "summary"}
+    assert sum(stub.requests) == 10 and max(stub.requests) <= 4  # lotes, no un request por texto
+    assert client.stats["batches"] == len(stub.requests)
+
+
+@pytest.mark.unit
+def test_concurrency_is_bounded():
+    with FramingStubServer(delay=0.05) as stub:
+        client = _client(stub.url, batch_size=1, concurrency=2, batch_wait_ms=0)
+        asyncio.run(_run(client, [f"t{i}" for i in range(8)]))
+    assert stub.max_active <= 2 and len(stub.requests) == 8
+
+
+@pytest.mark.unit
+def test_retries_transient_errors_with_backoff():
+    with FramingStubServer(fail_first=2) as stub:
+        client = _client(stub.url, retries=3)
+        outs = asyncio.run(_run(client, ["hola mundo"]))
+    assert outs[0]["summary"].startswith("stub:")
+    assert client.stats["retries"] == 2 and client.stats["failures"] == 0
+
+
+@pytest.mark.unit
+def test_gives_up_without_raising_and_does_not_cache_failures():
+    calls = []
+
+    async def broken(payload):
+        calls.append(payload)
+        raise FramingError("HTTP 400", retryable=False)
+
+    client = _client("http://unused", transport=broken, retries=3)
+    assert asyncio.run(_run(client, ["a", "b"])) == [{}, {}]
+    assert len(calls) == 1  # 4xx no se reintenta
+    assert client.stats["failures"] == 2 and client.cache.get(body_hash("a")) is None
+
+
+@pytest.mark.unit
+def test_cache_by_body_hash_and_inflight_dedup(tmp_path):
+    sent = []
+
+    async def transport(payload):
+        sent.extend(it["id"] for it in payload["items"])
+        return {"results": [{"id": it["id"], "framing": {"summary": "ok"}} for it in payload["items"]]}
+
+    cache = NLPResultCache(str(tmp_path / "framing.sqlite3"), versions="framing-test")
+    client = _client("http://unused", transport=transport, cache=cache)
+    outs = asyncio.run(_run(client, ["mismo texto", "mismo texto", "otro"]))
+    assert outs[0] == outs[1] == {"summary": "ok"}
+    assert sorted(sent) == sorted({body_hash("mismo texto"), body_hash("otro")})
+
+    again = _client("http://unused", transport=transport, cache=cache)
+    asyncio.run(_run(again, ["otro"]))
+    assert again.stats["cache_hits"] == 1 and len(sent) == 2
+    cache.close()
+
+
+@pytest.mark.unit
+def test_service_delivers_deferred_without_blocking_caller():
+    fired = []
+    with FramingStubServer(delay=0.2) as stub:
+        service = FramingService(_client(stub.url), call_from_thread=lambda f, *a: f(*a)).start()
+        t0 = time.monotonic()
+        d = service.analyze("texto lento")
+        assert time.monotonic() - t0 < 0.1  # encolar no espera al servicio
+        d.addCallback(fired.append)
+        service.shutdown()
+    assert fired and fired[0]["summary"].startswith("stub:")
+
+
+class _Cur:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, q, params=None):
+        self.log.append((" ".join(q.split()), params))
+
+    def fetchone(self):
+        return None
+
+
+class _Conn:
+    def __init__(self):
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return _Cur(self.queries)
+
+
+@pytest.mark.unit
+def test_pipeline_schedules_framing_and_saves_it_later(monkeypatch, pipeline_factory):
+    from twisted.internet import defer
+
+    from scrapy_project import pipelines as pl
+
+    class FakeService:
+        def __init__(self):
+            self.pending = []
+
+        def analyze(self, text):
+            d = defer.Deferred()
+            self.pending.append((text, d))
+            return d
+
+    saved = []
+    monkeypatch.setattr(pl, "save_framing", lambda cur, article_id, framing: saved.append((article_id, framing)))
+    monkeypatch.setattr(pl, "save_entities", lambda *a, **k: None)
+    p = pipeline_factory(conn=_Conn(), framing=FakeService())
+    item = {"url": "https://x/1", "title": "t", "body": "cuerpo del artículo"}
+
+    p._persist_nlp(_Cur(p.conn.queries), item, 42, {"polarity": 0.2, "entities": []})
+
+    assert saved == [] and len(p._framing_pending) == 1  # el ítem no espera al framing
+    text, d = p.framing.pending[0]
+    assert text == "cuerpo del artículo"
+    d.callback({"summary": "ok"})
+    assert saved == [(42, {"summary": "ok"})] and not p._framing_pending
+
+
+@pytest.mark.unit
+def test_pipeline_builds_client_from_crawler_settings(monkeypatch, pipeline_factory):
+    from types import SimpleNamespace
+
+    from scrapy.settings import Settings
+
+    from scrapy_project import pipelines as pl
+
+    built = {}
+
+    class FakeService:
+        def __init__(self, client):
+            built["client"] = client
+
+        def start(self):
+            return self
+
+    monkeypatch.setattr(pl, "FramingService", FakeService)
+    settings = Settings({
+        "FRAMING_ENABLED": "true", "FRAMING_URL": "http://framing:9000/f",
+        "FRAMING_CONCURRENCY": "2", "FRAMING_BATCH_SIZE": "16", "NLP_CACHE": "false",
+    })
+    p = pl.ScrapyProjectPipeline.from_crawler(SimpleNamespace(settings=settings, stats=None))
+    p._open_framing()
+    client = built["client"]
+    assert (client.url, client.concurrency, client.batch_size) == ("http://framing:9000/f", 2, 16)
@@ -0,0 +1,128 @@
+# tests/unit/test_id_cache.py
+from scrapy_project import storage_helpers as sh
+from scrapy_project.id_cache import ID_CACHE, IdCache
+
+
+class Conn:
+    def __init__(self, fail_commit=False):
+        self.cur = Cur(self)
+        self.fail_commit = fail_commit
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        if self.fail_commit:
+            raise RuntimeError("commit falló")
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class Cur:
+    def __init__(self, conn):
+        self.connection = conn
+        self.executed = []
+
+    def execute(self, q, params=None):
+        self.executed.append(" ".join(q.split()))
+
+    def fetchone(self):
+        return (11,)
+
+    def close(self):
+        pass
+
+
+def _lookups(cur, table):
+    return [q for q in cur.executed if f"FROM {table}" in q]
+
+
+def test_lru_evicts_least_recent():
+    c = IdCache(capacity=2)
+    c.put("keywords", "a", 1)
+    c.put("keywords", "b", 2)
+    assert c.get("keywords", "a") == 1  # 'a' pasa a ser el más reciente
+    c.put("keywords", "c", 3)
+    assert c.get("keywords", "b") is None
+    assert c.get("keywords", "a") == 1 and c.get("keywords", "c") == 3
+
+
+def test_pending_ids_visible_only_to_owner_until_commit():
+    c = IdCache(capacity=10)
+    owner, other = object(), object()
+    c.put("authors", "Ana", 5, owner)
+    assert c.get("authors", "Ana", owner) == 5
+    assert c.get("authors", "Ana", other) is None
+    c.commit(owner)
+    assert c.get("authors", "Ana", other) == 5
+
+
+def test_rollback_discards_pending_ids():
+    c = IdCache(capacity=10)
+    owner = object()
+    c.put("entities", ("boric", "PER"), 9, owner)
+    c.rollback(owner)
+    c.commit(owner)
+    assert c.get("entities", ("boric", "PER"), owner) is None
+
+
+def test_forget_drops_ids_but_keeps_stats():
+    c = IdCache(capacity=10)
+    c.put("entities", ("boric", "PER"), 5)
+    owner = object()
+    c.put("entities", ("kast", "PER"), 6, owner)
+    assert c.get("entities", ("boric", "PER")) == 5
+    c.forget()
+    assert c.get("entities", ("boric", "PER")) is None
+    assert c.get("entities", ("kast", "PER"), owner) is None
+    assert c.stats()["entities"]["hits"] == 1
+
+
+def test_stats_report_hit_rate():
+    c = IdCache(capacity=10)
+    c.put("keywords", "a", 1)
+    c.get("keywords", "a")
+    c.get("keywords", "zzz")
+    st = c.stats()
+    assert st["keywords"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    assert st["size"] == 1 and st["capacity"] == 10
+
+
+def test_disabled_cache_never_hits():
+    c = IdCache(capacity=0)
+    c.put("keywords", "a", 1)
+    assert c.get("keywords", "a") is None
+
+
+def test_save_keywords_skips_db_after_commit():
+    conn = Conn()
+    sh.save_keywords(conn, 1, ["economía"])
+    assert len(_lookups(conn.cur, "keywords")) == 1
+    sh.save_keywords(conn, 2, ["economía"])
+    # Segunda vez: solo el vínculo, sin INSERT/SELECT en keywords
+    assert len(_lookups(conn.cur, "keywords")) == 1
+    assert conn.cur.executed[-1].startswith("INSERT INTO articles_keywords")
+    assert ID_CACHE.stats()["keywords"]["hits"] == 1
+
+
+def test_failed_commit_does_not_cache_ids():
+    conn = Conn(fail_commit=True)
+    sh.save_authors(conn, 1, "Ana")
+    conn.fail_commit = False
+    sh.save_authors(conn, 2, "Ana")
+    assert len([q for q in conn.cur.executed if q.startswith("SELECT id FROM authors")]) == 2
+
+
+def test_ensure_source_uses_cache_within_transaction_and_after_commit():
+    conn = Conn()
+    cur = conn.cur
+    item = {"source": "Diario", "url": "https://diario.cl/x"}
+    assert sh._ensure_source(cur, item) == 11
+    assert sh._ensure_source(cur, item) == 11  # misma transacción (mismo dueño)
+    assert len(_lookups(cur, "sources")) == 1
+    ID_CACHE.commit(conn)
+    assert ID_CACHE.get("sources", ("diario", "diario.cl")) == 11
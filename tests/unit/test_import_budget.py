@@ -0,0 +1,55 @@
+# tests/unit/test_import_budget.py
+"""
+Presupuesto de import: importar el paquete no debe cargar backends NLP (spaCy,
+Stanza, pysentimiento/transformers, torch) ni abrir el log del run. Se mide en un
+intérprete nuevo con `python -X importtime`.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+MODULES = (
+    "scrapy_project.settings",
+    "scrapy_project.pipelines",
+    "scrapy_project.preprocessor",
+    "scrapy_project.nlp_transformers",
+    "scrapy_project.nlp_pool",
+    "scrapy_project.spiders.el_mostrador",
+)
+HEAVY = ("spacy", "stanza", "pysentimiento", "transformers", "torch", "thinc", "onnxruntime", "numpy")
+# Holgado a propósito (CI lento, cobertura); el costo real hoy es ~0.3 s, casi todo Scrapy
+BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "3000"))
+
+
+def _importtime(tmp_path):
+    env = dict(os.environ, LOGS_DIR=str(tmp_path / "logs"), PYTHONPATH=ROOT)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    rows = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            rows[name.strip()] = int(cumulative) / 1000.0
+        except ValueError:
+            continue  # cabecera
+    return rows
+
+
+def test_package_import_skips_nlp_backends_and_logs(tmp_path):
+    rows = _importtime(tmp_path)
+    loaded = sorted(m for m in rows if m.split(".")[0] in HEAVY)
+    assert loaded == [], f"imports pesados al importar el paquete: {loaded[:10]}"
+    assert not (tmp_path / "logs").exists()
+
+    total = sum(rows.get(m, 0.0) for m in MODULES)
+    assert total < BUDGET_MS, f"import de {MODULES} tomó {total:.0f} ms (> {BUDGET_MS:.0f} ms)"
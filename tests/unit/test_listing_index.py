@@ -0,0 +1,50 @@
+# tests/unit/test_listing_index.py
+import pytest
+
+from scrapy_project.listing_index import ListingIndex
+
+pytestmark = pytest.mark.unit
+
+DAY = 86400.0
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = ListingIndex("el_mostrador", path=str(tmp_path / "idx.sqlite3"), max_age_days=30, drift_per_day=0)
+    yield idx
+    idx.close()
+
+
+def test_bracket_uses_last_dirty_and_first_clean_page(index):
+    now = 1_000 * DAY
+    for page, (y_min, y_max) in {1: (2025, 2025), 400: (2023, 2025), 650: (2023, 2023), 700: (2023, 2023),
+                                 900: (2021, 2023)}.items():
+        index.observe(page, y_min, y_max, now=now)
+    assert index.bracket(2023, now=now) == (400, 650)
+    assert index.bracket(2021, now=now) is None  # nada limpio observado por debajo de 900
+
+
+def test_bracket_needs_both_bounds(index):
+    index.observe(10, 2024, 2025, now=0.0)
+    assert index.bracket(2023, now=0.0) is None  # sin página limpia conocida
+    index.observe(5, 2023, 2023, now=0.0)
+    assert index.bracket(2023, now=0.0) is None  # la limpia está por debajo de la cota baja
+    index.observe(12, 2022, 2023, now=0.0)
+    assert index.bracket(2023, now=0.0) == (10, 12)
+
+
+def test_stale_observations_ignored_and_clean_bound_drifts(tmp_path):
+    idx = ListingIndex("s", path=str(tmp_path / "d.sqlite3"), max_age_days=30, drift_per_day=8)
+    idx.observe(100, 2024, 2025, now=0.0)
+    idx.observe(120, 2023, 2023, now=0.0)
+    assert idx.bracket(2023, now=2 * DAY) == (100, 136)
+    assert idx.bracket(2023, now=31 * DAY) is None
+    idx.observe(100, 2024, 2025, now=31 * DAY)  # refresco: reemplaza la observación previa
+    assert idx.bracket(2023, now=31 * DAY) is None
+    idx.close()
+
+
+def test_observe_ignores_pages_without_years(index):
+    index.observe(3, None, None)
+    index.observe(0, 2020, 2020)
+    assert index.observed == 0
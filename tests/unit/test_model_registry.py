@@ -0,0 +1,68 @@
+# tests/unit/test_model_registry.py
+import threading
+import time
+
+from scrapy_project import model_registry as mr
+
+
+def test_loads_once_per_key_and_reports_stats():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    a = mr.get_spacy("fake_md", loader=loader)
+    b = mr.get_spacy("fake_md", loader=loader)
+    c = mr.get_spacy("fake_md", disable=["parser"], loader=loader)
+    assert a is b and a is not c
+    assert len(calls) == 2
+
+    st = {(s["name"], tuple(s["disabled"])): s for s in mr.model_stats()}
+    assert set(st) == {("fake_md", ()), ("fake_md", ("parser",))}
+    assert st[("fake_md", ())]["load_seconds"] >= 0
+    assert "rss_mb" in st[("fake_md", ())]
+
+
+def test_concurrent_get_loads_once():
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    got = []
+    threads = [
+        threading.Thread(target=lambda: got.append(mr.REGISTRY.get("spacy", "x", slow_loader)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(g is got[0] for g in got)
+
+
+def test_failed_load_is_not_cached():
+    def boom():
+        raise OSError("no model")
+
+    try:
+        mr.get_sentiment("es", loader=boom)
+    except OSError:
+        pass
+    assert mr.model_stats() == []
+    assert mr.get_sentiment("es", loader=lambda: "ok") == "ok"
+
+
+def test_components_share_spacy_model(mocker):
+    load = mocker.patch("scrapy_project.preprocessor.spacy.load", return_value=object())
+    from scrapy_project.preprocessor import Preprocessor
+    from scrapy_project.nlp_orchestrator import NLPOrchestrator
+
+    pre = Preprocessor(engine="spacy")
+    orch = NLPOrchestrator(spacy_model=None, posverdad_nlp=None, preprocessor=pre)
+    assert orch._nlp is pre.nlp
+    assert load.call_count == 1
@@ -0,0 +1,144 @@
+# tests/unit/test_nlp_cache.py
+from types import SimpleNamespace
+
+import pytest
+
+from scrapy_project import pipelines as pl
+from scrapy_project.nlp_cache import NLPResultCache
+
+
+class FakeCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, q, params=None):
+        pass
+
+    def fetchone(self):
+        return None
+
+
+class DummyConn:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor()
+
+
+class CountingNLP:
+    def __init__(self):
+        self.calls = []
+
+    @staticmethod
+    def _result():
+        return {"polarity": 1.0, "entities": [{"text": "Chile", "label": "LOC"}]}
+
+    def analyze(self, text):
+        self.calls.append([text])
+        return self._result()
+
+    def analyze_many(self, texts):
+        self.calls.append(list(texts))
+        return [self._result() for _ in texts]
+
+
+def test_roundtrip_and_version_isolation(tmp_path):
+    path = str(tmp_path / "c.sqlite3")
+    c = NLPResultCache(path, max_mb=1, versions="v1")
+    assert c.get("h1") is None
+    c.put("h1", {"polarity": 1.0, "sentiment": (1.0, 0.9)})
+    assert c.get("h1") == {"polarity": 1.0, "sentiment": [1.0, 0.9]}
+    # Vacíos no se cachean (NLP caído → se reintenta)
+    c.put("h2", {})
+    assert c.get("h2") is None
+    assert (c.hits, c.misses) == (1, 2)
+    c.close()
+
+    # Persiste entre aperturas; otra versión de modelos no ve las entradas
+    assert NLPResultCache(path, versions="v1").get("h1") is not None
+    assert NLPResultCache(path, versions="v2").get("h1") is None
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    c = NLPResultCache(str(tmp_path / "c.sqlite3"), max_mb=0.01, versions="v")  # ~10 KB
+    blob = "x" * 3000
+    for i in range(3):
+        c.put(f"h{i}", {"t": blob})
+    assert c.get("h0") is not None  # h0 pasa a ser el más reciente
+    c.put("h3", {"t": blob})
+
+    assert c.evictions >= 1
+    assert c.get("h1") is None
+    assert c.get("h0") is not None and c.get("h3") is not None
+    assert c.stats()["size_mb"] <= 0.01
+
+
+@pytest.fixture
+def make_pipeline(monkeypatch, tmp_path, pipeline_factory):
+    def _make(size):
+        p = pipeline_factory(conn=DummyConn(), nlp=CountingNLP(), nlp_batch_size=size, nlp_batch_timeout=999.0)
+        p.nlp_cache_path = str(tmp_path / "nlp.sqlite3")
+        p.nlp_cache_enabled = True
+        p._open_nlp_cache()
+        stats = {}
+        p.crawler = SimpleNamespace(stats=SimpleNamespace(
+            get_value=lambda k, d=0: stats.get(k, d),
+            set_value=lambda k, v: stats.__setitem__(k, v),
+        ))
+        monkeypatch.setattr(p, "_check_duplicates", lambda cur, item: None)
+        persisted = []
+        monkeypatch.setattr(p, "_persist_nlp", lambda cur, item, aid, pre: persisted.append((aid, pre)))
+        ids = iter(range(100, 200))
+        monkeypatch.setattr(pl, "store_article", lambda cur, item, return_created=True: (next(ids), True))
+        return p, stats, persisted
+
+    return _make
+
+
+def _item(i):
+    return {"url": f"https://x/{i}", "title": f"t{i}", "body": f"cuerpo largo número {i} " * 10}
+
+
+def test_rerun_skips_inference_for_seen_bodies(make_pipeline):
+    spider = SimpleNamespace(name="s")
+    p, _, _ = make_pipeline(size=2)
+    p.process_item(_item(1), spider)
+    p.process_item(_item(2), spider)
+    assert p.nlp.calls[0] == [pl.ScrapyProjectPipeline._text_for_nlp(_item(1)),
+                              pl.ScrapyProjectPipeline._text_for_nlp(_item(2))]
+    p._close_nlp_cache()
+
+    # Segunda corrida (p.ej. tras una caída): solo el cuerpo nuevo va al modelo
+    p2, stats, persisted = make_pipeline(size=3)
+    for i in (1, 2, 3):
+        p2.process_item(_item(i), spider)
+    assert p2.nlp.calls == [[pl.ScrapyProjectPipeline._text_for_nlp(_item(3))]]
+    assert len(persisted) == 3 and all(pre.get("polarity") == 1.0 for _, pre in persisted)
+    assert stats["posverdad/nlp_cache_hits"] == 2 and stats["posverdad/nlp_cache_misses"] == 1
+
+
+def test_inline_per_item_uses_cache(make_pipeline):
+    spider = SimpleNamespace(name="s")
+    p, stats, persisted = make_pipeline(size=0)
+    p.process_item(_item(1), spider)
+    p.process_item(_item(1), spider)
+    assert len(p.nlp.calls) == 1 and len(persisted) == 2
+    assert stats["posverdad/nlp_cache_hits"] == 1
+
+
+def test_model_versions_follow_settings_options(monkeypatch):
+    from scrapy_project.nlp_cache import model_versions
+
+    for env in ("SENTIMENT_CHUNKED", "SENTIMENT_WINDOW_TOKENS", "SENTIMENT_BACKEND", "SENTIMENT_ONNX_INT8"):
+        monkeypatch.delenv(env, raising=False)
+    defaults = {"chunked": False, "window_tokens": 120, "backend": "torch", "onnx_int8": True}
+    # Los defaults de settings firman igual que el entorno: la caché existente sigue sirviendo
+    assert model_versions("full", defaults) == model_versions("full")
+    assert model_versions("full", {**defaults, "chunked": True}) != model_versions("full")
@@ -0,0 +1,101 @@
+from scrapy_project.nlp_orchestrator import NLPOrchestrator
+
+
+class Ent:
+    def __init__(self, t, l):
+        self.text, self.label_ = t, l
+
+
+class Doc:
+    def __init__(self, text):
+        self.text = text
+        self.ents = [Ent("Chile", "LOC")] if "Chile" in text else []
+
+
+class FakeSpacy:
+    def __init__(self):
+        self.pipe_calls = 0
+        self.single_calls = 0
+
+    def __call__(self, text):
+        self.single_calls += 1
+        return Doc(text)
+
+    def pipe(self, texts, batch_size=32):
+        self.pipe_calls += 1
+        return (Doc(t) for t in texts)
+
+
+class FakePV:
+    def __init__(self):
+        self.batch_calls = []
+
+    def analyze_sentiment(self, text):
+        raise AssertionError("no debería usarse con batch disponible")
+
+    def analyze_sentiment_many(self, texts):
+        self.batch_calls.append(list(texts))
+        return [(0.3, 0.9) for _ in texts]
+
+    def subjectivity_proxy(self, text):
+        return 0.2
+
+
+class FakePreproc:
+    def preprocess(self, text):
+        return {"engine": "spacy", "tokens": text.split(), "lemmas": [], "pos": []}
+
+
+def make_orch(pv=None):
+    return NLPOrchestrator(
+        spacy_model=FakeSpacy(),
+        posverdad_nlp=pv or FakePV(),
+        framing_analyzer=None,
+        preprocessor=FakePreproc(),
+    )
+
+
+def test_analyze_many_uses_pipe_and_one_sentiment_call():
+    orch = make_orch()
+    outs = orch.analyze_many(["Hola Chile", "Otro texto"])
+    assert len(outs) == 2
+    assert orch._nlp.pipe_calls == 1 and orch._nlp.single_calls == 0
+    assert orch._pv.batch_calls == [["Hola Chile", "Otro texto"]]
+    assert outs[0]["entities"] == [{"text": "Chile", "label": "LOC"}]
+    assert outs[1]["entities"] == []
+    assert all(o["polarity"] == 0.3 and o["subjectivity"] == 0.2 for o in outs)
+
+
+def test_analyze_many_matches_analyze_per_text():
+    class PV(FakePV):
+        def analyze_sentiment(self, text):
+            return (0.3, 0.9)
+
+    orch = make_orch(PV())
+    texts = ["Hola Chile", "Otro texto"]
+    many = orch.analyze_many(texts)
+    single = [orch.analyze(t) for t in texts]
+    for m, s in zip(many, single):
+        assert m["entities"] == s["entities"]
+        assert m["polarity"] == s["polarity"]
+        assert m["subjectivity"] == s["subjectivity"]
+
+
+def test_analyze_many_empty_entries_get_defaults():
+    orch = make_orch()
+    outs = orch.analyze_many(["", "Chile"])
+    assert outs[0]["entities"] == [] and outs[0]["polarity"] is None
+    assert outs[1]["entities"] == [{"text": "Chile", "label": "LOC"}]
+
+
+def test_analyze_many_falls_back_when_no_batch_sentiment():
+    class PV:
+        def analyze_sentiment(self, text):
+            return (-1.0, 0.7)
+
+        def subjectivity_proxy(self, text):
+            return 0.4
+
+    orch = make_orch(PV())
+    outs = orch.analyze_many(["a", "b"])
+    assert [o["polarity"] for o in outs] == [-1.0, -1.0]
@@ -0,0 +1,100 @@
+from scrapy_project.nlp_orchestrator import NLPOrchestrator
+
+
+class Ent:
+    def __init__(self, t, l):
+        self.text, self.label_ = t, l
+
+
+class Doc:
+    def __init__(self, text):
+        self.text = text
+        self.ents = [Ent("Boric", "PER"), Ent("Gabriel Boric", "PER")]
+
+
+class CountingSpacy:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return Doc(text)
+
+    def pipe(self, texts, batch_size=32):
+        for t in texts:
+            yield self(t)
+
+
+class DocPreproc:
+    accepts_doc = True
+
+    def __init__(self):
+        self.docs = []
+
+    def preprocess(self, text, doc=None):
+        self.docs.append(doc)
+        return {"engine": "spacy", "tokens": text.split()}
+
+
+class DocPV:
+    accepts_doc = True
+
+    def __init__(self):
+        self.docs = []
+
+    def analyze_sentiment(self, text):
+        return (0.0, 0.9)
+
+    def analyze_sentiment_many(self, texts):
+        return [(0.0, 0.9) for _ in texts]
+
+    def subjectivity_proxy(self, text, doc=None):
+        self.docs.append(doc)
+        return 0.1
+
+
+def make(cleaner=None):
+    nlp, pre, pv = CountingSpacy(), DocPreproc(), DocPV()
+    orch = NLPOrchestrator(spacy_model=nlp, posverdad_nlp=pv, preprocessor=pre, entity_cleaner=cleaner)
+    return orch, nlp, pre, pv
+
+
+def test_process_parses_once_and_shares_doc():
+    seen = []
+
+    def cleaner(ents, spacy_doc=None):
+        seen.append(spacy_doc)
+        return ents[1:]
+
+    orch, nlp, pre, pv = make(cleaner)
+    out = orch.analyze("Gabriel Boric habló hoy")
+    assert nlp.calls == 1
+    doc = pre.docs[0]
+    assert doc is not None and pv.docs == [doc] and seen == [doc]
+    assert out["entities"] == [{"text": "Gabriel Boric", "label": "PER"}]
+
+
+def test_analyze_many_parses_each_text_once():
+    orch, nlp, pre, pv = make()
+    outs = orch.analyze_many(["uno dos", "tres"])
+    assert nlp.calls == 2
+    assert len(outs) == 2 and all(d is not None for d in pre.docs + pv.docs)
+
+
+def test_string_only_components_still_work():
+    class PlainPreproc:
+        def preprocess(self, text):
+            return {"text": text.upper()}
+
+    class PlainPV:
+        def analyze_sentiment(self, text):
+            return (1.0, 0.5)
+
+        def subjectivity_proxy(self, text):
+            return 0.3
+
+    nlp = CountingSpacy()
+    orch = NLPOrchestrator(spacy_model=nlp, posverdad_nlp=PlainPV(), preprocessor=PlainPreproc())
+    out = orch.analyze("hola")
+    assert nlp.calls == 1
+    assert out["subjectivity"] == 0.3 and out["polarity"] == 1.0
@@ -0,0 +1,136 @@
+# tests/unit/test_nlp_pool.py
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from scrapy_project import nlp_pool
+from scrapy_project import pipelines as pl
+
+
+class FakeOrchestrator:
+    def analyze(self, text):
+        return {"polarity": 1.0, "subjectivity": 0.3, "entities": [], "len": len(text)}
+
+
+def fake_factory():
+    return FakeOrchestrator()
+
+
+def make_pool():
+    # Threads en vez de procesos: mismo contrato, sin spawn ni modelos reales
+    ex = ThreadPoolExecutor(max_workers=1, initializer=nlp_pool._init_worker, initargs=(fake_factory,))
+    return nlp_pool.NLPProcessPool(workers=1, executor=ex, call_from_thread=lambda f, *a: f(*a)), ex
+
+
+def _result(d, ex):
+    ex.shutdown(wait=True)
+    out = []
+    d.addBoth(out.append)
+    return out[0]
+
+
+def test_pool_analyze_returns_deferred_with_result():
+    pool, ex = make_pool()
+    assert _result(pool.analyze("hola"), ex)["len"] == 4
+
+
+def test_pool_analyze_many_falls_back_to_per_text_and_empty():
+    pool, ex = make_pool()
+    res = _result(pool.analyze_many(["abc", ""]), ex)
+    assert res[0]["len"] == 3 and res[1] == {}
+
+
+def test_pool_errors_become_errback():
+    def boom():
+        return SimpleNamespace(analyze=lambda t: 1 / 0)
+
+    ex = ThreadPoolExecutor(max_workers=1, initializer=nlp_pool._init_worker, initargs=(boom,))
+    pool = nlp_pool.NLPProcessPool(workers=1, executor=ex, call_from_thread=lambda f, *a: f(*a))
+    res = _result(pool.analyze("x"), ex)
+    assert res.check(ZeroDivisionError)
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, q, params=None):
+        self.log.append((q, params))
+
+
+class DummyConn:
+    def __init__(self):
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor(self.queries)
+
+
+def test_pipeline_process_mode_returns_deferred_and_persists(monkeypatch, pipeline_factory):
+    p = pipeline_factory(conn=DummyConn(), nlp=None)
+    pool, ex = make_pool()
+    p._nlp_pool = pool
+    monkeypatch.setattr(p, "_check_duplicates", lambda cur, item: None)
+    monkeypatch.setattr(pl, "store_article", lambda cur, item, return_created=True: (7, True))
+
+    item = {"url": "https://x/1", "title": "t", "body": "cuerpo largo " * 10}
+    d = p.process_item(item, SimpleNamespace(name="s"))
+    out = _result(d, ex)
+    assert out is item
+    assert out["polarity"] == 1.0
+    assert any("preprocessed_data" in q and params[1] == 7 for q, params in p.conn.queries)
+    assert p._nlp_pending == set()
+
+
+def test_nlp_options_from_settings_reach_factory_and_inline_stack(monkeypatch, pipeline_factory):
+    from scrapy.settings import Settings
+
+    settings = Settings({"SENTIMENT_CHUNKED": "true", "SENTIMENT_WINDOW_TOKENS": "64", "SENTIMENT_BACKEND": "onnx"})
+    options = nlp_pool.nlp_options_from_settings(settings)
+    assert options == {"chunked": True, "window_tokens": 64, "backend": "onnx"}
+
+    built = []
+    monkeypatch.setattr(nlp_pool, "build_nlp_stack", lambda *a: built.append(a) or (None, "orq"))
+    assert nlp_pool.ProfiledFactory("ner-only", None, options)() == "orq"
+    assert built == [("ner-only", None, options)]
+
+    loaded = []
+    monkeypatch.setattr(pl, "build_nlp_stack", lambda *a: loaded.append(a) or (None, "orq"))
+    p = pl.ScrapyProjectPipeline.from_crawler(SimpleNamespace(settings=settings, stats=None))
+    # Nada se carga al construir: el stack en línea sale de open_spider con los settings finales
+    assert p.nlp_options == options and loaded == [] and p.nlp is None
+    p._load_nlp_stack()
+    p._load_nlp_stack()
+    assert loaded == [(None, None, options)] and p.nlp == "orq"
+
+
+def test_process_mode_never_loads_models_in_main_process(monkeypatch, pipeline_factory):
+    from scrapy.settings import Settings
+
+    loaded = []
+    monkeypatch.setattr(pl, "build_nlp_stack", lambda *a: loaded.append(a) or (None, "orq"))
+    started = []
+    monkeypatch.setattr(pl, "NLPProcessPool", lambda workers, factory: SimpleNamespace(
+        start=lambda: started.append(factory) or "pool"))
+    for name in ("_detect_dedup_keys", "_detect_preprocessed_storage", "_preload_dedup_index",
+                 "_open_nlp_cache", "_open_framing"):
+        monkeypatch.setattr(pl.ScrapyProjectPipeline, name, lambda self: None)
+    monkeypatch.setattr(pl.db, "get_pool", lambda **k: None)
+    monkeypatch.setattr(pl.db, "getconn", lambda **k: DummyConn())
+
+    settings = Settings({"NLP_EXECUTION": "process", "SENTIMENT_BACKEND": "onnx"})
+    p = pl.ScrapyProjectPipeline.from_crawler(SimpleNamespace(settings=settings, stats=None))
+    p.open_spider(SimpleNamespace(name="s"))
+    assert loaded == [] and p.nlp is None and p._nlp_pool == "pool"
+    assert started[0].options == {"backend": "onnx"}
@@ -0,0 +1,145 @@
+# tests/unit/test_nlp_stage_metrics.py
+import pytest
+
+from scrapy_project.nlp_metrics import StageMetrics, hist_bucket, percentile
+from scrapy_project.nlp_orchestrator import NLPOrchestrator
+from scrapy_project.pipelines import ScrapyProjectPipeline
+
+
+class FakeDoc(list):
+    def __init__(self, text):
+        super().__init__(text.split())
+        self.text = text
+        self.ents = []
+
+
+class FakeSpacy:
+    def __call__(self, text):
+        return FakeDoc(text)
+
+
+class FakePV:
+    def analyze_sentiment(self, text):
+        return {"label": "POS"}
+
+    def subjectivity_proxy(self, text):
+        raise RuntimeError("sin parser")
+
+
+class FakeFraming:
+    def analyze_framing(self, text):
+        return {"frame": "x"}
+
+
+def _orch(**kw):
+    return NLPOrchestrator(spacy_model=FakeSpacy(), posverdad_nlp=FakePV(), framing_analyzer=FakeFraming(), **kw)
+
+
+@pytest.mark.unit
+def test_process_records_every_stage_with_sizes_and_failures():
+    orch = _orch()
+    out = orch.analyze("uno dos tres")
+
+    timing = out["stage_timing"]
+    assert set(timing) == {"parse", "entities", "sentiment", "subjectivity", "framing"}
+    assert timing["parse"]["chars"] == len("uno dos tres") and timing["entities"]["tokens"] == 3
+    assert timing["subjectivity"]["failed"] == 1 and timing["sentiment"]["failed"] == 0
+    assert all(m["ms"] >= 0 for m in timing.values())
+    assert orch.failures["subjectivity"] == 1
+
+
+@pytest.mark.unit
+def test_analyze_many_splits_batch_time_per_text():
+    outs = _orch().analyze_many(["a b", "", "c d e"])
+    assert "stage_timing" not in outs[1]  # contrato exacto del texto vacío
+    assert outs[0]["stage_timing"]["sentiment"]["ms"] == outs[2]["stage_timing"]["sentiment"]["ms"]
+    assert outs[2]["stage_timing"]["sentiment"]["tokens"] == 3
+
+
+@pytest.mark.unit
+def test_analyze_many_counts_failed_sentiment_batch():
+    class BatchBoomPV(FakePV):
+        def analyze_sentiment_many(self, texts):
+            raise RuntimeError("backend caído")
+
+    orch = NLPOrchestrator(spacy_model=FakeSpacy(), posverdad_nlp=BatchBoomPV(), framing_analyzer=FakeFraming())
+    outs = orch.analyze_many(["a b", "c d e"])
+    assert orch.failures["sentiment"] == 1
+    assert all(o["stage_timing"]["sentiment"]["failed"] == 1 for o in outs)
+    assert all(o["sentiment"] == {"label": "POS"} for o in outs)  # se recupera por texto
+
+
+@pytest.mark.unit
+def test_stage_timing_can_be_disabled():
+    orch = _orch()
+    orch.stage_timing = False
+    assert "stage_timing" not in orch.analyze("hola")
+
+
+@pytest.mark.unit
+def test_stage_timing_follows_nlp_stage_timing_setting(pipeline_factory):
+    from types import SimpleNamespace
+
+    from scrapy.settings import Settings
+
+    from scrapy_project.nlp_pool import nlp_options_from_settings
+
+    orch = _orch()
+    options = nlp_options_from_settings(Settings({"NLP_STAGE_TIMING": "false"}))
+    assert options == {"stage_timing": False}
+    orch.set_options(options)
+    assert "stage_timing" not in orch.analyze("hola")
+
+    pipeline = ScrapyProjectPipeline.from_crawler(
+        SimpleNamespace(settings=Settings({"NLP_STAGE_TIMING": "false"}), stats=None)
+    )
+    assert pipeline.nlp_options == {"stage_timing": False}
+
+
+@pytest.mark.unit
+def test_stage_metrics_percentiles_and_persist():
+    m = StageMetrics()
+    for ms in range(1, 101):
+        m.observe({"sentiment": {"ms": float(ms), "chars": 10, "tokens": 2, "failed": ms == 100}})
+    st = m.summary()["sentiment"]
+    assert st["samples"] == 100 and st["failures"] == 1 and st["tokens"] == 200
+    assert st["p50_ms"] == pytest.approx(50.5) and st["p99_ms"] == pytest.approx(99.01)
+    assert percentile([], 50) is None
+    assert hist_bucket(7.0) == "<=10" and hist_bucket(1e6) == ">5000"
+
+    class Cur:
+        rows = []
+
+        def execute(self, sql, params):
+            self.rows.append(params)
+
+    assert m.persist(Cur(), "run-1") == 1
+    assert Cur.rows[0][:4] == ("run-1", "sentiment", 100, 1)
+
+
+class FakeStats:
+    def __init__(self):
+        self.values = {}
+
+    def get_value(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set_value(self, key, value):
+        self.values[key] = value
+
+
+@pytest.mark.unit
+def test_pipeline_pops_timing_into_stats_histograms():
+    p = ScrapyProjectPipeline.__new__(ScrapyProjectPipeline)
+    p.crawler = type("C", (), {"stats": FakeStats()})()
+    p.nlp_cache = None
+    p.nlp_metrics = StageMetrics()
+
+    fresh = [{"polarity": 1.0, "stage_timing": {"sentiment": {"ms": 7.0, "chars": 5, "tokens": 1, "failed": 1}}}]
+    results = p._merge_cached([None], [0], fresh, ["texto"])
+
+    assert "stage_timing" not in results[0]  # ni en preprocessed_data ni en la caché
+    assert p.crawler.stats.values["posverdad/nlp/sentiment_ms"] == {"<=10": 1}
+    assert p.crawler.stats.values["posverdad/nlp/sentiment_failures"] == 1
+    p._log_nlp_stage_metrics()
+    assert p.crawler.stats.values["posverdad/nlp/sentiment_p95_ms"] == 7.0
@@ -48,3 +48,23 @@ def test_subjectivity_proxy_ok():
     val = nlp.subjectivity_proxy("algo de texto")
     # 2/4 = 0.5
     assert val == 0.5
+
+def test_analyze_sentiment_many_single_predict_call():
+    calls = []
+
+    class BatchAnalyzer:
+        def predict(self, texts):
+            calls.append(texts)
+            assert isinstance(texts, list)
+            return [FakeAnalyzer().predict(t) for t in texts]
+
+    nlp = PosverdadNLP(nlp_model=None)
+    nlp.sa = BatchAnalyzer()
+    out = nlp.analyze_sentiment_many(["uno", "", "dos"])
+    assert len(calls) == 1 and calls[0] == ["uno", "dos"]
+    assert out[1] == (None, None)
+    assert out[0][0] == 1.0 and out[2][0] == 1.0
+
+def test_subjectivity_proxy_uses_given_doc_without_model():
+    nlp = PosverdadNLP(nlp_model=None)
+    assert nlp.subjectivity_proxy("algo de texto", doc=FakeSpacy()("x")) == 0.5
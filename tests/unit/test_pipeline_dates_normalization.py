@@ -33,10 +33,9 @@ class DummyConn:
         # Importante: devolver un objeto que soporte __enter__/__exit__
         return FakeCursor()
 
-def make_pipeline(monkeypatch):
-    p = pl.ScrapyProjectPipeline()
-    # Evitar DB real
-    p.conn = DummyConn()
+def make_pipeline(monkeypatch, pipeline_factory):
+    # Evitar DB real (pipeline_factory: logs en tmp_path y sin cargar modelos)
+    p = pipeline_factory(conn=DummyConn())
     # Evitar dedupe real
     monkeypatch.setattr(p, "_check_duplicates", lambda cur, item: None)
     # Evitar NLP real
@@ -45,8 +44,8 @@ def make_pipeline(monkeypatch):
     monkeypatch.setattr(pl, "store_article", lambda cur, item: 123)
     return p
 
-def test_dates_when_published_at_present(monkeypatch):
-    p = make_pipeline(monkeypatch)
+def test_dates_when_published_at_present(monkeypatch, pipeline_factory):
+    p = make_pipeline(monkeypatch, pipeline_factory)
     item = {
         "url": "https://x/y",
         "title": "t",
@@ -60,8 +59,8 @@ def test_dates_when_published_at_present(monkeypatch):
     assert out["publication_date"] == "2024-09-05"
     assert out["published_at"] == "2024-09-05T10:20:30Z"
 
-def test_dates_when_only_publication_date(monkeypatch):
-    p = make_pipeline(monkeypatch)
+def test_dates_when_only_publication_date(monkeypatch, pipeline_factory):
+    p = make_pipeline(monkeypatch, pipeline_factory)
     item = {
         "url": "https://x/y",
         "title": "t",
@@ -0,0 +1,127 @@
+# tests/unit/test_pipeline_nlp_batch.py
+from types import SimpleNamespace
+
+import pytest
+
+from scrapy_project import pipelines as pl
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, q, params=None):
+        self.log.append((q, params))
+
+    def fetchone(self):
+        return None
+
+
+class DummyConn:
+    def __init__(self):
+        self.queries = []
+        self.commits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.commits += 1
+        return False
+
+    def cursor(self):
+        return FakeCursor(self.queries)
+
+
+class BatchNLP:
+    def __init__(self):
+        self.calls = []
+
+    def analyze(self, text):  # no debería usarse en modo lote
+        raise AssertionError("analyze() por ítem en modo lote")
+
+    def analyze_many(self, texts):
+        self.calls.append(list(texts))
+        return [{"polarity": 0.5, "subjectivity": 0.1, "entities": []} for _ in texts]
+
+
+@pytest.fixture
+def make_pipeline(monkeypatch, pipeline_factory):
+    def _make(size=3, timeout=999.0):
+        p = pipeline_factory(conn=DummyConn(), nlp=BatchNLP(), nlp_batch_size=size, nlp_batch_timeout=timeout)
+        monkeypatch.setattr(p, "_check_duplicates", lambda cur, item: None)
+        ids = iter(range(100, 200))
+        monkeypatch.setattr(pl, "store_article", lambda cur, item, return_created=True: (next(ids), True))
+        return p
+
+    return _make
+
+
+def _item(i):
+    return {"url": f"https://x/{i}", "title": f"t{i}", "body": "cuerpo largo " * 10}
+
+
+def _preproc_updates(conn):
+    return [params for q, params in conn.queries if "preprocessed_data" in q]
+
+
+def test_batch_flushes_when_size_reached(monkeypatch, make_pipeline):
+    p = make_pipeline(size=3)
+    spider = SimpleNamespace(name="s")
+    p.process_item(_item(1), spider)
+    p.process_item(_item(2), spider)
+    assert p.nlp.calls == []
+    assert len(p._nlp_buffer) == 2
+
+    out = p.process_item(_item(3), spider)
+    assert len(p.nlp.calls) == 1 and len(p.nlp.calls[0]) == 3
+    assert p._nlp_buffer == []
+    assert [params[1] for params in _preproc_updates(p.conn)] == [100, 101, 102]
+    assert out["polarity"] == 0.5
+
+
+def test_batch_flushes_on_timeout(monkeypatch, make_pipeline):
+    p = make_pipeline(size=10, timeout=0.0)
+    p.process_item(_item(1), SimpleNamespace(name="s"))
+    assert len(p.nlp.calls) == 1
+    assert p._nlp_buffer == []
+
+
+def test_close_spider_drains_pending_batch(monkeypatch, make_pipeline):
+    p = make_pipeline(size=10)
+    p.process_item(_item(1), SimpleNamespace(name="s"))
+    assert len(p._nlp_buffer) == 1
+    monkeypatch.setattr("subprocess.run", lambda *a, **k: None)
+    conn = p.conn
+    p.close_spider(SimpleNamespace(name="s"))
+    assert len(p.nlp.calls) == 1
+    assert len(_preproc_updates(conn)) == 1
+
+
+def test_close_spider_returns_conn_and_closes_pool(monkeypatch, make_pipeline):
+    p = make_pipeline(size=10)
+    conn = p.conn
+    calls = []
+    monkeypatch.setattr("subprocess.run", lambda *a, **k: None)
+    monkeypatch.setattr(pl.db, "putconn", lambda c: calls.append(("putconn", c)))
+    monkeypatch.setattr(pl.db, "close_pool", lambda: calls.append(("close_pool", None)))
+    p.close_spider(SimpleNamespace(name="s"))
+    assert calls == [("putconn", conn), ("close_pool", None)]
+    assert p.conn is None
+
+
+def test_batch_size_from_crawler_settings(pipeline_factory):
+    settings = SimpleNamespace(
+        get=lambda k, d=None: d,
+        getint=lambda k, d=None: 16 if k == "NLP_BATCH_SIZE" else d,
+        getfloat=lambda k, d=None: 2.5 if k == "NLP_BATCH_TIMEOUT" else d,
+    )
+    p = pl.ScrapyProjectPipeline.from_crawler(SimpleNamespace(settings=settings, stats=None))
+    assert p.nlp_batch_size == 16
+    assert p.nlp_batch_timeout == 2.5
@@ -0,0 +1,50 @@
+# tests/unit/test_pipeline_preprocessed_storage.py
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+class Cur:
+    def __init__(self, row):
+        self.row = row
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, q, params=None):
+        self.queries.append(" ".join(q.split()))
+
+    def fetchone(self):
+        return self.row
+
+
+class Conn:
+    def __init__(self, row):
+        self.cur = Cur(row)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self.cur
+
+
+@pytest.mark.parametrize("row, expected", [((True,), "compact"), ((False,), "json"), (None, "json")])
+def test_compact_storage_falls_back_to_json_without_migration(row, expected, pipeline_factory):
+    p = pipeline_factory(preprocessed_storage="compact", conn=Conn(row))
+    p._detect_preprocessed_storage()
+    assert p.preprocessed_storage == expected
+    assert p.conn.cur.queries == ["SELECT to_regclass('article_preprocessed') IS NOT NULL"]
+
+
+def test_json_storage_skips_probe(pipeline_factory):
+    p = pipeline_factory(preprocessed_storage="json", conn=Conn((True,)))
+    p._detect_preprocessed_storage()
+    assert p.preprocessed_storage == "json" and p.conn.cur.queries == []
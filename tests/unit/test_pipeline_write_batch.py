@@ -0,0 +1,179 @@
+# tests/unit/test_pipeline_write_batch.py
+from types import SimpleNamespace
+
+import pytest
+from scrapy.exceptions import DropItem
+
+from scrapy_project import pipelines as pl
+
+
+class FakeCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, q, params=None):
+        pass
+
+    def fetchone(self):
+        return None
+
+
+class DummyConn:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor()
+
+
+class BatchNLP:
+    def __init__(self):
+        self.calls = []
+
+    def analyze_many(self, texts):
+        self.calls.append(list(texts))
+        return [{} for _ in texts]
+
+
+@pytest.fixture
+def make_pipeline(monkeypatch, pipeline_factory):
+    def _make(size=3):
+        p = pipeline_factory(conn=DummyConn(), nlp=BatchNLP(), write_batch_size=size, write_batch_timeout=999.0)
+        monkeypatch.setattr(p, "_check_duplicates", lambda cur, item: None)
+        monkeypatch.setattr(p, "_persist_nlp", lambda cur, item, article_id, pre: None)
+
+        def _no_single(*a, **k):
+            raise AssertionError("store_article por ítem en modo lote")
+
+        monkeypatch.setattr(pl, "store_article", _no_single)
+        batches = []
+
+        def _bulk(conn, items):
+            batches.append(list(items))
+            return [(200 + i, i % 2 == 0) for i in range(len(items))]
+
+        monkeypatch.setattr(pl, "store_articles_bulk", _bulk)
+        return p, batches
+
+    return _make
+
+
+def _item(i, **kw):
+    it = {"url": f"https://x.cl/{i}", "title": f"titulo {i}", "body": f"cuerpo largo {i} " * 10, "body_hash": f"h{i}"}
+    it.update(kw)
+    return it
+
+
+def test_items_are_written_in_one_batch(monkeypatch, make_pipeline):
+    p, batches = make_pipeline(size=3)
+    spider = SimpleNamespace(name="s")
+    items = [p.process_item(_item(i), spider) for i in range(3)]
+
+    assert len(batches) == 1 and len(batches[0]) == 3
+    assert [it["article_id"] for it in items] == [200, 201, 202]
+    assert [it["was_created"] for it in items] == [True, False, True]
+    assert (p.inserted, p.updated) == (2, 1)
+    # Solo los nuevos van al NLP, en una sola llamada
+    assert len(p.nlp.calls) == 1 and len(p.nlp.calls[0]) == 2
+
+
+def test_close_spider_flushes_partial_batch(monkeypatch, make_pipeline):
+    p, batches = make_pipeline(size=10)
+    spider = SimpleNamespace(name="s")
+    p.process_item(_item(1), spider)
+    assert batches == []
+    monkeypatch.setattr(p, "_finish_run", lambda spider: None)
+    p.close_spider(spider)
+    assert len(batches) == 1 and p.inserted == 1
+
+
+def test_duplicate_of_pending_item_is_dropped(monkeypatch, make_pipeline):
+    p, batches = make_pipeline(size=10)
+    spider = SimpleNamespace(name="s")
+    p.process_item(_item(1), spider)
+    with pytest.raises(DropItem):
+        p.process_item(_item(2, url="https://www.x.cl/1/"), spider)
+    with pytest.raises(DropItem):
+        p.process_item(_item(3, body_hash="h1"), spider)
+    assert p.discarded_duplicates == 2
+    assert len(p._write_buffer) == 1
+
+
+def test_failed_batch_counts_errors(monkeypatch, make_pipeline):
+    p, _ = make_pipeline(size=2)
+
+    def boom(conn, items):
+        raise RuntimeError("sin conexión")
+
+    monkeypatch.setattr(pl, "store_articles_bulk", boom)
+    spider = SimpleNamespace(name="s")
+    p.process_item(_item(1), spider)
+    p.process_item(_item(2), spider)
+    assert p.errors == 2 and p._write_buffer == []
+
+
+def test_failed_batch_falls_back_to_single_writes(monkeypatch, make_pipeline):
+    p, _ = make_pipeline(size=3)
+    added = []
+    p.dedup_index = SimpleNamespace(add_item=lambda item: added.append(item["url"]))
+
+    def boom(conn, items):
+        raise RuntimeError("violación de constraint en el lote")
+
+    def single(cur, item, return_created=False):
+        if item["url"].endswith("/2"):
+            raise RuntimeError("fila inválida")
+        return (300 + int(item["url"].rsplit("/", 1)[1]), True)
+
+    monkeypatch.setattr(pl, "store_articles_bulk", boom)
+    monkeypatch.setattr(pl, "store_article", single)
+    spider = SimpleNamespace(name="s")
+    items = [p.process_item(_item(i), spider) for i in range(3)]
+    # Nada entra al índice de duplicados antes del commit
+    assert added == ["https://x.cl/0", "https://x.cl/1"]
+    assert [it.get("article_id") for it in items] == [300, 301, None]
+    assert p.inserted == 2 and p.errors == 1
+    assert len(p.nlp.calls) == 1 and len(p.nlp.calls[0]) == 2
+
+
+def test_pending_items_enter_dedup_index_only_after_commit(monkeypatch, make_pipeline):
+    p, batches = make_pipeline(size=2)
+    added = []
+    p.dedup_index = SimpleNamespace(add_item=lambda item: added.append(item["url"]))
+    spider = SimpleNamespace(name="s")
+    p.process_item(_item(1), spider)
+    assert added == []
+    p.process_item(_item(2), spider)
+    assert len(batches) == 1 and added == ["https://x.cl/1", "https://x.cl/2"]
+
+
+def test_integrity_error_forgets_cached_ids_before_retry(monkeypatch, make_pipeline):
+    from psycopg2.errors import ForeignKeyViolation
+
+    from scrapy_project.id_cache import ID_CACHE
+
+    p, _ = make_pipeline(size=2)
+    # id cacheado de una entidad que un job de reconcile borró durante el crawl
+    ID_CACHE.put("entities", ("boric", "PER"), 99)
+
+    def fk(conn, items):
+        raise ForeignKeyViolation("articles_entities_entity_id_fkey")
+
+    seen = []
+
+    def single(cur, item, return_created=True):
+        seen.append(ID_CACHE.get("entities", ("boric", "PER")))
+        return 300, True
+
+    monkeypatch.setattr(pl, "store_articles_bulk", fk)
+    monkeypatch.setattr(pl, "store_article", single)
+    spider = SimpleNamespace(name="s")
+    p.process_item(_item(1), spider)
+    p.process_item(_item(2), spider)
+    assert seen == [None, None] and p.errors == 0
@@ -0,0 +1,102 @@
+# tests/unit/test_preprocessed_codec.py
+import json
+
+import pytest
+
+from scrapy_project import preprocessed_codec as codec
+from scrapy_project.storage import save_preprocessed_data
+
+PRE = {
+    "engine": "spacy",
+    "tokens": ["Presidente", "anunció", "reforma", "presidente", "anunció"],
+    "lemmas": ["presidente", "anunciar", "reforma", "presidente", "anunciar"],
+    "pos": ["NOUN", "VERB", "NOUN", "NOUN", "VERB"],
+}
+RESULT = {"polarity": 0.5, "entities": [{"text": "Chile", "label": "LOC"}], "preprocessed": PRE}
+
+
+class Cur:
+    def __init__(self, row=None):
+        self.queries = []
+        self.row = row
+
+    def execute(self, q, params=None):
+        self.queries.append((" ".join(q.split()), params))
+
+    def fetchone(self):
+        return self.row
+
+
+@pytest.mark.unit
+def test_pack_roundtrip_and_is_smaller():
+    blob = codec.pack(PRE)
+    assert codec.unpack(blob) == PRE
+    assert len(blob) < len(json.dumps(PRE, ensure_ascii=False).encode("utf-8"))
+
+
+@pytest.mark.unit
+def test_pos_outside_upos_and_empty_docs_roundtrip():
+    pre = {"engine": "stanza", "tokens": ["x", "y"], "lemmas": ["x", None], "pos": ["NOUN", "NC0S000"]}
+    out = codec.unpack(codec.pack(pre))
+    assert out["pos"] == ["NOUN", "NC0S000"] and out["lemmas"] == ["x", ""]
+    empty = {"engine": "spacy", "tokens": [], "lemmas": [], "pos": []}
+    assert codec.unpack(codec.pack(empty)) == empty
+
+
+@pytest.mark.unit
+def test_compact_leaves_stub_and_expand_rebuilds_old_dict():
+    slim, packed = codec.compact(RESULT, storage="compact")
+    assert slim["preprocessed"] == {"engine": "spacy", "n_tokens": 5, "packed": True}
+    assert slim["entities"] == RESULT["entities"] and RESULT["preprocessed"] is PRE  # sin mutar la entrada
+    assert packed["n_tokens"] == 5
+    assert codec.expand(slim, packed["packed"]) == RESULT
+
+
+@pytest.mark.unit
+def test_compact_passthrough_cases():
+    assert codec.compact(RESULT, storage="json") == (RESULT, None)
+    assert codec.compact({"preprocessed": {}}, storage="compact") == ({"preprocessed": {}}, None)
+    assert codec.compact({}, storage="compact") == ({}, None)
+    assert codec.expand({"preprocessed": {"tokens": ["a"]}}) == {"preprocessed": {"tokens": ["a"]}}
+
+
+@pytest.mark.unit
+def test_save_preprocessed_data_writes_stub_and_side_row(monkeypatch):
+    monkeypatch.setattr(codec, "PREPROCESSED_STORAGE", "compact")
+    cur = Cur()
+    save_preprocessed_data(article_id=7, preprocessed=RESULT, db=cur)
+
+    savepoint, update, side, release = cur.queries
+    assert savepoint[0] == "SAVEPOINT posverdad_packed" and release[0] == "RELEASE SAVEPOINT posverdad_packed"
+    assert "preprocessed_data" in update[0] and update[1][0].adapted["preprocessed"]["packed"] is True
+    assert side[0].startswith("INSERT INTO article_preprocessed")
+    assert side[1][:3] == (7, "spacy", 5)
+
+
+@pytest.mark.unit
+def test_missing_side_table_rolls_back_to_savepoint_and_writes_json():
+    class NoSideTable(Cur):
+        def execute(self, q, params=None):
+            if q.lstrip().startswith("INSERT INTO article_preprocessed"):
+                raise RuntimeError('relation "article_preprocessed" does not exist')
+            super().execute(q, params)
+
+    cur = NoSideTable()
+    assert codec.write_preprocessed(cur, 7, RESULT, storage="compact") is False
+    sql = [q for q, _ in cur.queries]
+    assert sql[0] == "SAVEPOINT posverdad_packed" and sql[2] == "ROLLBACK TO SAVEPOINT posverdad_packed"
+    # Tras el rollback parcial se guarda la forma json completa (con los arrays)
+    assert sql[3].startswith("UPDATE articles") and cur.queries[3][1][0].adapted == RESULT
+
+
+@pytest.mark.unit
+def test_side_table_probe():
+    assert codec.side_table_available(Cur(row=(True,))) is True
+    assert codec.side_table_available(Cur(row=(False,))) is False
+
+
+@pytest.mark.unit
+def test_load_preprocessed_data_accessor():
+    slim, packed = codec.compact(RESULT, storage="compact")
+    assert codec.load_preprocessed_data(Cur(row=(slim, packed["packed"])), 7) == RESULT
+    assert codec.load_preprocessed_data(Cur(row=None), 7) is None
@@ -46,3 +46,26 @@ def test_preprocessor_invalid_engine():
     import pytest
     with pytest.raises(ValueError):
         Preprocessor(engine="otro")
+
+def test_preprocess_many_uses_pipe_and_matches_preprocess(mocker):
+    class PipeSpacy(FakeSpacy):
+        pipe_calls = 0
+
+        def pipe(self, texts, batch_size=32):
+            PipeSpacy.pipe_calls += 1
+            return (self(t) for t in texts)
+
+    mocker.patch("scrapy_project.preprocessor.spacy.load", return_value=PipeSpacy())
+    p = Preprocessor(engine="spacy")
+    outs = p.preprocess_many(["Hola, muy bonito.", "  ", "Hola, muy bonito."])
+    assert PipeSpacy.pipe_calls == 1
+    assert outs[0] == p.preprocess("Hola, muy bonito.") == outs[2]
+    assert outs[1] == {"engine": "spacy", "tokens": [], "lemmas": [], "pos": []}
+
+def test_preprocess_reuses_given_doc(mocker):
+    nlp = mocker.MagicMock(side_effect=AssertionError("no debería parsear"))
+    mocker.patch("scrapy_project.preprocessor.spacy.load", return_value=nlp)
+    p = Preprocessor(engine="spacy")
+    assert p.accepts_doc is True
+    out = p.preprocess("Hola, muy bonito.", doc=FakeSpacy()("Hola, muy bonito."))
+    assert out["tokens"] == ["Hola", "bonito"]
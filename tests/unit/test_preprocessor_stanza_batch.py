@@ -0,0 +1,107 @@
+import types
+
+import pytest
+
+import scrapy_project.preprocessor as prep
+from scrapy_project.model_registry import REGISTRY
+
+pytestmark = pytest.mark.unit
+
+
+class _W:
+    def __init__(self, text, lemma, upos):
+        self.text, self.lemma, self.upos = text, lemma, upos
+
+
+class _S:
+    def __init__(self, words):
+        self.words = words
+
+
+class _Document:
+    def __init__(self, sentences, text=None):
+        self.sentences, self.text = sentences, text
+
+
+def _fake_stanza(calls):
+    def _download(lang, model_dir=None, verbose=False):
+        calls["download"].append((lang, model_dir))
+
+    class _Pipeline:
+        def __init__(self, lang, **kwargs):
+            calls["pipeline"].append(kwargs)
+
+        def _words(self, text):
+            return [_W(w, w.lower(), "NOUN") for w in text.replace(".", " .").split()]
+
+        def __call__(self, text):
+            calls["single"] += 1
+            return _Document([_S(self._words(text))], text=text)
+
+        def bulk_process(self, docs):
+            calls["bulk"].append(len(docs))
+            for d in docs:
+                d.sentences = [_S(self._words(d.text))]
+            return docs
+
+    return types.SimpleNamespace(download=_download, Pipeline=_Pipeline, Document=_Document)
+
+
+@pytest.fixture
+def stanza_env(monkeypatch, tmp_path):
+    calls = {"download": [], "pipeline": [], "bulk": [], "single": 0}
+    monkeypatch.setattr(prep, "stanza_available", True, raising=False)
+    monkeypatch.setattr(prep, "stanza", _fake_stanza(calls), raising=False)
+    monkeypatch.setattr(prep, "STANZA_RESOURCES_DIR", str(tmp_path))
+    REGISTRY.clear()
+    yield calls, tmp_path
+    REGISTRY.clear()
+
+
+def test_preprocess_many_uses_bulk_process_in_batches(stanza_env):
+    calls, _ = stanza_env
+    p = prep.Preprocessor(engine="stanza")
+    texts = ["Hola Chile.", "  ", "", "Uno dos.", "Tres."]
+    out = p.preprocess_many(texts, batch_size=2)
+
+    assert calls["bulk"] == [2, 1]
+    assert calls["single"] == 0
+    assert out[0] == {"engine": "stanza", "tokens": ["Hola", "Chile"], "lemmas": ["hola", "chile"],
+                      "pos": ["NOUN", "NOUN"]}
+    assert out[1]["tokens"] == [] and out[2]["tokens"] == []
+    assert out[3]["tokens"] == ["Uno", "dos"] and out[4]["tokens"] == ["Tres"]
+    # Mismo contrato que preprocess() texto a texto
+    assert out[3] == p.preprocess("Uno dos.")
+
+
+def test_pipeline_built_from_local_dir_without_download(stanza_env):
+    calls, tmp_path = stanza_env
+    (tmp_path / "resources.json").write_text("{}")
+    (tmp_path / "es").mkdir()
+
+    prep.Preprocessor(engine="stanza")
+    assert calls["download"] == []
+    (kwargs,) = calls["pipeline"]
+    assert kwargs["dir"] == str(tmp_path)
+    assert kwargs["download_method"] is None
+    assert kwargs["processors"] == prep.STANZA_PROCESSORS
+
+
+def test_missing_resources_downloaded_once_into_dir(stanza_env):
+    calls, tmp_path = stanza_env
+    prep.Preprocessor(engine="stanza")
+    prep.Preprocessor(engine="stanza")  # el registro reutiliza el Pipeline
+    assert calls["download"] == [("es", str(tmp_path))]
+    assert len(calls["pipeline"]) == 1
+
+
+def test_supported_kwargs_filters_for_narrow_signatures():
+    def narrow(lang, processors=None, verbose=False):
+        pass
+
+    def wide(lang, **kwargs):
+        pass
+
+    kw = {"processors": "tokenize", "dir": "/x", "verbose": False}
+    assert prep._supported_kwargs(narrow, kw) == {"processors": "tokenize", "verbose": False}
+    assert prep._supported_kwargs(wide, kw) == kw
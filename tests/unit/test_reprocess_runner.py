@@ -0,0 +1,216 @@
+# tests/unit/test_reprocess_runner.py
+import importlib.util
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from scrapy_project import nlp_pool
+
+_PATH = Path(__file__).resolve().parents[2] / "jobs" / "reprocess_runner.py"
+_spec = importlib.util.spec_from_file_location("reprocess_runner", _PATH)
+rr = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(rr)
+
+
+class FakeCursor:
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.name = name
+        self.itersize = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, q, params=None):
+        self.conn.executed.append((" ".join(q.split()), params))
+
+    def fetchone(self):
+        return self.conn.one
+
+    def __iter__(self):
+        after = self.conn.executed[-1][1][0]
+        return iter([r for r in self.conn.rows if r[0] > after])
+
+
+class FakeConn:
+    def __init__(self, rows=(), one=None):
+        self.rows = list(rows)
+        self.one = one
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.named = []
+
+    def cursor(self, name=None):
+        if name:
+            self.named.append(name)
+        return FakeCursor(self, name)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeOrch:
+    def analyze_many(self, texts):
+        return [{"polarity": 1.0, "subjectivity": 0.2, "entities": [{"text": "Chile", "label": "LOC"}]}
+                for _ in texts]
+
+
+@pytest.fixture
+def executor():
+    ex = ThreadPoolExecutor(max_workers=1, initializer=nlp_pool._init_worker, initargs=(FakeOrch,))
+    yield ex
+    ex.shutdown(wait=True)
+
+
+@pytest.fixture
+def values(monkeypatch):
+    calls = []
+    monkeypatch.setattr(rr, "execute_values", lambda cur, sql, rows, **kw: calls.append((" ".join(sql.split()), rows)))
+    monkeypatch.setattr(rr, "merge_links", lambda cur, links, cats: calls.append(("merge_links", links)))
+    return calls
+
+
+def _rows(n):
+    return [(i, f"cuerpo {i}", f"t{i}", None) for i in range(1, n + 1)]
+
+
+def test_build_query_filters():
+    sql, params = rr.build_query(10, run_id="r1", since="2024-01-01", missing=["entities", "polarity"])
+    assert "a.id > %s" in sql and sql.endswith("ORDER BY a.id")
+    assert "a.run_id = %s" in sql and "a.publication_date >= %s" in sql
+    assert "NOT EXISTS" in sql and " OR a.polarity IS NULL" in sql
+    assert params == [10, "r1", "2024-01-01"]
+
+
+def test_run_streams_batches_and_checkpoints(tmp_path, executor, values):
+    read, write = FakeConn(_rows(5)), FakeConn()
+    cp = rr.Checkpoint(tmp_path / "cp.json", {"profile": "full"})
+
+    stats = rr.run(read, write, executor, rr.build_query(0), cp, batch_size=2, in_flight=2)
+
+    assert read.named == [rr.CURSOR_NAME]
+    assert stats["processed"] == 5 and stats["updated"] == 5 and stats["last_id"] == 5
+    updates = [rows for sql, rows in values if sql.startswith("UPDATE articles")]
+    assert [len(u) for u in updates] == [2, 2, 1]  # un UPDATE multi-fila por lote
+    assert write.commits == 3
+    assert json.loads((tmp_path / "cp.json").read_text())["last_id"] == 5
+    # Entidades por conjuntos (merge de bulk_writer), una llamada por lote
+    assert [len(links) for sql, links in values if sql == "merge_links"] == [2, 2, 1]
+
+
+def test_resume_from_checkpoint_with_same_filters(tmp_path, executor, values):
+    cp_path = tmp_path / "cp.json"
+    rr.Checkpoint(cp_path, {"profile": "full"}).save(3, 3, 3)
+
+    assert rr.Checkpoint(cp_path, {"profile": "full"}).load() == 3
+    assert rr.Checkpoint(cp_path, {"profile": "ner-only"}).load() == 0  # otros filtros → desde cero
+
+    read, write = FakeConn(_rows(5)), FakeConn()
+    stats = rr.run(read, write, executor, rr.build_query(3), rr.Checkpoint(cp_path, {"profile": "full"}),
+                   batch_size=10, start_id=3)
+    assert stats["processed"] == 2 and stats["last_id"] == 5
+
+
+def test_failed_nlp_batch_does_not_overwrite(tmp_path, values):
+    class Boom:
+        def analyze_many(self, texts):
+            raise RuntimeError("modelo caído")
+
+    cp_path = tmp_path / "cp.json"
+    rr.Checkpoint(cp_path, {}).save(0, 0, 0)
+    ex = ThreadPoolExecutor(max_workers=1, initializer=nlp_pool._init_worker, initargs=(Boom,))
+    try:
+        stats = rr.run(FakeConn(_rows(2)), FakeConn(), ex, rr.build_query(0),
+                       rr.Checkpoint(cp_path, {}), batch_size=2)
+    finally:
+        ex.shutdown(wait=True)
+    assert stats["failed_batches"] == 1 and stats["updated"] == 0
+    assert not any(sql.startswith("UPDATE articles") for sql, _ in values)
+    # El checkpoint no avanza sobre el lote fallido: el resume lo reintenta
+    assert stats["last_id"] == 0 and stats["failed_ranges"] == [[1, 2]]
+    assert rr.Checkpoint(cp_path, {}).load() == 0
+
+
+def test_failed_batch_freezes_checkpoint_and_stops_reading(tmp_path, values):
+    class FlakyOrch(FakeOrch):
+        def analyze_many(self, texts):
+            if texts[0] == "cuerpo 3":
+                raise RuntimeError("modelo caído")
+            return super().analyze_many(texts)
+
+    cp_path = tmp_path / "cp.json"
+    read = FakeConn(_rows(20))
+    ex = ThreadPoolExecutor(max_workers=1, initializer=nlp_pool._init_worker, initargs=(FlakyOrch,))
+    try:
+        stats = rr.run(read, FakeConn(), ex, rr.build_query(0), rr.Checkpoint(cp_path, {}),
+                       batch_size=2, in_flight=1)
+    finally:
+        ex.shutdown(wait=True)
+    assert stats["failed_ranges"] == [[3, 4]]
+    assert stats["processed"] == 4 and stats["last_id"] == 2
+    assert json.loads(cp_path.read_text())["last_id"] == 2
+
+
+def test_partial_profile_merges_only_present_keys(values):
+    rr.write_batch(FakeConn(), [(1, "b", "t", None)],
+                   [{"entities": [{"text": "Chile", "label": "LOC"}], "subjectivity": None, "preprocessed": {}}],
+                   merge=True)
+    sql, rows = [v for v in values if v[0].startswith("UPDATE articles")][0]
+    assert "|| v.pre" in sql
+    assert rows[0][1].adapted == {"entities": [{"text": "Chile", "label": "LOC"}]}
+
+
+def test_limit_stops_stream(executor, values):
+    stats = rr.run(FakeConn(_rows(10)), FakeConn(), executor, rr.build_query(0),
+                   rr.Checkpoint(None, {}), batch_size=4, limit=6)
+    assert stats["processed"] == 6 and stats["last_id"] == 6
+
+
+def test_compact_existing_moves_arrays_to_side_table(tmp_path, values):
+    pre = {"polarity": 0.1, "entities": [{"text": "Chile", "label": "LOC"}],
+           "preprocessed": {"engine": "spacy", "tokens": ["a"], "lemmas": ["a"], "pos": ["NOUN"]}}
+    read = FakeConn([(1, pre), (2, pre)])
+    sql, params = rr.build_compact_query(0)
+    assert "jsonb_typeof" in sql and params == [0]
+
+    stats = rr.compact_existing(read, FakeConn(), (sql, params), rr.Checkpoint(tmp_path / "c.json", {}))
+
+    assert stats["updated"] == 2
+    update = [rows for q, rows in values if q.startswith("UPDATE articles")][0]
+    assert update[0][1].adapted["preprocessed"] == {"engine": "spacy", "n_tokens": 1, "packed": True}
+    assert [len(rows) for q, rows in values if q.startswith("INSERT INTO article_preprocessed")] == [2]
+    assert not any(q == "merge_links" and rows for q, rows in values)  # sin re-vincular entidades
+
+
+def test_compact_mode_has_its_own_default_checkpoint(monkeypatch):
+    monkeypatch.setenv("LOGS_DIR", "logs")
+    assert rr.default_checkpoint_path() == "logs/reprocess_checkpoint.json"
+    assert rr.default_checkpoint_path(compact_existing=True) == "logs/reprocess_compact_checkpoint.json"
+
+
+def test_compact_storage_falls_back_to_json_without_side_table():
+    missing, migrated = FakeConn(one=(False,)), FakeConn(one=(True,))
+    assert rr.resolve_storage(missing, "compact") == "json"
+    assert rr.resolve_storage(migrated, "compact") == "compact"
+    assert missing.executed == [("SELECT to_regclass('article_preprocessed') IS NOT NULL", None)]
+    assert missing.rollbacks == 1  # sin transacción abierta antes del primer lote
+
+    json_conn = FakeConn()
+    assert rr.resolve_storage(json_conn, "json") == "json" and json_conn.executed == []
+
+
+def test_json_storage_keeps_arrays_and_skips_side_table(values):
+    pre = {"polarity": 0.1, "preprocessed": {"engine": "spacy", "tokens": ["a"], "lemmas": ["a"], "pos": ["NOUN"]}}
+    rr.write_batch(FakeConn(), [(1, "b", "t", None)], [pre], storage="json")
+    update = [rows for q, rows in values if q.startswith("UPDATE articles")][0]
+    assert update[0][1].adapted["preprocessed"]["tokens"] == ["a"]
+    assert not any(q.startswith("INSERT INTO article_preprocessed") for q, _ in values)
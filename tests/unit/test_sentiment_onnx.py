@@ -0,0 +1,126 @@
+# tests/unit/test_sentiment_onnx.py
+import numpy as np
+
+from scrapy_project import nlp_transformers as nt
+from scrapy_project.sentiment_onnx import OnnxSentimentAnalyzer
+
+
+class FakeInput:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    """Logits fijos por texto: 'malo' → NEG, 'bien' → POS, resto NEU."""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_inputs(self):
+        return [FakeInput("input_ids"), FakeInput("attention_mask")]
+
+    def run(self, names, feeds):
+        assert feeds["input_ids"].dtype == np.int64
+        self.batches.append(feeds["input_ids"].shape[0])
+        return [np.array(self.current, dtype=np.float32)]
+
+
+class FakeTokenizer:
+    def __init__(self, session):
+        self.session = session
+
+    def __call__(self, texts, **kw):
+        rows = []
+        for t in texts:
+            if "malo" in t:
+                rows.append([3.0, 0.0, 0.0])
+            elif "bien" in t:
+                rows.append([0.0, 0.0, 3.0])
+            else:
+                rows.append([0.0, 3.0, 0.0])
+        self.session.current = rows
+        ids = np.ones((len(texts), 4))
+        return {"input_ids": ids, "attention_mask": ids}
+
+
+def make(batch_size=32):
+    session = FakeSession()
+    sa = OnnxSentimentAnalyzer(
+        session, FakeTokenizer(session), {"0": "NEG", "1": "NEU", "2": "POS"},
+        preprocessing_args={"lang": "es"}, batch_size=batch_size,
+    )
+    return sa, session
+
+
+def test_predict_matches_pysentimiento_output_contract():
+    sa, _ = make()
+    single = sa.predict("Todo salió bien")
+    assert single.output == "POS"
+    assert set(single.probas) == {"NEG", "NEU", "POS"}
+    assert abs(sum(single.probas.values()) - 1.0) < 1e-6
+
+    many = sa.predict(["muy malo", "una tabla", "bien"])
+    assert [r.output for r in many] == ["NEG", "NEU", "POS"]
+
+
+def test_predict_batches_by_batch_size():
+    sa, session = make(batch_size=2)
+    assert len(sa.predict(["a", "b", "c"])) == 3
+    assert session.batches == [2, 1]
+
+
+def test_posverdad_nlp_keeps_polarity_score_contract_with_onnx(monkeypatch):
+    sa, _ = make()
+    monkeypatch.setattr(nt, "load_onnx_sentiment", lambda lang="es": sa)
+    nlp = nt.PosverdadNLP(nlp_model=None, backend="onnx", chunked=False)
+    assert nlp.backend == "onnx" and nlp.sa is sa
+
+    pol, score = nlp.analyze_sentiment("esto es malo")
+    assert pol == -1.0 and 0.0 < score <= 1.0
+    assert [p for p, _ in nlp.analyze_sentiment_many(["bien", "", "malo"])] == [1.0, None, -1.0]
+
+
+def test_onnx_failure_falls_back_to_torch(monkeypatch):
+    def boom(lang="es"):
+        raise ImportError("No module named 'onnxruntime'")
+
+    torch_sa = object()
+    monkeypatch.setattr(nt, "load_onnx_sentiment", boom)
+    monkeypatch.setattr(nt, "create_analyzer", lambda **kw: torch_sa)
+    nlp = nt.PosverdadNLP(nlp_model=None, backend="onnx")
+    assert nlp.backend == "torch" and nlp.sa is torch_sa
+
+
+def test_configure_reloads_only_when_the_analyzer_changes(monkeypatch):
+    sa, _ = make()
+    loads = []
+    torch_sa = object()
+    monkeypatch.setattr(nt, "create_analyzer", lambda **kw: torch_sa)
+    monkeypatch.setattr(nt, "load_onnx_sentiment", lambda lang="es", **kw: loads.append(kw) or sa)
+    nlp = nt.PosverdadNLP(nlp_model=None, backend="torch", chunked=False)
+
+    nlp.configure(chunked=True, window_tokens=64, backend="torch", onnx_int8=nt.SENTIMENT_ONNX_INT8)
+    assert (nlp.chunked, nlp.window_tokens, nlp.sa) == (True, 64, torch_sa) and loads == []
+
+    nlp.configure(backend="onnx", onnx_int8=False, onnx_threads=2)
+    assert nlp.backend == "onnx" and nlp.sa is sa
+    assert loads == [{"int8": False, "threads": 2}]
+
+
+def test_onnx_threads_are_part_of_the_shared_session_key(monkeypatch):
+    loads = []
+
+    def load(lang="es", **kw):
+        loads.append(kw)
+        return make()[0]
+
+    monkeypatch.setattr(nt, "load_onnx_sentiment", load)
+    a = nt.PosverdadNLP(nlp_model=None, backend="onnx", onnx_threads=1)
+    b = nt.PosverdadNLP(nlp_model=None, backend="onnx", onnx_threads=1)
+    c = nt.PosverdadNLP(nlp_model=None, backend="onnx", onnx_threads=4)
+    assert b.sa is a.sa and c.sa is not a.sa and len(loads) == 2
+
+    a.configure(onnx_threads=4)
+    assert a.sa is c.sa and len(loads) == 2  # misma sesión de 4 hilos
+    a.configure(onnx_threads=2)
+    assert a.sa is not c.sa and loads[-1]["threads"] == 2
@@ -0,0 +1,88 @@
+# tests/unit/test_sentiment_windows.py
+from scrapy_project.nlp_orchestrator import NLPOrchestrator
+from scrapy_project.nlp_transformers import PosverdadNLP
+
+
+class R:
+    def __init__(self, output, probas):
+        self.output = output
+        self.probas = probas
+
+
+class WindowAnalyzer:
+    """'malo' → NEG, resto POS; registra cada llamada a predict."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, texts):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return self._one(texts)
+        return [self._one(t) for t in texts]
+
+    @staticmethod
+    def _one(text):
+        if "malo" in text:
+            return R("NEG", {"NEG": 0.8, "NEU": 0.1, "POS": 0.1})
+        return R("POS", {"NEG": 0.1, "NEU": 0.1, "POS": 0.8})
+
+
+def make(window_tokens=10):
+    nlp = PosverdadNLP(nlp_model=None, chunked=True, window_tokens=window_tokens)
+    nlp.sa = WindowAnalyzer()
+    return nlp
+
+
+def test_windows_respect_sentence_boundaries_and_budget():
+    nlp = make(window_tokens=10)
+    text = "Uno dos tres. Cuatro cinco seis. Siete ocho nueve diez once doce trece catorce quince dieciséis."
+    wins = nlp.sentiment_windows(text)
+    assert wins[0] == "Uno dos tres. Cuatro cinco seis."
+    # La oración larga se corta por palabras sin pasarse del presupuesto
+    assert all(nlp._count_tokens(w) <= 10 for w in wins[1:])
+    assert " ".join(wins[1:]) == "Siete ocho nueve diez once doce trece catorce quince dieciséis."
+
+
+def test_all_windows_of_many_texts_go_in_one_batch():
+    nlp = make(window_tokens=8)
+    texts = ["Está bien. Todo bueno hoy. Otra frase buena.", "", "Muy malo."]
+    out = nlp.analyze_sentiment_windows(texts)
+
+    assert len(nlp.sa.calls) == 1
+    assert len(nlp.sa.calls[0]) == out[0]["chunks"] + out[2]["chunks"]
+    assert out[0]["chunks"] >= 2 and out[1]["chunks"] == 0
+    assert out[0]["sentiment"] == (1.0, 0.8)
+    assert out[2]["sentiment"] == (-1.0, 0.8)
+    assert out[1]["sentiment"] == (None, None)
+    assert out[0]["ms_per_chunk"] >= 0.0
+
+
+def test_probabilities_are_weighted_by_window_length():
+    nlp = make(window_tokens=6)
+    # Ventana negativa más larga que la positiva → gana NEG
+    text = "Bien. Esto fue muy malo y además bastante malo."
+    pol, score = nlp.analyze_sentiment(text)
+    assert pol == -1.0
+    assert 0.5 < score < 0.8
+
+
+def test_unchunked_mode_keeps_single_predict_per_text():
+    nlp = PosverdadNLP(nlp_model=None, chunked=False)
+    nlp.sa = WindowAnalyzer()
+    assert nlp.analyze_sentiment("Bien. Muy malo.") == (-1.0, 0.8)
+    assert nlp.sa.calls == ["Bien. Muy malo."]
+
+
+def test_orchestrator_reports_chunk_timing():
+    pv = make(window_tokens=8)
+    orch = NLPOrchestrator(spacy_model=object(), posverdad_nlp=pv)
+    out = orch.analyze_many(["Está bien. Todo bueno hoy. Otra frase buena.", "Muy malo."])
+
+    assert len(pv.sa.calls) == 1
+    assert out[0]["polarity"] == 1.0 and out[1]["polarity"] == -1.0
+    timing = out[0]["sentiment_timing"]
+    assert timing["chunks"] >= 2 and set(timing) == {"chunks", "ms", "ms_per_chunk"}
+
+    single = orch.analyze("Muy malo.")
+    assert single["sentiment_timing"]["chunks"] == 1 and single["polarity"] == -1.0
@@ -0,0 +1,111 @@
+# tests/unit/test_spacy_profiles.py
+import spacy
+from spacy.language import Language
+
+from scrapy_project.nlp_orchestrator import NLPOrchestrator
+from scrapy_project.preprocessor import Preprocessor
+from scrapy_project.spacy_profiles import resolve_profile, use_profile
+
+
+@Language.component("posverdad_test_noop")
+def _noop(doc):
+    return doc
+
+
+def make_nlp():
+    """blank('es') con componentes vacíos bajo los nombres de es_core_news_md; `ran` registra cuáles corren."""
+    nlp = spacy.blank("es")
+    for name in ("tok2vec", "morphologizer", "parser", "attribute_ruler", "lemmatizer", "ner"):
+        nlp.add_pipe("posverdad_test_noop", name=name)
+
+    ran = []
+
+    def _track(name, proc):
+        def _wrapped(doc):
+            ran.append(name)
+            return proc(doc)
+        return _wrapped
+
+    nlp._components = [(n, _track(n, p)) for n, p in nlp._components]
+    return nlp, ran
+
+
+def test_use_profile_enables_only_profile_components():
+    nlp, ran = make_nlp()
+    with use_profile(nlp, "ner-only"):
+        nlp("texto")
+    assert ran == ["tok2vec", "ner"]
+
+    ran.clear()
+    with use_profile(nlp, "lemmas"):
+        nlp("texto")
+    assert ran == ["tok2vec", "morphologizer", "attribute_ruler", "lemmatizer"]
+
+    ran.clear()
+    nlp("texto")  # al salir se restaura el pipeline completo
+    assert "parser" in ran and "ner" in ran
+
+
+def test_unknown_profile_and_fakes_are_tolerated():
+    assert resolve_profile("nope") == "full"
+    fake = object()
+    with use_profile(fake, "ner-only") as got:
+        assert got is fake
+
+
+class FakePre:
+    accepts_doc = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def preprocess(self, text, doc=None):
+        self.calls += 1
+        return {"tokens": text.split()}
+
+
+class FakePV:
+    def __init__(self):
+        self.subj_calls = 0
+
+    def analyze_sentiment(self, text):
+        return (1.0, 0.9)
+
+    def subjectivity_proxy(self, text):
+        self.subj_calls += 1
+        return 0.3
+
+
+def test_ner_only_profile_skips_preprocess_and_parser_stages():
+    nlp, ran = make_nlp()
+    pre, pv = FakePre(), FakePV()
+    orch = NLPOrchestrator(spacy_model=nlp, preprocessor=pre, posverdad_nlp=pv, profile="ner-only")
+
+    out = orch.analyze("Texto de prueba")
+    assert pre.calls == 0 and pv.subj_calls == 0
+    assert out["polarity"] == 1.0 and out["subjectivity"] is None
+    assert "parser" not in ran and "ner" in ran
+
+    ran.clear()
+    orch.analyze_many(["uno", "dos"])
+    assert pre.calls == 0 and "parser" not in ran
+
+
+def test_full_profile_runs_everything():
+    nlp, ran = make_nlp()
+    pre, pv = FakePre(), FakePV()
+    orch = NLPOrchestrator(spacy_model=nlp, preprocessor=pre, posverdad_nlp=pv)
+    out = orch.analyze("Texto de prueba")
+    assert orch.profile == "full"
+    assert pre.calls == 1 and out["subjectivity"] == 0.3
+    assert "parser" in ran
+
+
+def test_preprocessor_own_parse_uses_lemmas_profile(monkeypatch):
+    nlp, ran = make_nlp()
+    monkeypatch.setattr(spacy, "load", lambda name: nlp)
+    pre = Preprocessor(engine="spacy")
+    assert pre.profile == "lemmas"
+    pre.preprocess("Texto de prueba")
+    pre.preprocess_many(["otro texto"])
+    assert "parser" not in ran and "ner" not in ran and "lemmatizer" in ran
@@ -77,3 +77,11 @@ def test_as_nullable_float_basic(inp, expect_type, expect_value):
     assert (out is None and expect_type is type(None)) or isinstance(out, expect_type)
     if isinstance(out, float):
         assert out == pytest.approx(expect_value, rel=1e-6)
+
+
+def test_url_key_and_title_norm():
+    from scrapy_project.storage_helpers import title_norm, url_key
+    assert url_key("https://www.X.cl/a//b/?utm_source=x#frag") == "x.cl/a/b"
+    assert url_key("http://x.cl") == "x.cl"
+    assert url_key("  ") == ""
+    assert title_norm("  Hola   MUNDO\n") == "hola mundo"
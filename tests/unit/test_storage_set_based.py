@@ -0,0 +1,92 @@
+# tests/unit/test_storage_set_based.py
+from unittest.mock import MagicMock
+
+from scrapy_project import storage_helpers as sh
+from scrapy_project.id_cache import ID_CACHE
+
+
+class SetCursor:
+    """Simula Postgres: `existing` ya está en la tabla; el resto se inserta con ids nuevos."""
+
+    def __init__(self, existing=None):
+        self.existing = dict(existing or {})
+        self.executed = []
+        self._rows = []
+        self.next_id = 100
+
+    def execute(self, q, params=None):
+        q = " ".join(q.split())
+        self.executed.append((q, params))
+        self._rows = []
+        if q.startswith("INSERT INTO entities"):
+            for name, etype in zip(*params):
+                key = (name.lower(), etype)
+                if key not in self.existing:
+                    self.existing[key] = self.next_id
+                    self._rows.append((self.next_id, name.lower(), etype))
+                    self.next_id += 1
+        elif q.startswith("SELECT DISTINCT ON (lower(e.name)"):
+            for name, etype in zip(*params):
+                key = (name.lower(), etype)
+                self._rows.append((self.existing[key], key[0], key[1]))
+        elif q.startswith("INSERT INTO") and "unnest(%s::text[])" in q:
+            for name in params[0]:
+                if name not in self.existing:
+                    self.existing[name] = self.next_id
+                    self._rows.append((self.next_id, name))
+                    self.next_id += 1
+        elif q.startswith("SELECT id,"):
+            self._rows = [(self.existing[n], n) for n in params[0]]
+
+    def fetchall(self):
+        return self._rows
+
+
+def test_names_set_uses_three_statements():
+    cur = SetCursor(existing={"b": 7})
+    ids = sh._save_names_set(
+        cur, 1, ["a", "b", "c"], table="keywords", column="word", bridge="articles_keywords", fk="keyword_id"
+    )
+    assert ids == [100, 7, 101]
+    assert len(cur.executed) == 3
+    assert cur.executed[2] == (
+        "INSERT INTO articles_keywords (article_id, keyword_id) SELECT %s, unnest(%s::int[]) ON CONFLICT DO NOTHING;",
+        (1, [100, 7, 101]),
+    )
+
+
+def test_names_set_skips_lookup_when_all_new_and_uses_cache():
+    cur = SetCursor()
+    sh._save_names_set(cur, 1, ["x"], table="authors", column="name", bridge="articles_authors", fk="author_id")
+    assert len(cur.executed) == 2  # upsert + vínculo
+
+    ID_CACHE.put("authors", "y", 55)
+    cur2 = SetCursor()
+    ids = sh._save_names_set(cur2, 2, ["y"], table="authors", column="name", bridge="articles_authors", fk="author_id")
+    assert ids == [55]
+    assert len(cur2.executed) == 1 and "articles_authors" in cur2.executed[0][0]
+
+
+def test_entities_set_case_insensitive():
+    cur = SetCursor(existing={("boric", "PER"): 3})
+    ents = [("Boric", "PER"), ("BORIC", "PER"), ("Chile", "LOC")]
+    ids = sh._save_entities_set(cur, 9, ents)
+    assert ids == [3, 100]
+    assert len(cur.executed) == 3
+    inserted = cur.executed[0][1]
+    assert inserted == (["Boric", "Chile"], ["PER", "LOC"])
+
+
+def test_mocks_keep_per_name_path(monkeypatch):
+    cur = MagicMock()
+    cur.fetchone.return_value = (1,)
+    assert not sh._set_based(cur)
+    sh.save_keywords(cur, 1, ["a", "b"])
+    assert not any("unnest" in str(c) for c in cur.execute.call_args_list)
+
+
+def test_save_keywords_routes_real_cursor_to_set_path(monkeypatch):
+    monkeypatch.setattr(sh, "_set_based", lambda cur: True)
+    cur = SetCursor()
+    sh.save_keywords(cur, 1, "a, b; c")
+    assert [q.split(" (")[0] for q, _ in cur.executed] == ["INSERT INTO keywords", "INSERT INTO articles_keywords"]